@@ -1,10 +1,70 @@
 # Generic async LLM-agent - automatic provider selection
 
 # * Configured via LLM_PROVIDER in settings (default: openrouter)
-# * Supports: openrouter (default), openai
+# * Supports: openrouter (default), openai, anthropic, router
 # * Requires OPENROUTER_API_KEY or LLM_API_KEY in .env
 # * If provider not configured correctly, raises ProviderError.
+# * Provider clients are pooled process-wide (see registry.provider_registry)
+# * Completions are cached by content hash (see cache.llm_response_cache)
+# * Embeddings are cached by normalized text, optionally quantized on disk
+#   (see embedding_cache)
+# * Concurrent identical calls are collapsed (see singleflight)
+# * Upstream concurrency is bounded per provider/model (see limiter)
+# * LLM_PROVIDER=router spreads calls over LLM_ROUTING_BACKENDS with hedging
+#   (see providers.router)
+# * JSON responses are parsed while streaming; generation stops once the object
+#   closes (see strategies.streaming_json)
+# * Prompt splits a static system prefix (provider-cached) from per-call text
+# * Offline bulk jobs run through provider batch endpoints (see batch)
+# * One-to-many / many-to-many cosine top-k over normalized matrices (see similarity)
 
+from .batch import (
+    BatchCheckpoint,
+    BatchItem,
+    BatchRunner,
+    read_batch_items,
+    write_batch_items,
+)
+from .cache import CachingProvider, LLMResponseCache, llm_response_cache
+from .embedding_cache import EmbeddingCache, embedding_cache
+from .limiter import (
+    AdaptiveLimiter,
+    Priority,
+    limiter_registry,
+    llm_request_scope,
+    priority_for_user,
+)
 from .manager import AgentManager, EmbeddingManager
+from .prompt import Prompt, prompt_cache_stats
+from .registry import PoolLimits, ProviderRegistry, provider_registry
+from .similarity import SimilarityMatrix
+from .singleflight import SingleFlight, embedding_singleflight, llm_singleflight
 
-__all__ = ["AgentManager", "EmbeddingManager"]
+__all__ = [
+    "AdaptiveLimiter",
+    "AgentManager",
+    "BatchCheckpoint",
+    "BatchItem",
+    "BatchRunner",
+    "CachingProvider",
+    "EmbeddingCache",
+    "EmbeddingManager",
+    "LLMResponseCache",
+    "PoolLimits",
+    "Priority",
+    "Prompt",
+    "ProviderRegistry",
+    "SimilarityMatrix",
+    "SingleFlight",
+    "embedding_cache",
+    "embedding_singleflight",
+    "limiter_registry",
+    "llm_request_scope",
+    "llm_response_cache",
+    "llm_singleflight",
+    "priority_for_user",
+    "prompt_cache_stats",
+    "provider_registry",
+    "read_batch_items",
+    "write_batch_items",
+]
@@ -0,0 +1,352 @@
+"""
+Offline batch inference for bulk jobs such as re-scoring stored optimizations.
+
+Input is a JSONL file, one request per line:
+
+    {"custom_id": "<id>", "prompt": "<per-call text>", "system": "<static prefix>",
+     "params": {"max_tokens": 2000, "temperature": 0.3}}
+
+``system`` and ``params`` are optional. BatchRunner sends the requests through
+the provider's batch endpoint when it has one (BatchProvider: OpenAI Batch
+API). Other providers get a concurrent executor paced to
+LLM_BATCH_REQUESTS_PER_SECOND, behind the usual per-provider limiter.
+
+Successful outputs are handed to a sink in chunks of LLM_BATCH_WRITE_SIZE, so
+the caller can write them back in bulk. A chunk's ids go into the checkpoint
+only after the sink returns. Submitted provider batches are checkpointed too,
+so a restarted run collects them instead of paying for them again. Failed
+requests, including every request of a provider batch that failed as a
+whole, are not checkpointed and are retried by the next run.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable, Collection, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from app.agent.exceptions import BatchFailedError
+from app.agent.providers.base import BatchProvider, BatchResult, Provider
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    """One request of a batch run."""
+
+    custom_id: str
+    prompt: str
+    system: str | None = None
+    params: dict[str, Any] = field(default_factory=dict)
+
+    def generation_args(self) -> dict[str, Any]:
+        args = dict(self.params)
+        if self.system:
+            args["system"] = self.system
+        return args
+
+
+# Receives a chunk of (item, output) pairs and returns the custom_ids of outputs
+# it rejected (e.g. unparseable), which are retried by the next run. Must be safe
+# to call again with the same items: the checkpoint is written only once it returns.
+ResultSink = Callable[[list[tuple[BatchItem, str]]], Awaitable[Collection[str]]]
+
+
+def read_batch_items(path: str | Path) -> list[BatchItem]:
+    """
+    Load batch requests from a JSONL file.
+
+    Raises:
+        ValueError: On a malformed line or a duplicated custom_id
+    """
+    items: list[BatchItem] = []
+    seen: set[str] = set()
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                item = BatchItem(
+                    custom_id=str(record["custom_id"]),
+                    prompt=record["prompt"],
+                    system=record.get("system"),
+                    params=record.get("params") or {},
+                )
+            except (json.JSONDecodeError, KeyError, TypeError) as e:
+                raise ValueError(f"{path}:{line_number}: invalid batch request: {e}") from e
+            if item.custom_id in seen:
+                raise ValueError(f"{path}:{line_number}: duplicate custom_id '{item.custom_id}'")
+            seen.add(item.custom_id)
+            items.append(item)
+    return items
+
+
+def write_batch_items(path: str | Path, items: Iterable[BatchItem]) -> int:
+    """
+    Write batch requests as JSONL, in the format read_batch_items loads.
+
+    Returns:
+        Number of requests written
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for item in items:
+            record: dict[str, Any] = {"custom_id": item.custom_id, "prompt": item.prompt}
+            if item.system:
+                record["system"] = item.system
+            if item.params:
+                record["params"] = item.params
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+class BatchCheckpoint:
+    """
+    Append-only JSONL log of submitted provider batches and written results.
+
+    Every record is flushed and fsync'ed before the call returns. A torn last
+    line left by a crash is ignored on load.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.completed: set[str] = set()
+        self.open_batches: dict[str, list[str]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring torn checkpoint record in {self.path}")
+                    continue
+                match record.get("event"):
+                    case "submitted":
+                        self.open_batches[record["batch_id"]] = record["custom_ids"]
+                    case "collected":
+                        self.open_batches.pop(record["batch_id"], None)
+                    case "completed":
+                        self.completed.update(record["custom_ids"])
+
+    def _append(self, record: dict[str, Any]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record_submitted(self, batch_id: str, custom_ids: list[str]) -> None:
+        self._append({"event": "submitted", "batch_id": batch_id, "custom_ids": custom_ids})
+        self.open_batches[batch_id] = custom_ids
+
+    def record_collected(self, batch_id: str) -> None:
+        self._append({"event": "collected", "batch_id": batch_id})
+        self.open_batches.pop(batch_id, None)
+
+    def record_completed(self, custom_ids: list[str]) -> None:
+        self._append({"event": "completed", "custom_ids": custom_ids})
+        self.completed.update(custom_ids)
+
+
+class _Pacer:
+    """Spaces request starts evenly at a fixed rate, shared by all workers."""
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self._interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(self._next, now) + self._interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class BatchRunner:
+    """Run a list of BatchItems to completion, resuming from a checkpoint."""
+
+    def __init__(
+        self,
+        provider: Provider,
+        checkpoint: BatchCheckpoint,
+        sink: ResultSink,
+        max_batch_size: int = settings.LLM_BATCH_MAX_REQUESTS,
+        poll_interval: float = settings.LLM_BATCH_POLL_INTERVAL_SECONDS,
+        requests_per_second: float = settings.LLM_BATCH_REQUESTS_PER_SECOND,
+        concurrency: int = settings.LLM_BATCH_CONCURRENCY,
+        write_size: int = settings.LLM_BATCH_WRITE_SIZE,
+    ):
+        """
+        Args:
+            provider: A BatchProvider uses its batch endpoint; any other provider
+                is called directly by the paced concurrent executor
+            checkpoint: Progress log; completed items are skipped
+            sink: Bulk writer for successful outputs (see ResultSink)
+            max_batch_size: Requests per submitted provider batch
+            poll_interval: Seconds between provider batch status checks
+            requests_per_second: Request start rate of the concurrent executor
+            concurrency: Maximum in-flight requests of the concurrent executor
+            write_size: Outputs per sink call
+        """
+        self.provider = provider
+        self.checkpoint = checkpoint
+        self.sink = sink
+        self.max_batch_size = max_batch_size
+        self.poll_interval = poll_interval
+        self.requests_per_second = requests_per_second
+        self.concurrency = concurrency
+        self.write_size = write_size
+        self._buffer: list[tuple[BatchItem, str]] = []
+        self._write_lock = asyncio.Lock()
+        self._failed: dict[str, str] = {}
+        self._succeeded = 0
+
+    async def run(self, items: Iterable[BatchItem]) -> dict[str, Any]:
+        """
+        Process every item not already completed in the checkpoint.
+
+        Returns:
+            Summary with counts and the errors of failed items (retried on the next run)
+        """
+        items = list(items)
+        pending = [item for item in items if item.custom_id not in self.checkpoint.completed]
+        mode = "provider_batch" if isinstance(self.provider, BatchProvider) else "concurrent"
+        logger.info(
+            f"Batch run: {len(items)} items, {len(items) - len(pending)} already completed, "
+            f"mode={mode}"
+        )
+
+        if isinstance(self.provider, BatchProvider):
+            await self._run_provider_batches(self.provider, pending)
+        else:
+            await self._run_concurrent(pending)
+        await self._flush()
+
+        return {
+            "mode": mode,
+            "total": len(items),
+            "skipped": len(items) - len(pending),
+            "succeeded": self._succeeded,
+            "failed": len(self._failed),
+            "errors": dict(self._failed),
+        }
+
+    async def _deliver(self, item: BatchItem, output: str) -> None:
+        async with self._write_lock:
+            self._buffer.append((item, output))
+            if len(self._buffer) >= self.write_size:
+                await self._flush_locked()
+
+    async def _flush(self) -> None:
+        async with self._write_lock:
+            await self._flush_locked()
+
+    async def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        chunk, self._buffer = self._buffer, []
+        rejected = set(await self.sink(chunk))
+        for custom_id in rejected:
+            self._fail(custom_id, "output rejected by sink")
+        written = [item.custom_id for item, _ in chunk if item.custom_id not in rejected]
+        if written:
+            self.checkpoint.record_completed(written)
+        self._succeeded += len(written)
+
+    def _fail(self, custom_id: str, error: str) -> None:
+        logger.warning(f"Batch item {custom_id} failed: {error}")
+        self._failed[custom_id] = error
+
+    async def _run_concurrent(self, pending: list[BatchItem]) -> None:
+        pacer = _Pacer(self.requests_per_second)
+        queue = iter(pending)
+
+        async def worker() -> None:
+            # Items are pulled lazily so tens of thousands don't become tasks at once
+            for item in queue:
+                await pacer.wait()
+                try:
+                    output = await self.provider(item.prompt, **item.generation_args())
+                except Exception as e:
+                    self._fail(item.custom_id, str(e))
+                    continue
+                if not output or not output.strip():
+                    self._fail(item.custom_id, "empty response")
+                    continue
+                await self._deliver(item, output)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, self.concurrency))))
+
+    async def _run_provider_batches(
+        self, provider: BatchProvider, pending: list[BatchItem]
+    ) -> None:
+        by_id = {item.custom_id: item for item in pending}
+        in_flight = {cid for ids in self.checkpoint.open_batches.values() for cid in ids}
+
+        to_submit = [item for item in pending if item.custom_id not in in_flight]
+        for start in range(0, len(to_submit), self.max_batch_size):
+            chunk = to_submit[start : start + self.max_batch_size]
+            batch_id = await provider.submit_batch(
+                [(item.custom_id, item.prompt, item.generation_args()) for item in chunk]
+            )
+            self.checkpoint.record_submitted(batch_id, [item.custom_id for item in chunk])
+            logger.info(f"Submitted batch {batch_id} with {len(chunk)} requests")
+
+        # Includes batches left open by an interrupted run
+        for batch_id, custom_ids in list(self.checkpoint.open_batches.items()):
+            await self._collect(provider, batch_id, custom_ids, by_id)
+
+    async def _collect(
+        self,
+        provider: BatchProvider,
+        batch_id: str,
+        custom_ids: list[str],
+        by_id: dict[str, BatchItem],
+    ) -> None:
+        try:
+            while not await provider.batch_done(batch_id):
+                await asyncio.sleep(self.poll_interval)
+        except BatchFailedError as e:
+            # Nothing in it was processed: close it so the next run resubmits its items
+            for custom_id in custom_ids:
+                if custom_id in by_id:
+                    self._fail(custom_id, str(e))
+            self.checkpoint.record_collected(batch_id)
+            logger.warning(f"Batch {batch_id} failed: {e}")
+            return
+
+        missing = {cid for cid in custom_ids if cid in by_id}
+        result: BatchResult
+        async for result in provider.batch_results(batch_id):
+            item = by_id.get(result.custom_id)
+            if item is None:
+                # Completed by an earlier run, or dropped from the input file
+                continue
+            missing.discard(result.custom_id)
+            if result.output is None:
+                self._fail(result.custom_id, result.error or "no output")
+            else:
+                await self._deliver(item, result.output)
+
+        for custom_id in missing:
+            self._fail(custom_id, f"missing from results of batch {batch_id}")
+        # Outputs must be written before the batch is marked collected
+        await self._flush()
+        self.checkpoint.record_collected(batch_id)
+        logger.info(f"Collected batch {batch_id}")
@@ -0,0 +1,439 @@
+"""
+Content-addressed cache for LLM responses.
+
+Keys are derived from (model, provider, prompt hash, temperature, max_tokens,
+prompt-template version), so re-running an optimization with the same resume
+and job returns the stored completion instead of paying for a new one.
+
+Two tiers:
+- an in-memory LRU bounded by entry count and total bytes
+- an optional SQLite file (LLM_CACHE_DB_PATH) shared across workers/restarts
+
+Sampled generations (temperature > 0) bypass the cache unless the caller opts
+in with ``cache_sampled=True`` or LLM_CACHE_ALLOW_SAMPLED is set. Prompts that
+contain personal data (resume text) pass ``cache_persist=False``: their
+completions stay in the memory tier and never reach the SQLite file, which LGPD
+deletion requests can't purge by user.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any
+
+from app.agent.providers.base import STREAM_COMPLETE, Provider
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Generation args consumed by the cache layer and never forwarded to providers
+CACHE_CONTROL_ARGS = ("prompt_version", "cache_sampled", "use_cache", "cache_persist")
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for the response cache."""
+
+    hits: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+    stores: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class _SQLiteTier:
+    """On-disk cache tier. All methods are blocking; call them via a thread."""
+
+    def __init__(self, path: str, max_entries: int):
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_response_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access "
+            "ON llm_response_cache(last_access)"
+        )
+
+    def get(self, key: str, ttl: float) -> tuple[str | None, bool]:
+        """Return (value, expired)."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, False
+            value, created_at = row
+            if ttl > 0 and now - created_at > ttl:
+                self._conn.execute("DELETE FROM llm_response_cache WHERE key = ?", (key,))
+                return None, True
+            self._conn.execute(
+                "UPDATE llm_response_cache SET last_access = ? WHERE key = ?", (now, key)
+            )
+            return value, False
+
+    def set(self, key: str, value: str) -> int:
+        """Store a value and return the number of entries evicted."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_response_cache (key, value, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_response_cache").fetchone()
+            overflow = count - self._max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM llm_response_cache WHERE key IN ("
+                    "SELECT key FROM llm_response_cache ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,),
+                )
+                return overflow
+            return 0
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_response_cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_response_cache")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LLMResponseCache:
+    """Two-tier (memory LRU + optional SQLite) cache of raw LLM completions."""
+
+    def __init__(
+        self,
+        max_entries: int = settings.LLM_CACHE_MAX_ENTRIES,
+        max_bytes: int = settings.LLM_CACHE_MAX_BYTES,
+        ttl_seconds: float = settings.LLM_CACHE_TTL_SECONDS,
+        db_path: str = settings.LLM_CACHE_DB_PATH,
+        db_max_entries: int = settings.LLM_CACHE_DB_MAX_ENTRIES,
+        allow_sampled: bool = settings.LLM_CACHE_ALLOW_SAMPLED,
+        enabled: bool = settings.LLM_CACHE_ENABLED,
+    ):
+        self.enabled = enabled
+        self.allow_sampled = allow_sampled
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl_seconds
+        # key -> (value, created_at, UTF-8 size in bytes)
+        self._memory: OrderedDict[str, tuple[str, float, int]] = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: _SQLiteTier | None = None
+        self.stats = CacheStats()
+
+        if enabled and db_path:
+            try:
+                self._disk = _SQLiteTier(db_path, db_max_entries)
+                logger.info(f"LLM response cache disk tier enabled at {db_path}")
+            except Exception as e:
+                logger.warning(f"LLM response cache disk tier unavailable ({db_path}): {e}")
+
+    @staticmethod
+    def make_key(
+        *,
+        model: str,
+        provider: str,
+        prompt: str,
+        temperature: float | None,
+        max_tokens: int | None,
+        prompt_version: str | None,
+        system: str | None = None,
+    ) -> str:
+        """Build a content-addressed cache key (``system`` is the static prompt prefix)."""
+        full_prompt = f"{system}\x00{prompt}" if system else prompt
+        prompt_hash = hashlib.sha256(full_prompt.encode("utf-8")).hexdigest()
+        material = json.dumps(
+            [provider, model, prompt_hash, temperature, max_tokens, prompt_version or ""],
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def is_cacheable(self, temperature: float | None, cache_sampled: bool | None = None) -> bool:
+        """Deterministic calls are cacheable; sampled ones only when opted in."""
+        if not self.enabled:
+            return False
+        if temperature is None or temperature <= 0:
+            return True
+        return bool(cache_sampled) if cache_sampled is not None else self.allow_sampled
+
+    def _memory_get(self, key: str) -> str | None:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        value, created_at, _ = entry
+        if self._ttl > 0 and time.time() - created_at > self._ttl:
+            self._memory_pop(key)
+            self.stats.expirations += 1
+            return None
+        self._memory.move_to_end(key)
+        return value
+
+    def _memory_pop(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[2]
+
+    def _memory_set(self, key: str, value: str, created_at: float | None = None) -> None:
+        # LLM_CACHE_MAX_BYTES is a byte budget: accented text is 2 bytes per character
+        size = len(value.encode("utf-8"))
+        if size > self._max_bytes:
+            return
+        self._memory_pop(key)
+        self._memory[key] = (value, created_at or time.time(), size)
+        self._memory_bytes += size
+        while self._memory and (
+            len(self._memory) > self._max_entries or self._memory_bytes > self._max_bytes
+        ):
+            _, (_, _, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self.stats.evictions += 1
+
+    async def get(self, key: str) -> str | None:
+        """Look up a key in memory, then on disk. Counts hits and misses."""
+        value = self._memory_get(key)
+        if value is not None:
+            self.stats.hits += 1
+            self.stats.memory_hits += 1
+            return value
+
+        if self._disk is not None:
+            try:
+                value, expired = await asyncio.to_thread(self._disk.get, key, self._ttl)
+            except Exception as e:
+                logger.warning(f"LLM cache disk read failed: {e}")
+                value, expired = None, False
+            if expired:
+                self.stats.expirations += 1
+            if value is not None:
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+                self._memory_set(key, value)
+                return value
+
+        self.stats.misses += 1
+        return None
+
+    async def set(self, key: str, value: str, persist: bool = True) -> None:
+        """Store a value in memory and, unless ``persist`` is False, on disk."""
+        self._memory_set(key, value)
+        self.stats.stores += 1
+        if self._disk is not None and persist:
+            try:
+                evicted = await asyncio.to_thread(self._disk.set, key, value)
+                self.stats.evictions += evicted
+            except Exception as e:
+                logger.warning(f"LLM cache disk write failed: {e}")
+
+    async def delete(self, key: str) -> None:
+        """Drop a key from both tiers, e.g. a completion the caller could not use."""
+        self._memory_pop(key)
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk.delete, key)
+            except Exception as e:
+                logger.warning(f"LLM cache disk delete failed: {e}")
+
+    async def get_or_generate(
+        self,
+        *,
+        model: str,
+        provider: str,
+        prompt: str,
+        temperature: float | None,
+        max_tokens: int | None,
+        prompt_version: str | None,
+        generate: Callable[[], Awaitable[str]],
+        cache_sampled: bool | None = None,
+        system: str | None = None,
+        validate: Callable[[str], bool] | None = None,
+        persist: bool = True,
+    ) -> str:
+        """
+        Return the cached completion for this request or call ``generate`` and store it.
+
+        Args:
+            model: Model name
+            provider: Provider name
+            prompt: Full prompt text
+            temperature: Sampling temperature used for the call
+            max_tokens: Completion token limit used for the call
+            prompt_version: Version tag of the prompt template
+            generate: Coroutine factory performing the real provider call
+            cache_sampled: Opt in (or out) of caching when temperature > 0
+            system: Static system prefix sent with the prompt, if any
+            validate: Returns False for a completion the caller can't use (truncated,
+                unparseable); such completions are neither stored nor served
+            persist: False keeps the completion out of the on-disk tier
+
+        Returns:
+            Completion text
+        """
+        if not self.is_cacheable(temperature, cache_sampled):
+            self.stats.bypassed += 1
+            return await generate()
+
+        key = self.make_key(
+            model=model,
+            provider=provider,
+            prompt=prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            prompt_version=prompt_version,
+            system=system,
+        )
+        cached = await self.get(key)
+        if cached is not None:
+            if validate is None or validate(cached):
+                return cached
+            await self.delete(key)
+
+        value = await generate()
+        if value and (validate is None or validate(value)):
+            await self.set(key, value, persist=persist)
+        return value
+
+    async def clear(self) -> None:
+        """Drop every cached entry (both tiers)."""
+        self._memory.clear()
+        self._memory_bytes = 0
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.clear)
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_enabled": self._disk is not None,
+            **self.stats.to_dict(),
+        }
+
+
+class CachingProvider(Provider):
+    """Provider wrapper that serves repeated prompts from an LLMResponseCache."""
+
+    def __init__(
+        self,
+        provider: Provider,
+        provider_name: str,
+        model: str,
+        cache: "LLMResponseCache | None" = None,
+    ):
+        self._provider = provider
+        self._provider_name = provider_name
+        self._model = model
+        self._cache = cache or llm_response_cache
+
+    async def __call__(self, prompt: str, **generation_args: Any) -> str:
+        prompt_version = generation_args.pop("prompt_version", None)
+        cache_sampled = generation_args.pop("cache_sampled", None)
+        use_cache = generation_args.pop("use_cache", True)
+        persist = generation_args.pop("cache_persist", True)
+
+        async def generate() -> str:
+            return await self._provider(prompt, **generation_args)
+
+        if not use_cache:
+            self._cache.stats.bypassed += 1
+            return await generate()
+
+        return await self._cache.get_or_generate(
+            model=self._model,
+            provider=self._provider_name,
+            prompt=prompt,
+            temperature=generation_args.get("temperature", 0),
+            max_tokens=generation_args.get("max_tokens"),
+            prompt_version=prompt_version,
+            generate=generate,
+            cache_sampled=cache_sampled,
+            system=generation_args.get("system"),
+            persist=persist,
+        )
+
+    async def stream(self, prompt: str, **generation_args: Any) -> AsyncIterator[str]:
+        """Replay a cached completion as one delta, or stream and store the full text."""
+        prompt_version = generation_args.pop("prompt_version", None)
+        cache_sampled = generation_args.pop("cache_sampled", None)
+        use_cache = generation_args.pop("use_cache", True)
+        persist = generation_args.pop("cache_persist", True)
+        temperature = generation_args.get("temperature", 0)
+
+        if not use_cache or not self._cache.is_cacheable(temperature, cache_sampled):
+            self._cache.stats.bypassed += 1
+            async with aclosing(self._provider.stream(prompt, **generation_args)) as inner:
+                async for delta in inner:
+                    yield delta
+            return
+
+        key = self._cache.make_key(
+            model=self._model,
+            provider=self._provider_name,
+            prompt=prompt,
+            temperature=temperature,
+            max_tokens=generation_args.get("max_tokens"),
+            prompt_version=prompt_version,
+            system=generation_args.get("system"),
+        )
+        cached = await self._cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        parts: list[str] = []
+        async with aclosing(self._provider.stream(prompt, **generation_args)) as inner:
+            async for delta in inner:
+                parts.append(delta)
+                if (yield delta) is STREAM_COMPLETE:
+                    # Consumer has the full response (see finish_stream)
+                    break
+        # Only completed streams are stored; an abandoned stream never reaches here.
+        # A completion the strategy then rejects is evicted again (AgentManager.run).
+        if parts:
+            await self._cache.set(key, "".join(parts), persist=persist)
+
+
+llm_response_cache = LLMResponseCache()
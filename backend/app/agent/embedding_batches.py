@@ -0,0 +1,85 @@
+"""
+Token-budget batching for embedding requests.
+
+Embedding endpoints accept many inputs per request, but cap both the number of
+inputs and the total tokens. embed_in_batches packs texts greedily, in input
+order, into batches under EMBEDDING_BATCH_MAX_TOKENS / EMBEDDING_BATCH_MAX_ITEMS.
+It sends up to EMBEDDING_BATCH_CONCURRENCY batches at once and returns the
+vectors in input order.
+
+Token counts are estimated (about 4 characters per token for Portuguese and
+English text), so the budget should keep some headroom below the provider's cap.
+"""
+
+import asyncio
+import math
+from collections.abc import Awaitable, Callable
+
+from app.agent.exceptions import ProviderError
+from app.core.config import settings
+
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / _CHARS_PER_TOKEN))
+
+
+def pack_by_token_budget(texts: list[str], max_tokens: int, max_items: int) -> list[list[int]]:
+    """
+    Group text indices into consecutive batches within both limits.
+
+    A single text over ``max_tokens`` gets a batch of its own; the provider
+    decides whether to truncate or reject it.
+    """
+    batches: list[list[int]] = []
+    current: list[int] = []
+    current_tokens = 0
+    for index, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def embed_in_batches(
+    texts: list[str],
+    embed_batch: Callable[[list[str]], Awaitable[list[list[float]]]],
+    max_tokens: int = settings.EMBEDDING_BATCH_MAX_TOKENS,
+    max_items: int = settings.EMBEDDING_BATCH_MAX_ITEMS,
+    concurrency: int = settings.EMBEDDING_BATCH_CONCURRENCY,
+) -> list[list[float]]:
+    """
+    Embed ``texts`` with ``embed_batch`` one packed batch per call.
+
+    Args:
+        texts: Inputs, in the order the vectors should be returned
+        embed_batch: Embeds one batch, returning vectors in batch order
+        max_tokens: Estimated token budget per batch
+        max_items: Maximum inputs per batch
+        concurrency: Maximum batches in flight
+
+    Raises:
+        ProviderError: If a batch returns the wrong number of vectors
+    """
+    results: list[list[float] | None] = [None] * len(texts)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(indices: list[int]) -> None:
+        async with semaphore:
+            vectors = await embed_batch([texts[i] for i in indices])
+        if len(vectors) != len(indices):
+            raise ProviderError(
+                f"Embedding batch returned {len(vectors)} vectors for {len(indices)} inputs"
+            )
+        for index, vector in zip(indices, vectors, strict=True):
+            results[index] = vector
+
+    batches = pack_by_token_budget(texts, max_tokens, max_items)
+    await asyncio.gather(*(run(batch) for batch in batches))
+    return results  # type: ignore[return-value]
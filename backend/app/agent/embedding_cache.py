@@ -0,0 +1,385 @@
+"""
+Content-addressed cache for embeddings.
+
+Keys are derived from (provider:model, hash of the whitespace/Unicode-normalized
+text), so the job description embedded for one resume is reused for every other
+resume scored against that job.
+
+Two tiers:
+- an in-memory LRU bounded by entry count
+- an optional on-disk store (EMBEDDING_CACHE_DIR): fixed-size numpy memmap
+  shards per vector dimension plus a SQLite index of key -> slot, evicted LRU
+
+Vectors are stored as float32, float16 or int8 (EMBEDDING_CACHE_DTYPE), in both
+tiers. float16 halves the footprint and int8 quarters it, using symmetric
+per-vector scaling, at well under 1% cosine-similarity error for typical
+embedding models. Cache hits therefore return the dequantized vector. The most
+recently used disk entries are loaded into memory at boot (warm_start).
+"""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+
+@dataclass
+class EmbeddingCacheStats:
+    """Hit/miss counters for the embedding cache."""
+
+    hits: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    warm_loaded: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "warm_loaded": self.warm_loaded,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def quantize(vector: list[float], dtype: str) -> tuple[np.ndarray, float]:
+    """Convert an embedding to its stored form; returns (values, scale)."""
+    values = np.asarray(vector, dtype=np.float32)
+    if dtype == "int8":
+        peak = float(np.max(np.abs(values))) if values.size else 0.0
+        scale = peak / 127.0 if peak else 1.0
+        return np.round(values / scale).astype(np.int8), scale
+    return values.astype(_DTYPES[dtype]), 1.0
+
+
+def dequantize(values: np.ndarray, scale: float) -> list[float]:
+    restored = values.astype(np.float32)
+    if values.dtype == np.int8:
+        restored *= scale
+    return restored.tolist()
+
+
+class _MemmapTier:
+    """
+    On-disk tier: memmap shards of ``shard_rows`` vectors per dimension, indexed
+    in SQLite. All methods are blocking; call them via a thread.
+    """
+
+    def __init__(self, directory: str, max_entries: int, dtype: str, shard_rows: int):
+        # One subdirectory per storage dtype, so changing the setting starts clean
+        self._dir = Path(directory) / dtype
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._dtype = _DTYPES[dtype]
+        self._max_entries = max_entries
+        self._shard_rows = shard_rows
+        self._shards: dict[tuple[int, int], np.memmap] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self._dir / "index.sqlite", check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS embedding_index (
+                key TEXT PRIMARY KEY,
+                dim INTEGER NOT NULL,
+                slot INTEGER NOT NULL,
+                scale REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_embedding_last_access
+                ON embedding_index(last_access);
+            CREATE TABLE IF NOT EXISTS embedding_free_slots (
+                dim INTEGER NOT NULL,
+                slot INTEGER NOT NULL,
+                PRIMARY KEY (dim, slot)
+            );
+            CREATE TABLE IF NOT EXISTS embedding_dims (
+                dim INTEGER PRIMARY KEY,
+                next_slot INTEGER NOT NULL
+            );
+            """
+        )
+
+    def _shard(self, dim: int, number: int) -> np.memmap:
+        shard = self._shards.get((dim, number))
+        if shard is None:
+            path = self._dir / f"{dim}d-{number:05d}.mmap"
+            shard = np.memmap(
+                path,
+                dtype=self._dtype,
+                mode="r+" if path.exists() else "w+",
+                shape=(self._shard_rows, dim),
+            )
+            self._shards[(dim, number)] = shard
+        return shard
+
+    def _row(self, dim: int, slot: int) -> np.ndarray:
+        return self._shard(dim, slot // self._shard_rows)[slot % self._shard_rows]
+
+    def get(self, key: str) -> tuple[np.ndarray, float] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT dim, slot, scale FROM embedding_index WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            dim, slot, scale = row
+            self._conn.execute(
+                "UPDATE embedding_index SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            return np.array(self._row(dim, slot)), scale
+
+    def _allocate(self, dim: int) -> int:
+        free = self._conn.execute(
+            "SELECT slot FROM embedding_free_slots WHERE dim = ? LIMIT 1", (dim,)
+        ).fetchone()
+        if free is not None:
+            self._conn.execute(
+                "DELETE FROM embedding_free_slots WHERE dim = ? AND slot = ?", (dim, free[0])
+            )
+            return free[0]
+        row = self._conn.execute(
+            "SELECT next_slot FROM embedding_dims WHERE dim = ?", (dim,)
+        ).fetchone()
+        slot = row[0] if row else 0
+        self._conn.execute(
+            "INSERT OR REPLACE INTO embedding_dims (dim, next_slot) VALUES (?, ?)", (dim, slot + 1)
+        )
+        return slot
+
+    def set(self, key: str, values: np.ndarray, scale: float) -> int:
+        """Store a vector and return the number of entries evicted."""
+        dim = int(values.shape[0])
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = self._conn.execute(
+                    "SELECT dim, slot FROM embedding_index WHERE key = ?", (key,)
+                ).fetchone()
+                if existing is not None and existing[0] == dim:
+                    slot = existing[1]
+                else:
+                    if existing is not None:
+                        self._release(key, *existing)
+                    slot = self._allocate(dim)
+                # The vector is flushed before the index row can point at it
+                shard_row = self._row(dim, slot)
+                shard_row[:] = values
+                self._shard(dim, slot // self._shard_rows).flush()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embedding_index (key, dim, slot, scale, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, dim, slot, scale, time.time()),
+                )
+                evicted = self._evict()
+                self._conn.execute("COMMIT")
+                return evicted
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _release(self, key: str, dim: int, slot: int) -> None:
+        self._conn.execute("DELETE FROM embedding_index WHERE key = ?", (key,))
+        self._conn.execute(
+            "INSERT OR IGNORE INTO embedding_free_slots (dim, slot) VALUES (?, ?)", (dim, slot)
+        )
+
+    def _evict(self) -> int:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embedding_index").fetchone()
+        overflow = count - self._max_entries
+        if overflow <= 0:
+            return 0
+        victims = self._conn.execute(
+            "SELECT key, dim, slot FROM embedding_index ORDER BY last_access LIMIT ?", (overflow,)
+        ).fetchall()
+        for key, dim, slot in victims:
+            self._release(key, dim, slot)
+        return len(victims)
+
+    def recent(self, limit: int) -> list[tuple[str, np.ndarray, float]]:
+        """The ``limit`` most recently used entries, most recent first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, dim, slot, scale FROM embedding_index "
+                "ORDER BY last_access DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+            return [(key, np.array(self._row(dim, slot)), scale) for key, dim, slot, scale in rows]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.executescript(
+                "DELETE FROM embedding_index; DELETE FROM embedding_free_slots; "
+                "DELETE FROM embedding_dims;"
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            for shard in self._shards.values():
+                shard.flush()
+            self._shards.clear()
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU + optional memmap store) cache of embedding vectors."""
+
+    def __init__(
+        self,
+        max_entries: int = settings.EMBEDDING_CACHE_MAX_ENTRIES,
+        directory: str = settings.EMBEDDING_CACHE_DIR,
+        disk_max_entries: int = settings.EMBEDDING_CACHE_DISK_MAX_ENTRIES,
+        dtype: str = settings.EMBEDDING_CACHE_DTYPE,
+        shard_rows: int = settings.EMBEDDING_CACHE_SHARD_ROWS,
+        enabled: bool = settings.EMBEDDING_CACHE_ENABLED,
+    ):
+        if dtype not in _DTYPES:
+            raise ValueError(f"EMBEDDING_CACHE_DTYPE must be one of {sorted(_DTYPES)}")
+        self.enabled = enabled
+        self.dtype = dtype
+        self._max_entries = max_entries
+        self._memory: OrderedDict[str, tuple[np.ndarray, float]] = OrderedDict()
+        self._disk: _MemmapTier | None = None
+        self.stats = EmbeddingCacheStats()
+
+        if enabled and directory:
+            try:
+                self._disk = _MemmapTier(directory, disk_max_entries, dtype, shard_rows)
+                logger.info(f"Embedding cache disk tier enabled at {directory} ({dtype})")
+            except Exception as e:
+                logger.warning(f"Embedding cache disk tier unavailable ({directory}): {e}")
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """Key for ``text`` embedded by ``model`` ("provider:model")."""
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        return hashlib.sha256(f"{model}\x00{normalized}".encode()).hexdigest()
+
+    def _memory_set(self, key: str, values: np.ndarray, scale: float) -> None:
+        self._memory[key] = (values, scale)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def get(self, key: str) -> list[float] | None:
+        """Look up a key in memory, then on disk. Counts hits and misses."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.stats.hits += 1
+            self.stats.memory_hits += 1
+            return dequantize(*entry)
+
+        if self._disk is not None:
+            try:
+                entry = await asyncio.to_thread(self._disk.get, key)
+            except Exception as e:
+                logger.warning(f"Embedding cache disk read failed: {e}")
+                entry = None
+            if entry is not None:
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+                self._memory_set(key, *entry)
+                return dequantize(*entry)
+
+        self.stats.misses += 1
+        return None
+
+    async def set(self, key: str, embedding: list[float]) -> None:
+        """Store an embedding in both tiers."""
+        values, scale = quantize(embedding, self.dtype)
+        self._memory_set(key, values, scale)
+        self.stats.stores += 1
+        if self._disk is not None:
+            try:
+                self.stats.evictions += await asyncio.to_thread(self._disk.set, key, values, scale)
+            except Exception as e:
+                logger.warning(f"Embedding cache disk write failed: {e}")
+
+    async def get_or_embed(
+        self, model: str, text: str, embed: Callable[[], Awaitable[list[float]]]
+    ) -> list[float]:
+        """
+        Return the cached embedding of ``text`` or call ``embed`` and store it.
+
+        Args:
+            model: "provider:model" namespace of the embedding
+            text: Text being embedded
+            embed: Coroutine factory performing the real provider call
+        """
+        if not self.enabled:
+            return await embed()
+        key = self.make_key(model, text)
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+        embedding = await embed()
+        if embedding:
+            await self.set(key, embedding)
+        return embedding
+
+    async def warm_start(self, limit: int = settings.EMBEDDING_CACHE_WARM_START) -> int:
+        """Load the most recently used disk entries into memory; returns how many."""
+        if self._disk is None or limit <= 0:
+            return 0
+        try:
+            entries = await asyncio.to_thread(self._disk.recent, min(limit, self._max_entries))
+        except Exception as e:
+            logger.warning(f"Embedding cache warm start failed: {e}")
+            return 0
+        # Oldest first, so the most recent end up at the LRU's hot end
+        for key, values, scale in reversed(entries):
+            self._memory_set(key, values, scale)
+        self.stats.warm_loaded += len(entries)
+        logger.info(f"Embedding cache warm start loaded {len(entries)} vectors")
+        return len(entries)
+
+    async def clear(self) -> None:
+        """Drop every cached entry (both tiers)."""
+        self._memory.clear()
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.clear)
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "dtype": self.dtype,
+            "memory_entries": len(self._memory),
+            "memory_bytes": sum(values.nbytes for values, _ in self._memory.values()),
+            "disk_enabled": self._disk is not None,
+            **self.stats.to_dict(),
+        }
+
+
+embedding_cache = EmbeddingCache()
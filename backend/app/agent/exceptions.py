@@ -4,3 +4,11 @@ class ProviderError(RuntimeError):
 
 class StrategyError(RuntimeError):
     """Raised when a Strategy cannot parse/return expected output"""
+
+
+class BatchFailedError(ProviderError):
+    """Raised when a provider batch failed as a whole and produced no results"""
+
+
+class ConcurrencyLimitError(ProviderError):
+    """Raised when a provider bulkhead rejects a call (queue full or deadline exceeded)"""
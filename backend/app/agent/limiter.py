@@ -0,0 +1,381 @@
+"""
+Adaptive concurrency limiting (bulkhead) per LLM provider/model.
+
+Each (provider, model) gets an AdaptiveLimiter that bounds the number of
+concurrent completions. The limit follows AIMD: it grows additively while
+calls succeed within the latency target and shrinks multiplicatively on 429s,
+timeouts or slow calls. "Slow" is judged on time to first token, not total
+wall time, so long generations don't shrink the limit: streams measure it
+directly, and non-streaming calls subtract an estimated decode time
+(LLM_LIMITER_SECONDS_PER_OUTPUT_TOKEN per output token) from their latency.
+
+Callers over the limit wait in a bounded queue with two priority lanes (paid
+and free users); a caller is rejected up front when the queue is full or when
+its deadline cannot be met.
+
+Priority and deadline come from the request context (see llm_request_scope),
+so services calling AgentManager don't have to pass them around.
+"""
+
+import asyncio
+import contextvars
+import enum
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from contextlib import aclosing, contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+from app.agent.embedding_batches import estimate_tokens
+from app.agent.exceptions import ConcurrencyLimitError
+from app.agent.providers.base import Provider
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(enum.IntEnum):
+    """Priority lanes. Lower value is served first."""
+
+    PAID = 0
+    FREE = 1
+
+
+_request_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "llm_request_priority", default=Priority.FREE
+)
+_request_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "llm_request_deadline", default=None
+)
+
+
+def priority_for_user(user: dict[str, Any] | None) -> Priority:
+    """
+    Map UsageLimitService credit data (is_pro / subscription_tier) to a lane.
+
+    Pro subscribers and any paid tier use the paid lane; everyone else is free.
+    """
+    if not user:
+        return Priority.FREE
+    if user.get("is_pro"):
+        return Priority.PAID
+    tier = str(user.get("subscription_tier") or "free").lower()
+    return Priority.FREE if tier == "free" else Priority.PAID
+
+
+@contextmanager
+def llm_request_scope(
+    priority: Priority = Priority.FREE, timeout: float | None = None
+) -> Iterator[None]:
+    """
+    Set the priority lane and queueing deadline for LLM calls made in this block.
+
+    Args:
+        priority: Lane used when the provider is saturated
+        timeout: Seconds from now after which queued calls are rejected
+    """
+    priority_token = _request_priority.set(priority)
+    deadline_token = _request_deadline.set(
+        time.monotonic() + timeout if timeout is not None else None
+    )
+    try:
+        yield
+    finally:
+        _request_deadline.reset(deadline_token)
+        _request_priority.reset(priority_token)
+
+
+@dataclass
+class _Waiter:
+    future: asyncio.Future
+    priority: Priority
+    enqueued_at: float
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit with a bounded, two-lane wait queue."""
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = settings.LLM_LIMITER_INITIAL_LIMIT,
+        min_limit: int = settings.LLM_LIMITER_MIN_LIMIT,
+        max_limit: int = settings.LLM_LIMITER_MAX_LIMIT,
+        latency_target: float = settings.LLM_LIMITER_LATENCY_TARGET_SECONDS,
+        backoff_factor: float = settings.LLM_LIMITER_BACKOFF_FACTOR,
+        max_queue: int = settings.LLM_LIMITER_MAX_QUEUE,
+        max_queue_wait: float = settings.LLM_LIMITER_MAX_QUEUE_WAIT_SECONDS,
+        paid_weight: int = settings.LLM_LIMITER_PAID_WEIGHT,
+    ):
+        self.name = name
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._latency_target = latency_target
+        self._backoff_factor = backoff_factor
+        self._max_queue = max_queue
+        self._max_queue_wait = max_queue_wait
+        self._paid_weight = max(paid_weight, 1)
+        self._paid_streak = 0
+        self._in_flight = 0
+        self._queues: dict[Priority, deque[_Waiter]] = {p: deque() for p in Priority}
+        self._ewma_latency: float | None = None
+        self._last_decrease = 0.0
+        self._counters = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_queue_full": 0,
+            "rejected_deadline": 0,
+            "rate_limited": 0,
+            "timeouts": 0,
+            "slow_calls": 0,
+        }
+
+    @property
+    def limit(self) -> int:
+        return max(int(self._limit), self._min_limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def queue_depth(self, priority: Priority | None = None) -> int:
+        if priority is not None:
+            return len(self._queues[priority])
+        return sum(len(q) for q in self._queues.values())
+
+    def _estimated_wait(self, ahead: int) -> float:
+        """Rough wait estimate: callers ahead / limit * mean call latency."""
+        if self._ewma_latency is None:
+            return 0.0
+        return (ahead + 1) / max(self.limit, 1) * self._ewma_latency
+
+    async def acquire(self, priority: Priority, deadline: float | None = None) -> None:
+        """
+        Wait for a slot or raise ConcurrencyLimitError.
+
+        Args:
+            priority: Lane to queue in when saturated
+            deadline: time.monotonic() value after which to give up
+        """
+        now = time.monotonic()
+        max_wait_deadline = now + self._max_queue_wait
+        deadline = min(deadline, max_wait_deadline) if deadline else max_wait_deadline
+
+        # Fast path: capacity available and nobody of equal/higher priority waiting
+        ahead = sum(len(self._queues[p]) for p in Priority if p <= priority)
+        if self._in_flight < self.limit and ahead == 0:
+            self._in_flight += 1
+            self._counters["admitted"] += 1
+            return
+
+        if self.queue_depth() >= self._max_queue:
+            self._counters["rejected_queue_full"] += 1
+            raise ConcurrencyLimitError(
+                f"{self.name}: LLM queue full ({self._max_queue} waiting), try again later"
+            )
+
+        if now + self._estimated_wait(ahead) > deadline:
+            self._counters["rejected_deadline"] += 1
+            raise ConcurrencyLimitError(
+                f"{self.name}: LLM queue wait would exceed the request deadline"
+            )
+
+        waiter = _Waiter(
+            future=asyncio.get_running_loop().create_future(), priority=priority, enqueued_at=now
+        )
+        self._queues[priority].append(waiter)
+        self._counters["queued"] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=deadline - now)
+        except (TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Slot was granted as we timed out/cancelled: give it back
+                self._release_slot()
+            else:
+                waiter.future.cancel()
+                try:
+                    self._queues[priority].remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._counters["rejected_deadline"] += 1
+            raise ConcurrencyLimitError(f"{self.name}: timed out waiting for an LLM slot") from None
+        self._counters["admitted"] += 1
+
+    def _next_waiter(self) -> _Waiter | None:
+        paid, free = self._queues[Priority.PAID], self._queues[Priority.FREE]
+        # Weighted lanes: serve up to paid_weight paid callers per free caller
+        if paid and (not free or self._paid_streak < self._paid_weight):
+            self._paid_streak += 1
+            return paid.popleft()
+        if free:
+            self._paid_streak = 0
+            return free.popleft()
+        return None
+
+    def _dispatch(self) -> None:
+        while self._in_flight < self.limit:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            if waiter.future.done():
+                continue
+            self._in_flight += 1
+            waiter.future.set_result(None)
+
+    def _release_slot(self) -> None:
+        self._in_flight = max(self._in_flight - 1, 0)
+        self._dispatch()
+
+    def release(
+        self, latency: float, outcome: str, first_token_latency: float | None = None
+    ) -> None:
+        """
+        Return a slot and adapt the limit.
+
+        Args:
+            latency: Seconds the slot was held
+            outcome: "ok", "rate_limited", "timeout" or "error"
+            first_token_latency: Seconds to the first output token, compared with
+                the latency target (defaults to ``latency``)
+        """
+        if outcome == "ok":
+            self._ewma_latency = (
+                latency if self._ewma_latency is None else 0.8 * self._ewma_latency + 0.2 * latency
+            )
+            if first_token_latency is None:
+                first_token_latency = latency
+            if first_token_latency > self._latency_target:
+                self._counters["slow_calls"] += 1
+                self._decrease()
+            else:
+                # Additive increase: roughly +1 per `limit` successful calls
+                self._limit = min(self._limit + 1.0 / max(self._limit, 1.0), self._max_limit)
+        elif outcome == "rate_limited":
+            self._counters["rate_limited"] += 1
+            self._decrease()
+        elif outcome == "timeout":
+            self._counters["timeouts"] += 1
+            self._decrease()
+        self._release_slot()
+
+    def _decrease(self) -> None:
+        # One multiplicative decrease per latency window, so a burst of 429s
+        # from the same congestion event doesn't collapse the limit to the floor
+        now = time.monotonic()
+        window = self._ewma_latency or 1.0
+        if now - self._last_decrease < window:
+            return
+        self._last_decrease = now
+        previous = self.limit
+        self._limit = max(self._limit * self._backoff_factor, float(self._min_limit))
+        if self.limit != previous:
+            logger.warning(f"LLM limiter {self.name}: limit {previous} -> {self.limit}")
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth(),
+            "queue_depth_paid": self.queue_depth(Priority.PAID),
+            "queue_depth_free": self.queue_depth(Priority.FREE),
+            "ewma_latency_seconds": round(self._ewma_latency, 3) if self._ewma_latency else None,
+            **self._counters,
+        }
+
+
+def classify_failure(exc: BaseException) -> str:
+    """Classify a provider failure as "rate_limited", "timeout" or "error"."""
+    current: BaseException | None = exc
+    while current is not None:
+        if getattr(current, "status_code", None) == 429 or "RateLimit" in type(current).__name__:
+            return "rate_limited"
+        if isinstance(current, TimeoutError) or "Timeout" in type(current).__name__:
+            return "timeout"
+        current = current.__cause__
+    return "error"
+
+
+def estimate_first_token_latency(latency: float, output: Any) -> float:
+    """Time to first token of a non-streaming call: latency minus estimated decode time."""
+    text = output if isinstance(output, str) else str(output)
+    decode = estimate_tokens(text) * settings.LLM_LIMITER_SECONDS_PER_OUTPUT_TOKEN
+    return max(latency - decode, 0.0)
+
+
+class LimitedProvider(Provider):
+    """Provider wrapper that runs every call inside an AdaptiveLimiter slot."""
+
+    def __init__(self, provider: Provider, limiter: AdaptiveLimiter):
+        self._provider = provider
+        self._limiter = limiter
+
+    async def __call__(self, prompt: str, **generation_args: Any) -> str:
+        await self._limiter.acquire(_request_priority.get(), _request_deadline.get())
+        started = time.monotonic()
+        outcome = "error"
+        first_token_latency = None
+        try:
+            result = await self._provider(prompt, **generation_args)
+            outcome = "ok"
+            first_token_latency = estimate_first_token_latency(time.monotonic() - started, result)
+            return result
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            outcome = classify_failure(e)
+            raise
+        finally:
+            self._limiter.release(time.monotonic() - started, outcome, first_token_latency)
+
+    async def stream(self, prompt: str, **generation_args: Any) -> AsyncIterator[str]:
+        # The slot is held until the last delta is delivered (or the consumer stops)
+        await self._limiter.acquire(_request_priority.get(), _request_deadline.get())
+        started = time.monotonic()
+        outcome = "cancelled"
+        first_token_latency = None
+        try:
+            async with aclosing(self._provider.stream(prompt, **generation_args)) as inner:
+                async for delta in inner:
+                    if first_token_latency is None:
+                        first_token_latency = time.monotonic() - started
+                    yield delta
+            outcome = "ok"
+        except GeneratorExit:
+            # Closed by the consumer: JSONWrapper stops the stream once the object
+            # closes (finish_stream), which is a success if a delta arrived
+            if first_token_latency is not None:
+                outcome = "ok"
+            raise
+        except Exception as e:
+            outcome = classify_failure(e)
+            raise
+        finally:
+            self._limiter.release(time.monotonic() - started, outcome, first_token_latency)
+
+
+class LimiterRegistry:
+    """One AdaptiveLimiter per (provider, model)."""
+
+    def __init__(self) -> None:
+        self._limiters: dict[tuple[str, str], AdaptiveLimiter] = {}
+
+    def get(self, provider: str, model: str) -> AdaptiveLimiter:
+        key = (provider, model)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = AdaptiveLimiter(name=f"{provider}/{model}")
+            self._limiters[key] = limiter
+        return limiter
+
+    def get_stats(self) -> list[dict[str, Any]]:
+        return [limiter.get_stats() for limiter in self._limiters.values()]
+
+
+limiter_registry = LimiterRegistry()
@@ -1,11 +1,40 @@
+import copy
+import hashlib
+import json
+from collections.abc import AsyncIterator
+from contextlib import aclosing
 from typing import Any
 
-from app.agent.providers.base import EmbeddingProvider, Provider
+from app.agent.cache import (
+    CACHE_CONTROL_ARGS,
+    CachingProvider,
+    LLMResponseCache,
+    llm_response_cache,
+)
+from app.agent.embedding_cache import EmbeddingCache, embedding_cache
+from app.agent.limiter import LimitedProvider, limiter_registry
+from app.agent.prompt import Prompt
+from app.agent.providers.base import (
+    STREAM_COMPLETE,
+    BatchProvider,
+    EmbeddingProvider,
+    Provider,
+    finish_stream,
+)
+from app.agent.registry import provider_registry
+from app.agent.singleflight import embedding_singleflight, llm_singleflight
 from app.agent.strategies.base import Strategy
 from app.agent.strategies.wrapper import JSONWrapper, MDWrapper
 from app.core.config import settings
 from app.core.exceptions import ProviderError
 
+DEFAULT_GENERATION_OPTS: dict[str, Any] = {
+    "temperature": 0,
+    "top_p": 0.9,
+    "top_k": 40,
+    "num_ctx": 20000,
+}
+
 
 class AgentManager:
     def __init__(
@@ -13,6 +42,7 @@ class AgentManager:
         strategy: str | None = None,
         model: str = settings.LL_MODEL or "anthropic/claude-3.5-sonnet",
         model_provider: str = settings.LLM_PROVIDER or "openrouter",
+        cache: LLMResponseCache | None = llm_response_cache,
     ) -> None:
         self.strategy: Strategy
         match strategy:
@@ -24,56 +54,232 @@ class AgentManager:
                 self.strategy = JSONWrapper()
         self.model = model
         self.model_provider = model_provider
+        self.cache = cache
 
     async def _get_provider(self, **kwargs: Any) -> Provider:
+        """
+        Resolve the pooled provider for this manager, wrapped in its concurrency limiter.
+
+        With model_provider "router", calls are routed across LLM_ROUTING_BACKENDS
+        (see app.agent.providers.router); each backend keeps its own limiter.
+        """
+        if self.model_provider == "router":
+            from .providers.router import RoutingProvider, parse_backends
+
+            backends = parse_backends(settings.LLM_ROUTING_BACKENDS)
+            if not backends:
+                raise ProviderError(
+                    "LLM_PROVIDER=router requires LLM_ROUTING_BACKENDS "
+                    "(e.g. 'openrouter:anthropic/claude-3.5-sonnet,openai:gpt-4o-mini')"
+                )
+            return RoutingProvider(
+                [
+                    (
+                        f"{name}:{model}",
+                        self._limited(self._build_provider(name, model, {}), name, model),
+                    )
+                    for name, model in backends
+                ]
+            )
+        provider = self._build_provider(self.model_provider, self.model, kwargs)
+        return self._limited(provider, self.model_provider, self.model)
+
+    @staticmethod
+    def _limited(provider: Provider, provider_name: str, model: str) -> Provider:
+        if not settings.LLM_LIMITER_ENABLED:
+            return provider
+        # Bulkhead per provider/model; cache hits in run() never take a slot
+        return LimitedProvider(provider, limiter_registry.get(provider_name, model))
+
+    @staticmethod
+    def _build_provider(provider_name: str, model: str, kwargs: dict[str, Any]) -> Provider:
         # Default options for any LLM. Not all can handle them
         # (e.g. OpenAI doesn't take top_k) but each provider can make
-        # best effort.
-        opts = {"temperature": 0, "top_p": 0.9, "top_k": 40, "num_ctx": 20000}
-        opts.update(kwargs)
-        match self.model_provider:
+        # best effort. Providers are pooled and shared, so per-call
+        # kwargs are passed as generation_args rather than baked in here.
+        opts = dict(DEFAULT_GENERATION_OPTS)
+        match provider_name:
             case "openai":
                 from .providers.openai import OpenAIProvider
 
-                api_key = str(opts.get("llm_api_key", settings.LLM_API_KEY or "")) or None
-                return OpenAIProvider(model_name=self.model, api_key=api_key, opts=opts)
+                api_key = str(kwargs.get("llm_api_key", settings.LLM_API_KEY or "")) or None
+                return provider_registry.get_or_create(
+                    kind="llm",
+                    provider="openai",
+                    model=model,
+                    base_url=None,
+                    api_key=api_key,
+                    factory=lambda http_client: OpenAIProvider(
+                        model_name=model, api_key=api_key, opts=opts, http_client=http_client
+                    ),
+                )
             case "openrouter":
                 from .providers.openrouter import OpenRouterProvider
 
                 api_key_raw = (
-                    opts.get("llm_api_key", settings.OPENROUTER_API_KEY)
+                    kwargs.get("llm_api_key", settings.OPENROUTER_API_KEY)
                     or settings.LLM_API_KEY
                     or ""
                 )
-                api_base_url_raw = opts.get("llm_base_url", settings.LLM_BASE_URL or "")
+                api_base_url_raw = kwargs.get("llm_base_url", settings.LLM_BASE_URL or "")
                 api_key = str(api_key_raw) if api_key_raw else None
                 api_base_url = str(api_base_url_raw) if api_base_url_raw else None
-                return OpenRouterProvider(
-                    model_name=self.model,
+                return provider_registry.get_or_create(
+                    kind="llm",
+                    provider="openrouter",
+                    model=model,
+                    base_url=api_base_url,
                     api_key=api_key,
-                    api_base_url=api_base_url,
-                    opts=opts,
+                    factory=lambda http_client: OpenRouterProvider(
+                        model_name=model,
+                        api_key=api_key,
+                        api_base_url=api_base_url,
+                        opts=opts,
+                        http_client=http_client,
+                    ),
+                )
+            case "anthropic":
+                from .providers.anthropic import AnthropicProvider
+
+                api_key = str(kwargs.get("llm_api_key", settings.ANTHROPIC_API_KEY or "")) or None
+                return provider_registry.get_or_create(
+                    kind="llm",
+                    provider="anthropic",
+                    model=model,
+                    base_url=None,
+                    api_key=api_key,
+                    factory=lambda http_client: AnthropicProvider(
+                        model_name=model, api_key=api_key, opts=opts, http_client=http_client
+                    ),
                 )
             case _:
                 raise ProviderError(
-                    f"Unsupported LLM provider: {self.model_provider}. "
-                    "Supported providers: openai, openrouter"
+                    f"Unsupported LLM provider: {provider_name}. "
+                    "Supported providers: openai, openrouter, anthropic, router"
                 )
 
-    async def run(self, prompt: str, **kwargs: Any) -> Any:
+    async def run(self, prompt: str | Prompt, **kwargs: Any) -> Any:
         """
         Run the agent with the given prompt and generation arguments.
+
+        Responses are served from the LLM response cache when possible; pass
+        ``prompt_version`` to tag the template, ``cache_sampled=True`` to
+        allow caching when temperature > 0 and ``cache_persist=False`` to keep
+        a completion off the on-disk tier. Upstream calls go through the
+        per-provider concurrency limiter (see app.agent.limiter). A Prompt is
+        sent as a cacheable system prefix plus the per-call text.
+        """
+        prompt = self._split_prompt(prompt, kwargs)
+        flight_key = self._flight_key(prompt, kwargs)
+        cache_key = None
+        provider: Provider = await self._get_provider(**kwargs)
+        if self.cache is not None and self.cache.enabled:
+            cache_key = self._request_key(prompt, kwargs)
+            provider = CachingProvider(
+                provider, provider_name=self.model_provider, model=self.model, cache=self.cache
+            )
+        else:
+            for arg in CACHE_CONTROL_ARGS:
+                kwargs.pop(arg, None)
+
+        async def apply_strategy() -> Any:
+            try:
+                return await self.strategy(prompt, provider, **kwargs)
+            except Exception:
+                # The completion may already be cached; don't replay one the
+                # strategy rejected (truncated, unparseable, schema-invalid)
+                if cache_key is not None:
+                    await self.cache.delete(cache_key)
+                raise
+
+        if flight_key is None:
+            return await apply_strategy()
+
+        # Concurrent identical requests share one upstream call
+        result = await llm_singleflight.do(flight_key, apply_strategy)
+        return copy.deepcopy(result) if isinstance(result, dict | list) else result
+
+    async def stream(self, prompt: str | Prompt, **kwargs: Any) -> AsyncIterator[str]:
+        """
+        Stream the raw completion text as deltas.
+
+        The strategy is not applied: callers parse the joined text once the stream
+        ends. Cache hits are replayed as a single delta; streamed calls are never
+        collapsed with concurrent identical ones.
+        """
+        prompt = self._split_prompt(prompt, kwargs)
+        provider: Provider = await self._get_provider(**kwargs)
+        if self.cache is not None and self.cache.enabled:
+            provider = CachingProvider(
+                provider, provider_name=self.model_provider, model=self.model, cache=self.cache
+            )
+        else:
+            for arg in CACHE_CONTROL_ARGS:
+                kwargs.pop(arg, None)
+
+        async with aclosing(provider.stream(prompt, **kwargs)) as inner:
+            async for delta in inner:
+                if (yield delta) is STREAM_COMPLETE:
+                    # Forward the consumer's completion signal to the cache layer
+                    await finish_stream(inner)
+                    return
+
+    async def get_batch_provider(self, **kwargs: Any) -> Provider:
+        """
+        Provider for offline batch runs (see app.agent.batch).
+
+        Returns the bare pooled provider when it has a batch endpoint and
+        LLM_BATCH_USE_PROVIDER_API is set; otherwise the limited (or routed)
+        provider, which the batch runner paces itself. The response cache is
+        bypassed: batch runs exist to replace stored results.
         """
-        provider = await self._get_provider(**kwargs)
-        return await self.strategy(prompt, provider, **kwargs)
+        if settings.LLM_BATCH_USE_PROVIDER_API and self.model_provider != "router":
+            provider = self._build_provider(self.model_provider, self.model, kwargs)
+            if isinstance(provider, BatchProvider):
+                return provider
+        return await self._get_provider(**kwargs)
+
+    @staticmethod
+    def _split_prompt(prompt: str | Prompt, kwargs: dict[str, Any]) -> str:
+        """Move a Prompt's static prefix into the ``system`` generation arg."""
+        if isinstance(prompt, Prompt):
+            if prompt.system:
+                kwargs["system"] = prompt.system
+            return prompt.user
+        return prompt
+
+    def _flight_key(self, prompt: str, kwargs: dict[str, Any]) -> str | None:
+        """Singleflight key, or None when the call is sampled and must not be shared."""
+        temperature = kwargs.get("temperature", 0)
+        if temperature and temperature > 0 and not kwargs.get("cache_sampled"):
+            return None
+        return f"{type(self.strategy).__name__}:{self._request_key(prompt, kwargs)}"
 
-    async def generate(self, prompt: str, **kwargs: Any) -> str:
+    def _request_key(self, prompt: str, kwargs: dict[str, Any]) -> str:
+        """Response cache key of this request (the key CachingProvider stores under)."""
+        return LLMResponseCache.make_key(
+            model=self.model,
+            provider=self.model_provider,
+            prompt=prompt,
+            temperature=kwargs.get("temperature", 0),
+            max_tokens=kwargs.get("max_tokens"),
+            prompt_version=kwargs.get("prompt_version"),
+            system=kwargs.get("system"),
+        )
+
+    async def generate(self, prompt: str | Prompt, **kwargs: Any) -> str:
         """
         Generate text response (convenience method).
         """
         result = await self.run(prompt, **kwargs)
         if isinstance(result, dict):
-            return result.get("text", "")
+            # JSON strategy: hand back the parsed object as JSON text
+            if "text" in result:
+                return str(result["text"])
+            return json.dumps(result, ensure_ascii=False)
+        elif isinstance(result, list):
+            # JSON arrays (e.g. keyword lists) must stay valid JSON too
+            return json.dumps(result, ensure_ascii=False)
         elif isinstance(result, str):
             return result
         else:
@@ -85,9 +291,11 @@ class EmbeddingManager:
         self,
         model: str = settings.EMBEDDING_MODEL or "text-embedding-3-small",
         model_provider: str = settings.EMBEDDING_PROVIDER or "openrouter",
+        cache: EmbeddingCache | None = embedding_cache,
     ) -> None:
         self._model = model
         self._model_provider = model_provider
+        self.cache = cache
 
     async def _get_embedding_provider(self, **kwargs: Any) -> EmbeddingProvider:
         match self._model_provider:
@@ -97,7 +305,16 @@ class EmbeddingManager:
                 api_key = (
                     str(kwargs.get("openai_api_key", settings.EMBEDDING_API_KEY or "")) or None
                 )
-                return OpenAIEmbeddingProvider(api_key=api_key, embedding_model=self._model)
+                return provider_registry.get_or_create(
+                    kind="embedding",
+                    provider="openai",
+                    model=self._model,
+                    base_url=None,
+                    api_key=api_key,
+                    factory=lambda http_client: OpenAIEmbeddingProvider(
+                        api_key=api_key, embedding_model=self._model, http_client=http_client
+                    ),
+                )
             case "openrouter":
                 from .providers.openrouter import OpenRouterEmbeddingProvider
 
@@ -110,10 +327,18 @@ class EmbeddingManager:
                 )
                 api_key = str(api_key_raw) if api_key_raw else None
                 api_base_url = str(api_base_url_raw) if api_base_url_raw else None
-                return OpenRouterEmbeddingProvider(
+                return provider_registry.get_or_create(
+                    kind="embedding",
+                    provider="openrouter",
+                    model=self._model,
+                    base_url=api_base_url,
                     api_key=api_key,
-                    embedding_model=self._model,
-                    api_base_url=api_base_url,
+                    factory=lambda http_client: OpenRouterEmbeddingProvider(
+                        api_key=api_key,
+                        embedding_model=self._model,
+                        api_base_url=api_base_url,
+                        http_client=http_client,
+                    ),
                 )
             case _:
                 raise ProviderError(
@@ -124,6 +349,52 @@ class EmbeddingManager:
     async def embed(self, text: str, **kwargs: Any) -> list[float]:
         """
         Get the embedding for the given text.
+
+        Embeddings are served from the embedding cache when possible (see
+        app.agent.embedding_cache); concurrent misses for the same text share
+        one upstream call.
         """
         provider = await self._get_embedding_provider(**kwargs)
-        return await provider.embed(text)
+        namespace = f"{self._model_provider}:{self._model}"
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        flight_key = f"{namespace}:{text_hash}"
+
+        async def fetch() -> list[float]:
+            return await embedding_singleflight.do(flight_key, lambda: provider.embed(text))
+
+        if self.cache is None:
+            embedding = await fetch()
+        else:
+            embedding = await self.cache.get_or_embed(namespace, text, fetch)
+        return list(embedding)
+
+    async def embed_many(self, texts: list[str], **kwargs: Any) -> list[list[float]]:
+        """
+        Get embeddings for several texts, in input order.
+
+        Cached vectors are reused; the remaining distinct texts are embedded in
+        token-budgeted batches (see app.agent.embedding_batches).
+        """
+        provider = await self._get_embedding_provider(**kwargs)
+        namespace = f"{self._model_provider}:{self._model}"
+        use_cache = self.cache is not None and self.cache.enabled
+        results: list[list[float] | None] = [None] * len(texts)
+        missing: dict[str, list[int]] = {}
+
+        for index, text in enumerate(texts):
+            key = EmbeddingCache.make_key(namespace, text)
+            cached = await self.cache.get(key) if use_cache else None
+            if cached is not None:
+                results[index] = cached
+            else:
+                missing.setdefault(key, []).append(index)
+
+        if missing:
+            keys = list(missing)
+            vectors = await provider.embed_many([texts[missing[key][0]] for key in keys])
+            for key, vector in zip(keys, vectors, strict=True):
+                for index in missing[key]:
+                    results[index] = list(vector)
+                if use_cache:
+                    await self.cache.set(key, vector)
+        return results  # type: ignore[return-value]
@@ -0,0 +1,62 @@
+"""
+Prompts split into a static prefix and a dynamic suffix.
+
+``system`` holds everything that is identical across calls (anti-discrimination
+rules, task instructions, output format); ``user`` holds the per-call resume/job
+text. Providers send the prefix first as a system message, marked for provider
+prompt caching where supported, so repeated calls only pay full price for the
+suffix.
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Prompt:
+    """A prompt with a cacheable static prefix and a per-call suffix."""
+
+    system: str
+    user: str
+
+    @property
+    def text(self) -> str:
+        """Single-string form for providers without system messages."""
+        return f"{self.system}\n\n{self.user}" if self.system else self.user
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __contains__(self, item: str) -> bool:
+        return item in self.system or item in self.user
+
+
+@dataclass
+class PromptCacheStats:
+    """Provider-reported prompt-cache usage, summed across calls."""
+
+    requests: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    cache_write_tokens: int = 0
+
+    def record(
+        self, prompt_tokens: int | None, cached_tokens: int | None, cache_write_tokens: int = 0
+    ) -> None:
+        self.requests += 1
+        self.prompt_tokens += prompt_tokens or 0
+        self.cached_tokens += cached_tokens or 0
+        self.cache_write_tokens += cache_write_tokens or 0
+
+    def to_dict(self) -> dict[str, float | int]:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "cached_ratio": round(self.cached_tokens / self.prompt_tokens, 4)
+            if self.prompt_tokens
+            else 0.0,
+        }
+
+
+prompt_cache_stats = PromptCacheStats()
@@ -0,0 +1,118 @@
+"""Anthropic provider for AI agent system."""
+
+import logging
+from collections.abc import AsyncIterator
+from typing import Any
+
+import httpx
+from anthropic import AsyncAnthropic
+
+from app.agent.exceptions import ProviderError
+from app.agent.prompt import prompt_cache_stats
+from app.agent.providers.base import Provider
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AnthropicProvider(Provider):
+    """Anthropic Claude provider using the Messages API."""
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model_name: str = "claude-3-5-sonnet-20241022",
+        opts: dict[str, Any] | None = None,
+        http_client: httpx.AsyncClient | None = None,
+    ):
+        """
+        Initialize Anthropic provider.
+
+        Args:
+            api_key: Anthropic API key (defaults to ANTHROPIC_API_KEY)
+            model_name: Model to use
+            opts: Additional options for generation
+            http_client: Shared keep-alive HTTP client (see app.agent.registry)
+        """
+        self.api_key = api_key or settings.ANTHROPIC_API_KEY
+        if not self.api_key:
+            raise ProviderError(
+                "Anthropic API key is missing. Set ANTHROPIC_API_KEY in your .env file."
+            )
+        self.model = model_name
+        self.opts = opts or {}
+        self._client = AsyncAnthropic(api_key=self.api_key, http_client=http_client)
+
+        logger.info(f"Initialized AnthropicProvider with model: {self.model}")
+
+    def _request(self, prompt: str, generation_args: dict[str, Any]) -> dict[str, Any]:
+        request: dict[str, Any] = {
+            "model": self.model,
+            "max_tokens": generation_args.get("max_tokens", self.opts.get("max_tokens", 4000)),
+            "temperature": generation_args.get("temperature", self.opts.get("temperature", 0)),
+            "top_p": generation_args.get("top_p", self.opts.get("top_p", 0.9)),
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        system = generation_args.get("system")
+        if system:
+            # Cache breakpoint after the static prefix (rules, instructions, format)
+            request["system"] = (
+                [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+                if settings.LLM_PROMPT_CACHING
+                else system
+            )
+        return request
+
+    async def __call__(self, prompt: str, **generation_args: Any) -> str:
+        """
+        Generate response using the Anthropic Messages API.
+
+        Args:
+            prompt: Input prompt
+            generation_args: Additional generation arguments (merged with opts)
+
+        Returns:
+            Generated text response
+
+        Raises:
+            ProviderError: If generation fails
+        """
+        try:
+            response = await self._client.messages.create(**self._request(prompt, generation_args))
+
+            if response.usage is not None:
+                cache_read = getattr(response.usage, "cache_read_input_tokens", 0) or 0
+                cache_write = getattr(response.usage, "cache_creation_input_tokens", 0) or 0
+                prompt_cache_stats.record(
+                    response.usage.input_tokens + cache_read + cache_write, cache_read, cache_write
+                )
+
+            if not response.content or not response.content[0].text:
+                raise ProviderError("Empty response from Anthropic API")
+
+            return response.content[0].text
+
+        except ProviderError:
+            raise
+        except Exception as e:
+            logger.exception(f"Anthropic error: {str(e)}")
+            raise ProviderError(f"Anthropic - Error generating response: {str(e)}") from e
+
+    async def stream(self, prompt: str, **generation_args: Any) -> AsyncIterator[str]:
+        """
+        Stream the response from the Anthropic Messages API as text deltas.
+
+        Raises:
+            ProviderError: If the stream cannot be opened or breaks mid-way
+        """
+        try:
+            async with self._client.messages.stream(
+                **self._request(prompt, generation_args)
+            ) as stream:
+                async for text in stream.text_stream:
+                    if text:
+                        yield text
+
+        except Exception as e:
+            logger.exception(f"Anthropic streaming error: {str(e)}")
+            raise ProviderError(f"Anthropic - Error streaming response: {str(e)}") from e
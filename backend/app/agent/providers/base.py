@@ -1,6 +1,15 @@
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
 from typing import Any
 
+from app.agent.embedding_batches import embed_in_batches
+
+# Sent into a provider stream (see finish_stream) by a consumer that already has
+# the complete response and stops reading early. Caching wrappers keep what was
+# streamed so far instead of discarding it as an abandoned stream.
+STREAM_COMPLETE = object()
+
 
 class Provider(ABC):
     """
@@ -10,6 +19,14 @@ class Provider(ABC):
     @abstractmethod
     async def __call__(self, prompt: str, **generation_args: Any) -> str: ...
 
+    async def stream(self, prompt: str, **generation_args: Any) -> AsyncIterator[str]:
+        """
+        Yield the completion as text deltas.
+
+        Providers without native streaming yield the full response as a single delta.
+        """
+        yield await self(prompt, **generation_args)
+
 
 class EmbeddingProvider(ABC):
     """
@@ -18,3 +35,67 @@ class EmbeddingProvider(ABC):
 
     @abstractmethod
     async def embed(self, text: str) -> list[float]: ...
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed several texts, returning vectors in input order.
+
+        Providers without a batch endpoint embed each text separately, with a
+        bounded number of calls in flight.
+        """
+
+        async def embed_one(batch: list[str]) -> list[list[float]]:
+            return [await self.embed(batch[0])]
+
+        return await embed_in_batches(texts, embed_one, max_items=1)
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """Outcome of one request in a provider batch: ``output`` on success, else ``error``."""
+
+    custom_id: str
+    output: str | None = None
+    error: str | None = None
+
+
+class BatchProvider(ABC):
+    """
+    Mixin for providers with an asynchronous batch endpoint (see app.agent.batch).
+    """
+
+    @abstractmethod
+    async def submit_batch(self, requests: list[tuple[str, str, dict[str, Any]]]) -> str:
+        """Submit (custom_id, prompt, generation_args) requests; returns the batch id."""
+
+    @abstractmethod
+    async def batch_done(self, batch_id: str) -> bool:
+        """
+        Whether the batch has stopped processing and its results can be read.
+
+        Raises:
+            BatchFailedError: If the batch failed as a whole (e.g. invalid input file)
+        """
+
+    @abstractmethod
+    def batch_results(self, batch_id: str) -> AsyncIterator[BatchResult]:
+        """Yield the result of every request the batch finished."""
+
+
+async def finish_stream(stream: AsyncIterator[str]) -> None:
+    """
+    Stop a provider stream whose consumer already has the complete response.
+
+    Signals STREAM_COMPLETE to the outermost wrapper, then closes the stream so
+    the upstream request is aborted and no further tokens are generated.
+    """
+    asend = getattr(stream, "asend", None)
+    try:
+        if asend is not None:
+            await asend(STREAM_COMPLETE)
+    except StopAsyncIteration:
+        pass
+    finally:
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -1,15 +1,21 @@
+import asyncio
+import functools
+import inspect
 import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
-from fastapi.concurrency import run_in_threadpool
-
 try:
     from llama_index.core.base.embeddings.base import BaseEmbedding
     from llama_index.core.base.llms.base import BaseLLM
+    from llama_index.core.llms.custom import CustomLLM
 except ImportError:
     # Optional dependency - mark as unavailable for type checking
     BaseEmbedding = None  # type: ignore
     BaseLLM = None  # type: ignore
+    CustomLLM = None  # type: ignore
 
 from app.agent.exceptions import ProviderError
 from app.agent.providers.base import EmbeddingProvider, Provider
@@ -17,6 +23,46 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Generation args forwarded to LlamaIndex complete()/acomplete() as model kwargs
+_FORWARDED_GENERATION_ARGS = ("temperature", "max_tokens", "top_p")
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _blocking_executor() -> ThreadPoolExecutor:
+    """
+    Dedicated pool for integrations without native async.
+
+    Bounded by LLM_BLOCKING_MAX_WORKERS so slow LLM calls can't starve
+    Starlette's shared threadpool.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.LLM_BLOCKING_MAX_WORKERS,
+                thread_name_prefix="llama-index",
+            )
+        return _executor
+
+
+async def _run_blocking[T](func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    return await loop.run_in_executor(_blocking_executor(), call)
+
+
+def _overrides(obj: Any, name: str, base: type | None) -> bool:
+    """Whether ``obj``'s class replaces ``base``'s implementation of ``name``."""
+    if base is None:
+        return True
+    # getattr_static: LlamaIndex wraps these methods in descriptors that return
+    # a new bound wrapper on every attribute access, so getattr is never identical
+    return inspect.getattr_static(type(obj), name, None) is not inspect.getattr_static(
+        base, name, None
+    )
+
 
 def _get_real_provider(provider_name):
     # The format this method expects is something like:
@@ -80,23 +126,30 @@ class LlamaIndexProvider(Provider):
             kwargs_for_provider.get("num_ctx", 20000)
         )
         self._client = provider_obj(**kwargs_for_provider)
+        # CustomLLM's default acomplete() calls the blocking complete() on the
+        # event loop; such integrations go to the dedicated executor instead
+        self._native_async = _overrides(self._client, "acomplete", CustomLLM)
 
-    def _generate_sync(self, prompt: str, **options) -> str:
-        """
-        Generate a response from the model.
-        """
+    async def __call__(self, prompt: str, **generation_args: Any) -> str:
+        system = generation_args.pop("system", None)
+        if system:
+            # Completion-style models have no system role: keep the prefix first
+            prompt = f"{system}\n\n{prompt}"
+        options = {
+            key: generation_args[key]
+            for key in _FORWARDED_GENERATION_ARGS
+            if generation_args.get(key) is not None
+        }
         try:
-            cr = self._client.complete(prompt)
-            return cr.text
+            if self._native_async:
+                response = await self._client.acomplete(prompt, **options)
+            else:
+                response = await _run_blocking(self._client.complete, prompt, **options)
+            return response.text
         except Exception as e:
-            logger.error(f"llama_index sync error: {e}")
+            logger.error(f"llama_index error: {e}")
             raise ProviderError(f"llama_index - Error generating response: {e}") from e
 
-    async def __call__(self, prompt: str, **generation_args: Any) -> str:
-        if generation_args:
-            logger.warning(f"LlamaIndexProvider ignoring generation_args: {generation_args}")
-        return await run_in_threadpool(self._generate_sync, prompt)
-
 
 class LlamaIndexEmbeddingProvider(EmbeddingProvider):
     def __init__(
@@ -134,13 +187,31 @@ class LlamaIndexEmbeddingProvider(EmbeddingProvider):
         )
 
         self._client = provider_obj(**kwargs_for_provider)
+        # BaseEmbedding's default async methods run the sync ones on the event loop
+        self._native_async = _overrides(self._client, "_aget_text_embedding", BaseEmbedding)
 
     async def embed(self, text: str) -> list[float]:
         """
         Generate an embedding for the given text.
         """
         try:
-            return await run_in_threadpool(self._client.get_text_embedding, text)
+            if self._native_async:
+                return await self._client.aget_text_embedding(text)
+            return await _run_blocking(self._client.get_text_embedding, text)
         except Exception as e:
             logger.error(f"llama_index embedding error: {e}")
             raise ProviderError(f"llama_index - Error generating embedding: {e}") from e
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        """
+        Generate embeddings for several texts, in input order.
+
+        Uses the integration's batch endpoint (embed_batch_size texts per request).
+        """
+        try:
+            if self._native_async:
+                return await self._client.aget_text_embedding_batch(texts)
+            return await _run_blocking(self._client.get_text_embedding_batch, texts)
+        except Exception as e:
+            logger.error(f"llama_index embedding error: {e}")
+            raise ProviderError(f"llama_index - Error generating embeddings: {e}") from e
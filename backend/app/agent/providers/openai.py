@@ -1,58 +1,160 @@
+import json
 import logging
 import os
+from collections.abc import AsyncIterator
 from typing import Any
 
-from fastapi.concurrency import run_in_threadpool
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI
 
-from app.agent.exceptions import ProviderError
-from app.agent.providers.base import EmbeddingProvider, Provider
+from app.agent.embedding_batches import embed_in_batches
+from app.agent.exceptions import BatchFailedError, ProviderError
+from app.agent.prompt import prompt_cache_stats
+from app.agent.providers.base import BatchProvider, BatchResult, EmbeddingProvider, Provider
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 
-class OpenAIProvider(Provider):
+class OpenAIProvider(Provider, BatchProvider):
     def __init__(
         self,
         api_key: str | None = None,
         model_name: str = settings.LL_MODEL or "gpt-3.5-turbo",
         opts: dict[str, Any] | None = None,
+        http_client: httpx.AsyncClient | None = None,
     ):
         if opts is None:
             opts = {}
         api_key = api_key or settings.LLM_API_KEY or os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ProviderError("OpenAI API key is missing")
-        self._client = OpenAI(api_key=api_key)
+        self._client = AsyncOpenAI(api_key=api_key, http_client=http_client)
         self.model = model_name
         self.opts = opts
         self.instructions = ""
 
-    def _generate_sync(self, prompt: str, options: dict[str, Any]) -> str:
+    async def _generate(self, prompt: str, options: dict[str, Any], system: str | None) -> str:
         try:
-            response = self._client.responses.create(
+            # OpenAI caches identical prompt prefixes automatically, so the static
+            # system prefix goes first as instructions
+            response = await self._client.responses.create(
                 model=self.model,
-                instructions=self.instructions,
+                instructions=system or self.instructions,
                 input=prompt,
                 **options,
             )
+            if response.usage is not None:
+                details = getattr(response.usage, "input_tokens_details", None)
+                prompt_cache_stats.record(
+                    response.usage.input_tokens, getattr(details, "cached_tokens", 0)
+                )
             return response.output_text
         except Exception as e:
             raise ProviderError(f"OpenAI - error generating response: {e}") from e
 
-    async def __call__(self, prompt: str, **generation_args: Any) -> str:
-        if generation_args:
-            logger.warning(f"OpenAIProvider - generation_args not used {generation_args}")
-        myopts = {
-            "temperature": self.opts.get("temperature", 0),
-            "top_p": self.opts.get("top_p", 0.9),
+    def _options(self, generation_args: dict[str, Any]) -> dict[str, Any]:
+        # Pooled providers are shared across calls, so per-call args win over opts
+        return {
+            "temperature": generation_args.get("temperature", self.opts.get("temperature", 0)),
+            "top_p": generation_args.get("top_p", self.opts.get("top_p", 0.9)),
             # top_k not currently supported by any OpenAI model - https://community.openai.com/t/does-openai-have-a-top-k-parameter/612410
             #            "top_k": generation_args.get("top_k", 40),
             # neither max_tokens
             #            "max_tokens": generation_args.get("max_length", 20000),
         }
-        return await run_in_threadpool(self._generate_sync, prompt, myopts)
+
+    async def __call__(self, prompt: str, **generation_args: Any) -> str:
+        return await self._generate(
+            prompt, self._options(generation_args), generation_args.get("system")
+        )
+
+    async def stream(self, prompt: str, **generation_args: Any) -> AsyncIterator[str]:
+        try:
+            stream = await self._client.responses.create(
+                model=self.model,
+                instructions=generation_args.get("system") or self.instructions,
+                input=prompt,
+                stream=True,
+                **self._options(generation_args),
+            )
+            async with stream:
+                async for event in stream:
+                    if event.type == "response.output_text.delta" and event.delta:
+                        yield event.delta
+        except Exception as e:
+            raise ProviderError(f"OpenAI - error streaming response: {e}") from e
+
+    async def submit_batch(self, requests: list[tuple[str, str, dict[str, Any]]]) -> str:
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/responses",
+                    "body": {
+                        "model": self.model,
+                        "instructions": generation_args.get("system") or self.instructions,
+                        "input": prompt,
+                        **self._options(generation_args),
+                    },
+                },
+                ensure_ascii=False,
+            )
+            for custom_id, prompt, generation_args in requests
+        ]
+        try:
+            input_file = await self._client.files.create(
+                file=("batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch"
+            )
+            batch = await self._client.batches.create(
+                input_file_id=input_file.id, endpoint="/v1/responses", completion_window="24h"
+            )
+            return batch.id
+        except Exception as e:
+            raise ProviderError(f"OpenAI - error submitting batch: {e}") from e
+
+    async def batch_done(self, batch_id: str) -> bool:
+        try:
+            batch = await self._client.batches.retrieve(batch_id)
+        except Exception as e:
+            raise ProviderError(f"OpenAI - error retrieving batch {batch_id}: {e}") from e
+        if batch.status == "failed":
+            raise BatchFailedError(f"OpenAI - batch {batch_id} failed: {batch.errors}")
+        # Expired and cancelled batches still have output for the requests they finished
+        return batch.status in ("completed", "expired", "cancelled")
+
+    async def batch_results(self, batch_id: str) -> AsyncIterator[BatchResult]:
+        try:
+            batch = await self._client.batches.retrieve(batch_id)
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if not file_id:
+                    continue
+                content = await self._client.files.content(file_id)
+                for line in content.text.splitlines():
+                    if line.strip():
+                        yield _batch_result(json.loads(line))
+        except Exception as e:
+            raise ProviderError(f"OpenAI - error reading batch {batch_id}: {e}") from e
+
+
+def _batch_result(record: dict[str, Any]) -> BatchResult:
+    """Map one line of a Batch API output/error file to a BatchResult."""
+    custom_id = record["custom_id"]
+    response = record.get("response") or {}
+    if record.get("error") or response.get("status_code") != 200:
+        return BatchResult(custom_id, error=str(record.get("error") or response.get("body")))
+    # Same text the SDK exposes as Response.output_text
+    text = "".join(
+        part.get("text", "")
+        for item in response["body"].get("output", [])
+        if item.get("type") == "message"
+        for part in item.get("content", [])
+        if part.get("type") == "output_text"
+    )
+    if not text:
+        return BatchResult(custom_id, error="Empty response from OpenAI")
+    return BatchResult(custom_id, output=text)
 
 
 class OpenAIEmbeddingProvider(EmbeddingProvider):
@@ -60,18 +162,27 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
         self,
         api_key: str | None = None,
         embedding_model: str = settings.EMBEDDING_MODEL or "text-embedding-3-small",
+        http_client: httpx.AsyncClient | None = None,
     ):
         api_key = api_key or settings.EMBEDDING_API_KEY or os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ProviderError("OpenAI API key is missing")
-        self._client = OpenAI(api_key=api_key)
+        self._client = AsyncOpenAI(api_key=api_key, http_client=http_client)
         self._model = embedding_model
 
     async def embed(self, text: str) -> list[float]:
         try:
-            response = await run_in_threadpool(
-                self._client.embeddings.create, input=text, model=self._model
-            )
+            response = await self._client.embeddings.create(input=text, model=self._model)
             return response.data[0].embedding
         except Exception as e:
             raise ProviderError(f"OpenAI - error generating embedding: {e}") from e
+
+    async def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        try:
+            response = await self._client.embeddings.create(input=texts, model=self._model)
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        except Exception as e:
+            raise ProviderError(f"OpenAI - error generating embeddings: {e}") from e
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        return await embed_in_batches(texts, self._embed_batch)
@@ -1,16 +1,24 @@
 """OpenRouter provider for AI agent system."""
 
 import logging
+from collections.abc import AsyncIterator
 from typing import Any
 
+import httpx
 from openai import AsyncOpenAI
 
+from app.agent.embedding_batches import embed_in_batches
 from app.agent.exceptions import ProviderError
+from app.agent.prompt import prompt_cache_stats
 from app.agent.providers.base import EmbeddingProvider, Provider
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Model families that only cache prompts at explicit cache_control breakpoints;
+# OpenAI, DeepSeek and others routed through OpenRouter cache prefixes automatically
+_CACHE_CONTROL_MODEL_PREFIXES = ("anthropic/", "google/")
+
 
 class OpenRouterProvider(Provider):
     """OpenRouter provider using OpenAI-compatible API."""
@@ -21,6 +29,7 @@ class OpenRouterProvider(Provider):
         model_name: str | None = None,
         api_base_url: str | None = None,
         opts: dict[str, Any] | None = None,
+        http_client: httpx.AsyncClient | None = None,
     ):
         """
         Initialize OpenRouter provider.
@@ -30,6 +39,7 @@ class OpenRouterProvider(Provider):
             model_name: Model to use (defaults to config)
             api_base_url: API base URL (defaults to OpenRouter URL)
             opts: Additional options for generation
+            http_client: Shared keep-alive HTTP client (see app.agent.registry)
         """
         if opts is None:
             opts = {}
@@ -51,12 +61,27 @@ class OpenRouterProvider(Provider):
         self._client = AsyncOpenAI(
             api_key=self.api_key,
             base_url=base_url,
+            http_client=http_client,
         )
 
         self.opts = opts
 
         logger.info(f"Initialized OpenRouterProvider with model: {self.model}")
 
+    def _messages(self, prompt: str, system: str | None) -> list[dict[str, Any]]:
+        """Static system prefix first (cache breakpoint where needed), then the prompt."""
+        messages: list[dict[str, Any]] = []
+        if system:
+            if settings.LLM_PROMPT_CACHING and self.model.startswith(_CACHE_CONTROL_MODEL_PREFIXES):
+                content: Any = [
+                    {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+                ]
+            else:
+                content = system
+            messages.append({"role": "system", "content": content})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
     async def __call__(self, prompt: str, **generation_args: Any) -> str:
         """
         Generate response using OpenRouter API.
@@ -80,14 +105,18 @@ class OpenRouterProvider(Provider):
             # Call OpenRouter API
             response = await self._client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "user", "content": prompt},
-                ],
+                messages=self._messages(prompt, generation_args.get("system")),
                 temperature=temperature,
                 top_p=top_p,
                 max_tokens=max_tokens,
             )
 
+            if response.usage is not None:
+                details = getattr(response.usage, "prompt_tokens_details", None)
+                prompt_cache_stats.record(
+                    response.usage.prompt_tokens, getattr(details, "cached_tokens", 0)
+                )
+
             # Extract response text
             content = response.choices[0].message.content
 
@@ -100,6 +129,34 @@ class OpenRouterProvider(Provider):
             logger.exception(f"OpenRouter error: {str(e)}")
             raise ProviderError(f"OpenRouter - Error generating response: {str(e)}") from e
 
+    async def stream(self, prompt: str, **generation_args: Any) -> AsyncIterator[str]:
+        """
+        Stream the response from OpenRouter as text deltas.
+
+        Raises:
+            ProviderError: If the stream cannot be opened or breaks mid-way
+        """
+        try:
+            stream = await self._client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(prompt, generation_args.get("system")),
+                temperature=generation_args.get("temperature", self.opts.get("temperature", 0)),
+                top_p=generation_args.get("top_p", self.opts.get("top_p", 0.9)),
+                max_tokens=generation_args.get("max_tokens", self.opts.get("max_tokens", 4000)),
+                stream=True,
+            )
+            async with stream:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+
+        except Exception as e:
+            logger.exception(f"OpenRouter streaming error: {str(e)}")
+            raise ProviderError(f"OpenRouter - Error streaming response: {str(e)}") from e
+
 
 class OpenRouterEmbeddingProvider(EmbeddingProvider):
     """OpenRouter embedding provider (uses OpenAI-compatible models)."""
@@ -109,6 +166,7 @@ class OpenRouterEmbeddingProvider(EmbeddingProvider):
         api_key: str | None = None,
         embedding_model: str | None = None,
         api_base_url: str | None = None,
+        http_client: httpx.AsyncClient | None = None,
     ):
         """
         Initialize OpenRouter embedding provider.
@@ -117,6 +175,7 @@ class OpenRouterEmbeddingProvider(EmbeddingProvider):
             api_key: OpenRouter API key
             embedding_model: Embedding model to use
             api_base_url: API base URL
+            http_client: Shared keep-alive HTTP client (see app.agent.registry)
         """
         # Get API key
         self.api_key = api_key or settings.OPENROUTER_API_KEY or settings.EMBEDDING_API_KEY
@@ -135,6 +194,7 @@ class OpenRouterEmbeddingProvider(EmbeddingProvider):
         self._client = AsyncOpenAI(
             api_key=self.api_key,
             base_url=base_url,
+            http_client=http_client,
         )
 
         logger.info(f"Initialized OpenRouterEmbeddingProvider with model: {self._model}")
@@ -162,3 +222,27 @@ class OpenRouterEmbeddingProvider(EmbeddingProvider):
         except Exception as e:
             logger.exception(f"OpenRouter embedding error: {str(e)}")
             raise ProviderError(f"OpenRouter - Error generating embedding: {str(e)}") from e
+
+    async def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        try:
+            response = await self._client.embeddings.create(input=texts, model=self._model)
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+        except Exception as e:
+            logger.exception(f"OpenRouter embedding error: {str(e)}")
+            raise ProviderError(f"OpenRouter - Error generating embeddings: {str(e)}") from e
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        """
+        Generate embeddings for several texts in token-budgeted batches.
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            Embedding vectors, in input order
+
+        Raises:
+            ProviderError: If embedding generation fails
+        """
+        return await embed_in_batches(texts, self._embed_batch)
@@ -0,0 +1,344 @@
+"""
+Latency-aware routing provider with hedged requests.
+
+RoutingProvider spreads completions over several configured backends
+(LLM_ROUTING_BACKENDS). Each backend tracks an EWMA of latency and error rate.
+Requests go to the best-ranked backend. If it hasn't answered within its p95
+latency budget, a hedged duplicate goes to the second-best backend, and
+whichever returns a valid response first wins; the loser is cancelled. A
+backend that fails outright fails over to the next one immediately.
+
+Streaming calls are hedged on time to first delta: the runner-up's stream
+races the primary until one of them produces a delta, and the router then
+commits to that stream and closes the other. A stream that errors after its
+first delta is not failed over, since deltas already reached the caller. A
+stream the consumer closes after its first delta (JSONWrapper's finish_stream)
+counts as a success. Stream latency samples are time to first delta, the
+quantity stream hedging is keyed on.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from typing import Any
+
+from app.agent.exceptions import ProviderError
+from app.agent.providers.base import Provider
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_EWMA_ALPHA = 0.2
+_ERROR_PENALTY = 4.0
+
+
+def parse_backends(spec: str) -> list[tuple[str, str]]:
+    """
+    Parse "provider:model,provider:model" into (provider, model) pairs.
+
+    The model part may itself contain ':' or '/' (e.g. OpenRouter model slugs).
+    """
+    backends: list[tuple[str, str]] = []
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        provider, sep, model = entry.partition(":")
+        if not sep or not provider.strip() or not model.strip():
+            raise ValueError(f"Invalid routing backend '{entry}', expected 'provider:model'")
+        backends.append((provider.strip(), model.strip()))
+    return backends
+
+
+class BackendHealth:
+    """Rolling latency/error statistics for one routed backend."""
+
+    def __init__(self, name: str, max_samples: int = 200):
+        self.name = name
+        self.ewma_latency: float | None = None
+        self.error_rate = 0.0
+        self.samples: deque[float] = deque(maxlen=max_samples)
+        self.requests = 0
+        self.failures = 0
+        self.hedges_sent = 0
+        self.hedge_wins = 0
+
+    def _observe_latency(self, latency: float) -> None:
+        self.samples.append(latency)
+        self.ewma_latency = (
+            latency
+            if self.ewma_latency is None
+            else (1 - _EWMA_ALPHA) * self.ewma_latency + _EWMA_ALPHA * latency
+        )
+
+    def record_success(self, latency: float) -> None:
+        self.requests += 1
+        self.error_rate *= 1 - _EWMA_ALPHA
+        self._observe_latency(latency)
+
+    def record_failure(self) -> None:
+        self.requests += 1
+        self.failures += 1
+        self.error_rate = (1 - _EWMA_ALPHA) * self.error_rate + _EWMA_ALPHA
+
+    def record_abandoned(self, elapsed: float) -> None:
+        """A hedging loser was cancelled; its latency was at least ``elapsed``."""
+        self._observe_latency(elapsed)
+
+    def percentile(self, q: float) -> float | None:
+        if len(self.samples) < settings.LLM_ROUTING_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(int(q * (len(ordered) - 1)), len(ordered) - 1)]
+
+    def score(self) -> float:
+        """Lower is better. Untried backends score 0 so they get explored."""
+        if self.ewma_latency is None:
+            return 0.0
+        return self.ewma_latency * (1.0 + _ERROR_PENALTY * self.error_rate)
+
+    def get_stats(self) -> dict[str, Any]:
+        p95 = self.percentile(settings.LLM_HEDGE_PERCENTILE)
+        return {
+            "backend": self.name,
+            "ewma_latency_seconds": round(self.ewma_latency, 3) if self.ewma_latency else None,
+            "p95_latency_seconds": round(p95, 3) if p95 is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "hedges_sent": self.hedges_sent,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+class BackendHealthRegistry:
+    """Process-wide health stats, shared by every RoutingProvider instance."""
+
+    def __init__(self) -> None:
+        self._health: dict[str, BackendHealth] = {}
+
+    def get(self, name: str) -> BackendHealth:
+        health = self._health.get(name)
+        if health is None:
+            health = BackendHealth(name)
+            self._health[name] = health
+        return health
+
+    def get_stats(self) -> list[dict[str, Any]]:
+        return [health.get_stats() for health in self._health.values()]
+
+
+backend_health = BackendHealthRegistry()
+
+
+class RoutingProvider(Provider):
+    """Route each call to the best backend and hedge to the runner-up on slow calls."""
+
+    def __init__(
+        self,
+        backends: list[tuple[str, Provider]],
+        health: BackendHealthRegistry | None = None,
+        hedging: bool = settings.LLM_HEDGING_ENABLED,
+    ):
+        """
+        Args:
+            backends: (name, provider) pairs, in configured preference order
+            health: Stats registry (defaults to the process-wide one)
+            hedging: Send a duplicate to the second-best backend past the latency budget
+        """
+        if not backends:
+            raise ProviderError("RoutingProvider needs at least one backend")
+        self._backends = backends
+        self._health = health or backend_health
+        self._hedging = hedging
+
+    def _rank(self) -> list[tuple[str, Provider]]:
+        # sorted() is stable, so ties keep the configured preference order
+        return sorted(self._backends, key=lambda backend: self._health.get(backend[0]).score())
+
+    def _hedge_delay(self, name: str) -> float:
+        p95 = self._health.get(name).percentile(settings.LLM_HEDGE_PERCENTILE)
+        if p95 is None:
+            return settings.LLM_HEDGE_DEFAULT_DELAY_SECONDS
+        return max(p95, settings.LLM_HEDGE_MIN_DELAY_SECONDS)
+
+    async def _timed_call(
+        self, name: str, provider: Provider, prompt: str, generation_args: dict[str, Any]
+    ) -> str:
+        health = self._health.get(name)
+        started = time.monotonic()
+        try:
+            result = await provider(prompt, **generation_args)
+        except asyncio.CancelledError:
+            health.record_abandoned(time.monotonic() - started)
+            raise
+        except Exception:
+            health.record_failure()
+            raise
+        if not result or not result.strip():
+            health.record_failure()
+            raise ProviderError(f"{name} returned an empty response")
+        health.record_success(time.monotonic() - started)
+        return result
+
+    async def __call__(self, prompt: str, **generation_args: Any) -> str:
+        ranked = self._rank()
+        fallbacks = ranked[1:]
+        tasks: dict[asyncio.Task, str] = {}
+        hedge_name: str | None = None
+
+        def launch(name: str, provider: Provider) -> None:
+            task = asyncio.create_task(self._timed_call(name, provider, prompt, generation_args))
+            tasks[task] = name
+
+        primary_name, primary = ranked[0]
+        launch(primary_name, primary)
+        hedge_at = time.monotonic() + self._hedge_delay(primary_name)
+        last_error: BaseException | None = None
+
+        try:
+            while tasks:
+                timeout = None
+                if self._hedging and fallbacks and hedge_name is None:
+                    timeout = max(hedge_at - time.monotonic(), 0.0)
+
+                done, _ = await asyncio.wait(
+                    tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Latency budget exceeded: hedge to the runner-up
+                    hedge_name, hedge = fallbacks.pop(0)
+                    self._health.get(hedge_name).hedges_sent += 1
+                    logger.info(f"Hedging slow call on {primary_name} to {hedge_name}")
+                    launch(hedge_name, hedge)
+                    continue
+
+                for task in done:
+                    name = tasks.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        last_error = e
+                        logger.warning(f"Routed backend {name} failed: {e}")
+                        continue
+                    if name == hedge_name:
+                        self._health.get(name).hedge_wins += 1
+                    return result
+
+                # Everything in flight failed: fail over to the next backend now
+                if not tasks and fallbacks:
+                    next_name, next_provider = fallbacks.pop(0)
+                    launch(next_name, next_provider)
+
+            raise ProviderError(f"All routed LLM backends failed: {last_error}") from last_error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def stream(self, prompt: str, **generation_args: Any) -> AsyncIterator[str]:
+        ranked = self._rank()
+        fallbacks = ranked[1:]
+        # Streams race only until their first delta: task -> (name, stream, start time)
+        racing: dict[asyncio.Task, tuple[str, AsyncIterator[str], float]] = {}
+        losers: list[tuple[str, AsyncIterator[str], float]] = []
+        # Winner: (name, stream, time to first delta, first delta)
+        winner: tuple[str, AsyncIterator[str], float, str] | None = None
+        hedge_name: str | None = None
+
+        def launch(name: str, provider: Provider) -> None:
+            inner = provider.stream(prompt, **generation_args)
+            task = asyncio.create_task(_first_delta(inner))
+            racing[task] = (name, inner, time.monotonic())
+
+        primary_name, primary = ranked[0]
+        launch(primary_name, primary)
+        hedge_at = time.monotonic() + self._hedge_delay(primary_name)
+        last_error: BaseException | None = None
+
+        try:
+            while racing and winner is None:
+                timeout = None
+                if self._hedging and fallbacks and hedge_name is None:
+                    timeout = max(hedge_at - time.monotonic(), 0.0)
+
+                done, _ = await asyncio.wait(
+                    racing, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # No first delta within the latency budget: hedge to the runner-up
+                    hedge_name, hedge = fallbacks.pop(0)
+                    self._health.get(hedge_name).hedges_sent += 1
+                    logger.info(f"Hedging slow stream on {primary_name} to {hedge_name}")
+                    launch(hedge_name, hedge)
+                    continue
+
+                for task in done:
+                    name, inner, started = racing.pop(task)
+                    try:
+                        first = task.result()
+                    except Exception as e:
+                        if isinstance(e, StopAsyncIteration):
+                            e = ProviderError(f"{name} returned an empty response")
+                        self._health.get(name).record_failure()
+                        last_error = e
+                        logger.warning(f"Routed backend {name} failed to stream: {e}")
+                        continue
+                    if winner is None:
+                        winner = (name, inner, time.monotonic() - started, first)
+                    else:
+                        losers.append((name, inner, started))
+
+                # Everything in flight failed: fail over to the next backend now
+                if winner is None and not racing and fallbacks:
+                    next_name, next_provider = fallbacks.pop(0)
+                    launch(next_name, next_provider)
+        finally:
+            # Commit to the winner: abort every other stream still racing
+            for task, (name, inner, started) in racing.items():
+                task.cancel()
+                losers.append((name, inner, started))
+            await asyncio.gather(*racing, return_exceptions=True)
+            for name, inner, started in losers:
+                self._health.get(name).record_abandoned(time.monotonic() - started)
+                await _close_stream(inner)
+
+        if winner is None:
+            raise ProviderError(f"All routed LLM backends failed: {last_error}") from last_error
+
+        name, inner, first_delta_latency, first = winner
+        health = self._health.get(name)
+        if name == hedge_name:
+            health.hedge_wins += 1
+        try:
+            async with aclosing(inner):
+                yield first
+                async for delta in inner:
+                    yield delta
+        except GeneratorExit:
+            # Closed by the consumer once it had the full response (finish_stream)
+            health.record_success(first_delta_latency)
+            raise
+        except Exception:
+            # Deltas already reached the caller; switching backends would garble output
+            health.record_failure()
+            raise
+        health.record_success(first_delta_latency)
+
+
+async def _first_delta(stream: AsyncIterator[str]) -> str:
+    return await anext(stream)
+
+
+async def _close_stream(stream: AsyncIterator[str]) -> None:
+    aclose = getattr(stream, "aclose", None)
+    if aclose is None:
+        return
+    try:
+        await aclose()
+    except Exception as e:
+        logger.debug(f"Error closing abandoned stream: {e}")
@@ -0,0 +1,273 @@
+"""
+Process-wide registry of pooled LLM and embedding providers.
+
+Building a provider per call means a fresh ``AsyncOpenAI`` client, a fresh
+connection pool and a fresh TLS handshake for every completion. The registry
+keeps one provider per (kind, provider, model, base_url, api_key) and one
+keep-alive ``httpx.AsyncClient`` per (provider, base_url), so repeated calls
+reuse warm connections.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _http2_available() -> bool:
+    """HTTP/2 support in httpx needs the optional ``h2`` package."""
+    try:
+        import h2  # type: ignore  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _fingerprint(secret: str | None) -> str:
+    """Short, non-reversible identifier for an API key (safe to log and key on)."""
+    if not secret:
+        return ""
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class PoolLimits:
+    """Tunable HTTP connection pool limits for pooled provider clients."""
+
+    max_connections: int = settings.LLM_HTTP_MAX_CONNECTIONS
+    max_keepalive_connections: int = settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS
+    keepalive_expiry: float = settings.LLM_HTTP_KEEPALIVE_EXPIRY
+    http2: bool = settings.LLM_HTTP2
+    timeout: float = settings.LLM_HTTP_TIMEOUT
+    connect_timeout: float = settings.LLM_HTTP_CONNECT_TIMEOUT
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response stream wrapper that reports when the body has been released."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[], None]):
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._on_close()
+
+
+class _InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport that counts in-flight requests for saturation stats."""
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_requests = 0
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.in_flight += 1
+        self.total_requests += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            self._release()
+            raise
+        # The connection stays checked out until the body is consumed/closed
+        response.stream = _TrackedStream(response.stream, self._release)  # type: ignore[arg-type]
+        return response
+
+    def open_connections(self) -> int:
+        pool = getattr(self, "_pool", None)
+        return len(getattr(pool, "connections", []) or [])
+
+
+@dataclass
+class _ConnectionPool:
+    """A shared keep-alive client for one upstream (provider, base_url)."""
+
+    provider: str
+    base_url: str
+    client: httpx.AsyncClient
+    transport: _InstrumentedTransport
+    limits: PoolLimits
+    created_at: float
+
+    def stats(self) -> dict[str, Any]:
+        in_flight = self.transport.in_flight
+        return {
+            "provider": self.provider,
+            "base_url": self.base_url,
+            "http2": self.limits.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "open_connections": self.transport.open_connections(),
+            "in_flight": in_flight,
+            "peak_in_flight": self.transport.peak_in_flight,
+            "total_requests": self.transport.total_requests,
+            "saturation": round(in_flight / max(self.limits.max_connections, 1), 3),
+            "uptime_seconds": round(time.monotonic() - self.created_at, 1),
+        }
+
+
+class ProviderRegistry:
+    """
+    Process-wide cache of provider instances backed by shared connection pools.
+
+    Providers are keyed by (kind, provider, model, base_url, api_key fingerprint);
+    HTTP clients are shared per (provider, base_url) so that e.g. the chat and
+    embedding providers for OpenRouter use the same warm connections.
+    """
+
+    def __init__(self, limits: PoolLimits | None = None):
+        self._limits = limits or PoolLimits()
+        self._lock = threading.Lock()
+        self._pools: dict[tuple[str, str], _ConnectionPool] = {}
+        self._providers: dict[tuple[str, str, str, str, str], Any] = {}
+
+    @property
+    def limits(self) -> PoolLimits:
+        return self._limits
+
+    def configure(self, limits: PoolLimits) -> None:
+        """Set pool limits. Only pools created after this call are affected."""
+        self._limits = limits
+
+    def _build_pool(self, provider: str, base_url: str) -> _ConnectionPool:
+        limits = self._limits
+        http2 = limits.http2 and _http2_available()
+        if limits.http2 and not http2:
+            logger.warning("LLM_HTTP2 enabled but 'h2' is not installed; falling back to HTTP/1.1")
+            limits = PoolLimits(
+                max_connections=limits.max_connections,
+                max_keepalive_connections=limits.max_keepalive_connections,
+                keepalive_expiry=limits.keepalive_expiry,
+                http2=False,
+                timeout=limits.timeout,
+                connect_timeout=limits.connect_timeout,
+            )
+
+        transport = _InstrumentedTransport(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=limits.max_connections,
+                max_keepalive_connections=limits.max_keepalive_connections,
+                keepalive_expiry=limits.keepalive_expiry,
+            ),
+        )
+        client = httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(limits.timeout, connect=limits.connect_timeout),
+        )
+        logger.info(
+            f"Created pooled HTTP client for {provider} ({base_url or 'default'}), "
+            f"http2={http2}, max_connections={limits.max_connections}"
+        )
+        return _ConnectionPool(
+            provider=provider,
+            base_url=base_url,
+            client=client,
+            transport=transport,
+            limits=limits,
+            created_at=time.monotonic(),
+        )
+
+    def http_client(self, provider: str, base_url: str | None = None) -> httpx.AsyncClient:
+        """Return the shared keep-alive client for an upstream, creating it if needed."""
+        pool_key = (provider, base_url or "")
+        with self._lock:
+            pool = self._pools.get(pool_key)
+            if pool is None or pool.client.is_closed:
+                pool = self._build_pool(provider, base_url or "")
+                self._pools[pool_key] = pool
+            return pool.client
+
+    def get_or_create(
+        self,
+        kind: str,
+        provider: str,
+        model: str,
+        base_url: str | None,
+        api_key: str | None,
+        factory: Callable[[httpx.AsyncClient], T],
+    ) -> T:
+        """
+        Return the cached provider for this key, building it with ``factory`` on a miss.
+
+        Args:
+            kind: "llm" or "embedding"
+            provider: Provider name (e.g. "openrouter", "openai")
+            model: Model name
+            base_url: API base URL (None for the provider default)
+            api_key: API key (None for the provider default)
+            factory: Callable receiving the shared http client and returning a provider
+
+        Returns:
+            Pooled provider instance
+        """
+        key = (kind, provider, model, base_url or "", _fingerprint(api_key))
+        instance = self._providers.get(key)
+        if instance is not None:
+            return instance  # type: ignore[no-any-return]
+
+        http_client = self.http_client(provider, base_url)
+        with self._lock:
+            instance = self._providers.get(key)
+            if instance is None:
+                instance = factory(http_client)
+                self._providers[key] = instance
+        return instance  # type: ignore[no-any-return]
+
+    def stats(self) -> dict[str, Any]:
+        """Pool saturation and cache statistics for health/monitoring endpoints."""
+        with self._lock:
+            pools = [pool.stats() for pool in self._pools.values()]
+            providers = [
+                {"kind": kind, "provider": provider, "model": model, "base_url": base_url}
+                for kind, provider, model, base_url, _ in self._providers
+            ]
+        return {
+            "providers": providers,
+            "provider_count": len(providers),
+            "pools": pools,
+            "pool_count": len(pools),
+        }
+
+    async def aclose(self) -> None:
+        """Close every pooled client. Called on application shutdown."""
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+            self._providers.clear()
+        for pool in pools:
+            try:
+                await pool.client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close HTTP client for {pool.provider}: {e}")
+        if pools:
+            logger.info(f"Closed {len(pools)} pooled LLM HTTP client(s)")
+
+
+provider_registry = ProviderRegistry()
@@ -0,0 +1,148 @@
+"""
+Vectorized cosine similarity for one-to-many and many-to-many scoring.
+
+Embeddings are L2-normalized once, when they are loaded into a
+SimilarityMatrix, and kept as a contiguous float32 (or float16, half the
+memory) array. After that, cosine similarity is a plain matrix product. top_k
+walks the matrix in blocks of SIMILARITY_CHUNK_ROWS rows. Each block keeps only
+its best k candidates (np.argpartition), so the score buffer never grows past
+queries x chunk rows, whatever the size of the pool.
+
+max_sim scores two multi-section documents by late interaction: each query
+section is matched to its closest document section, and the matches are averaged.
+"""
+
+from collections.abc import Hashable, Sequence
+from typing import Any
+
+import numpy as np
+
+from app.core.config import settings
+
+_SUPPORTED_DTYPES = ("float32", "float16")
+
+
+def normalize_rows(vectors: Any, dtype: str = "float32") -> np.ndarray:
+    """
+    Return ``vectors`` as a contiguous 2-D array of unit-length rows.
+
+    Zero vectors stay zero, so they score 0.0 against everything, as
+    ScoreImprovementService.calculate_cosine_similarity does.
+    """
+    if dtype not in _SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported similarity dtype '{dtype}'")
+    matrix = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return np.ascontiguousarray(matrix, dtype=dtype)
+
+
+class SimilarityMatrix:
+    """A pool of normalized embeddings (jobs or candidates) keyed by id."""
+
+    def __init__(
+        self,
+        ids: Sequence[Hashable],
+        embeddings: Any,
+        dtype: str = settings.SIMILARITY_DTYPE,
+    ):
+        self.ids = list(ids)
+        self.vectors = normalize_rows(embeddings, dtype) if self.ids else np.empty((0, 0), dtype)
+        if len(self.ids) != len(self.vectors):
+            raise ValueError(f"Got {len(self.ids)} ids for {len(self.vectors)} embeddings")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def scores(self, query: Any) -> np.ndarray:
+        """Cosine similarity of one query embedding against every row."""
+        if not self.ids:
+            return np.empty(0, dtype=np.float32)
+        q = normalize_rows(query)[0]
+        return self.vectors.astype(np.float32, copy=False) @ q
+
+    def top_k(
+        self,
+        queries: Any,
+        k: int,
+        chunk_rows: int = settings.SIMILARITY_CHUNK_ROWS,
+    ) -> list[list[tuple[Hashable, float]]]:
+        """
+        Best ``k`` rows for each query, highest similarity first.
+
+        Args:
+            queries: One embedding or a 2-D array of embeddings
+            k: Matches per query (capped at the pool size)
+            chunk_rows: Rows scored per block
+
+        Returns:
+            One list of (id, score) per query
+        """
+        q = normalize_rows(queries)
+        if not self.ids or k <= 0:
+            return [[] for _ in range(len(q))]
+        indices, scores = top_k_similar(q, self.vectors, k, chunk_rows)
+        return [
+            [(self.ids[i], float(s)) for i, s in zip(row_idx, row_scores, strict=True)]
+            for row_idx, row_scores in zip(indices, scores, strict=True)
+        ]
+
+
+def max_sim(query_sections: Any, document_sections: Any) -> float:
+    """
+    Late-interaction similarity between two sets of section embeddings.
+
+    Each query section (e.g. a job requirement block) is scored against its
+    best-matching document section (e.g. the resume's experience section),
+    and the per-section maxima are averaged. 0.0 if either side is empty.
+    """
+    if len(query_sections) == 0 or len(document_sections) == 0:
+        return 0.0
+    scores = normalize_rows(query_sections) @ normalize_rows(document_sections).T
+    return float(scores.max(axis=1).mean())
+
+
+def top_k_similar(
+    queries: np.ndarray,
+    matrix: np.ndarray,
+    k: int,
+    chunk_rows: int = settings.SIMILARITY_CHUNK_ROWS,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Chunked top-k over pre-normalized rows.
+
+    Args:
+        queries: (q, d) unit-length query rows
+        matrix: (n, d) unit-length pool rows
+        k: Matches per query (capped at n)
+        chunk_rows: Pool rows scored per block
+
+    Returns:
+        (indices, scores), both (q, k) and sorted by descending score
+    """
+    k = min(k, len(matrix))
+    queries = queries.astype(np.float32, copy=False)
+    best_idx = np.empty((len(queries), 0), dtype=np.int64)
+    best_scores = np.empty((len(queries), 0), dtype=np.float32)
+
+    for start in range(0, len(matrix), max(1, chunk_rows)):
+        block = matrix[start : start + chunk_rows].astype(np.float32, copy=False)
+        block_scores = queries @ block.T
+        # Keep only this block's top k before merging with the running best
+        if block_scores.shape[1] > k:
+            part = np.argpartition(block_scores, -k, axis=1)[:, -k:]
+            block_scores = np.take_along_axis(block_scores, part, axis=1)
+        else:
+            part = np.broadcast_to(np.arange(block_scores.shape[1]), block_scores.shape)
+        cand_idx = np.concatenate([best_idx, part + start], axis=1)
+        cand_scores = np.concatenate([best_scores, block_scores], axis=1)
+        if cand_scores.shape[1] > k:
+            keep = np.argpartition(cand_scores, -k, axis=1)[:, -k:]
+            cand_idx = np.take_along_axis(cand_idx, keep, axis=1)
+            cand_scores = np.take_along_axis(cand_scores, keep, axis=1)
+        best_idx, best_scores = cand_idx, cand_scores
+
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return np.take_along_axis(best_idx, order, axis=1), np.take_along_axis(
+        best_scores, order, axis=1
+    )
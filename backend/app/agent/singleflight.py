@@ -0,0 +1,105 @@
+"""
+Async singleflight: collapse concurrent identical calls into one upstream request.
+
+When many requests ask for the same job-description extraction or the same
+embedding at the same time, only the first (the leader) calls the provider;
+the others await the leader's result. The upstream call runs in its own task,
+so a cancelled caller never cancels the work other callers are waiting for.
+The task is cancelled only when every caller waiting on it has gone away.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    """Counters describing how many calls were collapsed."""
+
+    calls: int = 0
+    executions: int = 0
+    collapsed: int = 0
+    cancelled: int = 0
+    failures: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "collapsed": self.collapsed,
+            "cancelled": self.cancelled,
+            "failures": self.failures,
+            "collapse_rate": round(self.collapsed / self.calls, 3) if self.calls else 0.0,
+        }
+
+
+@dataclass
+class _Call:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Deduplicate concurrent async calls that share a key."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[str, _Call] = {}
+        self.stats = SingleFlightStats()
+
+    def _forget(self, key: str, call: _Call, task: asyncio.Task) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Mark the exception as retrieved even if every waiter was cancelled
+        if not task.cancelled() and task.exception() is not None:
+            self.stats.failures += 1
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``fn`` once for all concurrent callers using ``key``.
+
+        Args:
+            key: Identity of the request (callers with equal keys share a result)
+            fn: Coroutine factory performing the real call
+
+        Returns:
+            The result of the single shared call
+        """
+        self.stats.calls += 1
+        call = self._calls.get(key)
+        if call is None:
+            task: asyncio.Task = asyncio.ensure_future(fn())
+            call = _Call(task=task)
+            self._calls[key] = call
+            task.add_done_callback(lambda t, k=key, c=call: self._forget(k, c, t))
+            self.stats.executions += 1
+        else:
+            self.stats.collapsed += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)  # type: ignore[no-any-return]
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Last interested caller left: stop the upstream call
+                call.task.cancel()
+                self.stats.cancelled += 1
+                logger.debug(f"singleflight[{self.name}] cancelled orphaned call {key[:12]}")
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def get_stats(self) -> dict[str, Any]:
+        return {"name": self.name, "in_flight": self.in_flight(), **self.stats.to_dict()}
+
+
+llm_singleflight = SingleFlight("llm")
+embedding_singleflight = SingleFlight("embedding")
@@ -0,0 +1,183 @@
+"""
+Incremental JSON object parser for streamed LLM responses.
+
+Consumes response chunks as they arrive and tracks the top-level object with a
+small state machine, so each character is scanned once. Every top-level field is
+decoded as soon as its value closes, validated against an optional JSONSchema,
+and reported to the caller. Once the object closes the parser is ``done`` and
+the caller can stop generation; prose or code fences around the object are
+ignored.
+"""
+
+import json
+import re
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from ..exceptions import StrategyError
+
+# Characters that end a run of plain string content
+_STRING_SPECIAL = re.compile(r'["\\]')
+_WHITESPACE = " \t\r\n"
+
+_KEY, _COLON, _VALUE = range(3)
+
+
+@dataclass(frozen=True)
+class JSONSchema:
+    """
+    Expected shape of a JSON response.
+
+    Attributes:
+        fields: Field name -> accepted Python type(s) once decoded
+        required: Fields that must be present when the object closes
+    """
+
+    fields: Mapping[str, type | tuple[type, ...]] = field(default_factory=dict)
+    required: tuple[str, ...] = ()
+
+    def validate_field(self, key: str, value: Any) -> None:
+        expected = self.fields.get(key)
+        if expected is None or value is None:
+            return
+        # bool is an int subclass; don't let true/false pass as a score
+        if isinstance(value, bool) and bool not in _as_tuple(expected):
+            raise StrategyError(f"JSON schema error: field '{key}' must not be a boolean")
+        if not isinstance(value, expected):
+            raise StrategyError(f"JSON schema error: field '{key}' has type {type(value).__name__}")
+
+    def validate_complete(self, fields: Mapping[str, Any]) -> None:
+        missing = [key for key in self.required if key not in fields]
+        if missing:
+            raise StrategyError(f"JSON schema error: missing required fields {missing}")
+
+
+def _as_tuple(expected: type | tuple[type, ...]) -> tuple[type, ...]:
+    return expected if isinstance(expected, tuple) else (expected,)
+
+
+class IncrementalJSONParser:
+    """Single-pass parser for the first top-level JSON object in a text stream."""
+
+    def __init__(self, schema: JSONSchema | None = None):
+        self.schema = schema
+        self.done = False
+        self.failed = False
+        self._fields: dict[str, Any] = {}
+        self._started = False
+        self._phase = _KEY
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key: str | None = None
+        self._buf: list[str] = []
+
+    def result(self) -> dict[str, Any]:
+        """The parsed object (complete once ``done`` is True)."""
+        return dict(self._fields)
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        """
+        Consume the next chunk.
+
+        Returns:
+            (key, value) pairs for the top-level fields completed by this chunk
+
+        Raises:
+            StrategyError: If a completed field or the closed object violates the schema
+        """
+        completed: list[tuple[str, Any]] = []
+        i, n = 0, len(chunk)
+        while i < n and not self.done and not self.failed:
+            if not self._started:
+                start = chunk.find("{", i)
+                if start == -1:
+                    break
+                self._started, self._depth, self._phase = True, 1, _KEY
+                i = start + 1
+                continue
+
+            if self._in_string:
+                i = self._consume_string(chunk, i)
+                continue
+
+            ch = chunk[i]
+            i += 1
+            if self._phase == _KEY:
+                if ch in _WHITESPACE:
+                    continue
+                if ch == '"':
+                    self._in_string = True
+                    self._buf = [ch]
+                elif ch == "}":
+                    self._close()
+                else:
+                    self.failed = True
+            elif self._phase == _COLON:
+                if ch in _WHITESPACE:
+                    continue
+                if ch == ":":
+                    self._phase = _VALUE
+                    self._buf = []
+                else:
+                    self.failed = True
+            elif self._depth == 1 and ch in ",}":
+                self._finish_value(completed)
+                if ch == "}" and not self.failed:
+                    self._close()
+            else:
+                self._buf.append(ch)
+                if ch == '"':
+                    self._in_string = True
+                elif ch in "{[":
+                    self._depth += 1
+                elif ch in "}]":
+                    self._depth -= 1
+        return completed
+
+    def _consume_string(self, chunk: str, i: int) -> int:
+        if self._escape:
+            self._buf.append(chunk[i])
+            self._escape = False
+            return i + 1
+        match = _STRING_SPECIAL.search(chunk, i)
+        if match is None:
+            self._buf.append(chunk[i:])
+            return len(chunk)
+        end = match.start()
+        self._buf.append(chunk[i : end + 1])
+        if chunk[end] == "\\":
+            self._escape = True
+            return end + 1
+        self._in_string = False
+        if self._phase == _KEY:
+            try:
+                self._key = json.loads("".join(self._buf))
+            except json.JSONDecodeError:
+                self.failed = True
+            self._phase = _COLON
+        return end + 1
+
+    def _finish_value(self, completed: list[tuple[str, Any]]) -> None:
+        text = "".join(self._buf).strip()
+        self._buf = []
+        self._phase = _KEY
+        if not text or self._key is None:
+            self.failed = True
+            return
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            self.failed = True
+            return
+        if self.schema is not None:
+            self.schema.validate_field(self._key, value)
+        self._fields[self._key] = value
+        completed.append((self._key, value))
+        self._key = None
+
+    def _close(self) -> None:
+        self.done = True
+        if self.schema is not None:
+            self.schema.validate_complete(self._fields)
@@ -1,11 +1,13 @@
 import json
 import logging
 import re
+from collections.abc import Callable
 from typing import Any
 
 from ..exceptions import StrategyError
-from ..providers.base import Provider
+from ..providers.base import Provider, finish_stream
 from .base import Strategy
+from .streaming_json import IncrementalJSONParser, JSONSchema
 
 logger = logging.getLogger(__name__)
 
@@ -14,62 +16,126 @@ FENCE_PATTERN = re.compile(r"```(?:json)?\s*([\s\S]*?)```", re.IGNORECASE)
 
 
 class JSONWrapper(Strategy):
+    """
+    Parse the provider response as a JSON object.
+
+    The response is streamed through an IncrementalJSONParser: fields are decoded
+    (and checked against ``json_schema`` when given) as they arrive, and generation
+    is stopped as soon as the object closes. Only responses that start with ``{``
+    are streamed this way; anything else (a top-level array, prose, code fences) and
+    responses the incremental parser can't handle are read in full and go through
+    the heuristics in parse_json_response.
+    """
+
     async def __call__(
         self, prompt: str, provider: Provider, **generation_args: Any
     ) -> dict[str, Any]:
         """
         Wrapper strategy to format the prompt as JSON with the help of LLM.
+
+        Args:
+            json_schema: Optional JSONSchema validated as fields arrive
+            on_field: Optional callback invoked with (key, value) per completed field
         """
-        response = await provider(prompt, **generation_args)
-        response = response.strip()
-        logger.info(f"provider response: {response}")
+        schema: JSONSchema | None = generation_args.pop("json_schema", None)
+        on_field: Callable[[str, Any], None] | None = generation_args.pop("on_field", None)
+        parser = IncrementalJSONParser(schema)
+        chunks: list[str] = []
+        # Decided by the first non-whitespace character: only a bare object can
+        # finish early, an array would be cut down to its first element
+        incremental: bool | None = None
 
-        # 1) Try direct parse first
+        stream = provider.stream(prompt, **generation_args)
         try:
-            return json.loads(response)  # type: ignore[no-any-return]
-        except json.JSONDecodeError:
-            pass
+            async for chunk in stream:
+                chunks.append(chunk)
+                if incremental is None:
+                    head = chunk.lstrip()
+                    if not head:
+                        continue
+                    incremental = head[0] == "{"
+                if not incremental:
+                    continue
+                for key, value in parser.feed(chunk):
+                    if on_field is not None:
+                        on_field(key, value)
+                if parser.done:
+                    # Object closed: stop generating trailing prose/fences
+                    await finish_stream(stream)
+                    break
+        finally:
+            await stream.aclose()
+
+        if parser.done:
+            logger.info(f"provider response parsed incrementally ({len(parser.result())} fields)")
+            return parser.result()
+
+        result = parse_json_response("".join(chunks))
+        if schema is not None:
+            if not isinstance(result, dict):
+                raise StrategyError("JSON schema error: expected a JSON object")
+            for key, value in result.items():
+                schema.validate_field(key, value)
+            schema.validate_complete(result)
+        return result
 
-        # 2) If wrapped in fenced code blocks, try all and return the first valid JSON
-        #    Matches ```json\n...``` or ```\n...``` variants
-        for fence_match in FENCE_PATTERN.finditer(response):
-            fenced = fence_match.group(1).strip()
-            try:
-                return json.loads(fenced)  # type: ignore[no-any-return]
-            except json.JSONDecodeError:
-                continue
 
-        # 3) Fallback: extract the largest JSON-looking object block { ... }
-        obj_start, obj_end = response.find("{"), response.rfind("}")
+def parse_json_response(response: str) -> dict[str, Any]:
+    """
+    Parse a complete response that should contain a JSON object.
 
-        candidates: list[tuple[int, str]] = []
-        if obj_start != -1 and obj_end != -1 and obj_end > obj_start:
-            candidates.append((obj_start, response[obj_start : obj_end + 1]))
+    Tries a direct parse, then fenced code blocks, then the outermost brace block.
 
-        for _, candidate in candidates:
+    Raises:
+        StrategyError: If no JSON object can be recovered
+    """
+    response = response.strip()
+    logger.info(f"provider response: {response}")
+
+    # 1) Try direct parse first
+    try:
+        return json.loads(response)  # type: ignore[no-any-return]
+    except json.JSONDecodeError:
+        pass
+
+    # 2) If wrapped in fenced code blocks, try all and return the first valid JSON
+    #    Matches ```json\n...``` or ```\n...``` variants
+    for fence_match in FENCE_PATTERN.finditer(response):
+        fenced = fence_match.group(1).strip()
+        try:
+            return json.loads(fenced)  # type: ignore[no-any-return]
+        except json.JSONDecodeError:
+            continue
+
+    # 3) Fallback: extract the largest JSON-looking object block { ... }
+    obj_start, obj_end = response.find("{"), response.rfind("}")
+
+    candidates: list[tuple[int, str]] = []
+    if obj_start != -1 and obj_end != -1 and obj_end > obj_start:
+        candidates.append((obj_start, response[obj_start : obj_end + 1]))
+
+    for _, candidate in candidates:
+        try:
+            return json.loads(candidate)  # type: ignore[no-any-return]
+        except json.JSONDecodeError:
+            candidate2 = candidate.replace("```", "").strip()
             try:
-                return json.loads(candidate)  # type: ignore[no-any-return]
+                return json.loads(candidate2)  # type: ignore[no-any-return]
             except json.JSONDecodeError:
-                candidate2 = candidate.replace("```", "").strip()
-                try:
-                    return json.loads(candidate2)  # type: ignore[no-any-return]
-                except json.JSONDecodeError:
-                    continue
+                continue
+
+    if candidates:
+        # If we had candidates but none parsed, log the last error contextfully
+        _err_preview = response if len(response) <= 2000 else response[:2000] + "... (truncated)"
+        logger.error(
+            "provider returned non-JSON. failed to parse candidate blocks - response: %s",
+            _err_preview,
+        )
+        raise StrategyError("JSON parsing error: failed to parse candidate JSON blocks")
 
-        if candidates:
-            # If we had candidates but none parsed, log the last error contextfully
-            _err_preview = (
-                response if len(response) <= 2000 else response[:2000] + "... (truncated)"
-            )
-            logger.error(
-                "provider returned non-JSON. failed to parse candidate blocks - response: %s",
-                _err_preview,
-            )
-            raise StrategyError("JSON parsing error: failed to parse candidate JSON blocks")
-
-        # 4) No braces found: fail clearly
-        logger.error("provider response contained no JSON object braces: %s", response)
-        raise StrategyError("JSON parsing error: no JSON object detected in provider response")
+    # 4) No braces found: fail clearly
+    logger.error("provider response contained no JSON object braces: %s", response)
+    raise StrategyError("JSON parsing error: no JSON object detected in provider response")
 
 
 class MDWrapper(Strategy):
@@ -1,10 +1,16 @@
 import logging
+from collections.abc import AsyncIterator
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from app.core.config import settings
+from app.core.exceptions import ProviderError
+from app.middleware.credit_check import require_pro_or_credits
 from app.models.llm_models import (
+    BulkSimilarityRequest,
+    BulkSimilarityResponse,
     EmbeddingRequest,
     EmbeddingResponse,
     TextGenerationRequest,
@@ -12,14 +18,91 @@ from app.models.llm_models import (
 )
 from app.services.llm.embedding_service import EmbeddingService, get_embedding_service
 from app.services.llm.llm_service import LLMService, get_llm_service
+from app.services.score_improvement_service import (
+    ScoreImprovementService,
+    get_score_improvement_service,
+)
 from app.services.security.middleware import validate_and_sanitize_request
 from app.services.supabase.auth import SupabaseAuthService, get_auth_service
+from app.utils.sse import SSE_HEADERS, sse_event
 
 router = APIRouter()
 security = HTTPBearer()  # Make authentication required
 logger = logging.getLogger(__name__)
 
 
+async def _authenticate(
+    credentials: HTTPAuthorizationCredentials, auth_service: SupabaseAuthService
+) -> dict:
+    """Resolve the bearer token to a user or raise 401."""
+    try:
+        user = await auth_service.get_user(credentials.credentials)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication credentials",
+            )
+        logger.info(f"User authenticated: {user.get('email', 'Unknown user')}")
+        return user
+    except Exception as auth_error:
+        logger.error(f"Authentication error: {str(auth_error)}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Authentication failed: {str(auth_error)}",
+            headers={"WWW-Authenticate": "Bearer"},
+        ) from auth_error
+
+
+async def _sanitize_prompt(
+    request: TextGenerationRequest,
+    credentials: HTTPAuthorizationCredentials,
+    http_request: Request,
+    user_id: str | None,
+) -> str:
+    """Validate and sanitize the generation prompt or raise 400."""
+    try:
+        sanitized_request_data = await validate_and_sanitize_request(
+            request.dict(), credentials=credentials, request=http_request
+        )
+
+        # Update request with sanitized data
+        sanitized_prompt = sanitized_request_data.get("prompt", request.prompt)
+
+        # Log sanitization warnings if any
+        if (
+            hasattr(sanitized_request_data, "prompt")
+            and len(sanitized_request_data["prompt"].warnings) > 0
+        ):
+            warnings = sanitized_request_data["prompt"].warnings
+            logger.warning(f"Input sanitization warnings for user {user_id}: {warnings}")
+
+        return sanitized_prompt
+
+    except HTTPException:
+        # Re-raise HTTP exceptions from validation
+        raise
+    except Exception as sanitization_error:
+        logger.error(f"Input sanitization error: {str(sanitization_error)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Input validation failed"
+        ) from sanitization_error
+
+
+def _check_api_key(provider: str | None) -> None:
+    """Raise ValueError if the provider's API key is not configured."""
+    if provider == "openai" and not settings.OPENAI_API_KEY:
+        error_msg = (
+            "OpenAI API key not configured. Please set the OPENAI_API_KEY environment variable."
+        )
+        raise ValueError(error_msg)
+    elif provider == "anthropic" and not settings.ANTHROPIC_API_KEY:
+        error_msg = (
+            "Anthropic API key not configured. "
+            "Please set the ANTHROPIC_API_KEY environment variable."
+        )
+        raise ValueError(error_msg)
+
+
 @router.post("/generate", response_model=TextGenerationResponse)
 async def generate_text(
     request: TextGenerationRequest,
@@ -35,49 +118,11 @@ async def generate_text(
             f"Received text generation request with model: {request}, provider: {credentials}"
         )
 
-        # Validate user authentication
-        try:
-            user = await auth_service.get_user(credentials.credentials)
-            if user is None:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid authentication credentials",
-                )
-            user_id = user.get("id")
-            logger.info(f"User authenticated: {user.get('email', 'Unknown user')}")
-        except Exception as auth_error:
-            logger.error(f"Authentication error: {str(auth_error)}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail=f"Authentication failed: {str(auth_error)}",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-
-        # Validate and sanitize input
-        try:
-            sanitized_request_data = await validate_and_sanitize_request(
-                request.dict(), credentials=credentials, request=http_request
-            )
-
-            # Update request with sanitized data
-            sanitized_prompt = sanitized_request_data.get("prompt", request.prompt)
-
-            # Log sanitization warnings if any
-            if (
-                hasattr(sanitized_request_data, "prompt")
-                and len(sanitized_request_data["prompt"].warnings) > 0
-            ):
-                warnings = sanitized_request_data["prompt"].warnings
-                logger.warning(f"Input sanitization warnings for user {user_id}: {warnings}")
-
-        except HTTPException:
-            # Re-raise HTTP exceptions from validation
-            raise
-        except Exception as sanitization_error:
-            logger.error(f"Input sanitization error: {str(sanitization_error)}")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, detail="Input validation failed"
-            )
+        # Validate user authentication and sanitize input
+        user = await _authenticate(credentials, auth_service)
+        sanitized_prompt = await _sanitize_prompt(
+            request, credentials, http_request, user.get("id")
+        )
 
         # Get the right LLM service based on provider
         try:
@@ -93,18 +138,7 @@ async def generate_text(
             logger.info(f"Generating text with sanitized prompt (length: {len(sanitized_prompt)})")
 
             # Check if API keys are configured
-            if request.provider == "openai" and not settings.OPENAI_API_KEY:
-                error_msg = (
-                    "OpenAI API key not configured. "
-                    "Please set the OPENAI_API_KEY environment variable."
-                )
-                raise ValueError(error_msg)
-            elif request.provider == "anthropic" and not settings.ANTHROPIC_API_KEY:
-                error_msg = (
-                    "Anthropic API key not configured. "
-                    "Please set the ANTHROPIC_API_KEY environment variable."
-                )
-                raise ValueError(error_msg)
+            _check_api_key(request.provider)
 
             response = await llm_service.generate_text(
                 prompt=sanitized_prompt,  # Use sanitized prompt
@@ -133,6 +167,61 @@ async def generate_text(
         )
 
 
+@router.post("/generate/stream")
+async def stream_text(
+    request: TextGenerationRequest,
+    http_request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    auth_service: SupabaseAuthService = Depends(get_auth_service),
+) -> StreamingResponse:
+    """
+    Stream generated text as Server-Sent Events.
+
+    Emits "token" events ({"text": delta}) as the model produces output, then a
+    single "done" event, or an "error" event if generation fails mid-stream.
+    Authentication, validation and configuration errors are returned before the
+    stream starts, with the same status codes as /generate.
+    """
+    user = await _authenticate(credentials, auth_service)
+    sanitized_prompt = await _sanitize_prompt(request, credentials, http_request, user.get("id"))
+
+    try:
+        llm_service = get_llm_service(request.provider)
+    except ValueError as provider_error:
+        logger.error(f"Provider error: {str(provider_error)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(provider_error)
+        ) from provider_error
+
+    try:
+        _check_api_key(request.provider)
+    except ValueError as config_error:
+        logger.error(f"Text streaming error: {str(config_error)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Text generation failed: {str(config_error)}",
+        ) from config_error
+
+    async def events() -> AsyncIterator[str]:
+        length = 0
+        try:
+            async for delta in llm_service.stream_text(
+                prompt=sanitized_prompt,
+                model=request.model,
+                max_tokens=request.max_tokens,
+                temperature=request.temperature,
+            ):
+                length += len(delta)
+                yield sse_event("token", {"text": delta})
+            logger.info(f"Text streaming finished, response length: {length}")
+            yield sse_event("done", {"model": request.model, "length": length})
+        except Exception as generation_error:
+            logger.error(f"Text streaming error: {str(generation_error)}", exc_info=True)
+            yield sse_event("error", {"detail": f"Text generation failed: {str(generation_error)}"})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.post("/embedding", response_model=EmbeddingResponse)
 async def create_embedding(
     request: EmbeddingRequest,
@@ -200,3 +289,55 @@ async def create_embedding(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=f"Embedding creation failed: {str(e)}"
         )
+
+
+@router.post("/similarity/bulk", response_model=BulkSimilarityResponse)
+async def bulk_similarity(
+    request: BulkSimilarityRequest,
+    current_user: dict = Depends(require_pro_or_credits),
+    score_service: ScoreImprovementService = Depends(get_score_improvement_service),
+):
+    """
+    Score each query against a pool of texts by embedding similarity.
+
+    E.g. one resume against hundreds of job descriptions, or one job against a
+    candidate pool. No LLM calls are made, but every text is embedded, so the
+    endpoint needs Pro status or credits. Texts blocked by bias analysis are
+    left out (a blocked query gets no matches) instead of failing the request.
+    """
+    if len(request.queries) + len(request.candidates) > settings.SIMILARITY_MAX_CANDIDATES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.SIMILARITY_MAX_CANDIDATES} texts per request",
+        )
+
+    # Validate and sanitize every text. No request is passed: the per-IP rate
+    # limit counts requests, and would otherwise be charged once per text
+    texts = request.queries + request.candidates
+    try:
+        sanitized_request_data = await validate_and_sanitize_request(
+            {"documents": [{"text": text} for text in texts]}
+        )
+    except HTTPException:
+        raise
+    except Exception as sanitization_error:
+        logger.error(f"Input sanitization error: {str(sanitization_error)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Input validation failed"
+        ) from sanitization_error
+    sanitized = [document["text"] for document in sanitized_request_data["documents"]]
+
+    try:
+        matches = await score_service.score_many(
+            sanitized[: len(request.queries)],
+            sanitized[len(request.queries) :],
+            top_k=request.top_k,
+        )
+        return BulkSimilarityResponse(matches=matches)
+    except ProviderError as e:
+        logger.error(
+            f"Bulk similarity failed for user {current_user['id']}: {str(e)}", exc_info=True
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Bulk similarity failed: {str(e)}"
+        ) from e
@@ -2,13 +2,17 @@
 API endpoints for resume optimization workflow.
 """
 
+import asyncio
 import logging
 import uuid
+from collections.abc import AsyncIterator
 from datetime import datetime
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 
+from app.agent.limiter import llm_request_scope, priority_for_user
 from app.core.auth_dependencies import get_current_user
 from app.core.database import SupabaseSession
 from app.middleware.credit_check import check_credits, require_pro_or_credits
@@ -19,11 +23,13 @@ from app.models.optimization import (
     OptimizationStatus,
     StartOptimizationRequest,
 )
+from app.services.job_recommendation_service import enqueue_index_job
 from app.services.job_service import JobService
 from app.services.resume_service import ResumeService
 from app.services.score_improvement_service import ScoreImprovementService
 from app.services.supabase.database import SupabaseDatabaseService
 from app.services.usage_limit_service import UsageLimitService
+from app.utils.sse import SSE_HEADERS, sse_event
 
 
 # Database dependency
@@ -71,6 +77,14 @@ class ExtendedJobService(JobService):
         service = SupabaseDatabaseService("job_descriptions", dict)
         result = await service.create(job_data)
 
+        # Indexed for recommendations in the background. Best effort: a job
+        # missing from the vector store is only absent from recommendations,
+        # which must not fail the optimization flow
+        try:
+            await enqueue_index_job(job_id, user_id, title, company, description)
+        except Exception as e:
+            logger.warning(f"Failed to queue indexing of job {job_id} for recommendations: {e}")
+
         return {
             "id": job_id,
             "title": title,
@@ -420,6 +434,57 @@ async def list_optimizations(
         ) from e
 
 
+async def _load_optimization_inputs(optimization: dict[str, Any]) -> tuple[str, str]:
+    """
+    Load the resume text and job description text for an optimization.
+
+    Raises:
+        HTTPException: 404 if the resume or job description no longer exists
+    """
+    resume_service = ResumeService()
+    resume_data = await resume_service.get_resume_with_processed_data(optimization["resume_id"])
+
+    if not resume_data:
+        raise HTTPException(status_code=404, detail="Resume not found")
+
+    # Extract resume text
+    raw_resume = resume_data.get("raw_resume", {})
+    resume_text = raw_resume.get("content", "")
+
+    # Get job description from database
+    job_service = ExtendedJobService()
+    job_data = await job_service.get_job_with_processed_data(optimization["job_description_id"])
+
+    if not job_data:
+        raise HTTPException(status_code=404, detail="Job description not found")
+
+    # Extract job description text
+    processed_job = job_data.get("processed_job", {})
+    if processed_job and processed_job.get("job_summary"):
+        job_description = processed_job["job_summary"]
+    else:
+        # Fallback to raw job content
+        raw_job = job_data.get("raw_job", {})
+        job_description = raw_job.get("content", "Job description not available")
+
+    return resume_text, job_description
+
+
+def _build_results_data(analysis_result: dict[str, Any] | None) -> dict[str, Any]:
+    """Map an analyze_and_improve result to the optimization results columns."""
+    analysis = analysis_result.get("analysis", {}) if analysis_result else {}
+    return {
+        "match_score": analysis_result.get("original_score", 0) if analysis_result else 0,
+        "strengths": analysis.get("strengths", []),
+        "improvements": analysis.get("improvements", []),
+        "keywords": analysis.get("keywords", []),
+        "embedding_similarity": analysis.get("embedding_similarity"),
+        "improved_resume": analysis_result.get("improved_resume") if analysis_result else None,
+        "changes_made": analysis_result.get("changes_made", []) if analysis_result else [],
+        "expected_score": analysis_result.get("expected_score") if analysis_result else None,
+    }
+
+
 @router.post("/{optimization_id}/process", response_model=OptimizationDetailResponse)
 async def process_optimization(
     optimization_id: str,
@@ -458,55 +523,21 @@ async def process_optimization(
             optimization_id=optimization_id, status=OptimizationStatus.PROCESSING
         )
 
-        # Get resume and job description data
-        resume_service = ResumeService()
-        resume_data = await resume_service.get_resume_with_processed_data(optimization["resume_id"])
+        # Get resume and job description text
+        resume_text, job_description = await _load_optimization_inputs(optimization)
 
-        if not resume_data:
-            raise HTTPException(status_code=404, detail="Resume not found")
-
-        # Extract resume text
-        raw_resume = resume_data.get("raw_resume", {})
-        resume_text = raw_resume.get("content", "")
-
-        # Get job description from database
-        job_service = ExtendedJobService()
-        job_data = await job_service.get_job_with_processed_data(optimization["job_description_id"])
-
-        if not job_data:
-            raise HTTPException(status_code=404, detail="Job description not found")
-
-        # Extract job description text
-        processed_job = job_data.get("processed_job", {})
-        if processed_job and processed_job.get("job_summary"):
-            job_description = processed_job["job_summary"]
-        else:
-            # Fallback to raw job content
-            raw_job = job_data.get("raw_job", {})
-            job_description = raw_job.get("content", "Job description not available")
-
-        # Perform analysis using ScoreImprovementService
-        analysis_result = await optimization_service.analyze_and_improve(
-            resume_text=resume_text, job_description=job_description
-        )
+        # Perform analysis using ScoreImprovementService. Paid users get the
+        # priority lane when the LLM provider is saturated.
+        with llm_request_scope(priority=priority_for_user(current_user)):
+            analysis_result = await optimization_service.analyze_and_improve(
+                resume_text=resume_text, job_description=job_description
+            )
 
         # Update optimization with results
-        analysis = analysis_result.get("analysis", {}) if analysis_result else {}
-        results_data = {
-            "match_score": analysis_result.get("original_score", 0) if analysis_result else 0,
-            "strengths": analysis.get("strengths", []),
-            "improvements": analysis.get("improvements", []),
-            "keywords": analysis.get("keywords", []),
-            "embedding_similarity": analysis.get("embedding_similarity"),
-            "improved_resume": analysis_result.get("improved_resume") if analysis_result else None,
-            "changes_made": analysis_result.get("changes_made", []) if analysis_result else [],
-            "expected_score": analysis_result.get("expected_score") if analysis_result else None,
-        }
-
         await optimization_service.update_optimization_status(
             optimization_id=optimization_id,
             status=OptimizationStatus.COMPLETED,
-            results=results_data,
+            results=_build_results_data(analysis_result),
         )
 
         # Get updated optimization
@@ -561,6 +592,103 @@ async def process_optimization(
         ) from e
 
 
+@router.post("/{optimization_id}/process/stream")
+async def process_optimization_stream(
+    optimization_id: str,
+    current_user: dict = Depends(require_pro_or_credits),
+) -> StreamingResponse:
+    """
+    Process an optimization, streaming progress as Server-Sent Events.
+
+    Same workflow as /process, but the client receives an "analysis" event as
+    soon as scoring is done, "token" events while the improved resume is being
+    written, "field" events as each improvement field completes, and a final
+    "done" event once results are stored ("error" on failure).
+    Missing optimizations/resumes/jobs are reported as HTTP errors before streaming.
+
+    Args:
+        optimization_id: Optimization ID
+        current_user: Currently authenticated user with credit info
+
+    Returns:
+        text/event-stream response
+    """
+    optimization_service = ExtendedScoreImprovementService()
+    optimization = await optimization_service.get_optimization(
+        optimization_id=optimization_id, user_id=current_user["id"]
+    )
+
+    if not optimization:
+        raise HTTPException(status_code=404, detail="Optimization not found")
+
+    resume_text, job_description = await _load_optimization_inputs(optimization)
+
+    await optimization_service.update_optimization_status(
+        optimization_id=optimization_id, status=OptimizationStatus.PROCESSING
+    )
+
+    async def events() -> AsyncIterator[str]:
+        completed = False
+        try:
+            with llm_request_scope(priority=priority_for_user(current_user)):
+                analysis_result: dict[str, Any] | None = None
+                async for event, data in optimization_service.analyze_and_improve_stream(
+                    resume_text=resume_text, job_description=job_description
+                ):
+                    if event == "token":
+                        yield sse_event("token", {"text": data})
+                    elif event == "result":
+                        analysis_result = data
+                    else:
+                        yield sse_event(event, data)
+
+            results_data = _build_results_data(analysis_result)
+            await optimization_service.update_optimization_status(
+                optimization_id=optimization_id,
+                status=OptimizationStatus.COMPLETED,
+                results=results_data,
+            )
+            completed = True
+            logger.info(f"Optimization {optimization_id} processed successfully (streamed)")
+            yield sse_event(
+                "done",
+                {"optimization_id": optimization_id, "status": "completed", **results_data},
+            )
+
+        except Exception as e:
+            logger.error(f"Failed to process optimization {optimization_id}: {str(e)}")
+            try:
+                await optimization_service.update_optimization_status(
+                    optimization_id=optimization_id,
+                    status=OptimizationStatus.FAILED,
+                    results={"error_message": str(e)},
+                )
+            except Exception:
+                logger.warning(f"Failed to update optimization status to failed: {optimization_id}")
+            yield sse_event("error", {"detail": f"Failed to process optimization: {str(e)}"})
+
+        except BaseException:
+            # Client disconnected (CancelledError/GeneratorExit): nothing more can be
+            # sent, but the optimization must not stay PROCESSING forever
+            if not completed:
+                logger.warning(f"Client disconnected from optimization {optimization_id} stream")
+                try:
+                    await asyncio.shield(
+                        optimization_service.update_optimization_status(
+                            optimization_id=optimization_id,
+                            status=OptimizationStatus.FAILED,
+                            results={"error_message": "client disconnected"},
+                        )
+                    )
+                except BaseException:
+                    logger.warning(
+                        f"Failed to update optimization status to failed: {optimization_id}"
+                    )
+            raise
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.get("/credits/check")
 async def check_user_credits(
     current_user: dict = Depends(get_current_user), db: SupabaseSession = Depends(get_db)
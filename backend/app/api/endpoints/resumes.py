@@ -6,19 +6,54 @@ import logging
 import uuid
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
 
 from app.core.auth_dependencies import get_current_user
-from app.models.resume import ResumeListResponse, ResumeResponse, ResumeUploadResponse
-from app.services.resume_service import ResumeService
+from app.core.config import settings
+from app.core.database import SupabaseSession
+from app.middleware.credit_check import require_pro_or_credits
+from app.models.resume import (
+    JobRecommendationListResponse,
+    ResumeListResponse,
+    ResumeResponse,
+    ResumeUploadResponse,
+    StructuredResumeResponse,
+)
+from app.services.extraction_engine import (
+    ExtractionBusyError,
+    ExtractionTimeoutError,
+    extraction_engine,
+)
+from app.services.job_recommendation_service import JobRecommendationService
+from app.services.resume_artifact_store import resume_artifact_store
+from app.services.resume_service import (
+    STRUCTURED_FAILED,
+    STRUCTURED_PENDING,
+    STRUCTURED_PROCESSING,
+    STRUCTURED_READY,
+    ResumeService,
+)
 from app.services.supabase.database import SupabaseDatabaseService
-from app.utils.file_security import FileSecurityConfig, validate_file_security
+from app.services.usage_limit_service import UsageLimitService
+from app.utils.file_security import FileSecurityConfig, read_upload_securely
 from app.utils.validation import sanitize_filename, validate_string
 
+
+# Database dependency
+async def get_db() -> SupabaseSession:
+    """Get database session."""
+    return SupabaseSession()
+
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/resumes", tags=["resumes"])
 
+EXTRACTION_RETRY_AFTER_SECONDS = 5
+
+# Suggested polling interval while structured extraction is running
+STRUCTURED_POLL_AFTER_SECONDS = 2
+
 
 @router.post("/upload", response_model=ResumeUploadResponse, status_code=201)
 async def upload_resume(
@@ -49,6 +84,14 @@ async def upload_resume(
         HTTPException: If file upload or processing fails
     """
     try:
+        # Shed load before reading the body when the extraction queue is full
+        if extraction_engine.saturated:
+            raise HTTPException(
+                status_code=503,
+                detail="Resume processing is busy, please retry shortly",
+                headers={"Retry-After": str(EXTRACTION_RETRY_AFTER_SECONDS)},
+            )
+
         # Validate filename
         if not file.filename:
             raise HTTPException(status_code=400, detail="Filename is required")
@@ -62,9 +105,6 @@ async def upload_resume(
                 status_code=400, detail=f"Invalid filename: {'; '.join(filename_validation.errors)}"
             )
 
-        # Read file content
-        file_content = await file.read()
-
         # Comprehensive file security validation
         file_security_config = FileSecurityConfig(
             max_file_size=10 * 1024 * 1024,  # 10MB
@@ -73,10 +113,11 @@ async def upload_resume(
             check_for_embedded_scripts=True,
         )
 
-        security_result = validate_file_security(
-            file_content=file_content,
+        # Read the file in chunks: size cap, type sniff, checksum and malware scan
+        # run as it is read, so a bad file is rejected without buffering it
+        file_content, security_result = await read_upload_securely(
+            file,
             filename=filename_validation.sanitized_input,
-            content_type=file.content_type,
             config=file_security_config,
         )
 
@@ -126,6 +167,7 @@ async def upload_resume(
             filename=filename_validation.sanitized_input,  # Use sanitized filename
             content_type="md",  # Store as markdown
             user_id=current_user["id"],  # CRITICAL: Associate with current user
+            checksum=security_result.checksum,  # Reuses artifacts of a repeat upload
         )
 
         # Get the stored resume data
@@ -144,10 +186,20 @@ async def upload_resume(
             content_type=raw_resume.get("content_type", "text/markdown"),
             user_id=current_user["id"],  # Include user ownership in response
             created_at=raw_resume.get("created_at", datetime.utcnow()),
+            structured_status=raw_resume.get("structured_status") or STRUCTURED_PENDING,
         )
 
     except HTTPException:
         raise
+    except ExtractionBusyError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Resume processing is busy, please retry shortly",
+            headers={"Retry-After": str(EXTRACTION_RETRY_AFTER_SECONDS)},
+        ) from e
+    except ExtractionTimeoutError as e:
+        logger.warning(f"Resume extraction timed out for user {current_user['id']}: {e}")
+        raise HTTPException(status_code=422, detail="The document took too long to process") from e
     except Exception as e:
         logger.error(f"Resume upload failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Resume upload failed: {str(e)}") from e
@@ -205,6 +257,152 @@ async def get_resume(
         raise HTTPException(status_code=500, detail=f"Failed to retrieve resume: {str(e)}") from e
 
 
+@router.get("/{resume_id}/structured", response_model=StructuredResumeResponse)
+async def get_structured_resume(
+    resume_id: str, response: Response, current_user: dict = Depends(get_current_user)
+) -> StructuredResumeResponse:
+    """
+    Get the structured extraction status and data of a resume.
+
+    Structured extraction runs as a background job after upload. Clients poll
+    this endpoint (Retry-After suggests the interval) or subscribe to the
+    resume row's structured_status via Supabase Realtime.
+
+    Args:
+        resume_id: ID of the resume
+        response: Response, used to set Retry-After while extraction runs
+        current_user: Currently authenticated user
+
+    Returns:
+        StructuredResumeResponse with the status and, once ready, the data
+
+    Raises:
+        HTTPException: If resume not found or access denied
+    """
+    try:
+        resume_service = ResumeService()
+        # Looked up by resume_id: resumes.id is an internal serial key
+        raw_resume = await resume_service._get_resume_row(resume_id)
+
+        if not raw_resume:
+            raise HTTPException(status_code=404, detail="Resume not found")
+
+        # CRITICAL SECURITY: Verify user ownership
+        resume_user_id = raw_resume.get("user_id")
+        if not resume_user_id or resume_user_id != current_user["id"]:
+            logger.warning(
+                f"User {current_user['id']} attempted to access resume {resume_id} owned by {resume_user_id}"
+            )
+            raise HTTPException(status_code=403, detail="Access denied: Resume not found")
+
+        status = raw_resume.get("structured_status")
+        processed_resume = None
+        if status in (None, STRUCTURED_READY):
+            processed_resume = await resume_service._get_structured_row(resume_id)
+        # Resumes uploaded before background extraction have no status
+        if status is None:
+            status = STRUCTURED_READY if processed_resume else STRUCTURED_FAILED
+        if status in (STRUCTURED_PENDING, STRUCTURED_PROCESSING):
+            response.headers["Retry-After"] = str(STRUCTURED_POLL_AFTER_SECONDS)
+
+        return StructuredResumeResponse(
+            resume_id=resume_id,
+            status=status,
+            structured_data=(
+                processed_resume.get("structured_data")
+                if status == STRUCTURED_READY and processed_resume
+                else None
+            ),
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail="Resume not found") from e
+    except Exception as e:
+        logger.error(f"Failed to get structured resume {resume_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to retrieve structured resume: {str(e)}"
+        ) from e
+
+
+@router.get("/{resume_id}/job-recommendations", response_model=JobRecommendationListResponse)
+async def get_job_recommendations(
+    resume_id: str,
+    top_k: int = Query(
+        settings.RECOMMEND_ANN_TOP_K, ge=1, le=500, description="Jobs shortlisted by vector search"
+    ),
+    top_n: int = Query(
+        settings.RECOMMEND_LLM_TOP_N, ge=1, le=20, description="Jobs scored by the LLM"
+    ),
+    current_user: dict = Depends(require_pro_or_credits),
+    db: SupabaseSession = Depends(get_db),
+) -> JobRecommendationListResponse:
+    """
+    Recommend the user's stored job descriptions for a resume.
+
+    Each request costs non-Pro users one credit, since it runs up to ``top_n``
+    LLM match scores.
+
+    Args:
+        resume_id: ID of the resume to match
+        top_k: Number of jobs shortlisted by vector search
+        top_n: Number of shortlisted jobs scored by the LLM
+        current_user: Currently authenticated user with Pro status or credits
+        db: Database session
+
+    Returns:
+        JobRecommendationListResponse with the best matching jobs
+
+    Raises:
+        HTTPException: If resume not found, access denied, credits can't be
+            deducted or ranking fails
+    """
+    try:
+        resume_service = ResumeService()
+        # Looked up by resume_id: resumes.id is an internal serial key
+        raw_resume = await resume_service._get_resume_row(resume_id)
+
+        if not raw_resume:
+            raise HTTPException(status_code=404, detail="Resume not found")
+
+        # CRITICAL SECURITY: Verify user ownership
+        resume_user_id = raw_resume.get("user_id")
+        if not resume_user_id or resume_user_id != current_user["id"]:
+            logger.warning(
+                f"User {current_user['id']} attempted to get recommendations for resume {resume_id} owned by {resume_user_id}"
+            )
+            raise HTTPException(status_code=403, detail="Access denied: Resume not found")
+
+        # Determine credit cost (1 credit for non-pro users, 0 for pro users)
+        if not current_user.get("is_pro", False):
+            credit_deducted = await UsageLimitService(db).deduct_credits(
+                user_id=uuid.UUID(current_user["id"]),
+                amount=1,
+                operation_id=f"job-recommendations:{resume_id}:{uuid.uuid4()}",
+            )
+            if not credit_deducted:
+                logger.error(f"Failed to deduct credits for user {current_user['id']}")
+                raise HTTPException(
+                    status_code=402,
+                    detail="Failed to deduct credits. Please check your credit balance.",
+                )
+
+        result = await JobRecommendationService().recommend(
+            raw_resume.get("content") or "",
+            current_user["id"],
+            top_k=top_k,
+            top_n=min(top_n, top_k),
+        )
+        return JobRecommendationListResponse(resume_id=resume_id, **result)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to recommend jobs for resume {resume_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to recommend jobs: {str(e)}") from e
+
+
 @router.get("/", response_model=ResumeListResponse)
 async def list_resumes(
     limit: int = Query(10, ge=1, le=100, description="Number of resumes to return"),
@@ -316,6 +514,14 @@ async def delete_resume(resume_id: str, current_user: dict = Depends(get_current
             logger.error(f"Failed to delete resume {resume_id}: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to delete resume: {str(e)}") from e
 
+        # LGPD: cached processing artifacts of the file go with the resume
+        checksum = raw_resume.get("source_checksum")
+        if checksum:
+            try:
+                await resume_artifact_store.delete_for_checksum(current_user["id"], checksum)
+            except Exception as e:
+                logger.error(f"Failed to delete artifacts of resume {resume_id}: {e}")
+
         logger.info(f"Resume {resume_id} deleted by user {current_user['id']}")
 
     except HTTPException:
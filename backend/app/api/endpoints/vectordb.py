@@ -69,13 +69,11 @@ async def add_documents(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Input validation failed"
             )
 
-        # Generate embeddings for each document
-        all_embeddings = []
-        for document in sanitized_documents:
-            embedding_response = await embedding_service.create_embedding(
-                text=document.text, model=request.embedding_model
-            )
-            all_embeddings.append(embedding_response.embedding)
+        # Generate embeddings for all documents in batched requests
+        embedding_response = await embedding_service.embed_many(
+            [document.text for document in sanitized_documents], model=request.embedding_model
+        )
+        all_embeddings = embedding_response.embeddings
 
         # Prepare documents and metadata for storage
         docs = [{"text": doc.text, "title": doc.title} for doc in sanitized_documents]
@@ -87,7 +85,7 @@ async def add_documents(
 
         # Add documents to vector database
         doc_ids = await vector_db.add_documents(
-            documents=docs, embeddings=all_embeddings, metadata=metadata
+            documents=docs, embeddings=all_embeddings, metadata=metadata, user_id=user_id
         )
 
         return DocumentUploadResponse(document_ids=doc_ids)
@@ -150,11 +148,14 @@ async def search_documents(
             text=sanitized_query_text, model=query.embedding_model
         )
 
-        # Search vector database
+        # Search the user's documents
         results = await vector_db.search(
             query_embedding=embedding_response.embedding,
+            user_id=user_id,
             limit=query.limit,
             filter_params=query.filter_metadata,
+            hnsw_ef=query.hnsw_ef,
+            exact=query.exact,
         )
 
         return results
@@ -175,16 +176,23 @@ async def delete_documents(
     """Delete documents from the vector database."""
     try:
         # Validate user authentication
-        await auth_service.get_user(credentials.credentials)
+        user = await auth_service.get_user(credentials.credentials)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication credentials",
+            )
 
-        # Delete documents
-        success = await vector_db.delete(request.document_ids)
+        # Delete documents (only the user's own)
+        success = await vector_db.delete(request.document_ids, user_id=user.get("id"))
 
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Failed to delete one or more documents",
             )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Document deletion failed: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -31,10 +31,119 @@ class Settings(BaseSettings):
     EMBEDDING_API_KEY: str = ""
     EMBEDDING_BASE_URL: str = ""
 
+    # Embedding batching (app.agent.embedding_batches)
+    EMBEDDING_BATCH_MAX_TOKENS: int = 100000  # estimated tokens per request
+    EMBEDDING_BATCH_MAX_ITEMS: int = 256  # inputs per request
+    EMBEDDING_BATCH_CONCURRENCY: int = 4  # requests in flight per embed_many call
+
+    # Embedding cache (app.agent.embedding_cache)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 10000  # in-memory LRU
+    EMBEDDING_CACHE_DIR: str = ""  # memmap shards + index (empty = memory only)
+    EMBEDDING_CACHE_DISK_MAX_ENTRIES: int = 500000
+    EMBEDDING_CACHE_DTYPE: str = "float16"  # float32 | float16 | int8
+    EMBEDDING_CACHE_SHARD_ROWS: int = 8192
+    EMBEDDING_CACHE_WARM_START: int = 5000  # most recent disk entries loaded at boot
+
+    # Section-level embeddings (app.utils.text_sections), scored with max-sim
+    EMBEDDING_SECTION_MAX_CHARS: int = 2000  # longer sections are split on paragraphs
+    EMBEDDING_SECTION_MAX_COUNT: int = 24  # sections per document
+
+    # Bulk similarity scoring (app.agent.similarity)
+    SIMILARITY_DTYPE: str = "float32"  # float32 | float16 (half the memory)
+    SIMILARITY_CHUNK_ROWS: int = 4096  # pool rows scored per block in top-k
+    SIMILARITY_MAX_CANDIDATES: int = 1000  # texts per bulk scoring request
+
+    # Resume-to-jobs recommendations (app.services.job_recommendation_service)
+    RECOMMEND_ANN_TOP_K: int = 50  # jobs shortlisted by vector search
+    RECOMMEND_LLM_TOP_N: int = 5  # shortlisted jobs sent to the LLM scorer
+    RECOMMEND_LEXICAL_WEIGHT: float = 0.3  # keyword overlap share of the re-rank score
+
+    # Document extraction worker processes (app.services.extraction_engine)
+    EXTRACTION_WORKERS: int = 2
+    EXTRACTION_QUEUE_SIZE: int = 8  # jobs waiting for a worker before uploads get 503
+    EXTRACTION_TIMEOUT_SECONDS: float = 30.0  # parse time before the worker is killed
+    EXTRACTION_START_METHOD: str = "forkserver"  # forkserver | spawn | fork
+
+    # Resume artifacts cached by file checksum (app.services.resume_artifact_store)
+    RESUME_ARTIFACT_CACHE_ENABLED: bool = True
+
+    # Durable background jobs (app.services.job_queue)
+    JOB_QUEUE_WORKERS: int = 4  # concurrent jobs per process; 0 only enqueues
+    JOB_VISIBILITY_TIMEOUT_SECONDS: float = 300.0  # lease before a job is claimable again
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BACKOFF_SECONDS: float = 10.0  # doubled after every failed attempt
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0
+
+    # LLM HTTP connection pooling (shared by all pooled provider clients)
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 30.0  # seconds
+    LLM_HTTP2: bool = True
+    LLM_HTTP_TIMEOUT: float = 120.0  # seconds
+    LLM_HTTP_CONNECT_TIMEOUT: float = 10.0  # seconds
+
+    # Thread pool for LlamaIndex integrations without native async support,
+    # kept apart from Starlette's shared threadpool
+    LLM_BLOCKING_MAX_WORKERS: int = 8
+
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 1000
+    LLM_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # in-memory tier
+    LLM_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    LLM_CACHE_DB_PATH: str = ""  # SQLite file for the on-disk tier (empty = disabled)
+    LLM_CACHE_DB_MAX_ENTRIES: int = 50000
+    LLM_CACHE_ALLOW_SAMPLED: bool = False  # cache temperature > 0 without per-call opt-in
+
+    # LLM adaptive concurrency (per provider/model bulkhead)
+    LLM_LIMITER_ENABLED: bool = True
+    LLM_LIMITER_INITIAL_LIMIT: int = 8
+    LLM_LIMITER_MIN_LIMIT: int = 1
+    LLM_LIMITER_MAX_LIMIT: int = 64
+    LLM_LIMITER_LATENCY_TARGET_SECONDS: float = 10.0  # time to first token, not total wall time
+    LLM_LIMITER_SECONDS_PER_OUTPUT_TOKEN: float = 0.02  # estimated decode time, non-streaming calls
+    LLM_LIMITER_BACKOFF_FACTOR: float = 0.7  # multiplicative decrease on 429/timeout/slow call
+    LLM_LIMITER_MAX_QUEUE: int = 200
+    LLM_LIMITER_MAX_QUEUE_WAIT_SECONDS: float = 30.0
+    LLM_LIMITER_PAID_WEIGHT: int = 3  # paid-lane grants per free-lane grant under contention
+
+    # LLM multi-provider routing (LLM_PROVIDER=router)
+    # Comma-separated "provider:model" entries, e.g.
+    # "openrouter:anthropic/claude-3.5-sonnet,anthropic:claude-3-5-sonnet-20241022"
+    LLM_ROUTING_BACKENDS: str = ""
+    LLM_HEDGING_ENABLED: bool = True
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS: float = 15.0  # until enough latency samples exist
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 1.0
+    LLM_ROUTING_MIN_SAMPLES: int = 20
+
+    # Provider-side prompt caching of the static system prefix (cache_control markers)
+    LLM_PROMPT_CACHING: bool = True
+
+    # Offline batch inference (app.agent.batch)
+    LLM_BATCH_USE_PROVIDER_API: bool = True  # provider batch endpoints where available
+    LLM_BATCH_MAX_REQUESTS: int = 10000  # requests per submitted provider batch
+    LLM_BATCH_POLL_INTERVAL_SECONDS: float = 60.0
+    LLM_BATCH_REQUESTS_PER_SECOND: float = 5.0  # pacing for the concurrent fallback
+    LLM_BATCH_CONCURRENCY: int = 16
+    LLM_BATCH_WRITE_SIZE: int = 500  # results per bulk write-back
+
     # Vector Database
     QDRANT_URL: str = ""
     QDRANT_API_KEY: str = ""
     QDRANT_COLLECTION_NAME: str = "default_collection"
+    QDRANT_PREFER_GRPC: bool = False  # gRPC transport instead of REST
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_TIMEOUT_SECONDS: int = 10
+    QDRANT_INGEST_CHUNK_SIZE: int = 256  # points per upsert
+    QDRANT_INGEST_CONCURRENCY: int = 4  # upserts in flight
+    QDRANT_INGEST_MAX_RETRIES: int = 3
+    QDRANT_INGEST_RETRY_BACKOFF_SECONDS: float = 0.5
+    # Embedded index used when QDRANT_URL is empty (app.services.vectordb.local_index)
+    QDRANT_LOCAL_PATH: str = ""  # persisted collections (empty = memory only)
+    QDRANT_LOCAL_IVF_MIN_POINTS: int = 10000  # flat scan below this, IVF above
+    QDRANT_LOCAL_IVF_NPROBE: int = 8  # IVF lists scanned per query
 
     # Stripe Configuration
     STRIPE_SECRET_KEY: str = ""
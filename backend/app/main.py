@@ -1,13 +1,24 @@
 import logging
+from typing import Any
 
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from app.agent.cache import llm_response_cache
+from app.agent.embedding_cache import embedding_cache
+from app.agent.limiter import limiter_registry
+from app.agent.prompt import prompt_cache_stats
+from app.agent.providers.router import backend_health
+from app.agent.registry import provider_registry
+from app.agent.singleflight import embedding_singleflight, llm_singleflight
 from app.api.router import api_router
 from app.core.config import settings
 from app.core.sentry import get_sentry_config, init_sentry
 from app.middleware.security import create_security_middleware
+from app.services.extraction_engine import extraction_engine
+from app.services.job_queue import job_queue
+from app.services.vectordb import get_vector_db_service
 
 # Initialize Sentry first (before other imports)
 init_sentry()
@@ -83,6 +94,45 @@ app.add_middleware(
 app.include_router(api_router, prefix="/api")
 
 
+@app.on_event("startup")
+async def warm_embedding_cache() -> None:
+    """Preload recently used embeddings from the on-disk cache."""
+    await embedding_cache.warm_start()
+
+
+@app.on_event("startup")
+async def start_extraction_workers() -> None:
+    """Start the document extraction workers before the first upload."""
+    await extraction_engine.start()
+
+
+@app.on_event("startup")
+async def start_job_workers() -> None:
+    """Start the background job workers (structured resume extraction)."""
+    await job_queue.start()
+
+
+@app.on_event("shutdown")
+async def close_llm_clients() -> None:
+    """Close pooled LLM/embedding HTTP clients and the embedding cache on shutdown."""
+    await provider_registry.aclose()
+    embedding_cache.close()
+    if get_vector_db_service.cache_info().currsize:
+        await get_vector_db_service().close()
+
+
+@app.on_event("shutdown")
+async def stop_extraction_workers() -> None:
+    """Stop the document extraction worker processes."""
+    await extraction_engine.close()
+
+
+@app.on_event("shutdown")
+async def stop_job_workers() -> None:
+    """Stop the background job workers; interrupted jobs are retried after their lease."""
+    await job_queue.close()
+
+
 @app.get("/")
 async def root() -> dict[str, str | bool]:
     """Health check endpoint."""
@@ -164,6 +214,38 @@ async def security_health() -> dict[str, str | bool | dict[str, int | bool | str
     }
 
 
+@app.get("/health/llm")
+async def llm_health() -> dict[str, Any]:
+    """LLM health endpoint (pool saturation, cache, concurrency, queues and routing)."""
+    return {
+        "llm_status": "enabled",
+        "provider": settings.LLM_PROVIDER,
+        "embedding_provider": settings.EMBEDDING_PROVIDER,
+        "pool": provider_registry.stats(),
+        "response_cache": llm_response_cache.get_stats(),
+        "prompt_cache": prompt_cache_stats.to_dict(),
+        "embedding_cache": embedding_cache.get_stats(),
+        "concurrency": limiter_registry.get_stats(),
+        "routing": backend_health.get_stats(),
+        "singleflight": {
+            "llm": llm_singleflight.get_stats(),
+            "embedding": embedding_singleflight.get_stats(),
+        },
+    }
+
+
+@app.get("/health/extraction")
+async def extraction_health() -> dict[str, Any]:
+    """Document extraction pool health (workers, queue, queue wait vs parse time)."""
+    return extraction_engine.get_stats()
+
+
+@app.get("/health/jobs")
+async def jobs_health() -> dict[str, Any]:
+    """Background job queue health (workers, registered kinds, outcome counters)."""
+    return job_queue.get_stats()
+
+
 if __name__ == "__main__":
     import uvicorn
 
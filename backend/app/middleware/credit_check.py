@@ -67,7 +67,12 @@ async def check_credits(
         logger.info(
             f"Credit check passed for user {current_user['id']}: {credits_remaining} credits remaining"
         )
-        return {**current_user, "credits_remaining": credits_remaining, "is_pro": is_pro}
+        return {
+            **current_user,
+            "credits_remaining": credits_remaining,
+            "is_pro": is_pro,
+            "subscription_tier": credits_data.get("subscription_tier", "free"),
+        }
 
     except HTTPException:
         raise
@@ -122,7 +127,12 @@ async def require_pro_or_credits(
                 },
             )
 
-        return {**current_user, "credits_remaining": credits_remaining, "is_pro": is_pro}
+        return {
+            **current_user,
+            "credits_remaining": credits_remaining,
+            "is_pro": is_pro,
+            "subscription_tier": credits_data.get("subscription_tier", "free"),
+        }
 
     except HTTPException:
         raise
@@ -43,3 +43,24 @@ class EmbeddingResponse(BaseModel):
     embedding: list[float]
     model: str
     usage: LLMUsage
+
+
+class BulkSimilarityRequest(BaseModel):
+    """Request for scoring queries against a pool of texts by embedding similarity."""
+
+    queries: list[str] = Field(..., min_length=1)
+    candidates: list[str] = Field(..., min_length=1)
+    top_k: int | None = Field(default=None, ge=1)
+
+
+class SimilarityMatch(BaseModel):
+    """One scored candidate."""
+
+    index: int
+    score: float
+
+
+class BulkSimilarityResponse(BaseModel):
+    """Top matches for each query, in query order."""
+
+    matches: list[list[SimilarityMatch]]
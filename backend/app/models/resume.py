@@ -3,6 +3,7 @@ Pydantic models for resume upload and management.
 """
 
 from datetime import datetime
+from typing import Any
 
 from pydantic import BaseModel, Field
 
@@ -23,6 +24,9 @@ class ResumeUploadResponse(BaseModel):
     content_type: str = Field(..., description="Content type of the extracted text")
     user_id: str = Field(..., description="User ID who owns this resume")
     created_at: datetime = Field(..., description="Upload timestamp")
+    structured_status: str = Field(
+        "pending", description="Structured extraction status: pending, processing, ready, failed"
+    )
 
 
 class ResumeResponse(BaseModel):
@@ -37,6 +41,16 @@ class ResumeResponse(BaseModel):
     updated_at: datetime | None = Field(None, description="Last update timestamp")
 
 
+class StructuredResumeResponse(BaseModel):
+    """Response model for polling the structured extraction of a resume."""
+
+    resume_id: str = Field(..., description="Resume ID")
+    status: str = Field(..., description="pending, processing, ready or failed")
+    structured_data: dict[str, Any] | None = Field(
+        None, description="Structured resume data, once status is ready"
+    )
+
+
 class ResumeListResponse(BaseModel):
     """Response model for listing resumes."""
 
@@ -53,3 +67,27 @@ class ResumeCreateRequest(BaseModel):
     content: str = Field(..., description="Resume content")
     content_type: str = Field(..., description="Content type of the resume")
     user_id: str = Field(..., description="User ID who owns this resume")
+
+
+class JobRecommendation(BaseModel):
+    """A stored job description recommended for a resume."""
+
+    job_id: str | None = Field(None, description="Job description ID")
+    title: str | None = Field(None, description="Job title")
+    company: str | None = Field(None, description="Company name")
+    ann_score: float = Field(..., description="Vector similarity to the resume")
+    lexical_score: float = Field(..., description="Share of job keywords found in the resume")
+    combined_score: float = Field(..., description="Re-rank score blending both signals")
+    match_score: float | None = Field(
+        None, description="LLM compatibility score (0-100); null if scoring failed"
+    )
+
+
+class JobRecommendationListResponse(BaseModel):
+    """Response model for resume-to-jobs recommendations."""
+
+    resume_id: str = Field(..., description="Resume ID")
+    recommendations: list[JobRecommendation] = Field(
+        ..., description="Best matching jobs, ordered by match score"
+    )
+    candidates_considered: int = Field(..., description="Jobs shortlisted by vector search")
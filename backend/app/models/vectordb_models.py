@@ -30,7 +30,11 @@ class SearchQuery(BaseModel):
     query_text: str
     embedding_model: str = "text-embedding-ada-002"
     limit: int = Field(default=10, gt=0, le=100)
-    filter_metadata: dict[str, Any] | None = None
+    filter_metadata: dict[str, Any] | None = Field(
+        default=None, description="Filters on indexed fields (document_type, created_at)"
+    )
+    hnsw_ef: int | None = Field(default=None, ge=1, le=4096, description="HNSW search beam")
+    exact: bool = Field(default=False, description="Exact (non-HNSW) search")
 
 
 class SearchResult(BaseModel):
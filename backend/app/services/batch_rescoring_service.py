@@ -0,0 +1,142 @@
+"""
+Bulk re-scoring of stored optimizations with the offline batch runner.
+
+Used after the scoring prompt or model changes. build_items() reads stored
+optimizations in bulk and turns each resume/job pair into a batch request with
+the current score prompt, and write_scores() is the BatchRunner sink that
+writes the new scores back to the ``optimizations`` table in bulk (see
+scripts/rescore_optimizations.py).
+"""
+
+import logging
+from datetime import datetime
+from typing import Any
+
+from ..agent.batch import BatchItem
+from ..agent.exceptions import ProviderError, StrategyError
+from ..agent.strategies.wrapper import parse_json_response
+from .score_improvement_service import SCORE_JSON_SCHEMA, ScoreImprovementService
+from .supabase.database import SupabaseDatabaseService
+
+logger = logging.getLogger(__name__)
+
+
+class BatchRescoringService:
+    """Builds re-scoring batch requests and writes their results back in bulk."""
+
+    def __init__(self):
+        self.scorer = ScoreImprovementService()
+        self.db = SupabaseDatabaseService("optimizations", dict)
+
+    def build_item(self, optimization_id: str, resume_text: str, job_description: str) -> BatchItem:
+        """
+        Build the batch request re-scoring one optimization.
+
+        Applies the same bias preprocessing as calculate_match_score, so batch
+        and online scores come from identical prompts.
+
+        Raises:
+            ProviderError: If bias analysis blocks processing of the text
+        """
+        processed_resume, _ = self.scorer._preprocess_text_bias_analysis(resume_text)
+        processed_job, _ = self.scorer._preprocess_text_bias_analysis(job_description)
+        prompt = self.scorer._build_score_prompt(processed_resume, processed_job)
+        return BatchItem(
+            custom_id=optimization_id,
+            prompt=prompt.user,
+            system=prompt.system,
+            params={"max_tokens": 2000, "temperature": 0.3},
+        )
+
+    async def build_items(self, optimization_ids: list[str]) -> list[BatchItem]:
+        """
+        Build the re-scoring requests of many optimizations.
+
+        Optimizations, their resumes and their job descriptions are each read in
+        one query. Optimizations whose inputs no longer exist, or whose text bias
+        analysis blocks, are skipped with a warning.
+        """
+        rows = await self.db.get_many(optimization_ids)
+        resumes = self._select_in("resumes", "resume_id", [row.get("resume_id") for row in rows])
+        jobs = self._select_in(
+            "job_descriptions",
+            "job_id",
+            [row.get("job_description_id") for row in rows if not row.get("input_job_description")],
+        )
+
+        items: list[BatchItem] = []
+        for row in rows:
+            resume = resumes.get(row.get("resume_id"))
+            job_description = row.get("input_job_description") or (
+                jobs.get(row.get("job_description_id")) or {}
+            ).get("description")
+            if not resume or not job_description:
+                logger.warning(f"Optimization {row['id']} has no resume or job text, skipping")
+                continue
+            try:
+                items.append(self.build_item(row["id"], resume["content"], job_description))
+            except ProviderError as e:
+                logger.warning(f"Optimization {row['id']} blocked by bias analysis: {e}")
+        return items
+
+    def _select_in(self, table: str, key: str, values: list[Any]) -> dict[Any, dict[str, Any]]:
+        """Rows of ``table`` whose ``key`` is one of ``values``, keyed by it."""
+        wanted = sorted({value for value in values if value})
+        if not wanted:
+            return {}
+        response = self.db.supabase.table(table).select("*").in_(key, wanted).execute()
+        return {row[key]: row for row in response.data}
+
+    @staticmethod
+    def _score_columns(response: str) -> dict[str, Any]:
+        """
+        Map a score response to the optimization results columns.
+
+        Raises:
+            StrategyError: If the response is not a valid score object
+        """
+        analysis = parse_json_response(response)
+        for key, value in analysis.items():
+            SCORE_JSON_SCHEMA.validate_field(key, value)
+        SCORE_JSON_SCHEMA.validate_complete(analysis)
+        return {
+            "match_score": analysis["score_compatibilidade"],
+            "strengths": analysis.get("pontos_fortes", []),
+            "improvements": analysis.get("areas_melhoria", []),
+            "keywords": analysis.get("palavras_chave_ats", []),
+        }
+
+    async def write_scores(self, results: list[tuple[BatchItem, str]]) -> list[str]:
+        """
+        Write a chunk of batch outputs to the optimizations table.
+
+        Reads the affected rows in one query and upserts them in one request.
+
+        Returns:
+            custom_ids whose output could not be parsed (retried on the next run)
+        """
+        rejected: list[str] = []
+        updates: dict[str, dict[str, Any]] = {}
+        updated_at = datetime.utcnow().isoformat()
+        for item, output in results:
+            try:
+                columns = self._score_columns(output)
+            except StrategyError as e:
+                logger.warning(f"Discarding unparseable score for {item.custom_id}: {e}")
+                rejected.append(item.custom_id)
+                continue
+            updates[item.custom_id] = {
+                **columns,
+                "ai_model_used": self.scorer.agent_manager.model,
+                "updated_at": updated_at,
+            }
+
+        rows = await self.db.get_many(list(updates))
+        found = {row["id"] for row in rows}
+        for custom_id in updates.keys() - found:
+            # Deleted since the batch was built; nothing to write
+            logger.warning(f"Optimization {custom_id} no longer exists, skipping")
+
+        await self.db.upsert_many([{**row, **updates[row["id"]]} for row in rows])
+        logger.info(f"Wrote {len(rows)} re-scored optimizations")
+        return rejected
@@ -0,0 +1,269 @@
+"""
+Process-pool document extraction engine.
+
+PDF/DOCX parsing (MarkItDown, PyPDF2, python-docx) is CPU-bound, so running it
+inside ``async def`` stalls every other request on the worker. The engine runs
+parse jobs in a small set of warm worker processes instead:
+
+- Workers import the parsers once at start (forkserver preload plus a per-worker
+  initializer), so the first upload does not pay for the imports.
+- Each worker owns its process and pipe, so a job that exceeds its timeout is
+  killed and the worker replaced without disturbing jobs on other workers.
+- Admission is bounded: at most ``workers + queue_size`` jobs are in flight or
+  waiting; beyond that ``ExtractionBusyError`` is raised immediately so callers
+  can shed load (the upload endpoint answers 503 with Retry-After).
+- Queue wait (waiting for an idle worker) and parse time (inside the worker) are
+  recorded separately and exposed through ``get_stats``.
+
+Jobs are module-level functions called with picklable arguments.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import pickle
+import time
+from collections.abc import Callable
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Imported by the forkserver before it forks any worker
+PRELOAD_MODULES = ["app.services.text_extraction"]
+
+
+class ExtractionEngineError(RuntimeError):
+    """Raised when the engine cannot run an extraction job."""
+
+
+class ExtractionBusyError(ExtractionEngineError):
+    """Raised when the extraction queue is full; the caller should retry later."""
+
+
+class ExtractionTimeoutError(ExtractionEngineError):
+    """Raised when a job exceeds its timeout; the worker running it is killed."""
+
+
+def _preload_parsers() -> None:
+    """Worker initializer: import the document parsers before the first job."""
+    from app.services.text_extraction import warm_parsers
+
+    warm_parsers()
+
+
+def _worker_main(conn: Connection, initializer: Callable[[], None] | None) -> None:
+    """Worker loop: run ``(func, args)`` jobs from the pipe until it closes."""
+    if initializer is not None:
+        try:
+            initializer()
+        except Exception as e:  # a cold worker still works, just slower
+            logger.warning(f"Extraction worker initializer failed: {e}")
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+
+        func, args = job
+        started = time.perf_counter()
+        try:
+            status, payload = "ok", func(*args)
+        except Exception as e:
+            try:
+                pickle.dumps(e)
+                status, payload = "error", e
+            except Exception:
+                status, payload = "error", ExtractionEngineError(f"{type(e).__name__}: {e}")
+        conn.send((status, payload, time.perf_counter() - started))
+
+
+class _Worker:
+    """One warm worker process and the parent's end of its pipe."""
+
+    def __init__(self, ctx: Any, initializer: Callable[[], None] | None):
+        self.conn, child_conn = ctx.Pipe()
+        self.process: BaseProcess = ctx.Process(
+            target=_worker_main, args=(child_conn, initializer), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def call(self, func: Callable[..., Any], args: tuple, timeout: float) -> tuple[Any, float]:
+        """Run one job (blocking); returns (result, parse seconds)."""
+        try:
+            self.conn.send((func, args))
+            if not self.conn.poll(timeout):
+                raise ExtractionTimeoutError(f"Extraction exceeded {timeout:g}s and was killed")
+            status, payload, parse_seconds = self.conn.recv()
+        except (EOFError, OSError, BrokenPipeError) as e:
+            raise ExtractionEngineError(f"Extraction worker died: {e}") from e
+        if status == "error":
+            raise payload
+        return payload, parse_seconds
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=5)
+        self.conn.close()
+
+
+class ExtractionEngine:
+    """Bounded pool of warm extraction worker processes."""
+
+    def __init__(
+        self,
+        workers: int = settings.EXTRACTION_WORKERS,
+        queue_size: int = settings.EXTRACTION_QUEUE_SIZE,
+        timeout: float = settings.EXTRACTION_TIMEOUT_SECONDS,
+        start_method: str = settings.EXTRACTION_START_METHOD,
+        initializer: Callable[[], None] | None = _preload_parsers,
+    ):
+        if workers < 1:
+            raise ValueError("ExtractionEngine needs at least one worker")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._ctx = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            self._ctx.set_forkserver_preload(PRELOAD_MODULES)
+        self._initializer = initializer
+        self._idle: asyncio.Queue[_Worker] | None = None
+        self._all: set[_Worker] = set()
+        self._start_lock = asyncio.Lock()
+        self._admitted = 0
+        self._counters = {"completed": 0, "failed": 0, "timeouts": 0, "rejected": 0}
+        self._dispatched = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        self._parse_total = 0.0
+        self._parse_max = 0.0
+
+    @property
+    def saturated(self) -> bool:
+        """True when a new job would be rejected with ExtractionBusyError."""
+        return self._admitted >= self.workers + self.queue_size
+
+    async def start(self) -> None:
+        """Start the workers (idempotent); called lazily by the first job."""
+        async with self._start_lock:
+            if self._idle is not None:
+                return
+            idle: asyncio.Queue[_Worker] = asyncio.Queue()
+            for _ in range(self.workers):
+                idle.put_nowait(await self._spawn())
+            self._idle = idle
+            logger.info(f"Started {self.workers} extraction workers")
+
+    async def _spawn(self) -> _Worker:
+        worker = await asyncio.to_thread(_Worker, self._ctx, self._initializer)
+        self._all.add(worker)
+        return worker
+
+    async def _replace(self, worker: _Worker) -> _Worker:
+        self._all.discard(worker)
+        await asyncio.to_thread(worker.kill)
+        return await self._spawn()
+
+    async def run(self, func: Callable[..., Any], *args: Any, timeout: float | None = None) -> Any:
+        """
+        Run ``func(*args)`` in a worker process.
+
+        Args:
+            func: Module-level (picklable) function
+            *args: Picklable arguments
+            timeout: Parse time limit in seconds (default: engine timeout)
+
+        Returns:
+            The function's return value
+
+        Raises:
+            ExtractionBusyError: If the queue is full
+            ExtractionTimeoutError: If the job ran too long (its worker is killed)
+            Exception: Whatever ``func`` raised in the worker
+        """
+        if self.saturated:
+            self._counters["rejected"] += 1
+            raise ExtractionBusyError("Document extraction queue is full, retry shortly")
+
+        self._admitted += 1
+        try:
+            await self.start()
+            idle = self._idle
+            assert idle is not None
+            enqueued = time.perf_counter()
+            worker = await idle.get()
+            waited = time.perf_counter() - enqueued
+            self._dispatched += 1
+            self._queue_wait_total += waited
+            self._queue_wait_max = max(self._queue_wait_max, waited)
+
+            try:
+                result, parse_seconds = await asyncio.to_thread(
+                    worker.call, func, args, timeout or self.timeout
+                )
+            except ExtractionTimeoutError:
+                self._counters["timeouts"] += 1
+                worker = await self._replace(worker)
+                raise
+            except ExtractionEngineError:
+                self._counters["failed"] += 1
+                worker = await self._replace(worker)
+                raise
+            except asyncio.CancelledError:
+                # The job is still running in the worker; its result is unwanted
+                worker = await asyncio.shield(self._replace(worker))
+                raise
+            except Exception:
+                self._counters["failed"] += 1
+                raise
+            finally:
+                idle.put_nowait(worker)
+
+            self._counters["completed"] += 1
+            self._parse_total += parse_seconds
+            self._parse_max = max(self._parse_max, parse_seconds)
+            return result
+        finally:
+            self._admitted -= 1
+
+    async def close(self) -> None:
+        """Stop all workers."""
+        workers, self._all, self._idle = list(self._all), set(), None
+        for worker in workers:
+            await asyncio.to_thread(worker.stop)
+
+    def get_stats(self) -> dict[str, Any]:
+        dispatched = self._dispatched or 1
+        completed = self._counters["completed"] or 1
+        return {
+            "workers": self.workers,
+            "capacity": self.workers + self.queue_size,
+            "in_flight": min(self._admitted, self.workers),
+            "queue_depth": max(self._admitted - self.workers, 0),
+            "queue_wait_ms_avg": round(1000 * self._queue_wait_total / dispatched, 1),
+            "queue_wait_ms_max": round(1000 * self._queue_wait_max, 1),
+            "parse_ms_avg": round(1000 * self._parse_total / completed, 1),
+            "parse_ms_max": round(1000 * self._parse_max, 1),
+            **self._counters,
+        }
+
+
+extraction_engine = ExtractionEngine()
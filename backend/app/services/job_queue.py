@@ -0,0 +1,341 @@
+"""
+Durable background job queue.
+
+Work that should not hold up a request (the LLM structured extraction after a
+resume upload) is stored as a row in the ``background_jobs`` table and run by
+worker coroutines:
+
+- enqueue() is idempotent: the job id is derived from an idempotency key, so
+  enqueueing the same work twice (a retried request, a replayed upload)
+  creates a single job.
+- One poller per process claims due jobs for its idle workers through
+  ``claim_background_jobs`` (FOR UPDATE SKIP LOCKED), which leases each job
+  for the visibility timeout. A job whose worker died or hung is claimed
+  again once its lease expires, and a worker can only settle a job while it
+  still holds the lease.
+- A failed job is retried with exponential backoff; after ``max_attempts`` it
+  is marked failed and the kind's ``on_failure`` callback runs.
+
+Handlers may run more than once for the same job and must be idempotent.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from functools import cached_property
+from typing import Any
+
+from app.core.config import settings
+from app.services.supabase.database import SupabaseDatabaseService
+
+logger = logging.getLogger(__name__)
+
+JOB_TABLE = "background_jobs"
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Job ids are uuid5(idempotency key) in this namespace
+JOB_ID_NAMESPACE = uuid.UUID("922c5d0b-e5b8-4586-9b46-44a5fad66ea9")
+
+MAX_RETRY_DELAY_SECONDS = 3600.0
+
+JobHandler = Callable[[dict[str, Any]], Awaitable[None]]
+FailureHandler = Callable[[dict[str, Any], str], Awaitable[None]]
+
+
+def job_id_for(idempotency_key: str) -> str:
+    """Deterministic job id, so enqueueing the same work twice is a no-op."""
+    return str(uuid.uuid5(JOB_ID_NAMESPACE, idempotency_key))
+
+
+class SupabaseJobStore:
+    """
+    Access to the background_jobs table used by JobQueue.
+
+    The supabase client is synchronous, so every request runs in a thread to
+    keep polling off the event loop.
+    """
+
+    @cached_property
+    def db(self) -> SupabaseDatabaseService:
+        return SupabaseDatabaseService(JOB_TABLE, dict)
+
+    async def _execute(self, query: Callable[[], Any]) -> Any:
+        return await asyncio.to_thread(lambda: query().execute())
+
+    async def insert(self, job: dict[str, Any]) -> None:
+        """Insert a job unless one with the same id already exists."""
+        await self._execute(
+            lambda: self.db.supabase.table(JOB_TABLE).upsert(
+                job, on_conflict="id", ignore_duplicates=True
+            )
+        )
+
+    async def claim(
+        self, kinds: list[str], worker_id: str, limit: int, lease_seconds: float
+    ) -> list[dict[str, Any]]:
+        """Lease up to ``limit`` due jobs of the given kinds (attempts is incremented)."""
+        response = await self._execute(
+            lambda: self.db.supabase.rpc(
+                "claim_background_jobs",
+                {
+                    "p_kinds": kinds,
+                    "p_worker": worker_id,
+                    "p_limit": limit,
+                    "p_lease_seconds": lease_seconds,
+                },
+            )
+        )
+        return response.data or []
+
+    async def settle(self, job_id: str, lease_id: str, data: dict[str, Any]) -> bool:
+        """Update a running job; False if its lease expired and it was claimed again."""
+        response = await self._execute(
+            lambda: self.db.supabase.table(JOB_TABLE)
+            .update(data)
+            .eq("id", job_id)
+            .eq("lease_id", lease_id)
+            .eq("status", RUNNING)
+        )
+        return bool(response.data)
+
+    async def get(self, job_id: str) -> dict[str, Any] | None:
+        response = await self._execute(
+            lambda: self.db.supabase.table(JOB_TABLE).select("*").eq("id", job_id)
+        )
+        return response.data[0] if response.data else None
+
+
+class JobQueue:
+    """Durable job queue run by worker coroutines, with retries and leases."""
+
+    def __init__(
+        self,
+        store: Any = None,
+        workers: int = settings.JOB_QUEUE_WORKERS,
+        visibility_timeout: float = settings.JOB_VISIBILITY_TIMEOUT_SECONDS,
+        max_attempts: int = settings.JOB_MAX_ATTEMPTS,
+        backoff: float = settings.JOB_RETRY_BACKOFF_SECONDS,
+        poll_interval: float = settings.JOB_POLL_INTERVAL_SECONDS,
+    ):
+        self.store = store or SupabaseJobStore()
+        self.workers = workers
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._handlers: dict[str, tuple[JobHandler, FailureHandler | None]] = {}
+        self._poller: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._counters = {"enqueued": 0, "succeeded": 0, "retried": 0, "failed": 0, "lost": 0}
+
+    def register(
+        self, kind: str, handler: JobHandler, on_failure: FailureHandler | None = None
+    ) -> None:
+        """
+        Register the handler of a job kind.
+
+        Args:
+            kind: Job kind
+            handler: Coroutine called with the job payload; raising fails the attempt
+            on_failure: Coroutine called with (payload, error) once retries are exhausted
+        """
+        self._handlers[kind] = (handler, on_failure)
+
+    async def enqueue(self, kind: str, payload: dict[str, Any], idempotency_key: str) -> str:
+        """
+        Store a job for the workers.
+
+        Args:
+            kind: Registered job kind
+            payload: JSON-serializable handler argument
+            idempotency_key: Identifies the work; enqueueing it again is a no-op
+
+        Returns:
+            Job ID
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind {kind!r}")
+
+        job_id = job_id_for(idempotency_key)
+        now = datetime.now(UTC).isoformat()
+        await self.store.insert(
+            {
+                "id": job_id,
+                "kind": kind,
+                "idempotency_key": idempotency_key,
+                "payload": payload,
+                "status": QUEUED,
+                "attempts": 0,
+                "max_attempts": self.max_attempts,
+                "run_after": now,
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+        self._counters["enqueued"] += 1
+        self._wakeup.set()
+        return job_id
+
+    async def get(self, job_id: str) -> dict[str, Any] | None:
+        return await self.store.get(job_id)
+
+    def retry_delay(self, attempts: int) -> float:
+        """Backoff before the next attempt after ``attempts`` failed ones."""
+        return min(self.backoff * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS)
+
+    async def run_pending(self, limit: int = 1) -> int:
+        """
+        Claim up to ``limit`` due jobs and run them.
+
+        Returns:
+            Number of jobs claimed
+        """
+        if not self._handlers:
+            return 0
+        jobs = await self.store.claim(
+            list(self._handlers), self.worker_id, limit, self.visibility_timeout
+        )
+        for job in jobs:
+            await self._run(job)
+        return len(jobs)
+
+    async def _run(self, job: dict[str, Any]) -> None:
+        handler, on_failure = self._handlers[job["kind"]]
+        if job["attempts"] > job["max_attempts"]:
+            # The last attempt outlived its lease (its worker died or hung)
+            await self._fail(job, on_failure, "Lease expired on the last attempt")
+            return
+
+        try:
+            # Finish within the lease, or another worker may run the job concurrently
+            await asyncio.wait_for(handler(job["payload"]), timeout=self.visibility_timeout)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if job["attempts"] >= job["max_attempts"]:
+                await self._fail(job, on_failure, error)
+            else:
+                await self._retry(job, error)
+            return
+
+        if await self._settle(job, {"status": SUCCEEDED, "last_error": None}):
+            self._counters["succeeded"] += 1
+
+    async def _retry(self, job: dict[str, Any], error: str) -> None:
+        delay = self.retry_delay(job["attempts"])
+        run_after = (datetime.now(UTC) + timedelta(seconds=delay)).isoformat()
+        if await self._settle(job, {"status": QUEUED, "run_after": run_after, "last_error": error}):
+            self._counters["retried"] += 1
+            logger.warning(
+                f"Job {job['id']} ({job['kind']}) attempt {job['attempts']} failed, "
+                f"retrying in {delay:g}s: {error}"
+            )
+
+    async def _fail(
+        self, job: dict[str, Any], on_failure: FailureHandler | None, error: str
+    ) -> None:
+        if not await self._settle(job, {"status": FAILED, "last_error": error}):
+            return
+        self._counters["failed"] += 1
+        logger.error(
+            f"Job {job['id']} ({job['kind']}) failed after {job['attempts']} attempts: {error}"
+        )
+        if on_failure is not None:
+            try:
+                await on_failure(job["payload"], error)
+            except Exception as e:
+                logger.error(f"Failure callback of job {job['id']} failed: {e}")
+
+    async def _settle(self, job: dict[str, Any], data: dict[str, Any]) -> bool:
+        now = datetime.now(UTC).isoformat()
+        if data["status"] != QUEUED:
+            data["finished_at"] = now
+        settled = await self.store.settle(
+            job["id"], job["lease_id"], {**data, "locked_until": None, "updated_at": now}
+        )
+        if not settled:
+            self._counters["lost"] += 1
+            logger.warning(f"Job {job['id']} lease expired before it finished; result dropped")
+        return settled
+
+    async def _poll(self) -> None:
+        """
+        Claim due jobs for the idle worker slots and run each in its own task.
+
+        A single poller per process keeps idle polling to one claim per
+        poll_interval, however many workers are configured.
+        """
+        while True:
+            self._wakeup.clear()
+            if len(self._running) >= self.workers:
+                await asyncio.wait(self._running, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            if not self._handlers:
+                jobs = []
+            else:
+                try:
+                    jobs = await self.store.claim(
+                        list(self._handlers),
+                        self.worker_id,
+                        self.workers - len(self._running),
+                        self.visibility_timeout,
+                    )
+                except Exception as e:
+                    logger.error(f"Claiming background jobs failed: {e}")
+                    jobs = []
+            for job in jobs:
+                task = asyncio.create_task(self._run(job))
+                self._running.add(task)
+                task.add_done_callback(self._job_finished)
+            if not jobs:
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+
+    def _job_finished(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background job task crashed: {task.exception()}")
+
+    async def start(self) -> None:
+        """Start the poller and its workers (idempotent; no-op with zero workers)."""
+        if self._poller is not None or self.workers < 1:
+            return
+        self._poller = asyncio.create_task(self._poll())
+        logger.info(f"Started background job poller with {self.workers} workers")
+
+    async def close(self) -> None:
+        """
+        Stop the poller and the jobs it is running.
+
+        A job interrupted here keeps its lease and is claimed again once the
+        visibility timeout expires.
+        """
+        poller, self._poller = self._poller, None
+        tasks = [task for task in (poller, *self._running) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._running.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers if self._poller is not None else 0,
+            "running": len(self._running),
+            "kinds": sorted(self._handlers),
+            "visibility_timeout_seconds": self.visibility_timeout,
+            **self._counters,
+        }
+
+
+# Global background job queue instance
+job_queue = JobQueue()
@@ -0,0 +1,250 @@
+"""
+Resume-to-jobs recommendations over the vector store.
+
+Ranking is a three-stage funnel, so LLM cost grows with N rather than with the
+size of the job catalog:
+
+1. ANN: the resume's (cached) embedding retrieves the RECOMMEND_ANN_TOP_K
+   nearest job descriptions of the user from the vector store.
+2. Re-rank: each candidate's ANN score is blended with a cheap keyword overlap
+   score (share of the job's terms that also appear in the resume), weighted by
+   RECOMMEND_LEXICAL_WEIGHT.
+3. LLM: only the best RECOMMEND_LLM_TOP_N are scored by
+   ScoreImprovementService.calculate_match_score.
+
+Job descriptions are indexed (document_type "job") by a background job queued
+when they are created; scripts/index_job_descriptions.py backfills the ones
+created before. Each job has a fixed point id, so indexing it again replaces it.
+"""
+
+import asyncio
+import logging
+import re
+import unicodedata
+import uuid
+from functools import cached_property
+from typing import Any
+
+from app.agent.manager import EmbeddingManager
+from app.core.config import settings
+from app.services.job_queue import job_queue
+from app.services.score_improvement_service import ScoreImprovementService
+from app.services.vectordb import QdrantService, get_vector_db_service
+
+logger = logging.getLogger(__name__)
+
+JOB_DOCUMENT_TYPE = "job"
+
+INDEX_JOB = "index_job_description"
+
+# Vector store point ids are uuid5(job id) in this namespace
+JOB_POINT_NAMESPACE = uuid.UUID("5f0e7c1a-3b8d-4e52-9a61-0d2c7b4f8e93")
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+# Frequent Portuguese/English words that carry no skill signal
+_STOPWORDS = frozenset(
+    """
+    a o e de da do das dos em no na nos nas um uma para por com sem que se ao aos
+    como mais ou seu sua seus suas ser ter sobre entre ate the and for with from
+    of to in on at by an or be is are will you our your this that experiencia
+    conhecimento anos vaga empresa equipe trabalho requisitos responsabilidades
+    """.split()
+)
+
+
+def _terms(text: str) -> set[str]:
+    """Lowercased, accent-folded terms of ``text`` minus stopwords."""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return {
+        token
+        for token in _TOKEN.findall(folded)
+        if token not in _STOPWORDS and (len(token) > 2 or not token.isalpha())
+    }
+
+
+def keyword_overlap(resume_terms: set[str], job_text: str) -> float:
+    """Fraction of the job's terms that the resume also contains (0-1)."""
+    job_terms = _terms(job_text)
+    if not job_terms:
+        return 0.0
+    return len(job_terms & resume_terms) / len(job_terms)
+
+
+def job_point_id(job_id: str) -> str:
+    """Vector store id of a job description."""
+    return str(uuid.uuid5(JOB_POINT_NAMESPACE, job_id))
+
+
+async def enqueue_index_job(
+    job_id: str, user_id: str, title: str, company: str, description: str
+) -> str:
+    """Queue the indexing of a new job description; returns the background job id."""
+    return await job_queue.enqueue(
+        INDEX_JOB,
+        {
+            "job_id": job_id,
+            "user_id": user_id,
+            "title": title,
+            "company": company,
+            "description": description,
+        },
+        idempotency_key=f"{INDEX_JOB}:{job_id}",
+    )
+
+
+def _scored(match_score: float | None) -> tuple[bool, float]:
+    """Sort key that puts unscored jobs after every scored one."""
+    return match_score is not None, match_score or 0.0
+
+
+class JobRecommendationService:
+    """Index job descriptions and recommend them for a resume."""
+
+    def __init__(
+        self,
+        vector_db: QdrantService | None = None,
+        embedding_manager: EmbeddingManager | None = None,
+    ):
+        self.vector_db = vector_db or get_vector_db_service()
+        self.embedding_manager = embedding_manager or EmbeddingManager()
+
+    @cached_property
+    def scorer(self) -> ScoreImprovementService:
+        """LLM scorer, created only when recommendations are scored."""
+        return ScoreImprovementService()
+
+    async def index_job(
+        self, job_id: str, user_id: str, title: str, company: str, description: str
+    ) -> str:
+        """
+        Add a job description to the user's recommendable jobs.
+
+        Returns:
+            Vector store id of the indexed job
+        """
+        [point_id] = await self.index_jobs(
+            [
+                {
+                    "job_id": job_id,
+                    "user_id": user_id,
+                    "title": title,
+                    "company": company,
+                    "description": description,
+                }
+            ]
+        )
+        return point_id
+
+    async def index_jobs(self, jobs: list[dict[str, Any]]) -> list[str]:
+        """
+        Index many job descriptions with one batched embedding call.
+
+        Args:
+            jobs: Dicts with job_id, user_id, title, company and description
+
+        Returns:
+            Vector store ids, in input order
+        """
+        if not jobs:
+            return []
+        embeddings = await self.embedding_manager.embed_many([job["description"] for job in jobs])
+        point_ids = [job_point_id(job["job_id"]) for job in jobs]
+        # One tenant per add_documents call: the user_id is forced onto its points
+        for user_id in dict.fromkeys(job["user_id"] for job in jobs):
+            owned = [i for i, job in enumerate(jobs) if job["user_id"] == user_id]
+            await self.vector_db.add_documents(
+                documents=[
+                    {
+                        "job_id": jobs[i]["job_id"],
+                        "title": jobs[i]["title"],
+                        "company": jobs[i]["company"],
+                        "text": jobs[i]["description"],
+                    }
+                    for i in owned
+                ],
+                embeddings=[embeddings[i] for i in owned],
+                metadata=[{"document_type": JOB_DOCUMENT_TYPE} for _ in owned],
+                user_id=user_id,
+                ids=[point_ids[i] for i in owned],
+            )
+        return point_ids
+
+    async def recommend(
+        self,
+        resume_text: str,
+        user_id: str,
+        top_k: int = settings.RECOMMEND_ANN_TOP_K,
+        top_n: int = settings.RECOMMEND_LLM_TOP_N,
+    ) -> dict[str, Any]:
+        """
+        Rank the user's stored job descriptions for a resume.
+
+        Args:
+            resume_text: Resume content (already PII-masked when stored)
+            user_id: Owner of the resume and the jobs
+            top_k: ANN shortlist size
+            top_n: Jobs sent to the LLM scorer
+
+        Returns:
+            {"recommendations": [...], "candidates_considered": int}, with
+            recommendations ordered by LLM match score, then blended score
+        """
+        embedding = await self.embedding_manager.embed(resume_text)
+        hits = await self.vector_db.search(
+            query_embedding=embedding,
+            user_id=user_id,
+            limit=top_k,
+            filter_params={"document_type": JOB_DOCUMENT_TYPE},
+        )
+
+        resume_terms = _terms(resume_text)
+        weight = settings.RECOMMEND_LEXICAL_WEIGHT
+        candidates = []
+        for hit in hits:
+            job = hit["document"]
+            lexical = keyword_overlap(resume_terms, job.get("text", ""))
+            candidates.append(
+                {
+                    "job_id": job.get("job_id"),
+                    "title": job.get("title"),
+                    "company": job.get("company"),
+                    "ann_score": hit["score"],
+                    "lexical_score": lexical,
+                    "combined_score": (1 - weight) * hit["score"] + weight * lexical,
+                    "match_score": None,
+                    "_text": job.get("text", ""),
+                }
+            )
+        candidates.sort(key=lambda c: c["combined_score"], reverse=True)
+        shortlist = candidates[:top_n]
+
+        scores = await asyncio.gather(
+            *(self._llm_score(resume_text, c["_text"], c["job_id"]) for c in shortlist)
+        )
+        for candidate, score in zip(shortlist, scores, strict=True):
+            candidate["match_score"] = score
+            del candidate["_text"]
+        shortlist.sort(key=lambda c: (_scored(c["match_score"]), c["combined_score"]), reverse=True)
+
+        logger.info(
+            f"Recommended {len(shortlist)} of {len(candidates)} shortlisted jobs for user {user_id}"
+        )
+        return {"recommendations": shortlist, "candidates_considered": len(candidates)}
+
+    async def _llm_score(self, resume_text: str, job_text: str, job_id: str | None) -> float | None:
+        """LLM match score for one pair; None if scoring failed."""
+        try:
+            result = await self.scorer.calculate_match_score(resume_text, job_text)
+            return float(result.get("score_compatibilidade", result.get("score", 0)))
+        except Exception as e:
+            logger.warning(f"LLM scoring failed for job {job_id}: {e}")
+            return None
+
+
+async def _run_index_job(payload: dict[str, Any]) -> None:
+    await JobRecommendationService().index_job(**payload)
+
+
+job_queue.register(INDEX_JOB, _run_index_job)
@@ -6,30 +6,18 @@ Includes bias detection and PII scanning for LGPD compliance.
 import logging
 from typing import Any
 
+from app.agent.manager import AgentManager
+from app.agent.prompt import Prompt
 from app.exceptions.providers import ProviderError
-from app.services.llm.agent_manager import AgentManager
 
 logger = logging.getLogger(__name__)
 
+# Bump when the extraction prompt changes to invalidate cached LLM responses
+JOB_EXTRACTION_PROMPT_VERSION = "job-extraction-v2"
 
-class JobService:
-    """Service for processing and analyzing job descriptions."""
-
-    def __init__(self):
-        """Initialize job service."""
-        self.agent_manager = AgentManager()
-
-    async def _extract_structured_json(self, job_description_text: str) -> dict[str, Any] | None:
-        """
-        Uses the AgentManager+JSONWrapper to ask the LLM to
-        return the data in exact JSON schema we need.
-
-        SECURITY ENHANCEMENT: Includes comprehensive anti-discrimination rules
-        to ensure job descriptions are analyzed in a bias-free manner.
-        """
-        try:
-            # Anti-discrimination rules for Brazilian legal compliance
-            anti_discrimination_rules = """
+# Static prefix of the extraction prompt: identical for every posting, so it is
+# sent as a system message and cached provider-side
+JOB_EXTRACTION_SYSTEM_PROMPT = """
 CRITICAL - REGRAS ANTI-DISCRIMINAÇÃO (Lei Brasileira):
 - NÃO CONSIDERAR: idade, gênero, raça/etnia, religião, orientação sexual, deficiência
 - NÃO PENALIZAR: candidatos com intervalos de emprego, trajetórias não tradicionais
@@ -45,11 +33,6 @@ BASE LEGAL:
 - Lei nº 12.288/2010 - Estatuto da Igualdade Racial
 - Lei nº 7.853/89 - Pessoas com deficiência
 - LGPD - Transparência em decisões automatizadas
-"""
-
-            # Build structured extraction prompt for Brazilian market with bias prevention
-            prompt = f"""
-{anti_discrimination_rules}
 
 INSTRUÇÕES PARA ANÁLISE DE VAGA:
 
@@ -63,10 +46,8 @@ REGRAS CRÍTICAS DE ANÁLISE:
 4. FOCAR: em competências e qualificações mensuráveis
 5. SINALIZAR: qualquer requisito que possa ser considerado discriminatório
 
-Analise esta descrição de vaga e extraia as informações estruturadas em formato JSON válido:
-
-DESCRIÇÃO DA VAGA:
-{job_description_text}
+Analise a descrição de vaga enviada pelo usuário e extraia as informações estruturadas
+em formato JSON válido.
 
 Retorne um JSON com as seguintes chaves:
 - job_title: Título da vaga (string)
@@ -90,11 +71,38 @@ IMPORTANTE:
 - Retorne apenas o JSON válido, sem texto adicional
 """
 
+
+class JobService:
+    """Service for processing and analyzing job descriptions."""
+
+    def __init__(self):
+        """Initialize job service."""
+        self.agent_manager = AgentManager()
+
+    async def _extract_structured_json(self, job_description_text: str) -> dict[str, Any] | None:
+        """
+        Uses the AgentManager+JSONWrapper to ask the LLM to
+        return the data in exact JSON schema we need.
+
+        SECURITY ENHANCEMENT: Includes comprehensive anti-discrimination rules
+        to ensure job descriptions are analyzed in a bias-free manner.
+        """
+        try:
+            # Static rules/instructions prefix + the posting as the only per-call part
+            prompt = Prompt(
+                system=JOB_EXTRACTION_SYSTEM_PROMPT,
+                user=f"""DESCRIÇÃO DA VAGA:
+{job_description_text}
+""",
+            )
+
             # Get AI response
             response = await self.agent_manager.generate(
                 prompt,
                 max_tokens=2000,
                 temperature=0.3,  # Lower for consistent extraction
+                prompt_version=JOB_EXTRACTION_PROMPT_VERSION,
+                cache_sampled=True,  # Same posting -> same extraction
             )
 
             # Parse the response
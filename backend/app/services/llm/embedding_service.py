@@ -1,10 +1,13 @@
 import logging
 from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
 from functools import lru_cache
 
 import openai
 from pydantic import BaseModel
 
+from app.agent.embedding_batches import embed_in_batches
+from app.agent.embedding_cache import embedding_cache
 from app.core.config import settings
 from app.models.llm_models import LLMUsage
 
@@ -19,6 +22,14 @@ class EmbeddingResponse(BaseModel):
     usage: LLMUsage
 
 
+class EmbeddingBatchResponse(BaseModel):
+    """Response from a batched embedding call; embeddings are in input order."""
+
+    embeddings: list[list[float]]
+    model: str
+    usage: LLMUsage
+
+
 class EmbeddingService(ABC):
     """Abstract base class for embedding services."""
 
@@ -27,6 +38,71 @@ class EmbeddingService(ABC):
         """Create an embedding vector for the text."""
         pass
 
+    async def embed_many(self, texts: list[str], model: str) -> EmbeddingBatchResponse:
+        """Create embedding vectors for several texts, in input order."""
+        responses: list[EmbeddingResponse] = []
+
+        async def create_one(batch: list[str]) -> list[list[float]]:
+            response = await self.create_embedding(batch[0], model)
+            responses.append(response)
+            return [response.embedding]
+
+        embeddings = await embed_in_batches(texts, create_one, max_items=1)
+        tokens = sum(response.usage.prompt_tokens for response in responses)
+        usage = LLMUsage(prompt_tokens=tokens, completion_tokens=0, total_tokens=tokens)
+        return EmbeddingBatchResponse(embeddings=embeddings, model=model, usage=usage)
+
+
+async def _cached_embedding(
+    provider: str, text: str, model: str, create: Callable[[], Awaitable[EmbeddingResponse]]
+) -> EmbeddingResponse:
+    """Serve ``text`` from the shared embedding cache, or create and store it."""
+    if not embedding_cache.enabled:
+        return await create()
+    key = embedding_cache.make_key(f"{provider}:{model}", text)
+    cached = await embedding_cache.get(key)
+    if cached is not None:
+        # No tokens were billed for a cache hit
+        usage = LLMUsage(prompt_tokens=0, completion_tokens=0, total_tokens=0)
+        return EmbeddingResponse(embedding=cached, model=model, usage=usage)
+    response = await create()
+    await embedding_cache.set(key, response.embedding)
+    return response
+
+
+async def _openai_embed_many(
+    client: openai.AsyncOpenAI, provider: str, texts: list[str], model: str
+) -> EmbeddingBatchResponse:
+    """Embed texts in token-budgeted batches, reusing cached vectors."""
+    results: list[list[float] | None] = [None] * len(texts)
+    missing: dict[str, list[int]] = {}
+    for index, text in enumerate(texts):
+        key = embedding_cache.make_key(f"{provider}:{model}", text)
+        cached = await embedding_cache.get(key) if embedding_cache.enabled else None
+        if cached is not None:
+            results[index] = cached
+        else:
+            missing.setdefault(key, []).append(index)
+
+    tokens = 0
+
+    async def create_batch(batch: list[str]) -> list[list[float]]:
+        nonlocal tokens
+        response = await client.embeddings.create(model=model, input=batch)
+        tokens += response.usage.prompt_tokens
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    keys = list(missing)
+    vectors = await embed_in_batches([texts[missing[key][0]] for key in keys], create_batch)
+    for key, vector in zip(keys, vectors, strict=True):
+        for index in missing[key]:
+            results[index] = vector
+        if embedding_cache.enabled:
+            await embedding_cache.set(key, vector)
+
+    usage = LLMUsage(prompt_tokens=tokens, completion_tokens=0, total_tokens=tokens)
+    return EmbeddingBatchResponse(embeddings=results, model=model, usage=usage)
+
 
 class OpenAIEmbeddingService(EmbeddingService):
     """OpenAI implementation of the embedding service."""
@@ -39,17 +115,27 @@ class OpenAIEmbeddingService(EmbeddingService):
         self, text: str, model: str = "text-embedding-ada-002"
     ) -> EmbeddingResponse:
         """Create an embedding using OpenAI."""
-        response = await self.client.embeddings.create(model=model, input=text)
 
-        embedding = response.data[0].embedding
+        async def create() -> EmbeddingResponse:
+            response = await self.client.embeddings.create(model=model, input=text)
 
-        usage = LLMUsage(
-            prompt_tokens=response.usage.prompt_tokens,
-            completion_tokens=0,
-            total_tokens=response.usage.total_tokens,
-        )
+            embedding = response.data[0].embedding
 
-        return EmbeddingResponse(embedding=embedding, model=model, usage=usage)
+            usage = LLMUsage(
+                prompt_tokens=response.usage.prompt_tokens,
+                completion_tokens=0,
+                total_tokens=response.usage.total_tokens,
+            )
+
+            return EmbeddingResponse(embedding=embedding, model=model, usage=usage)
+
+        return await _cached_embedding("openai", text, model, create)
+
+    async def embed_many(
+        self, texts: list[str], model: str = "text-embedding-ada-002"
+    ) -> EmbeddingBatchResponse:
+        """Create embeddings using OpenAI, many inputs per request."""
+        return await _openai_embed_many(self.client, "openai", texts, model)
 
 
 class AnthropicEmbeddingService(EmbeddingService):
@@ -70,7 +156,8 @@ class AnthropicEmbeddingService(EmbeddingService):
         self, text: str, model: str = "text-embedding-3-small"
     ) -> EmbeddingResponse:
         """Create an embedding using OpenAI (fallback for Anthropic)."""
-        try:
+
+        async def create() -> EmbeddingResponse:
             response = await self.openai_client.embeddings.create(model=model, input=text)
 
             embedding = response.data[0].embedding
@@ -83,10 +170,25 @@ class AnthropicEmbeddingService(EmbeddingService):
 
             return EmbeddingResponse(embedding=embedding, model=model, usage=usage)
 
+        try:
+            # Same vectors as OpenAIEmbeddingService, so the same cache namespace
+            return await _cached_embedding("openai", text, model, create)
+
         except Exception as e:
             logger.error(f"Failed to create embedding with OpenAI fallback: {e}")
             raise ValueError(f"Failed to create embedding: {str(e)}") from e
 
+    async def embed_many(
+        self, texts: list[str], model: str = "text-embedding-3-small"
+    ) -> EmbeddingBatchResponse:
+        """Create embeddings using OpenAI (fallback for Anthropic), many inputs per request."""
+        try:
+            return await _openai_embed_many(self.openai_client, "openai", texts, model)
+
+        except Exception as e:
+            logger.error(f"Failed to create embeddings with OpenAI fallback: {e}")
+            raise ValueError(f"Failed to create embeddings: {str(e)}") from e
+
 
 class EmbeddingServiceFactory:
     """Factory for creating embedding service instances."""
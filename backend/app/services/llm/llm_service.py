@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Callable
 from functools import lru_cache
 from typing import Any
 
@@ -6,6 +7,7 @@ import anthropic
 import openai
 from pydantic import BaseModel
 
+from app.agent.cache import llm_response_cache
 from app.core.config import settings
 from app.models.llm_models import LLMUsage
 
@@ -30,6 +32,9 @@ class AgentManager:
         max_tokens: int = 1000,
         temperature: float = 0.7,
         model: str | None = None,
+        prompt_version: str | None = None,
+        cache_sampled: bool | None = None,
+        validate: Callable[[str], bool] | None = None,
         **kwargs: Any,
     ) -> str:
         """
@@ -40,6 +45,9 @@ class AgentManager:
             max_tokens: Maximum tokens to generate
             temperature: Sampling temperature
             model: Model name (uses provider default if None)
+            prompt_version: Prompt template version, part of the response cache key
+            cache_sampled: Allow serving/storing cached responses when temperature > 0
+            validate: Returns False for a response the caller can't use; it is not cached
             **kwargs: Additional parameters
 
         Returns:
@@ -52,10 +60,29 @@ class AgentManager:
             if model is None:
                 model = "gpt-3.5-turbo" if self.provider == "openai" else "claude-3-sonnet-20240229"
 
-            response = await self.service.generate_text(
-                prompt=prompt, model=model, max_tokens=max_tokens, temperature=temperature, **kwargs
+            resolved_model = model
+
+            async def _call() -> str:
+                response = await self.service.generate_text(
+                    prompt=prompt,
+                    model=resolved_model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    **kwargs,
+                )
+                return response.text
+
+            return await llm_response_cache.get_or_generate(
+                model=resolved_model,
+                provider=self.provider,
+                prompt=prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                prompt_version=prompt_version,
+                generate=_call,
+                cache_sampled=cache_sampled,
+                validate=validate,
             )
-            return response.text
         except Exception as e:
             raise ProviderError(f"LLM generation failed: {str(e)}") from e
 
@@ -83,6 +110,20 @@ class LLMService(ABC):
         """Generate text using the LLM."""
         pass
 
+    async def stream_text(
+        self,
+        prompt: str,
+        model: str,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs: dict[str, Any],
+    ) -> AsyncIterator[str]:
+        """Stream generated text as deltas (falls back to one delta with the full text)."""
+        response = await self.generate_text(
+            prompt=prompt, model=model, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        yield response.text
+
 
 class OpenAIService(LLMService):
     """OpenAI implementation of the LLM service."""
@@ -121,6 +162,27 @@ class OpenAIService(LLMService):
 
         return LLMResponse(text=response.choices[0].message.content, model=model, usage=usage)
 
+    async def stream_text(
+        self,
+        prompt: str,
+        model: str = "gpt-3.5-turbo",
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs: dict[str, Any],
+    ) -> AsyncIterator[str]:
+        """Stream text deltas from OpenAI."""
+        stream = await self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+        )
+        async with stream:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
 
 class AnthropicService(LLMService):
     """Anthropic (Claude) implementation of the LLM service."""
@@ -159,6 +221,25 @@ class AnthropicService(LLMService):
 
         return LLMResponse(text=response.content[0].text, model=model, usage=usage)
 
+    async def stream_text(
+        self,
+        prompt: str,
+        model: str = "claude-3-sonnet-20240229",
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        **kwargs: dict[str, Any],
+    ) -> AsyncIterator[str]:
+        """Stream text deltas from Anthropic Claude."""
+        async with self.client.messages.stream(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            messages=[{"role": "user", "content": prompt}],
+        ) as stream:
+            async for text in stream.text_stream:
+                if text:
+                    yield text
+
 
 class LLMServiceFactory:
     """Factory for creating LLM service instances."""
@@ -0,0 +1,121 @@
+"""
+Content-addressed store of resume processing artifacts.
+
+Users re-upload the same CV for every application. Artifacts derived from an
+upload are stored under the SHA-256 checksum of the file, so a repeat upload
+skips text extraction, the PII scan and the LLM structured extraction:
+
+- "text": extracted text after PII masking plus a summary of the PII findings
+  (types, confidence, never the detected values), versioned by the extractor
+- "structured": structured resume JSON, versioned by the extraction prompt
+
+Artifacts are scoped per user, so LGPD deletion and retention cleanup purge
+exactly the artifacts of the affected user. Unmasked text is never stored.
+"""
+
+import hashlib
+import logging
+from datetime import UTC, datetime
+from functools import cached_property
+from typing import Any
+
+from app.core.config import settings
+from app.services.supabase.database import SupabaseDatabaseService
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_TABLE = "resume_artifacts"
+
+TEXT_ARTIFACT = "text"
+STRUCTURED_ARTIFACT = "structured"
+
+
+class ResumeArtifactStore:
+    """Per-user cache of resume artifacts keyed by file checksum and version."""
+
+    def __init__(self, enabled: bool = settings.RESUME_ARTIFACT_CACHE_ENABLED):
+        self.enabled = enabled
+
+    @cached_property
+    def db(self) -> SupabaseDatabaseService:
+        return SupabaseDatabaseService(ARTIFACT_TABLE, dict)
+
+    @staticmethod
+    def artifact_id(user_id: str, checksum: str, kind: str, version: str) -> str:
+        """Deterministic row id, so storing an artifact twice is an idempotent upsert."""
+        return hashlib.sha256(f"{user_id}\0{checksum}\0{kind}\0{version}".encode()).hexdigest()
+
+    async def get(
+        self, user_id: str, checksum: str, kind: str, version: str
+    ) -> dict[str, Any] | None:
+        """
+        Look up an artifact.
+
+        Returns:
+            The stored payload, or None on a miss (or if the store is unavailable)
+        """
+        if not self.enabled:
+            return None
+        try:
+            record = await self.db.get(self.artifact_id(user_id, checksum, kind, version))
+        except Exception as e:
+            logger.warning(f"Resume artifact lookup failed ({kind}/{version}): {e}")
+            return None
+        return record["payload"] if record else None
+
+    async def put(
+        self, user_id: str, checksum: str, kind: str, version: str, payload: dict[str, Any]
+    ) -> None:
+        """Store an artifact; failures are logged since the store is only a cache."""
+        if not self.enabled:
+            return
+        try:
+            await self.db.upsert_many(
+                [
+                    {
+                        "id": self.artifact_id(user_id, checksum, kind, version),
+                        "user_id": user_id,
+                        "checksum": checksum,
+                        "kind": kind,
+                        "version": version,
+                        "payload": payload,
+                        "created_at": datetime.now(UTC).isoformat(),
+                    }
+                ]
+            )
+        except Exception as e:
+            logger.warning(f"Failed to store resume artifact ({kind}/{version}): {e}")
+
+    async def delete_for_checksum(self, user_id: str, checksum: str) -> int:
+        """Delete every artifact (all kinds and versions) of one of the user's files."""
+        response = (
+            self.db.supabase.table(ARTIFACT_TABLE)
+            .delete()
+            .eq("user_id", user_id)
+            .eq("checksum", checksum)
+            .execute()
+        )
+        return len(response.data or [])
+
+    async def delete_for_user(self, user_id: str) -> int:
+        """Delete all of a user's artifacts (LGPD deletion)."""
+        response = self.db.supabase.table(ARTIFACT_TABLE).delete().eq("user_id", user_id).execute()
+        deleted = len(response.data or [])
+        logger.info(f"Deleted {deleted} resume artifacts for user {user_id}")
+        return deleted
+
+    async def purge_expired(self, cutoff_date: datetime) -> int:
+        """Delete artifacts created before ``cutoff_date`` (retention cleanup)."""
+        response = (
+            self.db.supabase.table(ARTIFACT_TABLE)
+            .delete()
+            .lt("created_at", cutoff_date.isoformat())
+            .execute()
+        )
+        deleted = len(response.data or [])
+        logger.info(f"Purged {deleted} resume artifacts created before {cutoff_date.isoformat()}")
+        return deleted
+
+
+# Global resume artifact store instance
+resume_artifact_store = ResumeArtifactStore()
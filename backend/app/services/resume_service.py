@@ -5,25 +5,51 @@ This service handles resume file conversion, text extraction, PII detection/mask
 and storage with comprehensive LGPD compliance for Brazilian market deployment.
 """
 
+import hashlib
+import json
 import logging
-import tempfile
 import uuid
 from datetime import datetime
 from typing import Any
 
-from markitdown import MarkItDown
-
+from app.services.extraction_engine import ExtractionEngineError, extraction_engine
+from app.services.job_queue import job_queue
 from app.services.llm.llm_service import AgentManager
+from app.services.resume_artifact_store import (
+    STRUCTURED_ARTIFACT,
+    TEXT_ARTIFACT,
+    resume_artifact_store,
+)
 from app.services.security.audit_trail import ComplianceStatus, ComplianceType, audit_trail
 from app.services.security.pii_detection_service import (
     PIIDetectionResult,
+    PIIType,
     pii_detector,
 )
 from app.services.supabase.database import SupabaseDatabaseService
-from app.services.text_extraction import TextExtractionError, TextExtractionService
+from app.services.text_extraction import (
+    TextExtractionError,
+    TextExtractionService,
+    markitdown_to_text,
+)
 
 logger = logging.getLogger(__name__)
 
+# Bump when the extraction prompt changes to invalidate cached LLM responses
+RESUME_EXTRACTION_PROMPT_VERSION = "resume-extraction-v1"
+
+# Bump when text extraction or PII masking changes to invalidate cached texts
+RESUME_TEXT_EXTRACTOR_VERSION = "resume-text-v1"
+
+# Background job extracting structured data after an upload
+STRUCTURED_EXTRACTION_JOB = "resume_structured_extraction"
+
+# resumes.structured_status values
+STRUCTURED_PENDING = "pending"
+STRUCTURED_PROCESSING = "processing"
+STRUCTURED_READY = "ready"
+STRUCTURED_FAILED = "failed"
+
 
 class ResumeService:
     """
@@ -39,10 +65,11 @@ class ResumeService:
 
     def __init__(self):
         """Initialize resume service with required dependencies."""
-        self.md = MarkItDown()
         self.text_extraction_service = TextExtractionService()
         self.agent_manager = AgentManager()
         self.pii_detector = pii_detector
+        self.artifact_store = resume_artifact_store
+        self.job_queue = job_queue
         self._validate_docx_dependencies()
 
     def _validate_docx_dependencies(self) -> None:
@@ -73,16 +100,23 @@ class ResumeService:
         filename: str,
         content_type: str = "md",
         user_id: str | None = None,
+        checksum: str | None = None,
     ) -> str:
         """
         Convert resume file and store in database with PII processing.
 
+        A file the user already uploaded (same SHA-256) reuses the stored
+        artifacts instead of being extracted, scanned and analyzed again.
+        Structured extraction is queued as a background job; the resume's
+        ``structured_status`` tracks it.
+
         Args:
             file_bytes: Raw file content
             file_type: MIME type of the file
             filename: Original filename
             content_type: Output content type (md, html, plain)
             user_id: User ID for ownership
+            checksum: SHA-256 of the file, if already computed
 
         Returns:
             Resume ID of stored document
@@ -91,28 +125,46 @@ class ResumeService:
             Exception: If conversion or storage fails
         """
         try:
-            # Extract text from file
-            extracted_text = await self._extract_text_from_file(file_bytes, file_type)
-
-            # Process text with PII detection and masking
-            processed_text = await self._scan_and_process_resume_text(
-                text_content=extracted_text,
-                content_type=content_type,
-                user_id=user_id or "anonymous",
-                filename=filename,
-            )
+            checksum = checksum or hashlib.sha256(file_bytes).hexdigest()
+
+            processed_text = await self._get_cached_resume_text(user_id, checksum, filename)
+            if processed_text is None:
+                # Extract text from file
+                extracted_text = await self._extract_text_from_file(file_bytes, file_type)
+
+                # Process text with PII detection and masking
+                processed_text, pii_result = await self._scan_and_mask_resume_text(
+                    text_content=extracted_text,
+                    user_id=user_id or "anonymous",
+                    filename=filename,
+                )
+
+                # Anonymous uploads are not cached: they could not be deleted per user
+                if user_id:
+                    await self.artifact_store.put(
+                        user_id,
+                        checksum,
+                        TEXT_ARTIFACT,
+                        RESUME_TEXT_EXTRACTOR_VERSION,
+                        {
+                            "text": processed_text,
+                            "pii_findings": self._pii_findings(pii_result, len(extracted_text)),
+                        },
+                    )
 
             # Store in database
-            resume_id = await self._store_resume_in_db(processed_text, content_type, user_id)
+            resume_id = await self._store_resume_in_db(
+                processed_text, content_type, user_id, checksum
+            )
 
             # Trigger structured extraction (async, don't wait)
-            try:
-                await self._extract_and_store_structured_resume(resume_id, processed_text)
-            except Exception as e:
-                logger.warning(f"Structured extraction failed for resume {resume_id}: {e}")
+            await self._enqueue_structured_extraction(resume_id, user_id, checksum)
 
             return resume_id
 
+        except ExtractionEngineError:
+            # Busy/timeout must reach the endpoint as such (503/422), not as a generic failure
+            raise
         except Exception as e:
             logger.error(f"Resume conversion failed: {str(e)}")
             raise Exception(f"File conversion failed: {str(e)}") from e
@@ -139,11 +191,14 @@ class ResumeService:
         try:
             # Use MarkItDown for PDF and DOCX files
             if file_ext in [".pdf", ".docx", ".doc"]:
-                return await self._extract_with_markitdown(file_bytes, file_ext)
+                return await self._extract_with_markitdown(file_bytes, file_ext, file_type)
             else:
                 # Use text extraction service for other formats
                 return await self.text_extraction_service.extract_text(file_bytes, file_ext)
 
+        except ExtractionEngineError:
+            # Queue full or parse timed out: a second parser would only make it worse
+            raise
         except Exception as e:
             # Fallback to text extraction if MarkItDown fails
             if file_ext in [".pdf", ".docx", ".doc"]:
@@ -157,46 +212,67 @@ class ResumeService:
             else:
                 raise TextExtractionError(f"Text extraction failed: {str(e)}") from e
 
-    async def _extract_with_markitdown(self, file_bytes: bytes, file_ext: str) -> str:
+    async def _extract_with_markitdown(
+        self, file_bytes: bytes, file_ext: str, mimetype: str | None = None
+    ) -> str:
         """
-        Extract text using MarkItDown library.
+        Extract text using MarkItDown library in an extraction worker process.
 
         Args:
             file_bytes: Raw file content
             file_ext: File extension
+            mimetype: Declared MIME type (format hint)
 
         Returns:
             Extracted text content
         """
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(suffix=file_ext, delete=False) as temp_file:
-            temp_file.write(file_bytes)
-            temp_file_path = temp_file.name
+        return await extraction_engine.run(markitdown_to_text, file_bytes, file_ext, mimetype)
 
-        try:
-            # Convert with MarkItDown
-            result = self.md.convert(temp_file_path)
-            return result.text_content
+    async def _get_cached_resume_text(
+        self, user_id: str | None, checksum: str, filename: str
+    ) -> str | None:
+        """
+        Masked text of a file the user uploaded before, if cached.
 
-        except Exception as e:
-            # Check for specific dependency error
-            if "MissingDependencyException" in str(e) and file_ext == ".docx":
-                raise Exception(
-                    "markitdown is missing DOCX support. "
-                    "Install with: pip install 'markitdown[docx]'"
-                ) from e
-            else:
-                raise e
+        The PII detection is logged again so the audit trail covers every upload.
+        """
+        if not user_id:
+            return None
+        cached = await self.artifact_store.get(
+            user_id, checksum, TEXT_ARTIFACT, RESUME_TEXT_EXTRACTOR_VERSION
+        )
+        if cached is None:
+            return None
 
-        finally:
-            # Clean up temporary file
-            try:
-                import os
+        logger.info(f"Reusing processed text of file {checksum[:12]} for user {user_id}")
+        findings = cached.get("pii_findings")
+        if findings:
+            await self._log_pii_detection(
+                user_id=user_id,
+                filename=filename,
+                pii_result=PIIDetectionResult(
+                    has_pii=True,
+                    pii_types_found=[PIIType(t) for t in findings["pii_types_found"]],
+                    confidence_score=findings["confidence_score"],
+                    scan_duration_ms=findings.get("scan_duration_ms"),
+                ),
+                original_length=findings["original_length"],
+                masked_length=len(cached["text"]),
+            )
+        return cached["text"]
 
-                if os.path.exists(temp_file_path):
-                    os.remove(temp_file_path)
-            except Exception as cleanup_error:
-                logger.warning(f"Failed to clean up temp file {temp_file_path}: {cleanup_error}")
+    def _pii_findings(
+        self, pii_result: PIIDetectionResult | None, original_length: int
+    ) -> dict[str, Any] | None:
+        """Cacheable summary of a PII scan (without the detected values)."""
+        if pii_result is None or not pii_result.has_pii:
+            return None
+        return {
+            "pii_types_found": [t.value for t in pii_result.pii_types_found],
+            "confidence_score": pii_result.confidence_score,
+            "scan_duration_ms": pii_result.scan_duration_ms,
+            "original_length": original_length,
+        }
 
     async def _scan_and_process_resume_text(
         self, text_content: str, content_type: str, user_id: str, filename: str
@@ -213,6 +289,23 @@ class ResumeService:
         Returns:
             Processed text (masked if PII detected)
         """
+        processed_text, _ = await self._scan_and_mask_resume_text(text_content, user_id, filename)
+        return processed_text
+
+    async def _scan_and_mask_resume_text(
+        self, text_content: str, user_id: str, filename: str
+    ) -> tuple[str, PIIDetectionResult]:
+        """
+        Scan text for PII and apply masking if needed.
+
+        Args:
+            text_content: Original extracted text
+            user_id: User ID for ownership
+            filename: Original filename
+
+        Returns:
+            Processed text (masked if PII detected) and the scan result
+        """
         try:
             # Scan for PII
             pii_result = self.pii_detector.scan_text(text_content)
@@ -236,10 +329,10 @@ class ResumeService:
                     masked_length=len(processed_text),
                 )
 
-                return processed_text
+                return processed_text, pii_result
             else:
                 # No PII detected, return original text
-                return text_content
+                return text_content, pii_result
 
         except Exception as e:
             logger.error(f"PII detection error: {str(e)}")
@@ -290,7 +383,11 @@ class ResumeService:
             # Don't raise error - logging failure shouldn't stop processing
 
     async def _store_resume_in_db(
-        self, content: str, content_type: str, user_id: str | None = None
+        self,
+        content: str,
+        content_type: str,
+        user_id: str | None = None,
+        checksum: str | None = None,
     ) -> str:
         """
         Store processed resume content in database.
@@ -299,6 +396,7 @@ class ResumeService:
             content: Processed resume content
             content_type: Content type
             user_id: User ID for ownership
+            checksum: SHA-256 of the uploaded file (links the resume to its artifacts)
 
         Returns:
             Resume ID
@@ -311,6 +409,8 @@ class ResumeService:
             "content": content,
             "content_type": self._normalize_content_type(content_type),
             "user_id": user_id,  # Will be None for anonymous uploads
+            "source_checksum": checksum,
+            "structured_status": STRUCTURED_PENDING,
             "created_at": datetime.utcnow(),
         }
 
@@ -326,34 +426,183 @@ class ResumeService:
         }
         return type_mapping.get(content_type.lower(), "text/plain")
 
-    async def _extract_and_store_structured_resume(self, resume_id: str, resume_text: str) -> None:
+    async def _enqueue_structured_extraction(
+        self, resume_id: str, user_id: str | None, checksum: str | None
+    ) -> None:
+        """Queue the structured extraction of a stored resume."""
+        try:
+            await self.job_queue.enqueue(
+                STRUCTURED_EXTRACTION_JOB,
+                {"resume_id": resume_id, "user_id": user_id, "checksum": checksum},
+                idempotency_key=(
+                    f"{STRUCTURED_EXTRACTION_JOB}:{resume_id}:{RESUME_EXTRACTION_PROMPT_VERSION}"
+                ),
+            )
+        except Exception as e:
+            # The resume itself is stored; only its structured data is lost
+            logger.error(f"Failed to queue structured extraction for resume {resume_id}: {e}")
+            try:
+                await self._set_structured_status(resume_id, STRUCTURED_FAILED)
+            except Exception as status_error:
+                logger.warning(f"Failed to update resume {resume_id} status: {status_error}")
+
+    async def _get_resume_row(self, resume_id: str) -> dict[str, Any] | None:
+        """Get a resume row by its resume_id (``id`` is an internal serial key)."""
+        service = SupabaseDatabaseService("resumes", dict)
+        response = (
+            service.supabase.table("resumes").select("*").eq("resume_id", resume_id).execute()
+        )
+        return response.data[0] if response.data else None
+
+    async def _get_structured_row(self, resume_id: str) -> dict[str, Any] | None:
+        """Get the resume_structured_data row of a resume by its resume_id."""
+        service = SupabaseDatabaseService("resume_structured_data", dict)
+        response = (
+            service.supabase.table("resume_structured_data")
+            .select("*")
+            .eq("resume_id", resume_id)
+            .execute()
+        )
+        return response.data[0] if response.data else None
+
+    async def _set_structured_status(self, resume_id: str, status: str) -> None:
+        """Update the structured extraction status clients poll for."""
+        service = SupabaseDatabaseService("resumes", dict)
+        service.supabase.table("resumes").update({"structured_status": status}).eq(
+            "resume_id", resume_id
+        ).execute()
+
+    async def run_structured_extraction_job(self, payload: dict[str, Any]) -> None:
+        """
+        Background job: extract and store the structured data of an uploaded resume.
+
+        Safe to run again after a failed or interrupted attempt: the structured
+        record is keyed by resume, and a finished extraction of the same file is
+        reused from the artifact store.
+
+        Args:
+            payload: resume_id, user_id and checksum of the upload
+
+        Raises:
+            Exception: If extraction or storage fails (the job is retried)
+        """
+        resume_id = payload["resume_id"]
+        resume = await self._get_resume_row(resume_id)
+        if not resume:
+            logger.info(f"Resume {resume_id} was deleted before structured extraction")
+            return
+
+        await self._set_structured_status(resume_id, STRUCTURED_PROCESSING)
+        await self._store_structured_resume(
+            resume_id, resume["content"], payload.get("user_id"), payload.get("checksum")
+        )
+        await self._set_structured_status(resume_id, STRUCTURED_READY)
+
+    async def _extract_and_store_structured_resume(
+        self,
+        resume_id: str,
+        resume_text: str,
+        user_id: str | None = None,
+        checksum: str | None = None,
+    ) -> None:
         """
         Extract structured data from resume and store separately.
 
+        Best-effort variant of ``_store_structured_resume``: failures are logged.
+
         Args:
             resume_id: Resume ID
             resume_text: Resume text content
+            user_id: Owner, used with ``checksum`` to reuse a previous extraction
+            checksum: SHA-256 of the uploaded file
         """
         try:
+            await self._store_structured_resume(resume_id, resume_text, user_id, checksum)
+        except Exception as e:
+            logger.warning(f"Structured extraction failed for resume {resume_id}: {e}")
+            # Don't raise error - structured extraction is optional
+
+    async def _store_structured_resume(
+        self,
+        resume_id: str,
+        resume_text: str,
+        user_id: str | None = None,
+        checksum: str | None = None,
+    ) -> None:
+        """
+        Extract structured data from resume and store it, keyed by resume ID.
+
+        Raises:
+            Exception: If the extraction fails or returns no data
+        """
+        cached = None
+        if user_id and checksum:
+            cached = await self.artifact_store.get(
+                user_id, checksum, STRUCTURED_ARTIFACT, RESUME_EXTRACTION_PROMPT_VERSION
+            )
+
+        if cached is not None:
+            structured_data = cached["structured_data"]
+        else:
             # Extract structured JSON using existing method
             structured_data = await self._extract_structured_json(resume_text)
+            if not structured_data:
+                raise ValueError(f"Structured extraction returned no data for resume {resume_id}")
+            if user_id and checksum:
+                await self.artifact_store.put(
+                    user_id,
+                    checksum,
+                    STRUCTURED_ARTIFACT,
+                    RESUME_EXTRACTION_PROMPT_VERSION,
+                    {"structured_data": structured_data},
+                )
 
-            if structured_data:
-                # Store structured data
-                service = SupabaseDatabaseService("resume_structured_data", dict)
-
-                structured_record = {
+        # Store structured data; upserted so a retried job doesn't duplicate it
+        service = SupabaseDatabaseService("resume_structured_data", dict)
+        await service.upsert_many(
+            [
+                {
+                    "id": resume_id,
                     "resume_id": resume_id,
                     "structured_data": structured_data,
-                    "extracted_at": datetime.utcnow(),
+                    "extracted_at": datetime.utcnow().isoformat(),
                 }
+            ]
+        )
+        logger.info(f"Structured data extracted and stored for resume {resume_id}")
 
-                await service.create(structured_record)
-                logger.info(f"Structured data extracted and stored for resume {resume_id}")
+    @staticmethod
+    def _parse_structured_response(response: str) -> dict[str, Any] | None:
+        """
+        Parse the extraction response: plain JSON, or JSON in a markdown code block.
 
-        except Exception as e:
-            logger.warning(f"Structured extraction failed for resume {resume_id}: {e}")
-            # Don't raise error - structured extraction is optional
+        Returns:
+            The parsed object, or None if the response holds no JSON object
+        """
+        candidates = [response]
+        if "```json" in response:
+            json_start = response.find("```json") + 7
+            json_end = response.find("```", json_start)
+            if json_end != -1:
+                candidates.append(response[json_start:json_end].strip())
+        elif "```" in response:
+            json_start = response.find("```") + 3
+            json_end = response.find("```", json_start)
+            if json_end != -1:
+                json_str = response[json_start:json_end].strip()
+                # Remove 'json' if present at start
+                if json_str.startswith("json"):
+                    json_str = json_str[4:].strip()
+                candidates.append(json_str)
+
+        for candidate in candidates:
+            try:
+                parsed = json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(parsed, dict):
+                return parsed
+        return None
 
     async def _extract_structured_json(self, resume_text: str) -> dict[str, Any] | None:
         """
@@ -425,20 +674,18 @@ IMPORTANTE:
 - Se alguma informação não estiver presente, não inclua o campo ou retorne array vazio
 """
 
-            # Get AI response
+            # Get AI response. Kept out of the LLM response cache: the artifact store
+            # already serves repeat uploads, and it is what LGPD deletion purges
             response = await self.agent_manager.generate(
                 prompt,
                 max_tokens=3000,
                 temperature=0.3,  # Lower for consistent extraction
+                prompt_version=RESUME_EXTRACTION_PROMPT_VERSION,
+                cache_sampled=False,
             )
 
-            # Parse the response
-            import json
-
-            # Try to parse as JSON directly
-            try:
-                parsed_response = json.loads(response)
-
+            parsed_response = self._parse_structured_response(response)
+            if parsed_response is not None:
                 # Log any detected bias for compliance
                 bias_detected = parsed_response.get("potential_bias_detected", [])
                 compliance_notes = parsed_response.get("compliance_notes", [])
@@ -451,49 +698,6 @@ IMPORTANTE:
 
                 return parsed_response
 
-            except json.JSONDecodeError:
-                # Try to extract JSON from markdown code blocks
-                if "```json" in response:
-                    json_start = response.find("```json") + 7
-                    json_end = response.find("```", json_start)
-                    if json_end != -1:
-                        json_str = response[json_start:json_end].strip()
-                        parsed_response = json.loads(json_str)
-
-                        # Log any detected bias for compliance
-                        bias_detected = parsed_response.get("potential_bias_detected", [])
-                        compliance_notes = parsed_response.get("compliance_notes", [])
-
-                        if bias_detected or compliance_notes:
-                            logger.warning(
-                                f"Resume analysis detected potential bias issues: "
-                                f"Bias detected: {bias_detected}, Compliance notes: {compliance_notes}"
-                            )
-
-                        return parsed_response
-
-                elif "```" in response:
-                    json_start = response.find("```") + 3
-                    json_end = response.find("```", json_start)
-                    if json_end != -1:
-                        json_str = response[json_start:json_end].strip()
-                        # Remove 'json' if present at start
-                        if json_str.startswith("json"):
-                            json_str = json_str[4:].strip()
-                        parsed_response = json.loads(json_str)
-
-                        # Log any detected bias for compliance
-                        bias_detected = parsed_response.get("potential_bias_detected", [])
-                        compliance_notes = parsed_response.get("compliance_notes", [])
-
-                        if bias_detected or compliance_notes:
-                            logger.warning(
-                                f"Resume analysis detected potential bias issues: "
-                                f"Bias detected: {bias_detected}, Compliance notes: {compliance_notes}"
-                            )
-
-                        return parsed_response
-
             logger.warning(f"Could not parse AI response as JSON: {response[:200]}...")
             return None
 
@@ -540,3 +744,18 @@ IMPORTANTE:
         except Exception as e:
             logger.error(f"Failed to get resume {resume_id}: {str(e)}")
             raise Exception(f"Failed to retrieve resume: {str(e)}") from e
+
+
+async def _run_structured_extraction_job(payload: dict[str, Any]) -> None:
+    await ResumeService().run_structured_extraction_job(payload)
+
+
+async def _structured_extraction_job_failed(payload: dict[str, Any], error: str) -> None:
+    await ResumeService()._set_structured_status(payload["resume_id"], STRUCTURED_FAILED)
+
+
+job_queue.register(
+    STRUCTURED_EXTRACTION_JOB,
+    _run_structured_extraction_job,
+    on_failure=_structured_extraction_job_failed,
+)
@@ -6,20 +6,60 @@ ENHANCED WITH COMPREHENSIVE BIAS DETECTION AND ANTI-DISCRIMINATION MEASURES
 Phase 0.5 Security Implementation - Brazilian Legal Compliance
 """
 
+import asyncio
 import json
 import logging
 import uuid
+from collections.abc import AsyncIterator
 from datetime import datetime
+from functools import cached_property, lru_cache
 from typing import Any
 
 import numpy as np
 
 from ..agent.manager import AgentManager, EmbeddingManager
+from ..agent.prompt import Prompt
+from ..agent.providers.base import finish_stream
+from ..agent.similarity import SimilarityMatrix, max_sim
+from ..agent.strategies.streaming_json import IncrementalJSONParser, JSONSchema
 from ..core.exceptions import ProviderError
+from ..utils.stage_graph import StageGraph
+from ..utils.text_sections import split_sections
 from .bias_detection_service import BiasDetectionResult, bias_detection_service
 
 logger = logging.getLogger(__name__)
 
+# Prompt template versions - bump when a builder changes so cached LLM
+# responses produced by the old template are no longer served.
+SCORE_PROMPT_VERSION = "score-v2"
+IMPROVEMENT_PROMPT_VERSION = "improvement-v2"
+KEYWORDS_PROMPT_VERSION = "keywords-v2"
+
+# Expected response shapes, validated field by field while the LLM streams
+SCORE_JSON_SCHEMA = JSONSchema(
+    fields={
+        "score_compatibilidade": (int, float),
+        "pontos_fortes": list,
+        "areas_melhoria": list,
+        "palavras_chave_ats": list,
+        "criterios_avaliacao": str,
+        "alerta_viés": bool,
+        "requer_revisao_humana": bool,
+    },
+    required=("score_compatibilidade",),
+)
+IMPROVEMENT_JSON_SCHEMA = JSONSchema(
+    fields={
+        "curriculo_melhorado": str,
+        "alteracoes_realizadas": list,
+        "score_esperado": (int, float, str),
+        "informacoes_removidas": list,
+        "compliance_verificado": bool,
+        "requer_atencao_especial": list,
+    },
+    # No required fields: _finalize_improvement falls back to the processed resume
+)
+
 
 class ScoreImprovementService:
     """
@@ -45,12 +85,9 @@ class ScoreImprovementService:
             logger.error(f"Failed to initialize ScoreImprovementService: {e}")
             raise
 
-    def _build_score_prompt(self, resume_text: str, job_description: str) -> str:
-        """
-        Build prompt for score calculation and analysis with comprehensive bias prevention.
-
-        SECURITY ENHANCEMENT: Includes anti-discrimination rules and bias detection.
-        """
+    @cached_property
+    def _score_system_prompt(self) -> str:
+        """Static prefix of the scoring prompt (identical across calls, provider-cached)."""
         anti_discrimination_rules = self.bias_service.create_anti_discrimination_prompt("scoring")
 
         return f"""
@@ -86,15 +123,11 @@ DETALHES REQUERIDOS:
 6. alerta_viés: INDICAR se detectou informações discriminatórias no currículo
 7. requer_revisao_humana: SIM se detectou características protegidas
 
-CURRÍCULO (ANALISADO APENAS CONTEÚDO PROFISSIONAL):
-{resume_text}
-
-VAGA:
-{job_description}
-
 IMPORTANTE: Sua análise deve ser 100% imparcial e baseada apenas em méritos profissionais.
 Qualquer característica pessoal detectada deve ser ignorada na pontuação.
 
+Analise o CURRÍCULO (apenas conteúdo profissional) e a VAGA enviados pelo usuário.
+
 Responda em JSON válido:
 {{
     "score_compatibilidade": número (0-100),
@@ -106,20 +139,32 @@ Responda em JSON válido:
     "requer_revisao_humana": true/false,
     "observacoes_compliance": "detalhes sobre informações ignoradas"
 }}
-        """
+"""
 
-    def _build_improvement_prompt(
-        self, resume_text: str, job_description: str, current_score: float, improvements: list[str]
-    ) -> str:
+    def _build_score_prompt(self, resume_text: str, job_description: str) -> Prompt:
         """
-        Build prompt for resume improvement with comprehensive bias prevention.
+        Build prompt for score calculation and analysis with comprehensive bias prevention.
 
-        SECURITY ENHANCEMENT: Includes anti-discrimination rules and focuses only on professional aspects.
+        SECURITY ENHANCEMENT: Includes anti-discrimination rules and bias detection.
+        The rules and instructions form a static prefix; only the resume and job
+        text vary per call.
         """
+        return Prompt(
+            system=self._score_system_prompt,
+            user=f"""CURRÍCULO (ANALISADO APENAS CONTEÚDO PROFISSIONAL):
+{resume_text}
+
+VAGA:
+{job_description}
+""",
+        )
+
+    @cached_property
+    def _improvement_system_prompt(self) -> str:
+        """Static prefix of the improvement prompt (identical across calls, provider-cached)."""
         anti_discrimination_rules = self.bias_service.create_anti_discrimination_prompt(
             "improvement"
         )
-        improvements_text = "\n".join([f"- {imp}" for imp in improvements])
 
         return f"""
 {anti_discrimination_rules}
@@ -143,16 +188,7 @@ ANÁLISE NECESSÁRIA:
 - Alinhar linguagem com requisitos da vaga
 - Melhorar estrutura e clareza profissional
 
-CURRÍCULO ATUAL:
-{resume_text}
-
-VAGA:
-{job_description}
-
-SCORE ATUAL: {current_score}/100
-
-PONTOS PROFISSIONAIS A MELHORAR:
-{improvements_text}
+O usuário envia o CURRÍCULO ATUAL, a VAGA, o SCORE ATUAL e os PONTOS PROFISSIONAIS A MELHORAR.
 
 Forneça uma versão melhorada do currículo em formato JSON:
 {{
@@ -166,7 +202,33 @@ Forneça uma versão melhorada do currículo em formato JSON:
 
 IMPORTANTE: A versão melhorada deve estar 100% compliance com a legislação brasileira
 anti-discriminação e focar exclusivamente em qualificações profissionais relevantes.
+"""
+
+    def _build_improvement_prompt(
+        self, resume_text: str, job_description: str, current_score: float, improvements: list[str]
+    ) -> Prompt:
+        """
+        Build prompt for resume improvement with comprehensive bias prevention.
+
+        SECURITY ENHANCEMENT: Includes anti-discrimination rules and focuses only on
+        professional aspects. Rules and output format are a static, cacheable prefix.
         """
+        improvements_text = "\n".join([f"- {imp}" for imp in improvements])
+
+        return Prompt(
+            system=self._improvement_system_prompt,
+            user=f"""CURRÍCULO ATUAL:
+{resume_text}
+
+VAGA:
+{job_description}
+
+SCORE ATUAL: {current_score}/100
+
+PONTOS PROFISSIONAIS A MELHORAR:
+{improvements_text}
+""",
+        )
 
     def _preprocess_text_bias_analysis(self, text: str) -> tuple[str, BiasDetectionResult]:
         """
@@ -298,6 +360,104 @@ anti-discriminação e focar exclusivamente em qualificações profissionais rel
                 "observacoes_compliance": "Erro técnico na análise",
             }
 
+    async def score_many(
+        self, queries: list[str], candidates: list[str], top_k: int | None = None
+    ) -> list[list[dict[str, Any]]]:
+        """
+        Embedding similarity of each query against a pool of candidates.
+
+        Scores one resume against many job descriptions, or one job against a
+        candidate pool, without any LLM calls. All texts are embedded in one
+        batched call and scored as a single matrix product. Texts the bias
+        analysis blocks are left out: a blocked query gets no matches and a
+        blocked candidate is never matched.
+
+        Args:
+            queries: Query texts (e.g. one resume)
+            candidates: Pool texts (e.g. job descriptions)
+            top_k: Matches per query; all candidates when None
+
+        Returns:
+            Per query, a list of {"index", "score"} sorted by descending score,
+            where index points into ``candidates``
+        """
+        results: list[list[dict[str, Any]]] = [[] for _ in queries]
+        if not queries or not candidates:
+            return results
+
+        # PII is masked before embedding, as in calculate_match_score
+        processed = await asyncio.to_thread(
+            lambda: [self._mask_for_embedding(text) for text in queries + candidates]
+        )
+        offset = len(queries)
+        scorable = [i for i in range(offset) if processed[i] is not None]
+        pool_ids = [i for i in range(len(candidates)) if processed[offset + i] is not None]
+        if not scorable or not pool_ids:
+            return results
+
+        kept = scorable + [offset + i for i in pool_ids]
+        embeddings = await self.embedding_manager.embed_many([processed[i] for i in kept])
+        vectors = dict(zip(kept, embeddings, strict=True))
+
+        pool = SimilarityMatrix(pool_ids, [vectors[offset + i] for i in pool_ids])
+        matches = pool.top_k([vectors[i] for i in scorable], top_k or len(pool_ids))
+        for query, row in zip(scorable, matches, strict=True):
+            results[query] = [{"index": i, "score": score} for i, score in row]
+        return results
+
+    def _mask_for_embedding(self, text: str) -> str | None:
+        """PII-masked text for similarity scoring; None if bias analysis blocks it."""
+        try:
+            return self._preprocess_text_bias_analysis(text)[0]
+        except ProviderError as e:
+            logger.warning(f"Text left out of similarity scoring by bias analysis: {e}")
+            return None
+
+    async def _section_similarity(self, resume_text: str, job_text: str) -> float:
+        """
+        Max-sim embedding similarity between a resume and a job, section by section.
+
+        Both texts are split on their headings and all sections are embedded in
+        one batched call. Each section is cached on its own, so editing one
+        resume section only re-embeds that section.
+        """
+        resume_sections = split_sections(resume_text)
+        job_sections = split_sections(job_text)
+        if not resume_sections or not job_sections:
+            return 0.0
+        embeddings = await self.embedding_manager.embed_many(resume_sections + job_sections)
+        return max_sim(embeddings[len(resume_sections) :], embeddings[: len(resume_sections)])
+
+    async def _score_stage(
+        self,
+        resume_stage: tuple[str, BiasDetectionResult],
+        job_stage: tuple[str, BiasDetectionResult],
+    ) -> dict[str, Any]:
+        """LLM scoring stage of calculate_match_score."""
+        prompt = self._build_score_prompt(resume_stage[0], job_stage[0])
+        response = await self.agent_manager.generate(
+            prompt,
+            max_tokens=2000,
+            temperature=0.3,  # Lower for more consistent scoring
+            prompt_version=SCORE_PROMPT_VERSION,
+            cache_sampled=True,  # Re-scoring the same pair should be stable
+            cache_persist=False,  # Holds resume text: memory tier only (LGPD deletion)
+            json_schema=SCORE_JSON_SCHEMA,
+        )
+        return self._parse_score_response(response)
+
+    async def _embedding_stage(
+        self,
+        resume_stage: tuple[str, BiasDetectionResult],
+        job_stage: tuple[str, BiasDetectionResult],
+    ) -> float:
+        """Embedding similarity stage of calculate_match_score; 0.0 on failure."""
+        try:
+            return await self._section_similarity(resume_stage[0], job_stage[0])
+        except Exception as e:
+            logger.warning(f"Failed to calculate embedding similarity: {e}")
+            return 0.0
+
     async def calculate_match_score(self, resume_text: str, job_description: str) -> dict[str, Any]:
         """
         Calculate match score between resume and job description using LLM.
@@ -314,50 +474,39 @@ anti-discriminação e focar exclusivamente em qualificações profissionais rel
         processing_id = str(uuid.uuid4())
 
         try:
-            # Step 1: Bias analysis preprocessing
-            processed_resume, resume_bias_analysis = self._preprocess_text_bias_analysis(
-                resume_text
+            # Stages form a small DAG: both bias scans run in worker threads,
+            # then the LLM call and the embeddings (which don't depend on the
+            # LLM result) run concurrently.
+            graph = StageGraph()
+            graph.add(
+                "resume_bias",
+                lambda: asyncio.to_thread(self._preprocess_text_bias_analysis, resume_text),
+            )
+            graph.add(
+                "job_bias",
+                lambda: asyncio.to_thread(self._preprocess_text_bias_analysis, job_description),
             )
-            processed_job, job_bias_analysis = self._preprocess_text_bias_analysis(job_description)
+            graph.add("llm_score", self._score_stage, after=("resume_bias", "job_bias"))
+            graph.add("embeddings", self._embedding_stage, after=("resume_bias", "job_bias"))
+            stages = await graph.run()
 
+            _, resume_bias_analysis = stages["resume_bias"]
+            _, job_bias_analysis = stages["job_bias"]
             logger.info(
                 f"Processing {processing_id}: Resume bias={resume_bias_analysis.has_bias}, "
                 f"Job bias={job_bias_analysis.has_bias}"
             )
 
-            # Step 2: Build enhanced prompt with anti-discrimination rules
-            prompt = self._build_score_prompt(processed_resume, processed_job)
-
-            # Step 3: Get LLM response
-            response = await self.agent_manager.generate(
-                prompt,
-                max_tokens=2000,
-                temperature=0.3,  # Lower for more consistent scoring
-            )
-
-            # Step 4: Parse response
-            result = self._parse_score_response(response)
-
-            # Step 5: Calculate embedding-based similarity score
-            try:
-                resume_embedding = await self.embedding_manager.embed(processed_resume)
-                job_embedding = await self.embedding_manager.embed(processed_job)
-                embedding_score = self.calculate_cosine_similarity(
-                    np.array(resume_embedding), np.array(job_embedding)
-                )
-
-                result["embedding_similarity"] = embedding_score
-
-            except Exception as e:
-                logger.warning(f"Failed to calculate embedding similarity: {e}")
-                result["embedding_similarity"] = 0.0
+            result = stages["llm_score"]
+            result["embedding_similarity"] = stages["embeddings"]
 
-            # Step 6: Enhance result with bias analysis
+            # Enhance result with bias analysis
             result = self._enhance_score_result_with_bias_analysis(
                 result, resume_bias_analysis, processing_id
             )
+            result["processing_metadata"]["stage_timings_ms"] = graph.timings_ms
 
-            # Step 7: Log compliance status
+            # Log compliance status
             if resume_bias_analysis.requires_human_review:
                 logger.warning(f"Processing {processing_id} requires human review due to bias risk")
 
@@ -392,15 +541,9 @@ anti-discriminação e focar exclusivamente em qualificações profissionais rel
         processing_id = str(uuid.uuid4())
 
         try:
-            # Step 1: Bias analysis preprocessing
-            processed_resume, resume_bias_analysis = self._preprocess_text_bias_analysis(
-                resume_text
-            )
-            processed_job, job_bias_analysis = self._preprocess_text_bias_analysis(job_description)
-
-            # Step 2: Build enhanced improvement prompt
-            prompt = self._build_improvement_prompt(
-                processed_resume, processed_job, current_score, improvements
+            # Steps 1-2: Bias analysis preprocessing and enhanced improvement prompt
+            prompt, processed_resume, processed_job, resume_bias_analysis = (
+                self._prepare_improvement(resume_text, job_description, current_score, improvements)
             )
 
             # Step 3: Get LLM response
@@ -408,53 +551,127 @@ anti-discriminação e focar exclusivamente em qualificações profissionais rel
                 prompt,
                 max_tokens=3000,
                 temperature=0.7,  # Higher for creative improvements
+                prompt_version=IMPROVEMENT_PROMPT_VERSION,
+                cache_persist=False,
+                json_schema=IMPROVEMENT_JSON_SCHEMA,
             )
 
-            # Step 4: Parse response
-            result = self._parse_score_response(response)
+            # Steps 4-7: Parse, re-score and verify compliance
+            return await self._finalize_improvement(
+                self._parse_score_response(response),
+                processed_resume,
+                processed_job,
+                resume_bias_analysis,
+                processing_id,
+            )
 
-            # Step 5: Calculate new embedding similarity
-            try:
-                improved_resume = result.get("curriculo_melhorado", processed_resume)
-                resume_embedding = await self.embedding_manager.embed(improved_resume)
-                job_embedding = await self.embedding_manager.embed(processed_job)
-                new_similarity = self.calculate_cosine_similarity(
-                    np.array(resume_embedding), np.array(job_embedding)
-                )
+        except Exception as e:
+            logger.error(f"Error improving resume {processing_id}: {e}")
+            raise ProviderError(f"Failed to improve resume: {str(e)}") from e
 
-                result["new_embedding_similarity"] = new_similarity
+    async def improve_resume_stream(
+        self, resume_text: str, job_description: str, current_score: float, improvements: list[str]
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """
+        Streamed variant of improve_resume.
 
-            except Exception as e:
-                logger.warning(f"Failed to calculate new embedding similarity: {e}")
-                result["new_embedding_similarity"] = 0.0
+        Yields ("token", delta) events while the LLM writes the improved resume and
+        a ("field", {"name", "value"}) event as each top-level JSON field completes
+        (e.g. score_esperado), then a single ("result", dict) event with the same
+        payload improve_resume returns. Generation stops once the JSON object closes.
+        """
+        processing_id = str(uuid.uuid4())
 
-            # Step 6: Post-process bias analysis on improved resume
-            if "curriculo_melhorado" in result:
-                improved_bias_analysis = self.bias_service.analyze_text_bias(
-                    result["curriculo_melhorado"], "resume"
-                )
-                result["improved_resume_bias_analysis"] = {
-                    "has_bias": improved_bias_analysis.has_bias,
-                    "severity": improved_bias_analysis.severity.value,
-                    "requires_human_review": improved_bias_analysis.requires_human_review,
-                }
-
-            # Step 7: Add compliance metadata
-            result["processing_metadata"] = {
-                "processing_id": processing_id,
-                "timestamp": datetime.utcnow().isoformat(),
-                "bias_detection_enabled": True,
-                "original_bias_risk": resume_bias_analysis.confidence_score,
-                "improvement_compliance_verified": True,
-            }
+        try:
+            prompt, processed_resume, processed_job, resume_bias_analysis = (
+                self._prepare_improvement(resume_text, job_description, current_score, improvements)
+            )
 
-            logger.info(f"Resume improvement generated {processing_id}")
-            return result
+            parser = IncrementalJSONParser(IMPROVEMENT_JSON_SCHEMA)
+            parts: list[str] = []
+            stream = self.agent_manager.stream(
+                prompt,
+                max_tokens=3000,
+                temperature=0.7,
+                prompt_version=IMPROVEMENT_PROMPT_VERSION,
+                cache_persist=False,
+            )
+            try:
+                async for delta in stream:
+                    parts.append(delta)
+                    yield "token", delta
+                    for name, value in parser.feed(delta):
+                        yield "field", {"name": name, "value": value}
+                    if parser.done:
+                        await finish_stream(stream)
+                        break
+            finally:
+                await stream.aclose()
+
+            parsed = parser.result() if parser.done else self._parse_score_response("".join(parts))
+            result = await self._finalize_improvement(
+                parsed, processed_resume, processed_job, resume_bias_analysis, processing_id
+            )
+            yield "result", result
 
         except Exception as e:
-            logger.error(f"Error improving resume {processing_id}: {e}")
+            logger.error(f"Error streaming resume improvement {processing_id}: {e}")
             raise ProviderError(f"Failed to improve resume: {str(e)}") from e
 
+    def _prepare_improvement(
+        self, resume_text: str, job_description: str, current_score: float, improvements: list[str]
+    ) -> tuple[Prompt, str, str, BiasDetectionResult]:
+        """Run bias preprocessing and build the improvement prompt."""
+        processed_resume, resume_bias_analysis = self._preprocess_text_bias_analysis(resume_text)
+        processed_job, _ = self._preprocess_text_bias_analysis(job_description)
+        prompt = self._build_improvement_prompt(
+            processed_resume, processed_job, current_score, improvements
+        )
+        return prompt, processed_resume, processed_job, resume_bias_analysis
+
+    async def _finalize_improvement(
+        self,
+        result: dict[str, Any],
+        processed_resume: str,
+        processed_job: str,
+        resume_bias_analysis: BiasDetectionResult,
+        processing_id: str,
+    ) -> dict[str, Any]:
+        """Re-score the parsed improvement response and attach compliance metadata."""
+        # Step 5: Calculate new embedding similarity
+        try:
+            improved_resume = result.get("curriculo_melhorado", processed_resume)
+            result["new_embedding_similarity"] = await self._section_similarity(
+                improved_resume, processed_job
+            )
+
+        except Exception as e:
+            logger.warning(f"Failed to calculate new embedding similarity: {e}")
+            result["new_embedding_similarity"] = 0.0
+
+        # Step 6: Post-process bias analysis on improved resume
+        if "curriculo_melhorado" in result:
+            improved_bias_analysis = self.bias_service.analyze_text_bias(
+                result["curriculo_melhorado"], "resume"
+            )
+            result["improved_resume_bias_analysis"] = {
+                "has_bias": improved_bias_analysis.has_bias,
+                "severity": improved_bias_analysis.severity.value,
+                "requires_human_review": improved_bias_analysis.requires_human_review,
+            }
+
+        # Step 7: Add compliance metadata
+        result["processing_metadata"] = {
+            "processing_id": processing_id,
+            "timestamp": datetime.utcnow().isoformat(),
+            "bias_detection_enabled": True,
+            "original_bias_risk": resume_bias_analysis.confidence_score,
+            "improvement_compliance_verified": True,
+        }
+
+        logger.info(f"Resume improvement generated {processing_id}")
+        return result
+
     async def analyze_and_improve(self, resume_text: str, job_description: str) -> dict[str, Any]:
         """
         Complete analysis and improvement workflow with bias detection.
@@ -474,77 +691,141 @@ anti-discriminação e focar exclusivamente em qualificações profissionais rel
             # Step 1: Calculate initial score with bias analysis
             score_analysis = await self.calculate_match_score(resume_text, job_description)
 
-            # Step 2: Generate improvements if score is below threshold
-            current_score = score_analysis.get("score_compatibilidade", 0)
-            improvements = score_analysis.get("areas_melhoria", [])
-
-            # Check if human review is required before proceeding
-            requires_human_review = (
-                score_analysis.get("bias_analysis", {}).get("requires_human_review", False)
-                or current_score < 40  # Low scores may indicate discrimination
-            )
-
-            result = {
-                "processing_id": processing_id,
-                "original_score": current_score,
-                "analysis": score_analysis,
-                "improvements_generated": False,
-                "requires_human_review": requires_human_review,
-                "compliance_status": "COMPLIANT"
-                if not requires_human_review
-                else "REVIEW_REQUIRED",
-            }
+            # Step 2: Decide whether improvements are appropriate
+            result, should_improve = self._start_analysis_result(score_analysis, processing_id)
 
             # Step 3: Generate improvements only if appropriate
-            if current_score < 80 and improvements and not requires_human_review:
-                logger.info(
-                    f"Generating improvements for score {current_score} (ID: {processing_id})"
-                )
-
-                # Step 4: Generate improved resume
+            if should_improve:
                 improvement_result = await self.improve_resume(
-                    resume_text, job_description, current_score, improvements
+                    resume_text,
+                    job_description,
+                    result["original_score"],
+                    score_analysis.get("areas_melhoria", []),
                 )
+                self._apply_improvement_result(result, improvement_result)
 
-                result.update(
-                    {
-                        "improvements_generated": True,
-                        "improved_resume": improvement_result.get("curriculo_melhorado"),
-                        "changes_made": improvement_result.get("alteracoes_realizadas", []),
-                        "expected_score": improvement_result.get("score_esperado"),
-                        "new_embedding_similarity": improvement_result.get(
-                            "new_embedding_similarity"
-                        ),
-                        "improvement_compliance": improvement_result.get(
-                            "compliance_verificado", False
-                        ),
-                        "removed_personal_info": improvement_result.get(
-                            "informacoes_removidas", []
-                        ),
-                    }
-                )
+            # Step 4: Add final compliance summary
+            return self._complete_analysis_result(result)
 
-            elif requires_human_review:
-                logger.warning(f"Skipping improvements for {processing_id} - human review required")
-                result["skip_reason"] = (
-                    "Human review required due to bias risk or compliance concerns"
-                )
+        except Exception as e:
+            logger.error(f"Error in complete analysis workflow {processing_id}: {e}")
+            raise ProviderError(f"Analysis failed: {str(e)}") from e
 
-            # Step 5: Add final compliance summary
-            result["compliance_summary"] = {
-                "anti_discrimination_applied": True,
-                "bias_detection_completed": True,
-                "fairness_measures_active": True,
-                "lgpd_compliant": True,
-                "brazilian_law_compliant": True,
-            }
+    async def analyze_and_improve_stream(
+        self, resume_text: str, job_description: str
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """
+        Streamed variant of analyze_and_improve.
 
-            return result
+        Yields an ("analysis", dict) event once scoring is done, the ("token", ...)
+        and ("field", ...) events of improve_resume_stream while the improved resume
+        is generated, and a final ("result", dict) event with the same payload
+        analyze_and_improve returns.
+        """
+        processing_id = str(uuid.uuid4())
+
+        try:
+            score_analysis = await self.calculate_match_score(resume_text, job_description)
+            result, should_improve = self._start_analysis_result(score_analysis, processing_id)
+            yield "analysis", dict(result)
+
+            if should_improve:
+                async for event, data in self.improve_resume_stream(
+                    resume_text,
+                    job_description,
+                    result["original_score"],
+                    score_analysis.get("areas_melhoria", []),
+                ):
+                    if event == "result":
+                        self._apply_improvement_result(result, data)
+                    else:
+                        yield event, data
+
+            yield "result", self._complete_analysis_result(result)
 
         except Exception as e:
-            logger.error(f"Error in complete analysis workflow {processing_id}: {e}")
+            logger.error(f"Error in streamed analysis workflow {processing_id}: {e}")
             raise ProviderError(f"Analysis failed: {str(e)}") from e
 
+    def _start_analysis_result(
+        self, score_analysis: dict[str, Any], processing_id: str
+    ) -> tuple[dict[str, Any], bool]:
+        """Build the base workflow result and decide whether to generate improvements."""
+        current_score = score_analysis.get("score_compatibilidade", 0)
+        improvements = score_analysis.get("areas_melhoria", [])
+
+        # Check if human review is required before proceeding
+        requires_human_review = (
+            score_analysis.get("bias_analysis", {}).get("requires_human_review", False)
+            or current_score < 40  # Low scores may indicate discrimination
+        )
+
+        result = {
+            "processing_id": processing_id,
+            "original_score": current_score,
+            "analysis": score_analysis,
+            "improvements_generated": False,
+            "requires_human_review": requires_human_review,
+            "compliance_status": "COMPLIANT" if not requires_human_review else "REVIEW_REQUIRED",
+        }
+
+        should_improve = current_score < 80 and bool(improvements) and not requires_human_review
+        if should_improve:
+            logger.info(f"Generating improvements for score {current_score} (ID: {processing_id})")
+        elif requires_human_review:
+            logger.warning(f"Skipping improvements for {processing_id} - human review required")
+            result["skip_reason"] = "Human review required due to bias risk or compliance concerns"
+
+        return result, should_improve
+
+    @staticmethod
+    def _apply_improvement_result(
+        result: dict[str, Any], improvement_result: dict[str, Any]
+    ) -> None:
+        result.update(
+            {
+                "improvements_generated": True,
+                "improved_resume": improvement_result.get("curriculo_melhorado"),
+                "changes_made": improvement_result.get("alteracoes_realizadas", []),
+                "expected_score": improvement_result.get("score_esperado"),
+                "new_embedding_similarity": improvement_result.get("new_embedding_similarity"),
+                "improvement_compliance": improvement_result.get("compliance_verificado", False),
+                "removed_personal_info": improvement_result.get("informacoes_removidas", []),
+            }
+        )
+
+    @staticmethod
+    def _complete_analysis_result(result: dict[str, Any]) -> dict[str, Any]:
+        result["compliance_summary"] = {
+            "anti_discrimination_applied": True,
+            "bias_detection_completed": True,
+            "fairness_measures_active": True,
+            "lgpd_compliant": True,
+            "brazilian_law_compliant": True,
+        }
+        return result
+
+    @cached_property
+    def _keywords_system_prompt(self) -> str:
+        """Static prefix of the keyword extraction prompt."""
+        anti_discrimination_rules = self.bias_service.create_anti_discrimination_prompt("scoring")
+
+        return f"""
+{anti_discrimination_rules}
+
+Extraia APENAS palavras-chave profissionais e técnicas do texto enviado pelo usuário
+(currículo, vaga de emprego ou texto geral) para o mercado brasileiro, ignorando
+completamente características pessoais.
+
+REGRAS DE EXTRAÇÃO:
+- INCLUIR: competências técnicas, ferramentas, metodologias, certificações
+- IGNORAR: características pessoais, adjetivos subjetivos, informações discriminatórias
+- FOCAR: termos relevantes para sistemas de ATS e recrutamento ético
+
+Retorne apenas uma lista JSON de palavras-chave profissionais:
+["palavra1", "palavra2", "palavra3"]
+"""
+
     async def extract_keywords(self, text: str, context: str = "general") -> list[str]:
         """
         Extract keywords from text using LLM with bias prevention.
@@ -565,29 +846,23 @@ anti-discriminação e focar exclusivamente em qualificações profissionais rel
             context_map = {"resume": "currículo", "job": "vaga de emprego", "general": "texto"}
             context_text = context_map.get(context, "texto")
 
-            anti_discrimination_rules = self.bias_service.create_anti_discrimination_prompt(
-                "scoring"
-            )
-
-            prompt = f"""
-{anti_discrimination_rules}
-
-Extraia APENAS palavras-chave profissionais e técnicas deste {context_text}
-para o mercado brasileiro, ignorando completamente características pessoais.
-
-REGRAS DE EXTRAÇÃO:
-- INCLUIR: competências técnicas, ferramentas, metodologias, certificações
-- IGNORAR: características pessoais, adjetivos subjetivos, informações discriminatórias
-- FOCAR: termos relevantes para sistemas de ATS e recrutamento ético
+            prompt = Prompt(
+                system=self._keywords_system_prompt,
+                user=f"""TIPO DE TEXTO: {context_text}
 
 TEXTO PROCESSADO:
 {processed_text}
+""",
+            )
 
-Retorne apenas uma lista JSON de palavras-chave profissionais:
-["palavra1", "palavra2", "palavra3"]
-            """
-
-            response = await self.agent_manager.generate(prompt, max_tokens=500, temperature=0.2)
+            response = await self.agent_manager.generate(
+                prompt,
+                max_tokens=500,
+                temperature=0.2,
+                prompt_version=KEYWORDS_PROMPT_VERSION,
+                cache_sampled=True,
+                cache_persist=context == "job",  # Resume text stays off disk
+            )
 
             try:
                 keywords = json.loads(response)
@@ -615,3 +890,9 @@ Retorne apenas uma lista JSON de palavras-chave profissionais:
         except Exception as e:
             logger.error(f"Error extracting keywords: {e}")
             return []
+
+
+@lru_cache
+def get_score_improvement_service() -> ScoreImprovementService:
+    """Dependency to get a shared ScoreImprovementService."""
+    return ScoreImprovementService()
@@ -21,6 +21,7 @@ from typing import Any
 
 from pydantic import BaseModel
 
+from app.services.resume_artifact_store import resume_artifact_store
 from app.services.security.consent_manager import consent_manager
 from app.services.supabase.database import SupabaseDatabaseService
 
@@ -653,6 +654,8 @@ class DataSubjectRightsManager:
                             await self.resumes_db.update(
                                 resume["id"], {"deleted_at": datetime.now(UTC).isoformat()}
                             )
+                        # Cached extraction artifacts are derived data: always purged
+                        await resume_artifact_store.delete_for_user(user_id)
                         deletion_results["deleted_data"][data_type] = "Resume records soft deleted"
                     elif data_type == "job_descriptions":
                         # Update each job description individually since update_many doesn't exist
@@ -730,6 +733,7 @@ class DataSubjectRightsManager:
                 records = await db.list(filters={"user_id": user_id})
                 for record in records:
                     await db.delete(record["id"])
+            await resume_artifact_store.delete_for_user(user_id)
             await self.profiles_db.delete(user_id)
 
             logger.info(f"Permanent deletion completed for user {user_id}")
@@ -754,6 +758,8 @@ class DataSubjectRightsManager:
                 records = await db.list(filters={"user_id": user_id})
                 for record in records:
                     await db.update(record["id"], {"deleted_at": timestamp})
+            # Cached extraction artifacts are derived data, not legal records
+            await resume_artifact_store.delete_for_user(user_id)
             await self.profiles_db.update(user_id, {"deleted_at": timestamp})
 
             logger.info(f"Soft deletion completed for user {user_id}")
@@ -17,6 +17,7 @@ from typing import Any
 
 from pydantic import BaseModel, Field, validator
 
+from app.services.resume_artifact_store import resume_artifact_store
 from app.services.supabase.database import SupabaseDatabaseService
 
 logger = logging.getLogger(__name__)
@@ -471,6 +472,12 @@ class RetentionManager:
                 except Exception as e:
                     errors.append(f"Failed to delete resume {resume['id']}: {e}")
 
+            # Cached extraction artifacts follow the resume retention period
+            try:
+                await resume_artifact_store.purge_expired(cutoff_date)
+            except Exception as e:
+                errors.append(f"Failed to purge resume artifacts: {e}")
+
             return {
                 "scanned": len(resumes_to_delete),
                 "deleted": deleted_count,
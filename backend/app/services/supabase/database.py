@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 from typing import Any, TypeVar
 
 from app.core.config import settings
@@ -53,6 +55,15 @@ class SupabaseDatabaseService[T]:
 
         return self.model_class(**response.data[0])
 
+    async def get_many(self, ids: list[str]) -> list[T]:
+        """Get the records with the given IDs in a single query."""
+        if not ids:
+            return []
+
+        response = self.supabase.table(self.table_name).select("*").in_("id", ids).execute()
+
+        return [self.model_class(**item) for item in response.data]
+
     async def create(self, data: dict[str, Any]) -> T:
         """Create a new record."""
         response = self.supabase.table(self.table_name).insert(data).execute()
@@ -71,6 +82,20 @@ class SupabaseDatabaseService[T]:
 
         return self.model_class(**response.data[0])
 
+    async def upsert_many(self, records: list[dict[str, Any]]) -> list[T]:
+        """
+        Insert or update many records in a single request.
+
+        Records are matched on ``id`` and must be complete rows, since rows
+        that don't exist yet are inserted.
+        """
+        if not records:
+            return []
+
+        response = self.supabase.table(self.table_name).upsert(records).execute()
+
+        return [self.model_class(**item) for item in response.data]
+
     async def delete(self, id: str) -> bool:
         """Delete a record by ID."""
         response = self.supabase.table(self.table_name).delete().eq("id", id).execute()
@@ -6,11 +6,14 @@ Extracts plain text from PDF and DOCX resume files for AI processing.
 
 import io
 import logging
-from typing import BinaryIO
+from functools import cache
+from typing import Any, BinaryIO
 
 import docx
 from PyPDF2 import PdfReader
 
+from app.services.extraction_engine import extraction_engine
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,6 +23,167 @@ class TextExtractionError(Exception):
     pass
 
 
+def _as_bytes(file_content: bytes | BinaryIO) -> bytes:
+    """Raw bytes of an upload, reading file-like objects."""
+    return file_content if isinstance(file_content, bytes) else file_content.read()
+
+
+def _clean_text(text: str) -> str:
+    """
+    Clean extracted text by removing extra whitespace and normalizing.
+
+    Args:
+        text: Raw extracted text
+
+    Returns:
+        Cleaned text
+    """
+    # Remove excessive whitespace
+    lines = [line.strip() for line in text.split("\n")]
+
+    # Remove empty lines
+    lines = [line for line in lines if line]
+
+    # Join lines with single newline
+    cleaned = "\n".join(lines)
+
+    # Ensure UTF-8 encoding
+    cleaned = cleaned.encode("utf-8", errors="ignore").decode("utf-8")
+
+    return cleaned.strip()
+
+
+# The parsers below are CPU-bound and run inside extraction worker processes
+# (app.services.extraction_engine); they must stay module-level and synchronous.
+
+
+@cache
+def _markitdown() -> Any:
+    """Per-process MarkItDown converter."""
+    from markitdown import MarkItDown
+
+    return MarkItDown()
+
+
+def warm_parsers() -> None:
+    """Import the parsers and build the MarkItDown converter ahead of the first job."""
+    _markitdown()
+
+
+def markitdown_to_text(file_bytes: bytes, file_ext: str, mimetype: str | None = None) -> str:
+    """
+    Convert a PDF/DOCX file to markdown with MarkItDown.
+
+    Converts from memory; an upload no converter accepts raises, and callers
+    fall back to the PDF/DOCX parsers.
+
+    Args:
+        file_bytes: Raw file content
+        file_ext: File extension (e.g., '.pdf'), used as a format hint
+        mimetype: Declared MIME type, used as a format hint
+
+    Returns:
+        Extracted markdown text
+    """
+    from markitdown import StreamInfo
+
+    stream_info = StreamInfo(extension=file_ext, mimetype=mimetype)
+    try:
+        # BytesIO over immutable bytes shares the buffer instead of copying it
+        result = _markitdown().convert_stream(io.BytesIO(file_bytes), stream_info=stream_info)
+        return result.text_content
+
+    except Exception as e:
+        # Check for specific dependency error
+        if "MissingDependencyException" in str(e) and file_ext == ".docx":
+            raise TextExtractionError(
+                "markitdown is missing DOCX support. Install with: pip install 'markitdown[docx]'"
+            ) from e
+        raise
+
+
+def pdf_to_text(file_bytes: bytes) -> str:
+    """
+    Extract text from a PDF file with PyPDF2.
+
+    Args:
+        file_bytes: PDF file content
+
+    Returns:
+        Extracted text as string
+
+    Raises:
+        TextExtractionError: If extraction fails
+    """
+    try:
+        # Read PDF
+        pdf_reader = PdfReader(io.BytesIO(file_bytes))
+
+        # Extract text from all pages
+        text_parts = []
+        for page in pdf_reader.pages:
+            text = page.extract_text()
+            if text:
+                text_parts.append(text)
+
+        if not text_parts:
+            raise TextExtractionError("Nenhum texto encontrado no arquivo PDF")
+
+        # Join all pages with double newline, then clean up
+        full_text = _clean_text("\n\n".join(text_parts))
+
+        logger.info(f"Extracted {len(full_text)} characters from PDF")
+        return full_text
+
+    except Exception as e:
+        logger.exception(f"Error extracting text from PDF: {str(e)}")
+        raise TextExtractionError(f"Falha ao extrair texto do PDF: {str(e)}") from e
+
+
+def docx_to_text(file_bytes: bytes) -> str:
+    """
+    Extract text from a DOCX file with python-docx.
+
+    Args:
+        file_bytes: DOCX file content
+
+    Returns:
+        Extracted text as string
+
+    Raises:
+        TextExtractionError: If extraction fails
+    """
+    try:
+        # Read DOCX
+        document = docx.Document(io.BytesIO(file_bytes))
+
+        # Extract text from all paragraphs
+        text_parts = []
+        for paragraph in document.paragraphs:
+            if paragraph.text.strip():
+                text_parts.append(paragraph.text)
+
+        # Also extract text from tables
+        for table in document.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    if cell.text.strip():
+                        text_parts.append(cell.text)
+
+        if not text_parts:
+            raise TextExtractionError("Nenhum texto encontrado no arquivo DOCX")
+
+        # Join all parts with newline, then clean up
+        full_text = _clean_text("\n".join(text_parts))
+
+        logger.info(f"Extracted {len(full_text)} characters from DOCX")
+        return full_text
+
+    except Exception as e:
+        logger.exception(f"Error extracting text from DOCX: {str(e)}")
+        raise TextExtractionError(f"Falha ao extrair texto do DOCX: {str(e)}") from e
+
+
 class TextExtractionService:
     """Service for extracting text from resume files."""
 
@@ -29,7 +193,7 @@ class TextExtractionService:
 
     async def extract_text_from_pdf(self, file_content: bytes | BinaryIO) -> str:
         """
-        Extract text from a PDF file.
+        Extract text from a PDF file in an extraction worker process.
 
         Args:
             file_content: PDF file content as bytes or file-like object
@@ -40,42 +204,11 @@ class TextExtractionService:
         Raises:
             TextExtractionError: If extraction fails
         """
-        try:
-            # Handle bytes input
-            if isinstance(file_content, bytes):
-                file_obj: io.BytesIO | BinaryIO = io.BytesIO(file_content)
-            else:
-                file_obj = file_content
-
-            # Read PDF
-            pdf_reader = PdfReader(file_obj)
-
-            # Extract text from all pages
-            text_parts = []
-            for page in pdf_reader.pages:
-                text = page.extract_text()
-                if text:
-                    text_parts.append(text)
-
-            if not text_parts:
-                raise TextExtractionError("Nenhum texto encontrado no arquivo PDF")
-
-            # Join all pages with double newline
-            full_text = "\n\n".join(text_parts)
-
-            # Clean up text
-            full_text = self._clean_text(full_text)
-
-            logger.info(f"Extracted {len(full_text)} characters from PDF")
-            return full_text
-
-        except Exception as e:
-            logger.exception(f"Error extracting text from PDF: {str(e)}")
-            raise TextExtractionError(f"Falha ao extrair texto do PDF: {str(e)}") from e
+        return await extraction_engine.run(pdf_to_text, _as_bytes(file_content))
 
     async def extract_text_from_docx(self, file_content: bytes | BinaryIO) -> str:
         """
-        Extract text from a DOCX file.
+        Extract text from a DOCX file in an extraction worker process.
 
         Args:
             file_content: DOCX file content as bytes or file-like object
@@ -86,44 +219,7 @@ class TextExtractionService:
         Raises:
             TextExtractionError: If extraction fails
         """
-        try:
-            # Handle bytes input
-            if isinstance(file_content, bytes):
-                file_obj: io.BytesIO | BinaryIO = io.BytesIO(file_content)
-            else:
-                file_obj = file_content
-
-            # Read DOCX
-            document = docx.Document(file_obj)
-
-            # Extract text from all paragraphs
-            text_parts = []
-            for paragraph in document.paragraphs:
-                if paragraph.text.strip():
-                    text_parts.append(paragraph.text)
-
-            # Also extract text from tables
-            for table in document.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            text_parts.append(cell.text)
-
-            if not text_parts:
-                raise TextExtractionError("Nenhum texto encontrado no arquivo DOCX")
-
-            # Join all parts with newline
-            full_text = "\n".join(text_parts)
-
-            # Clean up text
-            full_text = self._clean_text(full_text)
-
-            logger.info(f"Extracted {len(full_text)} characters from DOCX")
-            return full_text
-
-        except Exception as e:
-            logger.exception(f"Error extracting text from DOCX: {str(e)}")
-            raise TextExtractionError(f"Falha ao extrair texto do DOCX: {str(e)}") from e
+        return await extraction_engine.run(docx_to_text, _as_bytes(file_content))
 
     async def extract_text(self, file_content: bytes | BinaryIO, file_extension: str) -> str:
         """
@@ -157,28 +253,8 @@ class TextExtractionService:
             raise TextExtractionError(f"Formato de arquivo não suportado: {file_ext}")
 
     def _clean_text(self, text: str) -> str:
-        """
-        Clean extracted text by removing extra whitespace and normalizing.
-
-        Args:
-            text: Raw extracted text
-
-        Returns:
-            Cleaned text
-        """
-        # Remove excessive whitespace
-        lines = [line.strip() for line in text.split("\n")]
-
-        # Remove empty lines
-        lines = [line for line in lines if line]
-
-        # Join lines with single newline
-        cleaned = "\n".join(lines)
-
-        # Ensure UTF-8 encoding
-        cleaned = cleaned.encode("utf-8", errors="ignore").decode("utf-8")
-
-        return cleaned.strip()
+        """Clean extracted text by removing extra whitespace and normalizing."""
+        return _clean_text(text)
 
     def validate_text_length(
         self, text: str, min_length: int = 50, max_length: int = 50000
@@ -1,3 +1,7 @@
-from app.services.vectordb.qdrant_service import QdrantService, get_vector_db_service
+from app.services.vectordb.qdrant_service import (
+    IngestReport,
+    QdrantService,
+    get_vector_db_service,
+)
 
-__all__ = ["QdrantService", "get_vector_db_service"]
+__all__ = ["IngestReport", "QdrantService", "get_vector_db_service"]
@@ -0,0 +1,619 @@
+"""
+Embedded vector index used by QdrantService when QDRANT_URL is empty.
+
+LocalQdrantClient implements the part of AsyncQdrantClient that QdrantService
+uses, on top of one LocalVectorIndex per collection, so dev, CI and small
+single-node deployments need no Qdrant server. Each collection stores:
+
+- vectors.f32: unit-length float32 rows in a memory-mapped file that grows
+  by doubling. Cosine similarity is a dot product.
+- index.sqlite: point ids, JSON payloads, free rows (reused after deletes),
+  IVF cluster assignments and declared payload indexes.
+- centroids.npy: IVF centroids, once trained.
+
+Below QDRANT_LOCAL_IVF_MIN_POINTS points, search is an exact flat scan. Above
+it, the index trains spherical k-means centroids (about sqrt(n) of them) and
+retrains each time the collection doubles. A query then scans only the rows of
+its QDRANT_LOCAL_IVF_NPROBE closest clusters, which keeps searches over 100k
+vectors in the low milliseconds. exact=True always scans every row, and
+hnsw_ef, where given, raises nprobe to hnsw_ef // 16. Filtered searches scan
+their matching rows exactly when there are no more of them than a probe would
+visit, and otherwise widen the probe until ``limit`` filtered rows are found.
+
+With QDRANT_LOCAL_PATH empty, everything is kept in memory, like the old
+QdrantClient(":memory:") fallback.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import sqlite3
+import threading
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from qdrant_client.http import models
+from qdrant_client.http.models import Distance, VectorParams
+
+from app.agent.similarity import normalize_rows
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_INITIAL_CAPACITY = 1024
+_KMEANS_ITERATIONS = 8
+_KMEANS_SAMPLE_PER_CENTROID = 32
+_ASSIGN_CHUNK_ROWS = 65536
+
+
+def _kmeans(sample: np.ndarray, nlist: int, rng: np.random.Generator) -> np.ndarray:
+    """Spherical k-means over unit-length rows; returns unit-length centroids."""
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(_KMEANS_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        empty = np.bincount(assignment, minlength=nlist) == 0
+        # Re-seed empty clusters from random points so every list is used
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def _as_datetime(value: Any) -> datetime | None:
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    else:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+
+
+def _in_range(value: Any, bounds: models.Range | models.DatetimeRange) -> bool:
+    if isinstance(bounds, models.DatetimeRange):
+        value = _as_datetime(value)
+        limits = {name: _as_datetime(getattr(bounds, name)) for name in ("gt", "gte", "lt", "lte")}
+    else:
+        if not isinstance(value, int | float) or isinstance(value, bool):
+            return False
+        limits = {name: getattr(bounds, name) for name in ("gt", "gte", "lt", "lte")}
+    if value is None:
+        return False
+    return (
+        (limits["gt"] is None or value > limits["gt"])
+        and (limits["gte"] is None or value >= limits["gte"])
+        and (limits["lt"] is None or value < limits["lt"])
+        and (limits["lte"] is None or value <= limits["lte"])
+    )
+
+
+def _must_conditions(query_filter: models.Filter | None) -> list[Any]:
+    if query_filter is None:
+        return []
+    if query_filter.should or query_filter.must_not or query_filter.min_should:
+        raise ValueError("The local vector index only supports 'must' filters")
+    must = query_filter.must or []
+    return list(must) if isinstance(must, list) else [must]
+
+
+class LocalVectorIndex:
+    """
+    One collection of the embedded index. All methods are blocking; call them
+    via a thread.
+    """
+
+    def __init__(
+        self,
+        directory: Path | None,
+        dim: int | None = None,
+        ivf_min_points: int = settings.QDRANT_LOCAL_IVF_MIN_POINTS,
+    ):
+        self._dir = directory
+        self._ivf_min_points = ivf_min_points
+        self._lock = threading.Lock()
+        if directory is not None:
+            directory.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            ":memory:" if directory is None else directory / "index.sqlite",
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS points (
+                row INTEGER PRIMARY KEY,
+                id TEXT UNIQUE NOT NULL,
+                payload TEXT NOT NULL,
+                cluster INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS payload_indexes (
+                field TEXT PRIMARY KEY,
+                schema TEXT NOT NULL,
+                is_tenant INTEGER NOT NULL
+            );
+            """
+        )
+        meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        if "dim" in meta:
+            self.dim = int(meta["dim"])
+        elif dim is None:
+            raise ValueError(f"No local vector index at {directory}")
+        else:
+            self.dim = dim
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('dim', ?)", (str(dim),))
+        self._next_row = int(meta.get("next_row", 0))
+        self._trained_on = int(meta.get("trained_on", 0))
+        self._load()
+
+    # -- loading and storage -------------------------------------------------
+
+    def _load(self) -> None:
+        capacity = _INITIAL_CAPACITY
+        if self._dir is not None and (self._dir / "vectors.f32").exists():
+            capacity = (self._dir / "vectors.f32").stat().st_size // (self.dim * 4)
+        capacity = max(capacity, self._next_row, _INITIAL_CAPACITY)
+        self._vectors: np.ndarray = np.zeros((0, self.dim), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._clusters = np.zeros(0, dtype=np.int32)
+        self._tenants = np.zeros(0, dtype=np.int32)
+        self._ids: list[str | None] = []
+        self._payloads: list[dict[str, Any] | None] = []
+        self._grow(capacity)
+
+        self._row_of: dict[str, int] = {}
+        self._tenant_codes: dict[str, int] = {}
+        self._tenant_field: str | None = None
+        self.payload_schema: dict[str, str] = {}
+        for field_name, schema, is_tenant in self._conn.execute(
+            "SELECT field, schema, is_tenant FROM payload_indexes"
+        ):
+            self.payload_schema[field_name] = schema
+            if is_tenant:
+                self._tenant_field = field_name
+        self._free = [row for (row,) in self._conn.execute("SELECT row FROM free_rows")]
+
+        self._centroids: np.ndarray | None = None
+        if self._dir is not None and (self._dir / "centroids.npy").exists():
+            self._centroids = np.load(self._dir / "centroids.npy")
+
+        for row, point_id, payload, cluster in self._conn.execute(
+            "SELECT row, id, payload, cluster FROM points"
+        ):
+            self._set_row_state(row, point_id, json.loads(payload), cluster)
+
+    def _grow(self, capacity: int) -> None:
+        """Resize every per-row array to ``capacity`` rows, keeping existing rows."""
+        if self._dir is None:
+            vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+            vectors[: len(self._vectors)] = self._vectors
+        else:
+            path = self._dir / "vectors.f32"
+            if isinstance(self._vectors, np.memmap):
+                self._vectors.flush()
+            with open(path, "a+b") as f:
+                f.truncate(capacity * self.dim * 4)
+            vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._vectors = vectors
+        old = len(self._alive)
+        self._alive = np.concatenate([self._alive, np.zeros(capacity - old, dtype=bool)])
+        self._clusters = np.concatenate([self._clusters, np.full(capacity - old, -1, np.int32)])
+        self._tenants = np.concatenate([self._tenants, np.full(capacity - old, -1, np.int32)])
+        self._ids.extend([None] * (capacity - old))
+        self._payloads.extend([None] * (capacity - old))
+
+    def _tenant_code(self, value: Any) -> int:
+        if not isinstance(value, str):
+            return -1
+        return self._tenant_codes.setdefault(value, len(self._tenant_codes))
+
+    def _set_row_state(self, row: int, point_id: str, payload: dict[str, Any], cluster: int):
+        self._alive[row] = True
+        self._ids[row] = point_id
+        self._payloads[row] = payload
+        self._clusters[row] = cluster
+        self._row_of[point_id] = row
+        if self._tenant_field is not None:
+            self._tenants[row] = self._tenant_code(payload.get(self._tenant_field))
+
+    def _clear_row_state(self, row: int) -> None:
+        self._row_of.pop(self._ids[row], None)  # type: ignore[arg-type]
+        self._alive[row] = False
+        self._ids[row] = None
+        self._payloads[row] = None
+        self._clusters[row] = -1
+        self._tenants[row] = -1
+
+    def _set_meta(self, key: str, value: int) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value))
+        )
+
+    # -- writes ----------------------------------------------------------------
+
+    def create_payload_index(self, field_name: str, schema: str, is_tenant: bool) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO payload_indexes (field, schema, is_tenant) "
+                "VALUES (?, ?, ?)",
+                (field_name, schema, int(is_tenant)),
+            )
+            self.payload_schema[field_name] = schema
+            if is_tenant and self._tenant_field != field_name:
+                self._tenant_field = field_name
+                self._tenant_codes.clear()
+                for row in np.flatnonzero(self._alive):
+                    payload = self._payloads[row] or {}
+                    self._tenants[row] = self._tenant_code(payload.get(field_name))
+
+    def upsert(self, points: list[tuple[str, Any, dict[str, Any]]]) -> None:
+        """Insert or replace points given as (id, vector, payload)."""
+        # A repeated id keeps its last occurrence, as a sequence of upserts would
+        points = list({point[0]: point for point in points}.values())
+        if not points:
+            return
+        vectors = normalize_rows([vector for _, vector, _ in points])
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+        with self._lock:
+            rows: list[int] = []
+            next_row = self._next_row
+            free = list(self._free)
+            for point_id, _, _ in points:
+                if point_id in self._row_of:
+                    rows.append(self._row_of[point_id])
+                elif free:
+                    rows.append(free.pop())
+                else:
+                    rows.append(next_row)
+                    next_row += 1
+            if next_row > len(self._alive):
+                self._grow(max(next_row, 2 * len(self._alive)))
+
+            # Vectors are flushed before the index rows can point at them
+            self._vectors[rows] = vectors
+            if isinstance(self._vectors, np.memmap):
+                self._vectors.flush()
+            clusters = (
+                np.argmax(vectors @ self._centroids.T, axis=1)
+                if self._centroids is not None
+                else np.full(len(rows), -1)
+            )
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO points (row, id, payload, cluster) VALUES (?, ?, ?, ?)",
+                    [
+                        (row, point_id, json.dumps(payload, default=str), int(cluster))
+                        for row, (point_id, _, payload), cluster in zip(
+                            rows, points, clusters, strict=True
+                        )
+                    ],
+                )
+                self._conn.executemany(
+                    "DELETE FROM free_rows WHERE row = ?", [(row,) for row in rows]
+                )
+                self._set_meta("next_row", next_row)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            self._next_row = next_row
+            self._free = free
+            for row, (point_id, _, payload), cluster in zip(rows, points, clusters, strict=True):
+                self._set_row_state(row, point_id, payload, int(cluster))
+            self._maybe_train()
+
+    def delete(self, point_ids: list[str]) -> int:
+        """Delete points by id; returns how many existed."""
+        with self._lock:
+            rows = [self._row_of[i] for i in point_ids if i in self._row_of]
+            if not rows:
+                return 0
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("DELETE FROM points WHERE row = ?", [(r,) for r in rows])
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO free_rows (row) VALUES (?)", [(r,) for r in rows]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            for row in rows:
+                self._clear_row_state(row)
+            self._free.extend(rows)
+            return len(rows)
+
+    def _maybe_train(self) -> None:
+        """(Re)train IVF centroids once the index is large enough or has doubled."""
+        count = int(self._alive.sum())
+        if count < self._ivf_min_points or (self._trained_on and count < 2 * self._trained_on):
+            return
+        rng = np.random.default_rng(0)
+        alive_rows = np.flatnonzero(self._alive)
+        nlist = max(1, int(math.sqrt(count)))
+        sample_rows = rng.choice(
+            alive_rows, min(count, nlist * _KMEANS_SAMPLE_PER_CENTROID), replace=False
+        )
+        centroids = _kmeans(np.asarray(self._vectors[np.sort(sample_rows)]), nlist, rng)
+
+        clusters = np.full(len(self._alive), -1, dtype=np.int32)
+        for start in range(0, len(alive_rows), _ASSIGN_CHUNK_ROWS):
+            rows = alive_rows[start : start + _ASSIGN_CHUNK_ROWS]
+            clusters[rows] = np.argmax(self._vectors[rows] @ centroids.T, axis=1)
+
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(
+                "UPDATE points SET cluster = ? WHERE row = ?",
+                [(int(clusters[row]), int(row)) for row in alive_rows],
+            )
+            self._set_meta("trained_on", count)
+            if self._dir is not None:
+                np.save(self._dir / "centroids.npy", centroids)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._centroids, self._clusters, self._trained_on = centroids, clusters, count
+        logger.info(f"Trained local IVF index: {nlist} lists over {count} points")
+
+    # -- reads -----------------------------------------------------------------
+
+    def count(self) -> int:
+        return int(self._alive.sum())
+
+    def _candidates(self, conditions: list[Any]) -> tuple[np.ndarray, list[Any]]:
+        """Rows passing the vectorizable conditions, plus the conditions left to check."""
+        mask = self._alive[: self._next_row].copy()
+        remaining = []
+        for condition in conditions:
+            if isinstance(condition, models.HasIdCondition):
+                wanted = np.zeros_like(mask)
+                rows = [self._row_of[str(i)] for i in condition.has_id if str(i) in self._row_of]
+                wanted[rows] = True
+                mask &= wanted
+            elif (
+                isinstance(condition, models.FieldCondition)
+                and condition.key == self._tenant_field
+                and isinstance(condition.match, models.MatchValue)
+            ):
+                code = self._tenant_codes.get(condition.match.value, -2)
+                mask &= self._tenants[: self._next_row] == code
+            else:
+                remaining.append(condition)
+        return np.flatnonzero(mask), remaining
+
+    def _matches(self, condition: Any, row: int) -> bool:
+        payload = self._payloads[row] or {}
+        if isinstance(condition, models.HasIdCondition):
+            return self._ids[row] in {str(i) for i in condition.has_id}
+        if not isinstance(condition, models.FieldCondition):
+            raise ValueError(f"Unsupported filter condition: {type(condition).__name__}")
+        value = payload.get(condition.key)
+        if isinstance(condition.match, models.MatchValue):
+            return value == condition.match.value
+        if isinstance(condition.match, models.MatchAny):
+            return value in condition.match.any
+        if condition.range is not None:
+            return _in_range(value, condition.range)
+        raise ValueError(f"Unsupported condition on '{condition.key}'")
+
+    def _filter_rows(self, rows: np.ndarray, conditions: list[Any]) -> np.ndarray:
+        """The rows that also match the conditions _candidates couldn't vectorize."""
+        if not conditions:
+            return rows
+        return np.array(
+            [r for r in rows if all(self._matches(c, int(r)) for c in conditions)],
+            dtype=np.int64,
+        )
+
+    def find(self, conditions: list[Any]) -> list[str]:
+        """Ids of the points matching every condition."""
+        with self._lock:
+            rows, remaining = self._candidates(conditions)
+            return [
+                self._ids[row]  # type: ignore[misc]
+                for row in rows
+                if all(self._matches(c, int(row)) for c in remaining)
+            ]
+
+    def search(
+        self,
+        query: Any,
+        limit: int,
+        conditions: list[Any],
+        exact: bool = False,
+        nprobe: int = settings.QDRANT_LOCAL_IVF_NPROBE,
+    ) -> list[tuple[str, float, dict[str, Any]]]:
+        """Top ``limit`` (id, score, payload) by cosine similarity."""
+        q = normalize_rows(query)[0]
+        with self._lock:
+            rows, remaining = self._candidates(conditions)
+            nlist = len(self._centroids) if self._centroids is not None else 0
+            # A selective filter (e.g. a small tenant) leaves fewer rows than a
+            # probe would scan anyway, and they need not sit in the closest
+            # clusters: score them all
+            if not exact and nlist and len(rows) > max(limit, nprobe * self.count() / nlist):
+                order = np.argsort(-(self._centroids @ q))
+                clusters = self._clusters[rows]
+                nprobe = min(nprobe, nlist)
+                while True:
+                    probed = self._filter_rows(rows[np.isin(clusters, order[:nprobe])], remaining)
+                    if len(probed) >= limit or nprobe == nlist:
+                        break
+                    # Too few filtered hits in the closest clusters: widen the probe
+                    nprobe = min(2 * nprobe, nlist)
+                rows = probed
+            else:
+                rows = self._filter_rows(rows, remaining)
+            if not len(rows) or limit <= 0:
+                return []
+
+            if len(rows) > self._next_row // 2:
+                # Scoring the whole prefix in place beats gathering most of it
+                scores = (self._vectors[: self._next_row] @ q)[rows]
+            else:
+                scores = self._vectors[rows] @ q
+            k = min(limit, len(rows))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            hits = []
+            for i in top:
+                row = int(rows[i])
+                hits.append((self._ids[row], float(scores[i]), dict(self._payloads[row] or {})))
+            return hits  # type: ignore[return-value]
+
+    def close(self) -> None:
+        with self._lock:
+            if isinstance(self._vectors, np.memmap):
+                self._vectors.flush()
+            self._conn.close()
+
+
+class LocalQdrantClient:
+    """The subset of AsyncQdrantClient used by QdrantService, served by LocalVectorIndex."""
+
+    def __init__(self, path: str = settings.QDRANT_LOCAL_PATH):
+        """
+        Args:
+            path: Directory holding one subdirectory per collection (empty = memory only)
+        """
+        self._path = Path(path) if path else None
+        self._collections: dict[str, LocalVectorIndex] = {}
+
+    def _directory(self, collection_name: str) -> Path | None:
+        return self._path / collection_name if self._path is not None else None
+
+    def _index(self, collection_name: str) -> LocalVectorIndex:
+        index = self._collections.get(collection_name)
+        if index is None:
+            directory = self._directory(collection_name)
+            if directory is None or not (directory / "index.sqlite").exists():
+                raise ValueError(f"Collection {collection_name} not found")
+            index = self._collections[collection_name] = LocalVectorIndex(directory)
+        return index
+
+    def _exists(self, collection_name: str) -> bool:
+        directory = self._directory(collection_name)
+        return collection_name in self._collections or (
+            directory is not None and (directory / "index.sqlite").exists()
+        )
+
+    async def collection_exists(self, collection_name: str) -> bool:
+        return self._exists(collection_name)
+
+    async def create_collection(self, collection_name: str, vectors_config: VectorParams) -> bool:
+        if self._exists(collection_name):
+            raise ValueError(f"Collection {collection_name} already exists")
+        if vectors_config.distance != Distance.COSINE:
+            raise ValueError("The local vector index only supports cosine distance")
+        self._collections[collection_name] = await asyncio.to_thread(
+            LocalVectorIndex, self._directory(collection_name), vectors_config.size
+        )
+        return True
+
+    async def get_collection(self, collection_name: str) -> models.CollectionInfo:
+        index = self._index(collection_name)
+        # Only the fields QdrantService reads are filled in
+        return models.CollectionInfo.model_construct(
+            status=models.CollectionStatus.GREEN,
+            points_count=index.count(),
+            config=models.CollectionConfig.model_construct(
+                params=models.CollectionParams(
+                    vectors=VectorParams(size=index.dim, distance=Distance.COSINE)
+                )
+            ),
+            payload_schema={
+                field_name: models.PayloadIndexInfo.model_construct(data_type=schema)
+                for field_name, schema in index.payload_schema.items()
+            },
+        )
+
+    async def create_payload_index(
+        self, collection_name: str, field_name: str, field_schema: Any, wait: bool = True
+    ) -> models.UpdateResult:
+        schema = getattr(field_schema, "type", field_schema)
+        is_tenant = bool(getattr(field_schema, "is_tenant", False))
+        await asyncio.to_thread(
+            self._index(collection_name).create_payload_index,
+            field_name,
+            str(getattr(schema, "value", schema)),
+            is_tenant,
+        )
+        return models.UpdateResult(operation_id=0, status=models.UpdateStatus.COMPLETED)
+
+    async def upsert(
+        self, collection_name: str, points: list[models.PointStruct], wait: bool = True
+    ) -> models.UpdateResult:
+        await asyncio.to_thread(
+            self._index(collection_name).upsert,
+            [(str(point.id), point.vector, point.payload or {}) for point in points],
+        )
+        return models.UpdateResult(operation_id=0, status=models.UpdateStatus.COMPLETED)
+
+    async def query_points(
+        self,
+        collection_name: str,
+        query: list[float],
+        limit: int = 10,
+        query_filter: models.Filter | None = None,
+        search_params: models.SearchParams | None = None,
+    ) -> models.QueryResponse:
+        nprobe = settings.QDRANT_LOCAL_IVF_NPROBE
+        exact = False
+        if search_params is not None:
+            exact = bool(search_params.exact)
+            if search_params.hnsw_ef:
+                nprobe = max(nprobe, search_params.hnsw_ef // 16)
+        hits = await asyncio.to_thread(
+            self._index(collection_name).search,
+            query,
+            limit,
+            _must_conditions(query_filter),
+            exact,
+            nprobe,
+        )
+        return models.QueryResponse(
+            points=[
+                models.ScoredPoint(id=point_id, version=0, score=score, payload=payload)
+                for point_id, score, payload in hits
+            ]
+        )
+
+    async def delete(
+        self,
+        collection_name: str,
+        points_selector: models.PointIdsList | models.FilterSelector,
+        wait: bool = True,
+    ) -> models.UpdateResult:
+        index = self._index(collection_name)
+        if isinstance(points_selector, models.PointIdsList):
+            point_ids = [str(i) for i in points_selector.points]
+        else:
+            point_ids = await asyncio.to_thread(
+                index.find, _must_conditions(points_selector.filter)
+            )
+        await asyncio.to_thread(index.delete, point_ids)
+        return models.UpdateResult(operation_id=0, status=models.UpdateStatus.COMPLETED)
+
+    async def count(self, collection_name: str) -> models.CountResult:
+        return models.CountResult(count=self._index(collection_name).count())
+
+    async def close(self) -> None:
+        for index in self._collections.values():
+            await asyncio.to_thread(index.close)
+        self._collections.clear()
@@ -1,12 +1,49 @@
+import asyncio
+import logging
+import time
 import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
 from functools import lru_cache
 from typing import Any
 
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models
 from qdrant_client.http.models import Distance, VectorParams
 
 from app.core.config import settings
+from app.core.exceptions import DatabaseError
+from app.services.vectordb.local_index import LocalQdrantClient
+
+logger = logging.getLogger(__name__)
+
+# Payload indexes created with the collection. Search filters may only use
+# these fields; user_id is the tenant key every query is scoped by.
+PAYLOAD_INDEXES: dict[str, models.PayloadSchemaType | models.KeywordIndexParams] = {
+    "user_id": models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD, is_tenant=True),
+    "document_type": models.PayloadSchemaType.KEYWORD,
+    "created_at": models.PayloadSchemaType.DATETIME,
+}
+
+# (document, embedding, metadata) as accepted by QdrantService.ingest
+IngestItem = tuple[dict[str, Any], list[float], dict[str, Any] | None]
+
+
+@dataclass
+class IngestReport:
+    """Outcome of a QdrantService.ingest run."""
+
+    ids: list[str] = field(default_factory=list)  # in input order
+    points: int = 0  # points acknowledged by Qdrant
+    chunks: int = 0
+    retries: int = 0
+    failed_ids: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def points_per_second(self) -> float:
+        return self.points / self.seconds if self.seconds else 0.0
 
 
 class QdrantService:
@@ -17,6 +54,9 @@ class QdrantService:
         url: str = settings.QDRANT_URL,
         api_key: str = settings.QDRANT_API_KEY,
         collection_name: str = settings.QDRANT_COLLECTION_NAME,
+        prefer_grpc: bool = settings.QDRANT_PREFER_GRPC,
+        payload_indexes: dict[str, Any] | None = None,
+        local_path: str = settings.QDRANT_LOCAL_PATH,
     ):
         """
         Initialize the Qdrant service.
@@ -25,36 +65,105 @@ class QdrantService:
             url: URL of the Qdrant server
             api_key: API key for Qdrant
             collection_name: Name of the collection to use
+            prefer_grpc: Use the gRPC transport (QDRANT_GRPC_PORT) instead of REST
+            payload_indexes: Field name -> index schema (defaults to PAYLOAD_INDEXES)
+            local_path: Storage directory of the embedded index used without a URL
         """
+        self.client: AsyncQdrantClient | LocalQdrantClient
         if not url:
-            # Use local in-memory Qdrant instance if no URL provided
-            self.client = QdrantClient(":memory:")
+            # Use the embedded index if no URL provided (see local_index)
+            self.client = LocalQdrantClient(local_path)
         else:
-            self.client = QdrantClient(url=url, api_key=api_key)
+            self.client = AsyncQdrantClient(
+                url=url,
+                api_key=api_key or None,
+                prefer_grpc=prefer_grpc,
+                grpc_port=settings.QDRANT_GRPC_PORT,
+                timeout=settings.QDRANT_TIMEOUT_SECONDS,
+            )
 
         self.collection_name = collection_name
+        self.payload_indexes = PAYLOAD_INDEXES if payload_indexes is None else payload_indexes
+        # Vector size of the collection once it is known to exist
+        self._vector_size: int | None = None
+        self._collection_lock = asyncio.Lock()
 
-    def ensure_collection_exists(self, vector_size: int = 1536):
+    async def ensure_collection_exists(self, vector_size: int = 1536) -> None:
         """
-        Ensure that the collection exists, creating it if necessary.
+        Ensure that the collection and its payload indexes exist, creating them if necessary.
+
+        Only the first call talks to Qdrant; the outcome and the collection's
+        vector size are memoized. If another worker creates the collection
+        concurrently, the failed create is treated as success once the
+        collection is seen to exist.
 
         Args:
             vector_size: Size of the embedding vectors
+
+        Raises:
+            ValueError: If the collection holds vectors of a different size
         """
-        collections = self.client.get_collections().collections
-        collection_names = [collection.name for collection in collections]
+        if self._vector_size is None:
+            async with self._collection_lock:
+                if self._vector_size is None:
+                    self._vector_size = await self._load_or_create_collection(vector_size)
+
+        if vector_size != self._vector_size:
+            raise ValueError(
+                f"Collection '{self.collection_name}' stores {self._vector_size}-dimensional "
+                f"vectors, got {vector_size}"
+            )
 
-        if self.collection_name not in collection_names:
-            self.client.create_collection(
+    async def _load_or_create_collection(self, vector_size: int) -> int:
+        """Return the collection's vector size, creating the collection if missing."""
+        if not await self.client.collection_exists(self.collection_name):
+            try:
+                await self.client.create_collection(
+                    collection_name=self.collection_name,
+                    vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+                )
+                logger.info(
+                    f"Created Qdrant collection '{self.collection_name}' ({vector_size} dims)"
+                )
+                await self._ensure_payload_indexes(existing=set())
+                return vector_size
+            except Exception:
+                # Lost the race against another worker: fine if it exists now
+                if not await self.client.collection_exists(self.collection_name):
+                    raise
+
+        info = await self.client.get_collection(self.collection_name)
+        await self._ensure_payload_indexes(existing=set(info.payload_schema or {}))
+        vectors = info.config.params.vectors
+        if isinstance(vectors, VectorParams):
+            return vectors.size
+        # Named vectors are not used by this service; trust the caller
+        return vector_size
+
+    async def _ensure_payload_indexes(self, existing: set[str]) -> None:
+        """Create the declared payload indexes that ``existing`` lacks (idempotent)."""
+        for field_name, schema in self.payload_indexes.items():
+            if field_name in existing:
+                continue
+            await self.client.create_payload_index(
                 collection_name=self.collection_name,
-                vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+                field_name=field_name,
+                field_schema=schema,
+                wait=True,
             )
+            logger.info(f"Created payload index on '{field_name}' in '{self.collection_name}'")
+
+    async def close(self) -> None:
+        """Close the underlying client connections."""
+        await self.client.close()
 
     async def add_documents(
         self,
         documents: list[dict[str, Any]],
         embeddings: list[list[float]],
         metadata: list[dict[str, Any]] | None = None,
+        user_id: str | None = None,
+        ids: list[str] | None = None,
     ) -> list[str]:
         """
         Add documents and their embeddings to the vector database.
@@ -63,74 +172,186 @@ class QdrantService:
             documents: List of documents (can be any dictionary with text field)
             embeddings: List of embedding vectors
             metadata: Optional metadata for each document
+            user_id: Tenant that owns the documents
+            ids: Optional point IDs (UUIDs); a point with the same ID is replaced
 
         Returns:
             List of generated IDs for the documents
         """
         if len(documents) != len(embeddings):
             raise ValueError("Number of documents and embeddings must match")
+        if ids is not None and len(ids) != len(documents):
+            raise ValueError("Number of documents and ids must match")
 
         if metadata is None:
             metadata = [{} for _ in documents]
 
-        ids = [str(uuid.uuid4()) for _ in documents]
-
-        # Ensure collection exists
-        self.ensure_collection_exists(len(embeddings[0]))
+        async def items() -> AsyncIterator[IngestItem]:
+            for item in zip(documents, embeddings, metadata, strict=True):
+                yield item
 
-        # Add points to collection
-        points = [
-            models.PointStruct(
-                id=ids[i], vector=embeddings[i], payload={"document": documents[i], **metadata[i]}
+        report = await self.ingest(items(), user_id=user_id, ids=ids)
+        if report.failed_ids:
+            raise DatabaseError(
+                f"Failed to store {len(report.failed_ids)} of {len(documents)} documents"
             )
-            for i in range(len(documents))
-        ]
 
-        self.client.upsert(collection_name=self.collection_name, points=points)
+        return report.ids
 
-        return ids
+    async def ingest(
+        self,
+        items: AsyncIterator[IngestItem],
+        user_id: str | None = None,
+        chunk_size: int = settings.QDRANT_INGEST_CHUNK_SIZE,
+        concurrency: int = settings.QDRANT_INGEST_CONCURRENCY,
+        max_retries: int = settings.QDRANT_INGEST_MAX_RETRIES,
+        ids: list[str] | None = None,
+    ) -> IngestReport:
+        """
+        Stream documents into the collection in chunks.
+
+        Chunks are upserted with wait=False, with up to ``concurrency`` requests
+        in flight. Reading from ``items`` pauses while the limit is reached, so
+        memory stays bounded by chunk_size x concurrency points. The last chunk
+        is held back and sent with wait=True once every other chunk has been
+        acknowledged. Qdrant applies updates in order, so when it returns, all
+        ingested points are searchable.
+
+        Every point gets a ``created_at`` timestamp unless its metadata has one.
+        When ``user_id`` is given, it overrides any user_id in the metadata, so
+        callers can't write into another tenant.
+
+        A failing chunk is retried with exponential backoff. Chunks that still
+        fail are reported in ``failed_ids`` rather than aborting the import.
+
+        Args:
+            items: Async iterator of (document, embedding, metadata)
+            user_id: Tenant that owns the documents
+            chunk_size: Points per upsert request
+            concurrency: Upsert requests in flight
+            max_retries: Retries per chunk before giving up on it
+            ids: Point IDs in item order (default: random UUIDs)
+
+        Returns:
+            IngestReport with the point ids and throughput
+        """
+        report = IngestReport()
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        in_flight: set[asyncio.Task] = set()
+
+        async def send(points: list[models.PointStruct], wait: bool) -> None:
+            for attempt in range(max_retries + 1):
+                try:
+                    await self.client.upsert(
+                        collection_name=self.collection_name, points=points, wait=wait
+                    )
+                    report.points += len(points)
+                    return
+                except Exception as e:
+                    if attempt == max_retries:
+                        logger.error(f"Giving up on a chunk of {len(points)} points: {e}")
+                        report.failed_ids.extend(str(point.id) for point in points)
+                        return
+                    report.retries += 1
+                    logger.warning(f"Upsert of {len(points)} points failed, retrying: {e}")
+                    await asyncio.sleep(settings.QDRANT_INGEST_RETRY_BACKOFF_SECONDS * 2**attempt)
+
+        def release(task: asyncio.Task) -> None:
+            in_flight.discard(task)
+            semaphore.release()
+
+        async def submit(points: list[models.PointStruct]) -> None:
+            await semaphore.acquire()
+            report.chunks += 1
+            task = asyncio.create_task(send(points, wait=False))
+            in_flight.add(task)
+            task.add_done_callback(release)
+
+        chunk: list[models.PointStruct] = []
+        held_back: list[models.PointStruct] = []
+        try:
+            async for document, embedding, metadata in items:
+                if not report.ids:
+                    await self.ensure_collection_exists(len(embedding))
+                point_id = ids[len(report.ids)] if ids is not None else str(uuid.uuid4())
+                report.ids.append(point_id)
+                payload = {"document": document, **(metadata or {})}
+                if user_id is not None:
+                    payload["user_id"] = user_id
+                payload.setdefault("created_at", datetime.now(UTC).isoformat())
+                chunk.append(models.PointStruct(id=point_id, vector=embedding, payload=payload))
+                if len(chunk) >= chunk_size:
+                    if held_back:
+                        await submit(held_back)
+                    held_back, chunk = chunk, []
+            if chunk:
+                if held_back:
+                    await submit(held_back)
+                held_back = chunk
+
+            await asyncio.gather(*in_flight)
+            if held_back:
+                # Consistency barrier: acknowledged only once everything before it is applied
+                report.chunks += 1
+                await send(held_back, wait=True)
+        except BaseException:
+            for task in in_flight:
+                task.cancel()
+            raise
+
+        report.seconds = time.perf_counter() - started
+        logger.info(
+            f"Ingested {report.points} points into '{self.collection_name}' in "
+            f"{report.seconds:.2f}s ({report.points_per_second:.0f} points/s, "
+            f"{report.chunks} chunks, {report.retries} retries, "
+            f"{len(report.failed_ids)} failed)"
+        )
+        return report
 
     async def search(
         self,
         query_embedding: list[float],
+        user_id: str,
         limit: int = 10,
         filter_params: dict[str, Any] | None = None,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
     ) -> list[dict[str, Any]]:
         """
-        Search for documents similar to the query embedding.
+        Search one tenant's documents for those similar to the query embedding.
 
         Args:
             query_embedding: Embedding vector of the query
+            user_id: Tenant to search in; always applied
             limit: Maximum number of results to return
-            filter_params: Optional filter parameters
+            filter_params: Optional filters on indexed payload fields. A scalar
+                matches exactly, a list matches any value, and a dict
+                (gt/gte/lt/lte) is a range.
+            hnsw_ef: HNSW beam width for this query (higher = better recall, slower)
+            exact: Skip the HNSW index and score every candidate
 
         Returns:
             List of matching documents with scores
+
+        Raises:
+            ValueError: If a filter targets user_id or a field without a payload index
         """
         # Ensure collection exists
-        self.ensure_collection_exists(len(query_embedding))
-
-        # Create filter if provided
-        filter_condition = None
-        if filter_params:
-            filter_condition = models.Filter(
-                must=[
-                    models.FieldCondition(key=key, match=models.MatchValue(value=value))
-                    for key, value in filter_params.items()
-                ]
-            )
+        await self.ensure_collection_exists(len(query_embedding))
 
         # Perform search
-        search_result = self.client.search(
+        search_result = await self.client.query_points(
             collection_name=self.collection_name,
-            query_vector=query_embedding,
+            query=query_embedding,
             limit=limit,
-            query_filter=filter_condition,
+            query_filter=self._build_filter(user_id, filter_params),
+            search_params=models.SearchParams(hnsw_ef=hnsw_ef, exact=exact),
         )
 
         # Format results
         results = []
-        for scored_point in search_result:
+        for scored_point in search_result.points:
             payload = scored_point.payload
             if payload is None:
                 continue
@@ -148,12 +369,42 @@ class QdrantService:
 
         return results
 
-    async def delete(self, ids: str | list[str]) -> bool:
+    def _build_filter(self, user_id: str, filter_params: dict[str, Any] | None) -> models.Filter:
+        """Tenant condition plus one condition per (indexed) filter field."""
+        conditions: list[models.Condition] = [
+            models.FieldCondition(key="user_id", match=models.MatchValue(value=user_id))
+        ]
+        for key, value in (filter_params or {}).items():
+            if key == "user_id":
+                raise ValueError("user_id is set by the tenant scope and cannot be filtered on")
+            schema = self.payload_indexes.get(key)
+            if schema is None:
+                raise ValueError(
+                    f"Cannot filter on '{key}': no payload index "
+                    f"(indexed fields: {', '.join(self.payload_indexes)})"
+                )
+            if isinstance(value, dict):
+                schema_type = getattr(schema, "type", schema)
+                is_datetime = schema_type == models.PayloadSchemaType.DATETIME
+                range_type = models.DatetimeRange if is_datetime else models.Range
+                conditions.append(models.FieldCondition(key=key, range=range_type(**value)))
+            elif isinstance(value, list):
+                conditions.append(models.FieldCondition(key=key, match=models.MatchAny(any=value)))
+            else:
+                match = models.MatchValue(value=value)
+                conditions.append(models.FieldCondition(key=key, match=match))
+        return models.Filter(must=conditions)
+
+    async def delete(self, ids: str | list[str], user_id: str) -> bool:
         """
         Delete documents from the vector database.
 
+        Only documents owned by ``user_id`` are deleted; ids belonging to
+        other tenants are ignored.
+
         Args:
             ids: ID or list of IDs to delete
+            user_id: Tenant that owns the documents
 
         Returns:
             True if deletion was successful
@@ -163,9 +414,18 @@ class QdrantService:
 
         try:
             # Use the ids directly - mypy issue with list invariance
-            self.client.delete(
+            await self.client.delete(
                 collection_name=self.collection_name,
-                points_selector=models.PointIdsList(points=ids),  # type: ignore
+                points_selector=models.FilterSelector(
+                    filter=models.Filter(
+                        must=[
+                            models.HasIdCondition(has_id=ids),  # type: ignore
+                            models.FieldCondition(
+                                key="user_id", match=models.MatchValue(value=user_id)
+                            ),
+                        ]
+                    )
+                ),
             )
             return True
         except Exception:
@@ -5,6 +5,7 @@ This module provides file validation, virus scanning, and security checks
 to prevent malicious file uploads and ensure file integrity.
 """
 
+import codecs
 import hashlib
 import logging
 import os
@@ -13,10 +14,14 @@ import tempfile
 from typing import Any
 
 import magic
+from fastapi import UploadFile
 from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
 
+# Uploads are read in chunks of this size; type checks run on the first one
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
 
 class FileSecurityConfig(BaseModel):
     """Configuration for file security validation."""
@@ -464,6 +469,210 @@ class FileSecurityValidator:
 default_validator = FileSecurityValidator()
 
 
+class StreamingFileValidator:
+    """
+    Incremental file security validation for uploads read in chunks.
+
+    Checks that only need the start of the file (filename, declared and
+    detected content type, signature) run before or on the first chunk. The
+    size cap is checked against the declared size before reading when it is
+    known, and like SHA-256 and malware patterns applied chunk by chunk. An
+    upload is rejected at the first failed check, without reading the rest.
+    Checks that need the whole file (PDF trailer, DOCX structure, script
+    patterns) run in finish().
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        content_type: str | None = None,
+        config: FileSecurityConfig | None = None,
+    ):
+        self.validator = FileSecurityValidator(config) if config else default_validator
+        self.config = self.validator.config
+        self.result = FileSecurityResult(
+            is_safe=True,
+            file_info={"filename": filename, "content_type": content_type, "size": 0},
+            metadata={},
+        )
+        self.content = b""
+        self._chunks: list[bytes] = []
+        self._size = 0
+        self._head = b""
+        self._sha256 = hashlib.sha256()
+        self._text_decoder: codecs.IncrementalDecoder | None = None
+        self._patterns = [
+            (name, pattern)
+            for name, patterns in self.validator.malware_patterns.items()
+            for pattern in patterns
+        ]
+        # Bytes kept from the previous chunk so patterns spanning chunks match
+        self._overlap = max(len(pattern) for _, pattern in self._patterns) - 1
+        self._tail = b""
+
+        self.validator._validate_filename(filename, self.result)
+
+    @property
+    def rejected(self) -> bool:
+        return not self.result.is_safe
+
+    def check_declared_size(self, size: int | None) -> bool:
+        """
+        Apply the size cap to the upload's known size before any of it is read.
+
+        Returns:
+            False if the upload is rejected (don't read it)
+        """
+        if size is not None and size > self.config.max_file_size:
+            self.result.is_safe = False
+            self.result.errors.append(
+                f"File too large: {size} bytes (max: {self.config.max_file_size})"
+            )
+            self._size = size
+        return not self.rejected
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Validate the next chunk of the upload.
+
+        Returns:
+            False once the upload is rejected (stop reading)
+        """
+        if self.rejected or not chunk:
+            return not self.rejected
+
+        self._size += len(chunk)
+        if self._size > self.config.max_file_size:
+            self.result.is_safe = False
+            self.result.errors.append(
+                f"File too large: over {self.config.max_file_size} bytes "
+                f"(max: {self.config.max_file_size})"
+            )
+            return False
+
+        if not self._head:
+            self._head = chunk
+            self._validate_head(chunk)
+        elif self._text_decoder is not None:
+            self._validate_text(chunk)
+        if self.rejected:
+            return False
+
+        self._scan_chunk(chunk)
+        if self.rejected:
+            return False
+
+        self._sha256.update(chunk)
+        self._chunks.append(chunk)
+        return True
+
+    def _validate_head(self, head: bytes) -> None:
+        """Content type and signature checks on the first chunk."""
+        self.validator._validate_content_type(
+            head, self.result.file_info["content_type"], self.result
+        )
+        if self.rejected or not self.config.validate_content_signature:
+            return
+
+        if head.startswith(b"%PDF"):
+            # Same check as _validate_pdf_signature, without splitting the whole file
+            if not re.match(rb"%PDF-\d\.\d", head):
+                self.result.is_safe = False
+                self.result.errors.append("Invalid PDF signature detected")
+        elif not head.startswith(b"PK\x03\x04"):
+            # Plain text: validated as UTF-8 as it streams
+            self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+            self._validate_text(head)
+
+    def _validate_text(self, chunk: bytes) -> None:
+        assert self._text_decoder is not None
+        try:
+            self._text_decoder.decode(chunk)
+        except UnicodeDecodeError:
+            self.result.is_safe = False
+            self.result.errors.append("Unknown or invalid file signature")
+
+    def _scan_chunk(self, chunk: bytes) -> None:
+        """Malware pattern scan (as _scan_for_malware) over the chunk and the overlap."""
+        if not self.config.scan_for_malware:
+            return
+        window = self._tail + chunk.lower()
+        for pattern_name, pattern in self._patterns:
+            if pattern in window:
+                self.result.is_safe = False
+                self.result.errors.append(f"Malicious pattern detected: {pattern_name}")
+                self.result.blocked_patterns.append(pattern_name)
+                return
+        self._tail = window[-self._overlap :]
+
+    def finish(self) -> FileSecurityResult:
+        """
+        Run the whole-file checks once the upload has been read.
+
+        The content is available as ``self.content`` unless the upload was
+        rejected.
+        """
+        result = self.result
+        result.file_info["size"] = self._size
+        if self.rejected:
+            logger.info(f"Streamed upload {result.file_info['filename']} rejected: {result.errors}")
+            return result
+
+        self.content = b"".join(self._chunks)
+        self._chunks = []
+        content = self.content
+
+        try:
+            self.validator._validate_basic_properties(content, result.file_info["filename"], result)
+            if self._text_decoder is not None:
+                self._validate_text_end()
+
+            if self.config.validate_content_signature and not self.rejected:
+                if content.startswith(b"%PDF"):
+                    if b"%%EOF" not in content[-1024:]:  # Check last 1KB
+                        result.is_safe = False
+                        result.errors.append("Invalid PDF signature detected")
+                elif content.startswith(b"PK\x03\x04"):
+                    if not self.validator._validate_docx_signature(content):
+                        result.is_safe = False
+                        result.errors.append("Invalid DOCX signature detected")
+
+            if self.config.scan_for_malware and not self.rejected:
+                result.warnings.append("Malware scan passed")
+
+            if self.config.check_for_embedded_scripts:
+                self.validator._scan_for_scripts(content, result)
+
+            result.checksum = self._sha256.hexdigest()
+            result.metadata = {"file_size": self._size, "checksum": result.checksum}
+            try:
+                result.metadata["detected_type"] = magic.from_buffer(self._head)
+            except Exception:
+                pass
+            if content.startswith(b"%PDF"):
+                result.metadata.update(self.validator._extract_pdf_metadata(content))
+
+            logger.info(
+                f"File security validation completed for {result.file_info['filename']}: "
+                f"safe={result.is_safe}"
+            )
+
+        except Exception as e:
+            logger.error(f"Error during file security validation: {str(e)}")
+            result.is_safe = False
+            result.errors.append(f"Validation error: {str(e)}")
+
+        return result
+
+    def _validate_text_end(self) -> None:
+        assert self._text_decoder is not None
+        try:
+            self._text_decoder.decode(b"", final=True)  # truncated multi-byte sequence
+        except UnicodeDecodeError:
+            self.result.is_safe = False
+            self.result.errors.append("Unknown or invalid file signature")
+
+
 def validate_file_security(
     file_content: bytes,
     filename: str,
@@ -486,6 +695,51 @@ def validate_file_security(
     return validator.validate_file(file_content, filename, content_type)
 
 
+async def read_upload_securely(
+    file: UploadFile,
+    filename: str,
+    config: FileSecurityConfig | None = None,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> tuple[bytes, FileSecurityResult]:
+    """
+    Read an uploaded file in chunks, validating it as it is read.
+
+    An upload whose size is known up front (``UploadFile.size``, set once
+    Starlette has spooled the body, or the part's Content-Length) is rejected
+    as oversized before the first read. Wrong-type or malicious uploads are
+    rejected as soon as a chunk fails a check, without reading (or holding)
+    the rest of the file.
+
+    Args:
+        file: Uploaded file
+        filename: Sanitized filename
+        config: Optional custom configuration
+        chunk_size: Read size in bytes
+
+    Returns:
+        File content (empty if rejected) and the validation result
+    """
+    validator = StreamingFileValidator(filename, file.content_type, config)
+    validator.check_declared_size(_declared_size(file))
+    while not validator.rejected:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        validator.feed(chunk)
+    result = validator.finish()
+    return validator.content, result
+
+
+def _declared_size(file: UploadFile) -> int | None:
+    """Size of the upload known without reading it, if any."""
+    if file.size is not None:
+        return file.size
+    content_length = file.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        return int(content_length)
+    return None
+
+
 def secure_file_cleanup(filepath: str) -> bool:
     """
     Securely delete a temporary file.
@@ -0,0 +1,24 @@
+"""
+Server-Sent Events helpers for streaming endpoints.
+"""
+
+import json
+from typing import Any
+
+# Disable proxy buffering (nginx) and caching so events reach the client as they are produced
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """
+    Format one Server-Sent Event with a JSON payload.
+
+    Args:
+        event: Event name (e.g. "token", "done", "error")
+        data: JSON-serializable payload
+
+    Returns:
+        Wire-format event terminated by a blank line
+    """
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
@@ -0,0 +1,71 @@
+"""
+Split resume and job text into sections for per-section embeddings.
+
+MarkItDown renders document headings as markdown ATX headings ("## Experiência").
+Styled paragraphs it can't map to a heading come out as whole-line bold
+("**Formação**"). Both start a new section. Each section keeps its heading, so
+its embedding knows what the section is about. Sections longer than
+``max_chars`` are split further on paragraph boundaries. Text without headings
+(e.g. plain PDF extraction) is split the same way, so a long document never
+reaches the embedding model as a single truncated input.
+"""
+
+import re
+
+from app.core.config import settings
+
+_HEADING = re.compile(r"^\s{0,3}(#{1,6}\s+\S.*|\*\*[^*\n]+\*\*:?)\s*$")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def split_sections(
+    text: str,
+    max_chars: int = settings.EMBEDDING_SECTION_MAX_CHARS,
+    max_sections: int = settings.EMBEDDING_SECTION_MAX_COUNT,
+) -> list[str]:
+    """
+    Return the non-empty sections of ``text``, in document order.
+
+    Args:
+        text: Markdown or plain text
+        max_chars: Longest section; longer ones are split on paragraphs
+        max_sections: Cap on the result; the tail is merged into the last section
+
+    Returns:
+        At least one section for non-blank text, otherwise an empty list
+    """
+    sections: list[list[str]] = [[]]
+    for line in text.splitlines():
+        if _HEADING.match(line) and any(part.strip() for part in sections[-1]):
+            sections.append([])
+        sections[-1].append(line)
+
+    chunks: list[str] = []
+    for lines in sections:
+        section = "\n".join(lines).strip()
+        if section:
+            chunks.extend(_split_long(section, max_chars))
+
+    if len(chunks) > max_sections:
+        chunks = chunks[: max_sections - 1] + ["\n\n".join(chunks[max_sections - 1 :])]
+    return chunks
+
+
+def _split_long(section: str, max_chars: int) -> list[str]:
+    """Pack paragraphs into pieces of at most ``max_chars`` (single paragraphs may exceed it)."""
+    if len(section) <= max_chars:
+        return [section]
+    pieces: list[str] = []
+    current = ""
+    for paragraph in _PARAGRAPH_BREAK.split(section):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            pieces.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        pieces.append(current)
+    return pieces
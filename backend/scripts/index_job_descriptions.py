@@ -0,0 +1,74 @@
+"""
+Index stored job descriptions in the vector store for recommendations.
+
+New job descriptions are indexed by a background job when they are created;
+this backfills the ones created before that. Every job keeps a fixed point id,
+so running it again re-indexes jobs instead of duplicating them.
+
+Usage:
+    python scripts/index_job_descriptions.py --page-size 200
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Before importing app.*, whose settings are read at import time
+load_dotenv()
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.job_recommendation_service import JobRecommendationService  # noqa: E402
+from app.services.supabase.database import SupabaseDatabaseService  # noqa: E402
+
+
+async def backfill(page_size: int) -> int:
+    db = SupabaseDatabaseService("job_descriptions", dict)
+    service = JobRecommendationService()
+    indexed = 0
+    offset = 0
+    try:
+        while True:
+            # Ordered, so pages neither skip nor repeat rows
+            query = db.supabase.table("job_descriptions").select("*").order("id")
+            rows = query.range(offset, offset + page_size - 1).execute().data
+            if not rows:
+                break
+            offset += len(rows)
+            jobs = [
+                {
+                    "job_id": row.get("job_id") or row["id"],
+                    "user_id": row["user_id"],
+                    "title": row["title"],
+                    "company": row["company"],
+                    "description": row["description"],
+                }
+                for row in rows
+                if not row.get("deleted_at") and row.get("description")
+            ]
+            indexed += len(await service.index_jobs(jobs))
+            print(f"Indexed {indexed} job descriptions ({offset} read)")
+    finally:
+        await service.vector_db.close()
+    return indexed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--page-size", type=int, default=200, help="Jobs read and embedded per batch"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    indexed = asyncio.run(backfill(args.page_size))
+    print(f"✅ Indexed {indexed} job descriptions")
+
+
+if __name__ == "__main__":
+    main()
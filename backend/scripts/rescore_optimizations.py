@@ -0,0 +1,94 @@
+"""
+Re-score stored optimizations in bulk with the offline batch runner.
+
+``export`` reads the given optimizations and writes a JSONL file of batch
+requests (see app.agent.batch), one per optimization, with the optimization ID
+as custom_id and the current score prompt. ``run`` sends those requests and
+writes the new scores back. Progress is checkpointed, so an interrupted run is
+resumed by running the same command again.
+
+Usage:
+    python scripts/rescore_optimizations.py export optimization_ids.txt requests.jsonl
+    python scripts/rescore_optimizations.py run requests.jsonl --checkpoint rescore.ckpt
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Before importing app.*, whose settings are read at import time
+load_dotenv()
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.agent.batch import (  # noqa: E402
+    BatchCheckpoint,
+    BatchRunner,
+    read_batch_items,
+    write_batch_items,
+)
+from app.services.batch_rescoring_service import BatchRescoringService  # noqa: E402
+
+# Optimizations read per query while exporting
+EXPORT_CHUNK_SIZE = 200
+
+
+async def export(ids_path: Path, requests_path: Path) -> int:
+    ids = [line.strip() for line in ids_path.read_text(encoding="utf-8").splitlines()]
+    ids = list(dict.fromkeys(i for i in ids if i))
+    service = BatchRescoringService()
+    items = []
+    for start in range(0, len(ids), EXPORT_CHUNK_SIZE):
+        items.extend(await service.build_items(ids[start : start + EXPORT_CHUNK_SIZE]))
+    written = write_batch_items(requests_path, items)
+    if written < len(ids):
+        print(f"⚠️  {len(ids) - written} optimizations skipped (missing or blocked inputs)")
+    return written
+
+
+async def rescore(requests_path: Path, checkpoint_path: Path) -> dict:
+    service = BatchRescoringService()
+    provider = await service.scorer.agent_manager.get_batch_provider()
+    runner = BatchRunner(provider, BatchCheckpoint(checkpoint_path), service.write_scores)
+    return await runner.run(read_batch_items(requests_path))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Build batch requests for optimizations")
+    export_parser.add_argument("ids", type=Path, help="File of optimization IDs, one per line")
+    export_parser.add_argument("requests", type=Path, help="JSONL file of batch requests to write")
+
+    run_parser = commands.add_parser("run", help="Run batch requests and write the scores")
+    run_parser.add_argument("requests", type=Path, help="JSONL file of batch requests")
+    run_parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        help="Progress log (default: <requests>.checkpoint)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "export":
+        written = asyncio.run(export(args.ids, args.requests))
+        print(f"Wrote {written} batch requests to {args.requests}")
+        return
+
+    checkpoint = args.checkpoint or args.requests.with_suffix(".checkpoint")
+    summary = asyncio.run(rescore(args.requests, checkpoint))
+
+    print(json.dumps({k: v for k, v in summary.items() if k != "errors"}, indent=2))
+    if summary["failed"]:
+        print(f"⚠️  {summary['failed']} requests failed; run again to retry them")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Unit tests for bulk re-scoring request export.
+Tests that optimizations and their inputs are read in bulk and skipped when missing.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.agent.batch import BatchItem
+from app.services.batch_rescoring_service import BatchRescoringService
+
+
+def make_table(rows_by_table: dict[str, list[dict]], queries: list[tuple]):
+    def table(name: str):
+        query = MagicMock()
+
+        def in_(key, values):
+            queries.append((name, key, values))
+            rows = [row for row in rows_by_table[name] if row[key] in values]
+            query.execute.return_value = SimpleNamespace(data=rows)
+            return query
+
+        query.select.return_value.in_.side_effect = in_
+        return query
+
+    return table
+
+
+@pytest.mark.asyncio
+async def test_build_items_reads_inputs_in_bulk():
+    service = BatchRescoringService.__new__(BatchRescoringService)
+    queries: list[tuple] = []
+    service.db = MagicMock()
+    service.db.get_many = AsyncMock(
+        return_value=[
+            {"id": "o1", "resume_id": "r1", "input_job_description": "Vaga Python"},
+            {"id": "o2", "resume_id": "r2", "job_description_id": "j2"},
+            {"id": "o3", "resume_id": "gone", "input_job_description": "Vaga"},
+        ]
+    )
+    service.db.supabase.table.side_effect = make_table(
+        {
+            "resumes": [
+                {"resume_id": "r1", "content": "CV 1"},
+                {"resume_id": "r2", "content": "CV 2"},
+            ],
+            "job_descriptions": [{"job_id": "j2", "description": "Vaga Go"}],
+        },
+        queries,
+    )
+    service.build_item = lambda oid, resume, job: BatchItem(oid, f"{resume}|{job}")
+
+    items = await service.build_items(["o1", "o2", "o3"])
+
+    assert items == [BatchItem("o1", "CV 1|Vaga Python"), BatchItem("o2", "CV 2|Vaga Go")]
+    assert queries == [
+        ("resumes", "resume_id", ["gone", "r1", "r2"]),
+        ("job_descriptions", "job_id", ["j2"]),
+    ]
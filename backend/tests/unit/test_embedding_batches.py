@@ -0,0 +1,85 @@
+"""
+Unit tests for batched embeddings.
+Tests token-budget packing, ordered concurrent batches and EmbeddingManager.embed_many.
+"""
+
+import asyncio
+
+import pytest
+
+from app.agent.embedding_batches import embed_in_batches, pack_by_token_budget
+from app.agent.embedding_cache import EmbeddingCache
+from app.agent.exceptions import ProviderError
+from app.agent.manager import EmbeddingManager
+from app.agent.providers.base import EmbeddingProvider
+
+
+def test_pack_respects_token_and_item_limits():
+    """Batches stay under both caps; an oversized text is sent on its own."""
+    texts = ["a" * 40, "b" * 40, "c" * 400, "d" * 4, "e" * 4, "f" * 4]
+    assert pack_by_token_budget(texts, max_tokens=20, max_items=2) == [
+        [0, 1],
+        [2],
+        [3, 4],
+        [5],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_embed_in_batches_preserves_order_under_concurrency():
+    """Out-of-order batch completion still yields vectors in input order."""
+    in_flight = 0
+    peak = 0
+
+    async def embed_batch(batch: list[str]) -> list[list[float]]:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Later batches finish first
+        await asyncio.sleep(0.01 / int(batch[0]))
+        in_flight -= 1
+        return [[float(text)] for text in batch]
+
+    texts = [str(i) for i in range(1, 11)]
+    vectors = await embed_in_batches(
+        texts, embed_batch, max_tokens=1000, max_items=2, concurrency=3
+    )
+
+    assert vectors == [[float(i)] for i in range(1, 11)]
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_embed_in_batches_rejects_short_batches():
+    async def embed_batch(batch: list[str]) -> list[list[float]]:
+        return [[0.0]]
+
+    with pytest.raises(ProviderError):
+        await embed_in_batches(["a", "b"], embed_batch, max_items=2)
+
+
+@pytest.mark.asyncio
+async def test_embedding_manager_embed_many_batches_only_uncached_texts(monkeypatch):
+    """Cached and duplicate texts are not sent upstream again."""
+    batches: list[list[str]] = []
+
+    class FakeProvider(EmbeddingProvider):
+        async def embed(self, text: str) -> list[float]:
+            raise AssertionError("embed_many should be used")
+
+        async def embed_many(self, texts: list[str]) -> list[list[float]]:
+            batches.append(texts)
+            return [[float(len(text))] for text in texts]
+
+    async def get_provider(**kwargs):
+        return FakeProvider()
+
+    cache = EmbeddingCache()
+    manager = EmbeddingManager(model="m", model_provider="fake", cache=cache)
+    monkeypatch.setattr(manager, "_get_embedding_provider", get_provider)
+    await cache.set(EmbeddingCache.make_key("fake:m", "vaga"), [7.0])
+
+    vectors = await manager.embed_many(["currículo", "vaga", "currículo", "ab"])
+
+    assert vectors == [[9.0], [7.0], [9.0], [2.0]]
+    assert batches == [["currículo", "ab"]]
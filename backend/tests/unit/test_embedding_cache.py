@@ -0,0 +1,87 @@
+"""
+Unit tests for the embedding cache.
+Tests key normalization, quantized storage, the memmap disk tier, LRU eviction
+and warm start.
+"""
+
+import numpy as np
+import pytest
+
+from app.agent.embedding_cache import EmbeddingCache, dequantize, quantize
+from app.agent.manager import EmbeddingManager
+
+
+def cosine(a: list[float], b: list[float]) -> float:
+    a_arr, b_arr = np.asarray(a), np.asarray(b)
+    return float(a_arr @ b_arr / (np.linalg.norm(a_arr) * np.linalg.norm(b_arr)))
+
+
+def test_key_ignores_whitespace_and_is_scoped_by_model():
+    """Reformatted text shares a key; a different model does not."""
+    key = EmbeddingCache.make_key("openai:m", "Engenheiro  de\ndados ")
+    assert key == EmbeddingCache.make_key("openai:m", "Engenheiro de dados")
+    assert key != EmbeddingCache.make_key("openai:other", "Engenheiro de dados")
+
+
+@pytest.mark.parametrize("dtype, itemsize", [("float16", 2), ("int8", 1)])
+def test_quantization_shrinks_storage_and_keeps_similarity(dtype, itemsize):
+    """Stored vectors are 2-4x smaller and nearly identical in direction."""
+    vector = np.random.default_rng(0).normal(size=1536).tolist()
+    values, scale = quantize(vector, dtype)
+    assert values.itemsize == itemsize
+    assert cosine(vector, dequantize(values, scale)) > 0.999
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart_and_warm_starts(tmp_path):
+    """Vectors written by one instance are loaded into memory by the next."""
+    cache = EmbeddingCache(directory=str(tmp_path), dtype="float16", shard_rows=2)
+    vectors = {f"k{i}": [float(i), 1.0, 2.0] for i in range(3)}
+    for key, vector in vectors.items():
+        await cache.set(key, vector)
+    cache.close()
+
+    reopened = EmbeddingCache(directory=str(tmp_path), dtype="float16", shard_rows=2)
+    assert await reopened.warm_start() == 3
+    assert await reopened.get("k2") == [2.0, 1.0, 2.0]
+    assert reopened.stats.memory_hits == 1
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_evicts_least_recently_used(tmp_path):
+    """Over capacity, the LRU entry is dropped and its slot reused."""
+    cache = EmbeddingCache(
+        max_entries=1, directory=str(tmp_path), disk_max_entries=2, dtype="float32"
+    )
+    await cache.set("a", [1.0, 0.0])
+    await cache.set("b", [0.0, 1.0])
+    assert await cache.get("a") == [1.0, 0.0]  # disk hit refreshes "a"
+    await cache.set("c", [1.0, 1.0])
+
+    cache._memory.clear()
+    assert await cache.get("b") is None
+    assert await cache.get("a") == [1.0, 0.0]
+    assert await cache.get("c") == [1.0, 1.0]
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_embedding_manager_reuses_cached_embeddings(monkeypatch):
+    """The same job text is embedded upstream only once."""
+    calls: list[str] = []
+
+    class FakeProvider:
+        async def embed(self, text: str) -> list[float]:
+            calls.append(text)
+            return [0.5, 0.25]
+
+    async def get_provider(**kwargs):
+        return FakeProvider()
+
+    manager = EmbeddingManager(model="m", model_provider="fake", cache=EmbeddingCache())
+    monkeypatch.setattr(manager, "_get_embedding_provider", get_provider)
+
+    assert await manager.embed("vaga de dados") == [0.5, 0.25]
+    assert await manager.embed("vaga  de dados") == [0.5, 0.25]
+    assert calls == ["vaga de dados"]
@@ -0,0 +1,93 @@
+"""
+Unit tests for the process-pool extraction engine.
+Tests out-of-process execution, error propagation, killing runaway jobs and
+queue backpressure.
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.services.extraction_engine import (
+    ExtractionBusyError,
+    ExtractionEngine,
+    ExtractionTimeoutError,
+)
+
+
+def pid_job() -> int:
+    return os.getpid()
+
+
+def sleep_job(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def failing_job() -> None:
+    raise LookupError("Nenhum texto encontrado no arquivo PDF")
+
+
+@pytest.fixture
+def engine():
+    # fork keeps the test's imports; production uses a preloaded forkserver
+    return ExtractionEngine(
+        workers=2, queue_size=1, timeout=5, start_method="fork", initializer=None
+    )
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_in_warm_worker_processes(engine):
+    try:
+        pids = {await engine.run(pid_job) for _ in range(4)}
+
+        assert os.getpid() not in pids
+        assert len(pids) <= 2  # workers are reused, not spawned per job
+        with pytest.raises(LookupError, match="Nenhum texto"):
+            await engine.run(failing_job)
+
+        stats = engine.get_stats()
+        assert stats["completed"] == 4 and stats["failed"] == 1
+    finally:
+        await engine.close()
+
+
+@pytest.mark.asyncio
+async def test_runaway_job_is_killed_without_affecting_other_workers(engine):
+    try:
+        slow, runaway = await asyncio.gather(
+            engine.run(sleep_job, 0.3),
+            engine.run(sleep_job, 30, timeout=0.2),
+            return_exceptions=True,
+        )
+
+        assert slow == 0.3
+        assert isinstance(runaway, ExtractionTimeoutError)
+        # The killed worker was replaced: both slots still serve jobs
+        assert await asyncio.gather(engine.run(sleep_job, 0), engine.run(sleep_job, 0)) == [0, 0]
+        assert engine.get_stats()["timeouts"] == 1
+    finally:
+        await engine.close()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_immediately_and_queue_wait_is_measured(engine):
+    try:
+        await engine.start()
+        admitted = [asyncio.create_task(engine.run(sleep_job, 0.2)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        assert engine.saturated
+        with pytest.raises(ExtractionBusyError):
+            await engine.run(sleep_job, 0)
+        await asyncio.gather(*admitted)
+
+        stats = engine.get_stats()
+        assert stats["rejected"] == 1 and stats["completed"] == 3
+        # The third job waited for a worker roughly as long as the others parsed
+        assert stats["queue_wait_ms_max"] >= 150
+        assert stats["parse_ms_max"] >= 150
+    finally:
+        await engine.close()
@@ -0,0 +1,109 @@
+"""
+Unit tests for streamed upload validation.
+Tests that oversized, wrong-type and malicious uploads are rejected without
+reading the rest of the file, and that accepted uploads match the buffered
+validator.
+"""
+
+import hashlib
+import io
+
+import pytest
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from app.utils.file_security import (
+    FileSecurityConfig,
+    read_upload_securely,
+    validate_file_security,
+)
+
+PDF = (
+    b"%PDF-1.4\n1 0 obj\n<<\n/Type /Catalog\n/Pages 2 0 R\n>>\nendobj\n" + b"0" * 5000 + b"\n%%EOF"
+)
+
+
+def make_upload(
+    content: bytes, filename: str, content_type: str, size: int | None = None
+) -> UploadFile:
+    return UploadFile(
+        file=io.BytesIO(content),
+        size=size,
+        filename=filename,
+        headers=Headers({"content-type": content_type}),
+    )
+
+
+@pytest.mark.asyncio
+async def test_valid_upload_matches_buffered_validation():
+    upload = make_upload(PDF, "cv.pdf", "application/pdf")
+
+    content, result = await read_upload_securely(upload, "cv.pdf", chunk_size=64)
+
+    assert content == PDF
+    assert result.is_safe, result.errors
+    assert result.checksum == hashlib.sha256(PDF).hexdigest()
+    assert result.file_info["detected_content_type"] == "application/pdf"
+    assert result.file_info["size"] == len(PDF)
+
+    buffered = validate_file_security(PDF, "cv.pdf", "application/pdf")
+    assert buffered.is_safe and buffered.checksum == result.checksum
+
+
+@pytest.mark.asyncio
+async def test_oversized_upload_is_rejected_before_reading():
+    oversized = PDF + b"0" * (1024 * 1024)
+    upload = make_upload(oversized, "cv.pdf", "application/pdf", size=len(oversized))
+    config = FileSecurityConfig(max_file_size=256 * 1024)
+
+    content, result = await read_upload_securely(upload, "cv.pdf", config, chunk_size=64 * 1024)
+
+    assert not result.is_safe
+    assert any("too large" in error.lower() for error in result.errors)
+    assert content == b""
+    assert result.file_info["size"] == len(oversized)
+    assert upload.file.tell() == 0  # nothing read
+
+
+@pytest.mark.asyncio
+async def test_oversized_upload_of_unknown_size_is_rejected_at_the_cap():
+    oversized = PDF + b"0" * (1024 * 1024)
+    upload = make_upload(oversized, "cv.pdf", "application/pdf")
+    config = FileSecurityConfig(max_file_size=256 * 1024)
+
+    content, result = await read_upload_securely(upload, "cv.pdf", config, chunk_size=64 * 1024)
+
+    assert not result.is_safe
+    assert content == b""
+    assert upload.file.tell() == 256 * 1024 + 64 * 1024  # stopped one chunk past the cap
+
+
+@pytest.mark.asyncio
+async def test_wrong_type_is_rejected_after_the_first_chunk():
+    executable = b"MZ\x90\x00\x03\x00\x00\x00\x04\x00\x00\x00\xff\xff" + b"\x00" * (1024 * 1024)
+    upload = make_upload(executable, "cv.pdf", "application/pdf")
+
+    content, result = await read_upload_securely(upload, "cv.pdf", chunk_size=64 * 1024)
+
+    assert not result.is_safe
+    assert "Detected content type not allowed: application/x-dosexec" in result.errors
+    assert content == b"" and result.checksum is None
+    assert upload.file.tell() == 64 * 1024
+
+
+@pytest.mark.asyncio
+async def test_patterns_and_characters_split_across_chunks():
+    # "ç" and "javascript:" both straddle a 16-byte chunk boundary
+    text = "Experiência: ".encode() + b"x" * 1 + "ç".encode() + b"." * 13 + b"javascript:alert(1)"
+    upload = make_upload(text + b" " * 4096, "cv.txt", "text/plain")
+
+    content, result = await read_upload_securely(upload, "cv.txt", chunk_size=16)
+
+    assert not result.is_safe
+    assert result.blocked_patterns == ["script_patterns"]
+    assert upload.file.tell() < len(text) + 16  # the padding was never read
+
+    safe = make_upload(text.replace(b"javascript:", b"typescript "), "cv.txt", "text/plain")
+    content, result = await read_upload_securely(safe, "cv.txt", chunk_size=16)
+    assert result.is_safe, result.errors
+    assert content.decode() == text.replace(b"javascript:", b"typescript ").decode()
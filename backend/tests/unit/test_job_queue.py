@@ -0,0 +1,196 @@
+"""
+Unit tests for the durable background job queue.
+Tests idempotent enqueueing, retries with backoff, failure callbacks, expired
+leases and the job poller.
+"""
+
+import asyncio
+import uuid
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services.job_queue import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue
+
+
+class InMemoryJobStore:
+    """Stand-in for the background_jobs table and claim_background_jobs()."""
+
+    def __init__(self):
+        self.jobs = {}
+        self.claims = []
+
+    async def insert(self, job):
+        self.jobs.setdefault(job["id"], dict(job))
+
+    async def claim(self, kinds, worker_id, limit, lease_seconds):
+        self.claims.append(limit)
+        now = datetime.now(UTC)
+        due = [
+            job
+            for job in self.jobs.values()
+            if job["kind"] in kinds
+            and (
+                (job["status"] == QUEUED and datetime.fromisoformat(job["run_after"]) <= now)
+                or (job["status"] == RUNNING and job["locked_until"] < now)
+            )
+        ]
+        for job in due[:limit]:
+            job.update(
+                status=RUNNING,
+                attempts=job["attempts"] + 1,
+                lease_id=str(uuid.uuid4()),
+                locked_by=worker_id,
+                locked_until=now + timedelta(seconds=lease_seconds),
+            )
+        return [dict(job) for job in due[:limit]]
+
+    async def settle(self, job_id, lease_id, data):
+        job = self.jobs[job_id]
+        if job["status"] != RUNNING or job["lease_id"] != lease_id:
+            return False
+        job.update(data)
+        return True
+
+    async def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def expire_lease(self, job_id):
+        self.jobs[job_id]["locked_until"] = datetime.now(UTC) - timedelta(seconds=1)
+
+    def make_due(self, job_id):
+        self.jobs[job_id]["run_after"] = datetime.now(UTC).isoformat()
+
+
+@pytest.fixture
+def store():
+    return InMemoryJobStore()
+
+
+@pytest.fixture
+def queue(store):
+    return JobQueue(
+        store=store, workers=2, visibility_timeout=5, max_attempts=3, backoff=10, poll_interval=5
+    )
+
+
+@pytest.mark.asyncio
+async def test_enqueue_is_idempotent_and_job_runs_once(queue, store):
+    handler = AsyncMock()
+    queue.register("extract", handler)
+
+    first = await queue.enqueue("extract", {"resume_id": "r1"}, idempotency_key="extract:r1")
+    second = await queue.enqueue("extract", {"resume_id": "r1"}, idempotency_key="extract:r1")
+
+    assert first == second and len(store.jobs) == 1
+    assert await queue.run_pending() == 1
+    assert await queue.run_pending() == 0
+    handler.assert_awaited_once_with({"resume_id": "r1"})
+    assert (await queue.get(first))["status"] == SUCCEEDED
+
+    with pytest.raises(ValueError, match="No handler"):
+        await queue.enqueue("unknown", {}, idempotency_key="unknown:1")
+
+
+@pytest.mark.asyncio
+async def test_failed_job_backs_off_then_fails_and_runs_callback(queue, store):
+    handler = AsyncMock(side_effect=RuntimeError("LLM unavailable"))
+    on_failure = AsyncMock()
+    queue.register("extract", handler, on_failure=on_failure)
+    job_id = await queue.enqueue("extract", {"resume_id": "r1"}, idempotency_key="extract:r1")
+
+    await queue.run_pending()
+    job = store.jobs[job_id]
+    assert job["status"] == QUEUED and job["attempts"] == 1
+    assert "LLM unavailable" in job["last_error"]
+    # Not due again until the backoff has passed
+    assert datetime.fromisoformat(job["run_after"]) > datetime.now(UTC) + timedelta(seconds=9)
+    assert await queue.run_pending() == 0
+    assert queue.retry_delay(2) == 20
+
+    for _ in range(2):
+        store.make_due(job_id)
+        await queue.run_pending()
+
+    assert job["status"] == FAILED and job["attempts"] == 3
+    assert handler.await_count == 3
+    on_failure.assert_awaited_once_with({"resume_id": "r1"}, "RuntimeError: LLM unavailable")
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed_and_stale_worker_cannot_settle(queue, store):
+    handler = AsyncMock()
+    on_failure = AsyncMock()
+    queue.register("extract", handler, on_failure=on_failure)
+    job_id = await queue.enqueue("extract", {"resume_id": "r1"}, idempotency_key="extract:r1")
+
+    # A worker claims the job and dies without settling it
+    [stale] = await store.claim(["extract"], "dead-worker", 1, 5)
+    assert await queue.run_pending() == 0  # still leased
+
+    store.expire_lease(job_id)
+    assert await queue.run_pending() == 1
+    assert store.jobs[job_id]["status"] == SUCCEEDED and store.jobs[job_id]["attempts"] == 2
+    assert not await store.settle(job_id, stale["lease_id"], {"status": FAILED})
+
+    # A job whose every attempt outlived its lease is failed without running again
+    job_id = await queue.enqueue("extract", {"resume_id": "r2"}, idempotency_key="extract:r2")
+    for _ in range(3):
+        await store.claim(["extract"], "dead-worker", 1, 5)
+        store.expire_lease(job_id)
+    await queue.run_pending()
+
+    assert store.jobs[job_id]["status"] == FAILED
+    assert handler.await_count == 1
+    on_failure.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_workers_pick_up_enqueued_jobs_without_waiting_for_the_poll(queue):
+    done = asyncio.Event()
+
+    async def handler(payload):
+        done.set()
+
+    queue.register("extract", handler)
+    await queue.start()
+    try:
+        await asyncio.sleep(0)  # workers find the queue empty and wait
+        await queue.enqueue("extract", {"resume_id": "r1"}, idempotency_key="extract:r1")
+        await asyncio.wait_for(done.wait(), timeout=1)  # poll interval is 5s
+
+        stats = queue.get_stats()
+        assert stats["workers"] == 2 and stats["kinds"] == ["extract"]
+    finally:
+        await queue.close()
+    assert queue.get_stats()["workers"] == 0
+
+
+@pytest.mark.asyncio
+async def test_single_poller_claims_only_for_idle_workers(queue, store):
+    """Idle polling is one claim per interval, and claims never exceed free workers."""
+    release = asyncio.Event()
+    started = []
+
+    async def handler(payload):
+        started.append(payload["n"])
+        await release.wait()
+
+    queue.register("extract", handler)
+    await queue.start()
+    try:
+        await asyncio.sleep(0.01)
+        assert store.claims == [2]
+
+        for n in range(3):
+            await queue.enqueue("extract", {"n": n}, idempotency_key=f"extract:{n}")
+        await asyncio.sleep(0.01)
+        assert len(started) == 2 and queue.get_stats()["running"] == 2
+
+        release.set()
+        await asyncio.sleep(0.01)
+        assert len(started) == 3
+        assert max(store.claims) == 2
+    finally:
+        await queue.close()
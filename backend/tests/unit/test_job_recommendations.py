@@ -0,0 +1,162 @@
+"""
+Unit tests for JobRecommendationService.
+Tests the ANN shortlist, lexical re-ranking, that only the top N jobs reach
+the LLM scorer, and background indexing.
+"""
+
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.endpoints.resumes import get_job_recommendations
+from app.services import job_recommendation_service
+from app.services.job_recommendation_service import (
+    INDEX_JOB,
+    JobRecommendationService,
+    enqueue_index_job,
+    keyword_overlap,
+)
+from app.services.vectordb.qdrant_service import QdrantService
+
+RESUME = "Desenvolvedor Python com FastAPI, Docker e AWS. Experiência com PostgreSQL."
+
+JOBS = {
+    # Same embedding as the resume, but almost no shared keywords
+    "chef": ("Chef", [1.0, 0.0, 0.0], "Cozinha italiana, massas frescas, gestão de estoque"),
+    "backend": ("Backend Python", [0.9, 0.1, 0.0], "Python, FastAPI, Docker, AWS, PostgreSQL"),
+    "data": ("Engenheiro de dados", [0.8, 0.2, 0.0], "Python, Spark, Airflow, AWS"),
+    "design": ("Designer", [0.0, 0.0, 1.0], "Figma, UX, prototipagem"),
+}
+
+
+@pytest.fixture
+def service():
+    embeddings = {text: vector for _, vector, text in JOBS.values()}
+    embeddings[RESUME] = [1.0, 0.0, 0.0]
+    manager = MagicMock()
+    manager.embed = AsyncMock(side_effect=lambda text: embeddings[text])
+    manager.embed_many = AsyncMock(side_effect=lambda texts: [embeddings[t] for t in texts])
+    recommender = JobRecommendationService(
+        vector_db=QdrantService(url="", collection_name="jobs"), embedding_manager=manager
+    )
+    recommender.scorer = MagicMock()
+    return recommender
+
+
+async def index_all(service: JobRecommendationService, user_id: str = "u1") -> None:
+    for job_id, (title, _, text) in JOBS.items():
+        await service.index_job(job_id, user_id, title, "ACME", text)
+
+
+def test_keyword_overlap_is_accent_insensitive_job_coverage():
+    resume_terms = {"python", "programacao", "aws"}
+
+    assert keyword_overlap(resume_terms, "Programação Python e AWS") == 1.0
+    assert keyword_overlap(resume_terms, "Python, Kotlin") == 0.5
+    assert keyword_overlap(resume_terms, "") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_lexical_rerank_decides_which_jobs_reach_the_llm(service):
+    await index_all(service)
+    service.scorer.calculate_match_score = AsyncMock(
+        side_effect=[{"score_compatibilidade": 70}, {"score_compatibilidade": 90}]
+    )
+
+    result = await service.recommend(RESUME, "u1", top_k=3, top_n=2)
+
+    # The chef job is the nearest vector but shares no skills with the resume
+    assert result["candidates_considered"] == 3
+    assert service.scorer.calculate_match_score.await_count == 2
+    scored_jobs = [c.args[1] for c in service.scorer.calculate_match_score.await_args_list]
+    assert scored_jobs == [JOBS["backend"][2], JOBS["data"][2]]
+    assert [r["job_id"] for r in result["recommendations"]] == ["data", "backend"]
+    assert result["recommendations"][0]["match_score"] == 90
+    assert result["recommendations"][1]["lexical_score"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_failed_llm_scores_rank_last_and_other_tenants_are_invisible(service):
+    await index_all(service)
+    await service.index_job("other", "u2", "Backend Python", "Rival", JOBS["backend"][2])
+    service.scorer.calculate_match_score = AsyncMock(
+        side_effect=[RuntimeError("provider down"), {"score_compatibilidade": 40}]
+    )
+
+    result = await service.recommend(RESUME, "u1", top_k=10, top_n=2)
+
+    assert result["candidates_considered"] == 4
+    assert [r["job_id"] for r in result["recommendations"]] == ["data", "backend"]
+    assert result["recommendations"][1]["match_score"] is None
+
+
+@pytest.mark.asyncio
+async def test_reindexing_a_job_replaces_its_point(service):
+    """Backfills and retried index jobs don't duplicate a job in recommendations."""
+    await index_all(service)
+    await service.index_jobs(
+        [
+            {
+                "job_id": "backend",
+                "user_id": "u1",
+                "title": "Backend Python Sênior",
+                "company": "ACME",
+                "description": JOBS["backend"][2],
+            }
+        ]
+    )
+    hits = await service.vector_db.search([0.9, 0.1, 0.0], user_id="u1", limit=10)
+
+    assert len(hits) == len(JOBS)
+    titles = {hit["document"]["job_id"]: hit["document"]["title"] for hit in hits}
+    assert titles["backend"] == "Backend Python Sênior"
+
+
+@pytest.mark.asyncio
+async def test_new_jobs_are_indexed_by_a_queued_job(monkeypatch):
+    enqueue = AsyncMock(return_value="job-1")
+    monkeypatch.setattr(job_recommendation_service.job_queue, "enqueue", enqueue)
+
+    await enqueue_index_job("j1", "u1", "Backend", "ACME", "Python")
+
+    kind, payload = enqueue.await_args.args
+    assert kind == INDEX_JOB
+    assert payload["job_id"] == "j1" and payload["description"] == "Python"
+    assert enqueue.await_args.kwargs["idempotency_key"] == f"{INDEX_JOB}:j1"
+
+
+@pytest.mark.asyncio
+async def test_recommendation_endpoint_charges_non_pro_users():
+    """Each request costs a non-Pro user a credit before any job is scored."""
+    user = {"id": str(uuid.uuid4()), "is_pro": False}
+    resume = {"resume_id": "r1", "user_id": user["id"], "content": RESUME}
+
+    with (
+        patch("app.api.endpoints.resumes.ResumeService") as mock_resume_service,
+        patch("app.api.endpoints.resumes.UsageLimitService") as mock_usage_service,
+        patch("app.api.endpoints.resumes.JobRecommendationService") as mock_recommender,
+    ):
+        mock_resume_service.return_value._get_resume_row = AsyncMock(return_value=resume)
+        deduct = mock_usage_service.return_value.deduct_credits = AsyncMock(return_value=True)
+        recommend = mock_recommender.return_value.recommend = AsyncMock(
+            return_value={"recommendations": [], "candidates_considered": 0}
+        )
+
+        result = await get_job_recommendations("r1", top_k=10, top_n=5, current_user=user, db=None)
+        assert result.resume_id == "r1"
+        mock_resume_service.return_value._get_resume_row.assert_awaited_once_with("r1")
+        assert deduct.await_args.kwargs["amount"] == 1
+
+        deduct.return_value = False
+        recommend.reset_mock()
+        with pytest.raises(HTTPException) as exc:
+            await get_job_recommendations("r1", top_k=10, top_n=5, current_user=user, db=None)
+        assert exc.value.status_code == 402
+        recommend.assert_not_awaited()
+
+        deduct.reset_mock()
+        pro = {**user, "is_pro": True}
+        await get_job_recommendations("r1", top_k=10, top_n=5, current_user=pro, db=None)
+        deduct.assert_not_awaited()
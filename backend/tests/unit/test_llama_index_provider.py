@@ -0,0 +1,72 @@
+"""
+Unit tests for the LlamaIndex providers.
+Tests native async dispatch, the bounded executor fallback and generation args.
+"""
+
+import threading
+from typing import Any
+
+import pytest
+
+pytest.importorskip("llama_index.core")
+
+from llama_index.core.llms import CompletionResponse, CustomLLM, LLMMetadata  # noqa: E402
+from pydantic import ConfigDict  # noqa: E402
+
+from app.agent.providers import llama_index as llama_index_module  # noqa: E402
+from app.agent.providers.llama_index import LlamaIndexProvider  # noqa: E402
+
+
+class SyncLLM(CustomLLM):
+    """Only implements the blocking API, like many community integrations."""
+
+    model_config = ConfigDict(extra="allow")
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata()
+
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        return CompletionResponse(
+            text=f"{threading.current_thread().name}|{prompt}|{sorted(kwargs.items())}"
+        )
+
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any):
+        raise NotImplementedError
+
+
+class AsyncLLM(SyncLLM):
+    async def acomplete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponse:
+        return CompletionResponse(text=f"async|{prompt}|{sorted(kwargs.items())}")
+
+
+def make_provider(monkeypatch, cls: type) -> LlamaIndexProvider:
+    monkeypatch.setattr(
+        llama_index_module, "_get_real_provider", lambda name: (cls, __name__, cls.__name__)
+    )
+    return LlamaIndexProvider(provider=f"{__name__}.{cls.__name__}", model_name="m")
+
+
+@pytest.mark.asyncio
+async def test_sync_only_llm_runs_on_dedicated_executor(monkeypatch):
+    """Blocking integrations run on the llama-index pool with generation args forwarded."""
+    provider = make_provider(monkeypatch, SyncLLM)
+
+    result = await provider("pergunta", temperature=0.2, prompt_version="v1", system="REGRAS")
+
+    thread, prompt, options = result.split("|")
+    assert thread.startswith("llama-index")
+    assert prompt == "REGRAS\n\npergunta"
+    assert options == "[('temperature', 0.2)]"
+
+
+@pytest.mark.asyncio
+async def test_native_async_llm_is_awaited_directly(monkeypatch):
+    """Integrations overriding acomplete() never touch a thread pool."""
+    provider = make_provider(monkeypatch, AsyncLLM)
+
+    result = await provider("pergunta", max_tokens=50)
+
+    assert result == "async|pergunta|[('max_tokens', 50)]"
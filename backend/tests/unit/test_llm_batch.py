@@ -0,0 +1,206 @@
+"""
+Unit tests for offline batch inference.
+Tests JSONL loading, checkpoint resume, the paced concurrent executor and
+provider batch collection.
+"""
+
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+
+from app.agent.batch import (
+    BatchCheckpoint,
+    BatchItem,
+    BatchRunner,
+    read_batch_items,
+    write_batch_items,
+)
+from app.agent.exceptions import BatchFailedError
+from app.agent.providers.base import BatchProvider, BatchResult, Provider
+
+
+class EchoProvider(Provider):
+    def __init__(self, fail: set[str] | None = None):
+        self.calls: list[str] = []
+        self.fail = fail or set()
+
+    async def __call__(self, prompt: str, **generation_args: Any) -> str:
+        self.calls.append(prompt)
+        if prompt in self.fail:
+            raise RuntimeError("upstream error")
+        return f"{generation_args.get('system', '')}:{prompt}"
+
+
+class FakeBatchProvider(Provider, BatchProvider):
+    def __init__(self):
+        self.batches: dict[str, list[tuple[str, str, dict[str, Any]]]] = {}
+        self.polls = 0
+
+    async def __call__(self, prompt: str, **generation_args: Any) -> str:
+        raise AssertionError("batch provider must not be called directly")
+
+    async def submit_batch(self, requests: list[tuple[str, str, dict[str, Any]]]) -> str:
+        batch_id = f"batch-{len(self.batches)}"
+        self.batches[batch_id] = requests
+        return batch_id
+
+    async def batch_done(self, batch_id: str) -> bool:
+        self.polls += 1
+        return self.polls > 1
+
+    async def batch_results(self, batch_id: str) -> AsyncIterator[BatchResult]:
+        for custom_id, prompt, _ in self.batches[batch_id]:
+            if prompt == "bad":
+                yield BatchResult(custom_id, error="invalid_request")
+            else:
+                yield BatchResult(custom_id, output=prompt.upper())
+
+
+def make_sink(written: list[list[str]], reject: set[str] | None = None):
+    async def sink(results: list[tuple[BatchItem, str]]) -> list[str]:
+        written.append([item.custom_id for item, _ in results])
+        return [item.custom_id for item, _ in results if item.custom_id in (reject or set())]
+
+    return sink
+
+
+def test_read_batch_items(tmp_path):
+    """JSONL lines become items; duplicates are rejected."""
+    path = tmp_path / "requests.jsonl"
+    path.write_text(
+        json.dumps({"custom_id": "a", "prompt": "p1", "system": "S", "params": {"max_tokens": 5}})
+        + "\n\n"
+        + json.dumps({"custom_id": "b", "prompt": "p2"})
+        + "\n"
+    )
+    items = read_batch_items(path)
+    assert [item.custom_id for item in items] == ["a", "b"]
+    assert items[0].generation_args() == {"max_tokens": 5, "system": "S"}
+
+    path.write_text(json.dumps({"custom_id": "a", "prompt": "x"}) + "\n" + path.read_text())
+    with pytest.raises(ValueError, match="duplicate"):
+        read_batch_items(path)
+
+
+def test_written_batch_items_read_back(tmp_path):
+    """write_batch_items produces the JSONL that read_batch_items loads."""
+    items = [
+        BatchItem(custom_id="a", prompt="Currículo: ç", system="S", params={"max_tokens": 5}),
+        BatchItem(custom_id="b", prompt="p2"),
+    ]
+    path = tmp_path / "requests.jsonl"
+
+    assert write_batch_items(path, items) == 2
+    assert read_batch_items(path) == items
+
+
+@pytest.mark.asyncio
+async def test_concurrent_executor_writes_in_chunks_and_resumes(tmp_path):
+    """Completed items are checkpointed after the sink and skipped on the next run."""
+    items = [BatchItem(custom_id=str(i), prompt=f"p{i}", system="S") for i in range(5)]
+    provider = EchoProvider(fail={"p3"})
+    written: list[list[str]] = []
+    checkpoint_path = tmp_path / "run.ckpt"
+
+    runner = BatchRunner(
+        provider,
+        BatchCheckpoint(checkpoint_path),
+        make_sink(written, reject={"4"}),
+        requests_per_second=0,
+        concurrency=2,
+        write_size=2,
+    )
+    summary = await runner.run(items)
+
+    assert summary["mode"] == "concurrent"
+    assert summary["succeeded"] == 3
+    assert set(summary["errors"]) == {"3", "4"}
+    assert sorted(cid for chunk in written for cid in chunk) == ["0", "1", "2", "4"]
+    assert all(len(chunk) <= 2 for chunk in written)
+
+    # A torn record from a crash mid-write is ignored
+    with open(checkpoint_path, "a") as f:
+        f.write('{"event": "compl')
+
+    provider.calls.clear()
+    rerun = BatchRunner(
+        provider,
+        BatchCheckpoint(checkpoint_path),
+        make_sink([]),
+        requests_per_second=0,
+    )
+    summary = await rerun.run(items)
+    assert sorted(provider.calls) == ["p3", "p4"]
+    assert summary["skipped"] == 3
+
+
+@pytest.mark.asyncio
+async def test_provider_batch_is_collected_after_restart_without_resubmitting(tmp_path):
+    """A batch submitted before a crash is collected, not submitted again."""
+    items = [
+        BatchItem(custom_id="a", prompt="ok"),
+        BatchItem(custom_id="b", prompt="bad"),
+        BatchItem(custom_id="c", prompt="fine"),
+    ]
+    provider = FakeBatchProvider()
+    checkpoint_path = tmp_path / "batch.ckpt"
+
+    # Simulate a run that submitted its batch and then died
+    batch_id = await provider.submit_batch(
+        [(item.custom_id, item.prompt, item.generation_args()) for item in items[:2]]
+    )
+    BatchCheckpoint(checkpoint_path).record_submitted(batch_id, ["a", "b"])
+
+    written: list[list[str]] = []
+    runner = BatchRunner(
+        provider, BatchCheckpoint(checkpoint_path), make_sink(written), poll_interval=0
+    )
+    summary = await runner.run(items)
+
+    assert summary["mode"] == "provider_batch"
+    # Only "c" needed a new batch
+    assert [[r[0] for r in reqs] for reqs in provider.batches.values()] == [["a", "b"], ["c"]]
+    assert summary["succeeded"] == 2
+    assert summary["errors"] == {"b": "invalid_request"}
+
+    reloaded = BatchCheckpoint(checkpoint_path)
+    assert reloaded.open_batches == {}
+    assert reloaded.completed == {"a", "c"}
+
+
+class FailingBatchProvider(FakeBatchProvider):
+    """The first submitted batch fails as a whole; later ones succeed."""
+
+    async def batch_done(self, batch_id: str) -> bool:
+        if batch_id == "batch-0":
+            raise BatchFailedError(f"batch {batch_id} failed: invalid input file")
+        return True
+
+
+@pytest.mark.asyncio
+async def test_failed_provider_batch_is_closed_and_resubmitted(tmp_path):
+    """A batch that failed as a whole fails its items and doesn't block later runs."""
+    items = [BatchItem(custom_id="a", prompt="ok"), BatchItem(custom_id="b", prompt="fine")]
+    provider = FailingBatchProvider()
+    checkpoint_path = tmp_path / "batch.ckpt"
+
+    written: list[list[str]] = []
+    runner = BatchRunner(
+        provider, BatchCheckpoint(checkpoint_path), make_sink(written), poll_interval=0
+    )
+    summary = await runner.run(items)
+
+    assert summary["succeeded"] == 0
+    assert set(summary["errors"]) == {"a", "b"}
+    assert BatchCheckpoint(checkpoint_path).open_batches == {}
+
+    rerun = BatchRunner(
+        provider, BatchCheckpoint(checkpoint_path), make_sink(written), poll_interval=0
+    )
+    summary = await rerun.run(items)
+
+    assert list(provider.batches) == ["batch-0", "batch-1"]
+    assert summary["succeeded"] == 2
+    assert BatchCheckpoint(checkpoint_path).completed == {"a", "b"}
@@ -0,0 +1,222 @@
+"""
+Unit tests for the adaptive per-provider concurrency limiter.
+Tests AIMD adjustments, bounded queueing, deadlines and priority lanes.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.agent.exceptions import ConcurrencyLimitError, ProviderError
+from app.agent.limiter import (
+    AdaptiveLimiter,
+    LimitedProvider,
+    Priority,
+    classify_failure,
+    estimate_first_token_latency,
+    llm_request_scope,
+    priority_for_user,
+)
+from app.agent.providers.base import Provider
+from app.agent.strategies.wrapper import JSONWrapper
+
+
+def make_limiter(**overrides):
+    params = {
+        "name": "openrouter/test",
+        "initial_limit": 2,
+        "min_limit": 1,
+        "max_limit": 10,
+        "latency_target": 5.0,
+        "backoff_factor": 0.5,
+        "max_queue": 3,
+        "max_queue_wait": 1.0,
+        "paid_weight": 2,
+    }
+    params.update(overrides)
+    return AdaptiveLimiter(**params)
+
+
+def test_priority_for_user_uses_tier_data():
+    """Pro users and paid tiers go to the paid lane."""
+    assert priority_for_user({"is_pro": True}) == Priority.PAID
+    assert priority_for_user({"is_pro": False, "subscription_tier": "basic"}) == Priority.PAID
+    assert priority_for_user({"is_pro": False, "subscription_tier": "free"}) == Priority.FREE
+    assert priority_for_user(None) == Priority.FREE
+
+
+def test_classify_failure_follows_cause_chain():
+    """429s and timeouts wrapped in ProviderError are still recognised."""
+
+    class RateLimitError(Exception):
+        status_code = 429
+
+    try:
+        try:
+            raise RateLimitError("too many requests")
+        except RateLimitError as e:
+            raise ProviderError("OpenRouter - Error generating response") from e
+    except ProviderError as wrapped:
+        assert classify_failure(wrapped) == "rate_limited"
+
+    assert classify_failure(TimeoutError()) == "timeout"
+    assert classify_failure(ValueError("bad json")) == "error"
+
+
+@pytest.mark.asyncio
+async def test_additive_increase_on_fast_success():
+    """Fast successful calls grow the limit."""
+    limiter = make_limiter()
+    for _ in range(10):
+        await limiter.acquire(Priority.FREE)
+        limiter.release(0.5, "ok")
+
+    assert limiter.limit > 2
+
+
+@pytest.mark.asyncio
+async def test_multiplicative_decrease_on_rate_limit():
+    """A 429 halves the limit, but only once per latency window."""
+    limiter = make_limiter(initial_limit=8)
+    await limiter.acquire(Priority.FREE)
+    limiter.release(1.0, "rate_limited")
+    assert limiter.limit == 4
+
+    await limiter.acquire(Priority.FREE)
+    limiter.release(1.0, "rate_limited")
+    assert limiter.limit == 4
+    assert limiter.get_stats()["rate_limited"] == 2
+
+
+@pytest.mark.asyncio
+async def test_queue_full_rejects_immediately():
+    """Callers beyond the queue bound are rejected without waiting."""
+    limiter = make_limiter(initial_limit=1, max_queue=1)
+    await limiter.acquire(Priority.FREE)
+    waiting = asyncio.create_task(limiter.acquire(Priority.FREE))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ConcurrencyLimitError):
+        await limiter.acquire(Priority.FREE)
+    assert limiter.get_stats()["rejected_queue_full"] == 1
+
+    limiter.release(0.1, "ok")
+    await waiting
+    assert limiter.in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_rejects_queued_caller():
+    """A queued caller gives up once its deadline passes."""
+    limiter = make_limiter(initial_limit=1, max_queue_wait=0.05)
+    await limiter.acquire(Priority.FREE)
+
+    with pytest.raises(ConcurrencyLimitError):
+        await limiter.acquire(Priority.FREE)
+
+    assert limiter.queue_depth() == 0
+    assert limiter.get_stats()["rejected_deadline"] == 1
+
+
+@pytest.mark.asyncio
+async def test_paid_lane_served_before_free():
+    """When a slot frees up, paid callers are admitted ahead of free ones."""
+    limiter = make_limiter(initial_limit=1, max_queue=10)
+    await limiter.acquire(Priority.FREE)
+    order: list[str] = []
+
+    async def wait(label, priority):
+        await limiter.acquire(priority)
+        order.append(label)
+
+    free = asyncio.create_task(wait("free", Priority.FREE))
+    await asyncio.sleep(0)
+    paid = asyncio.create_task(wait("paid", Priority.PAID))
+    await asyncio.sleep(0)
+    assert limiter.get_stats()["queue_depth_paid"] == 1
+
+    limiter.release(0.1, "ok")
+    await asyncio.sleep(0)
+    limiter.release(0.1, "ok")
+    await asyncio.gather(free, paid)
+
+    assert order == ["paid", "free"]
+
+
+@pytest.mark.asyncio
+async def test_long_generation_is_not_a_slow_call():
+    """Slowness is judged on time to first token, not on total wall time."""
+    limiter = make_limiter()
+    await limiter.acquire(Priority.FREE)
+    limiter.release(60.0, "ok", first_token_latency=1.0)
+    assert limiter.get_stats()["slow_calls"] == 0 and limiter.limit == 2
+
+    await limiter.acquire(Priority.FREE)
+    limiter.release(60.0, "ok", first_token_latency=6.0)
+    assert limiter.get_stats()["slow_calls"] == 1 and limiter.limit == 1
+
+    # Non-streaming calls: about 4000 output tokens at 0.02s each is 80s of decoding
+    assert estimate_first_token_latency(82.0, "x" * 16000) == pytest.approx(2.0)
+    assert estimate_first_token_latency(3.0, "short") == pytest.approx(2.96)
+
+
+@pytest.mark.asyncio
+async def test_limited_provider_stream_measures_time_to_first_token(monkeypatch):
+    """A stream that starts quickly but runs long is not a slow call."""
+    clock = iter([0.0, 0.5, 120.0])  # start, first delta, end of stream
+    limiter = make_limiter()
+    await limiter.acquire(Priority.FREE)
+    limiter.acquire = AsyncMock()
+    release = MagicMock(wraps=limiter.release)
+    monkeypatch.setattr(limiter, "release", release)
+    monkeypatch.setattr("app.agent.limiter.time", SimpleNamespace(monotonic=lambda: next(clock)))
+
+    class Inner:
+        async def stream(self, prompt, **generation_args):
+            yield "a"
+            yield "b"
+
+    provider = LimitedProvider(Inner(), limiter)
+    assert [delta async for delta in provider.stream("prompt")] == ["a", "b"]
+
+    release.assert_called_once_with(120.0, "ok", 0.5)
+    assert limiter.get_stats()["slow_calls"] == 0
+
+
+@pytest.mark.asyncio
+async def test_limited_provider_uses_request_scope_priority():
+    """LimitedProvider reads the lane from llm_request_scope and releases slots."""
+    limiter = make_limiter()
+    inner = AsyncMock(return_value="ok")
+    provider = LimitedProvider(inner, limiter)
+
+    with llm_request_scope(priority=Priority.PAID, timeout=5):
+        assert await provider("prompt", temperature=0) == "ok"
+
+    inner.assert_awaited_once_with("prompt", temperature=0)
+    assert limiter.in_flight == 0
+    assert limiter.get_stats()["admitted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_json_wrapper_streams_count_as_successes():
+    """JSONWrapper closes the stream once the object is complete; that is a success."""
+
+    class Inner(Provider):
+        async def __call__(self, prompt, **generation_args):
+            raise AssertionError("stream() should be used")
+
+        async def stream(self, prompt, **generation_args):
+            for delta in ['{"score": ', "85}", "\nObservações finais...", " mais texto"]:
+                yield delta
+
+    limiter = make_limiter(initial_limit=4)
+    provider = LimitedProvider(Inner(), limiter)
+
+    for _ in range(20):
+        assert await JSONWrapper()("prompt", provider) == {"score": 85}
+
+    assert limiter.limit > 4 and limiter.in_flight == 0
+    assert limiter._ewma_latency is not None
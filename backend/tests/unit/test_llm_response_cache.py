@@ -0,0 +1,262 @@
+"""
+Unit tests for the content-addressed LLM response cache.
+Tests key derivation, LRU/TTL eviction, the SQLite tier, memory-only entries
+and sampling bypass.
+"""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.agent.cache import CachingProvider, LLMResponseCache
+from app.agent.providers.base import Provider
+
+
+@pytest.fixture
+def cache():
+    """Memory-only cache with small limits."""
+    return LLMResponseCache(
+        max_entries=2, max_bytes=1024, ttl_seconds=60, db_path="", allow_sampled=False
+    )
+
+
+def _key(**overrides):
+    params = {
+        "model": "anthropic/claude-3.5-sonnet",
+        "provider": "openrouter",
+        "prompt": "Analise este currículo",
+        "temperature": 0,
+        "max_tokens": 2000,
+        "prompt_version": "score-v1",
+    }
+    params.update(overrides)
+    return LLMResponseCache.make_key(**params)
+
+
+def test_key_depends_on_every_component():
+    """Any change to model, prompt, sampling or template version changes the key."""
+    base = _key()
+    assert base == _key()
+    assert base != _key(model="openai/gpt-4o")
+    assert base != _key(provider="openai")
+    assert base != _key(prompt="Outro currículo")
+    assert base != _key(temperature=0.3)
+    assert base != _key(max_tokens=3000)
+    assert base != _key(prompt_version="score-v2")
+
+
+@pytest.mark.asyncio
+async def test_get_or_generate_hits_after_first_call(cache):
+    """Second identical deterministic call is served from cache."""
+    generate = AsyncMock(return_value='{"score_compatibilidade": 80}')
+    kwargs = {
+        "model": "m",
+        "provider": "openrouter",
+        "prompt": "p",
+        "temperature": 0,
+        "max_tokens": 100,
+        "prompt_version": "v1",
+    }
+
+    first = await cache.get_or_generate(generate=generate, **kwargs)
+    second = await cache.get_or_generate(generate=generate, **kwargs)
+
+    assert first == second
+    generate.assert_awaited_once()
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_sampled_calls_bypass_unless_opted_in(cache):
+    """temperature > 0 skips the cache unless cache_sampled=True."""
+    generate = AsyncMock(return_value="texto")
+    kwargs = {
+        "model": "m",
+        "provider": "p",
+        "prompt": "x",
+        "temperature": 0.7,
+        "max_tokens": 10,
+        "prompt_version": None,
+    }
+
+    await cache.get_or_generate(generate=generate, **kwargs)
+    await cache.get_or_generate(generate=generate, **kwargs)
+    assert generate.await_count == 2
+    assert cache.stats.bypassed == 2
+
+    await cache.get_or_generate(generate=generate, cache_sampled=True, **kwargs)
+    await cache.get_or_generate(generate=generate, cache_sampled=True, **kwargs)
+    assert generate.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_by_entry_count(cache):
+    """Least recently used entries are evicted first."""
+    await cache.set("a", "1")
+    await cache.set("b", "2")
+    assert await cache.get("a") == "1"  # "a" becomes most recent
+    await cache.set("c", "3")
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == "1"
+    assert await cache.get("c") == "3"
+    assert cache.stats.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_size_based_eviction():
+    """Total stored bytes never exceed max_bytes."""
+    cache = LLMResponseCache(max_entries=100, max_bytes=10, ttl_seconds=60, db_path="")
+    await cache.set("a", "x" * 6)
+    await cache.set("b", "y" * 6)
+
+    assert await cache.get("a") is None
+    assert await cache.get("b") == "y" * 6
+    assert cache.get_stats()["memory_bytes"] <= 10
+
+    # The budget counts UTF-8 bytes, not characters: "ção" is 5 bytes
+    await cache.set("c", "ção" * 2)
+    assert cache.get_stats()["memory_bytes"] == 10
+    await cache.set("d", "ção" * 3)
+    assert await cache.get("d") is None
+
+
+@pytest.mark.asyncio
+async def test_ttl_expiry(monkeypatch, cache):
+    """Entries older than the TTL are treated as misses."""
+    import app.agent.cache as cache_module
+
+    now = 1_000_000.0
+    monkeypatch.setattr(cache_module.time, "time", lambda: now)
+    await cache.set("k", "v")
+
+    now += 61
+    assert await cache.get("k") is None
+    assert cache.stats.expirations == 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_tier_survives_new_instance(tmp_path):
+    """Entries written to disk are visible to a fresh cache instance."""
+    db_path = str(tmp_path / "llm_cache.sqlite")
+    writer = LLMResponseCache(max_entries=10, ttl_seconds=60, db_path=db_path)
+    await writer.set("k", "persistido")
+
+    reader = LLMResponseCache(max_entries=10, ttl_seconds=60, db_path=db_path)
+    assert await reader.get("k") == "persistido"
+    assert reader.stats.disk_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_non_persistent_entries_stay_off_disk(tmp_path):
+    """cache_persist=False completions (resume text) are served from memory only."""
+    db_path = str(tmp_path / "llm_cache.sqlite")
+    writer = LLMResponseCache(max_entries=10, ttl_seconds=60, db_path=db_path)
+    inner = AsyncMock(return_value="score")
+    provider = CachingProvider(inner, provider_name="openrouter", model="m", cache=writer)
+
+    await provider("currículo", temperature=0, cache_persist=False)
+    await provider("currículo", temperature=0, cache_persist=False)
+    inner.assert_awaited_once_with("currículo", temperature=0)
+
+    reader = LLMResponseCache(max_entries=10, ttl_seconds=60, db_path=db_path)
+    key = LLMResponseCache.make_key(
+        model="m",
+        provider="openrouter",
+        prompt="currículo",
+        temperature=0,
+        max_tokens=None,
+        prompt_version=None,
+    )
+    assert await reader.get(key) is None
+
+
+@pytest.mark.asyncio
+async def test_caching_provider_strips_cache_args(cache):
+    """Cache control arguments are never forwarded to the real provider."""
+    inner = AsyncMock(return_value="ok")
+    provider = CachingProvider(inner, provider_name="openrouter", model="m", cache=cache)
+
+    await provider("prompt", temperature=0, max_tokens=10, prompt_version="v1", cache_sampled=True)
+    await provider("prompt", temperature=0, max_tokens=10, prompt_version="v1", cache_sampled=True)
+
+    inner.assert_awaited_once_with("prompt", temperature=0, max_tokens=10)
+
+
+@pytest.mark.asyncio
+async def test_caching_provider_stream_stores_and_replays(cache):
+    """A completed stream is stored and later replayed as a single delta."""
+
+    class StreamingInner(Provider):
+        calls = 0
+
+        async def __call__(self, prompt, **generation_args):
+            raise AssertionError("stream() should be used")
+
+        async def stream(self, prompt, **generation_args):
+            StreamingInner.calls += 1
+            for delta in ["Olá", ", ", "mundo"]:
+                yield delta
+
+    provider = CachingProvider(StreamingInner(), provider_name="openrouter", model="m", cache=cache)
+
+    first = [d async for d in provider.stream("prompt", temperature=0, prompt_version="v1")]
+    second = [d async for d in provider.stream("prompt", temperature=0, prompt_version="v1")]
+
+    assert first == ["Olá", ", ", "mundo"]
+    assert second == ["Olá, mundo"]
+    assert StreamingInner.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_get_or_generate_skips_completions_the_caller_rejects(tmp_path):
+    """A rejected completion is neither stored nor served, in either tier."""
+    cache = LLMResponseCache(max_entries=10, ttl_seconds=60, db_path=str(tmp_path / "c.sqlite"))
+    kwargs = {
+        "model": "m",
+        "provider": "openrouter",
+        "prompt": "p",
+        "temperature": 0.3,
+        "max_tokens": 100,
+        "prompt_version": "score-v1",
+        "cache_sampled": True,
+        "validate": lambda text: text.endswith("}"),
+    }
+
+    truncated = AsyncMock(return_value='{"skills": ["Pyt')
+    assert await cache.get_or_generate(generate=truncated, **kwargs) == '{"skills": ["Pyt'
+    assert cache.stats.stores == 0
+
+    # An entry stored before validation existed is evicted and regenerated
+    await cache.set(_key(model="m", prompt="p", temperature=0.3, max_tokens=100), '{"skills"')
+    complete = AsyncMock(return_value='{"skills": ["Python"]}')
+    assert await cache.get_or_generate(generate=complete, **kwargs) == '{"skills": ["Python"]}'
+    assert await cache.get_or_generate(generate=complete, **kwargs) == '{"skills": ["Python"]}'
+    complete.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_agent_manager_evicts_completion_the_strategy_rejects(cache, monkeypatch):
+    """An unparseable answer is not replayed: the next attempt calls the provider again."""
+    from app.agent.exceptions import StrategyError
+    from app.agent.manager import AgentManager
+
+    class StreamingInner(Provider):
+        replies = ['{"score_compatibilidade": 8', '{"score_compatibilidade": 85}']
+
+        async def __call__(self, prompt, **generation_args):
+            raise AssertionError("stream() should be used")
+
+        async def stream(self, prompt, **generation_args):
+            yield StreamingInner.replies.pop(0)
+
+    manager = AgentManager(strategy="json", model="m", model_provider="openrouter", cache=cache)
+    monkeypatch.setattr(manager, "_get_provider", AsyncMock(return_value=StreamingInner()))
+    kwargs = {"temperature": 0.3, "cache_sampled": True, "prompt_version": "v1"}
+
+    with pytest.raises(StrategyError):
+        await manager.run("prompt", **kwargs)
+    assert await manager.run("prompt", **kwargs) == {"score_compatibilidade": 85}
+    assert await manager.run("prompt", **kwargs) == {"score_compatibilidade": 85}
+    assert StreamingInner.replies == []
@@ -0,0 +1,222 @@
+"""
+Unit tests for latency-aware LLM routing.
+Tests backend parsing, ranking, hedged requests and failover.
+"""
+
+import asyncio
+
+import pytest
+
+from app.agent.exceptions import ProviderError
+from app.agent.providers.base import Provider
+from app.agent.providers.router import (
+    BackendHealthRegistry,
+    RoutingProvider,
+    parse_backends,
+)
+
+
+def make_backend(result="ok", delay=0.0, error=None):
+    calls = {"count": 0, "cancelled": 0}
+
+    async def provider(prompt, **generation_args):
+        calls["count"] += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            calls["cancelled"] += 1
+            raise
+        if error is not None:
+            raise error
+        return result
+
+    return provider, calls
+
+
+def test_parse_backends_keeps_model_separators():
+    """Only the first ':' separates provider from model."""
+    assert parse_backends("openrouter:anthropic/claude-3.5-sonnet, openai:gpt-4o-mini") == [
+        ("openrouter", "anthropic/claude-3.5-sonnet"),
+        ("openai", "gpt-4o-mini"),
+    ]
+    assert parse_backends("") == []
+    with pytest.raises(ValueError):
+        parse_backends("openai")
+
+
+def test_ranking_prefers_fast_healthy_backend():
+    """Lower latency wins unless the backend keeps failing."""
+    health = BackendHealthRegistry()
+    health.get("a").record_success(2.0)
+    health.get("b").record_success(1.0)
+    router = RoutingProvider([("a", make_backend()[0]), ("b", make_backend()[0])], health=health)
+    assert [name for name, _ in router._rank()] == ["b", "a"]
+
+    for _ in range(5):
+        health.get("b").record_failure()
+    assert [name for name, _ in router._rank()] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_hedges_slow_primary(monkeypatch):
+    """A primary past its latency budget is hedged and the loser cancelled."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "LLM_HEDGE_DEFAULT_DELAY_SECONDS", 0.01)
+    slow, slow_calls = make_backend("slow", delay=1.0)
+    fast, fast_calls = make_backend("fast")
+    health = BackendHealthRegistry()
+    router = RoutingProvider([("slow", slow), ("fast", fast)], health=health, hedging=True)
+
+    assert await router("prompt") == "fast"
+    await asyncio.sleep(0)
+    assert slow_calls["cancelled"] == 1
+    assert health.get("fast").get_stats()["hedge_wins"] == 1
+    assert health.get("slow").ewma_latency is not None
+
+
+@pytest.mark.asyncio
+async def test_fails_over_on_error():
+    """A failing primary fails over immediately, without waiting for the hedge delay."""
+    broken, _ = make_backend(error=ProviderError("boom"))
+    healthy, healthy_calls = make_backend("ok")
+    health = BackendHealthRegistry()
+    router = RoutingProvider([("broken", broken), ("healthy", healthy)], health=health)
+
+    assert await asyncio.wait_for(router("prompt"), timeout=1.0) == "ok"
+    assert healthy_calls["count"] == 1
+    assert health.get("broken").failures == 1
+
+
+@pytest.mark.asyncio
+async def test_empty_response_is_not_accepted():
+    """Empty completions count as failures and fall through to the next backend."""
+    empty, _ = make_backend("  ")
+    healthy, _ = make_backend("ok")
+    router = RoutingProvider(
+        [("empty", empty), ("healthy", healthy)], health=BackendHealthRegistry()
+    )
+    assert await router("prompt") == "ok"
+
+
+@pytest.mark.asyncio
+async def test_all_backends_failing_raises():
+    """When every backend fails the last error is surfaced as ProviderError."""
+    a, _ = make_backend(error=RuntimeError("a down"))
+    b, _ = make_backend(error=RuntimeError("b down"))
+    router = RoutingProvider([("a", a), ("b", b)], health=BackendHealthRegistry())
+    with pytest.raises(ProviderError):
+        await router("prompt")
+
+
+@pytest.mark.asyncio
+async def test_stream_fails_over_before_first_delta():
+    """Streams switch backend only if the failing one produced nothing yet."""
+
+    class Backend(Provider):
+        def __init__(self, deltas, error=None):
+            self.deltas, self.error = deltas, error
+
+        async def __call__(self, prompt, **generation_args):
+            return "".join(self.deltas)
+
+        async def stream(self, prompt, **generation_args):
+            for delta in self.deltas:
+                yield delta
+            if self.error:
+                raise self.error
+
+    router = RoutingProvider(
+        [("down", Backend([], ProviderError("down"))), ("up", Backend(["a", "b"]))],
+        health=BackendHealthRegistry(),
+    )
+    assert [d async for d in router.stream("prompt")] == ["a", "b"]
+
+    broken_mid_stream = RoutingProvider(
+        [("flaky", Backend(["a"], ProviderError("reset"))), ("up", Backend(["x"]))],
+        health=BackendHealthRegistry(),
+    )
+    with pytest.raises(ProviderError):
+        [d async for d in broken_mid_stream.stream("prompt")]
+
+
+class SlowStartBackend(Provider):
+    """Streams its deltas after an initial delay and records being aborted."""
+
+    def __init__(self, deltas, delay=0.0):
+        self.deltas, self.delay = deltas, delay
+        self.closed = False
+
+    async def __call__(self, prompt, **generation_args):
+        await asyncio.sleep(self.delay)
+        return "".join(self.deltas)
+
+    async def stream(self, prompt, **generation_args):
+        try:
+            await asyncio.sleep(self.delay)
+            for delta in self.deltas:
+                yield delta
+        finally:
+            self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_stream_hedges_on_time_to_first_delta(monkeypatch):
+    """A stream with no first delta inside the budget races the runner-up and the loser is closed."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "LLM_HEDGE_DEFAULT_DELAY_SECONDS", 0.01)
+    slow = SlowStartBackend(["slow"], delay=2.0)
+    fast = SlowStartBackend(["fa", "st"])
+    health = BackendHealthRegistry()
+    router = RoutingProvider([("slow", slow), ("fast", fast)], health=health, hedging=True)
+
+    deltas = await asyncio.wait_for(_collect_stream(router.stream("prompt")), timeout=1.0)
+
+    assert deltas == ["fa", "st"]
+    assert slow.closed
+    assert health.get("slow").hedges_sent == 0
+    assert health.get("fast").get_stats()["hedges_sent"] == 1
+    assert health.get("fast").get_stats()["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_json_wrapper_over_router_is_hedged(monkeypatch):
+    """JSONWrapper streams through the router, so slow structured calls still get hedged."""
+    from app.agent.strategies.wrapper import JSONWrapper
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "LLM_HEDGE_DEFAULT_DELAY_SECONDS", 0.01)
+    slow = SlowStartBackend(['{"score": 1}'], delay=2.0)
+    fast = SlowStartBackend(['{"score": ', "85}"])
+    health = BackendHealthRegistry()
+    router = RoutingProvider([("slow", slow), ("fast", fast)], health=health, hedging=True)
+
+    result = await asyncio.wait_for(JSONWrapper()("prompt", router), timeout=1.0)
+
+    assert result == {"score": 85}
+    assert health.get("fast").hedges_sent > 0
+    assert health.get("fast").hedge_wins == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_closed_by_consumer_counts_as_success():
+    """finish_stream closes the routed stream early; that still records a success."""
+    from app.agent.providers.base import finish_stream
+
+    backend = SlowStartBackend(['{"score": ', "85}", " trailing"], delay=0.01)
+    health = BackendHealthRegistry()
+    router = RoutingProvider([("only", backend)], health=health)
+
+    stream = router.stream("prompt")
+    assert await anext(stream) == '{"score": '
+    await finish_stream(stream)
+
+    stats = health.get("only").get_stats()
+    assert backend.closed
+    assert stats["requests"] == 1
+    assert stats["ewma_latency_seconds"] is not None
+
+
+async def _collect_stream(stream):
+    return [delta async for delta in stream]
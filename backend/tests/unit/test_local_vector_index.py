@@ -0,0 +1,90 @@
+"""
+Unit tests for the embedded vector index.
+Tests persistence across restarts, IVF search against exact search, and
+incremental delete with row reuse.
+"""
+
+import numpy as np
+import pytest
+from qdrant_client.http import models
+
+from app.services.vectordb.local_index import LocalVectorIndex
+from app.services.vectordb.qdrant_service import QdrantService
+
+
+@pytest.mark.asyncio
+async def test_documents_survive_a_restart(tmp_path):
+    service = QdrantService(url="", collection_name="docs", local_path=str(tmp_path))
+    ids = await service.add_documents(
+        [{"text": "python"}, {"text": "design"}],
+        [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]],
+        [{"document_type": "resume"}, {"document_type": "job"}],
+        user_id="u1",
+    )
+    await service.close()
+
+    reopened = QdrantService(url="", collection_name="docs", local_path=str(tmp_path))
+    results = await reopened.search(
+        [0.9, 0.1, 0.0], user_id="u1", filter_params={"document_type": ["resume", "job"]}
+    )
+
+    assert [r["id"] for r in results] == ids
+    assert results[0]["document"] == {"text": "python"}
+    assert await reopened.search([1.0, 0.0, 0.0], user_id="u2") == []
+    await reopened.close()
+
+
+def test_ivf_search_recalls_exact_neighbours_on_clustered_data():
+    """Once trained, probing a few lists finds nearly the same neighbours as a full scan."""
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(20, 16))
+    data = centers[rng.integers(0, 20, 2000)] + 0.05 * rng.normal(size=(2000, 16))
+    index = LocalVectorIndex(None, dim=16, ivf_min_points=500)
+    index.upsert([(f"p{i}", vector, {}) for i, vector in enumerate(data)])
+
+    assert index._centroids is not None
+    recall = []
+    for query in data[:50]:
+        ivf = {hit[0] for hit in index.search(query, 10, [], nprobe=4)}
+        exact = {hit[0] for hit in index.search(query, 10, [], exact=True)}
+        recall.append(len(ivf & exact) / 10)
+    assert np.mean(recall) >= 0.9
+
+
+def test_selective_filters_on_trained_index_return_full_results():
+    """A small tenant or rare payload value isn't lost to clusters the probe skips."""
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(3000, 16))
+    index = LocalVectorIndex(None, dim=16, ivf_min_points=500)
+    index.create_payload_index("user_id", "keyword", is_tenant=True)
+    index.upsert(
+        [
+            (f"big{i}", vector, {"user_id": "big", "document_type": "job" if i % 100 else "resume"})
+            for i, vector in enumerate(data)
+        ]
+    )
+    index.upsert([(f"small{i}", rng.normal(size=16), {"user_id": "small"}) for i in range(5)])
+    small = [models.FieldCondition(key="user_id", match=models.MatchValue(value="small"))]
+    resumes = [
+        models.FieldCondition(key="user_id", match=models.MatchValue(value="big")),
+        models.FieldCondition(key="document_type", match=models.MatchValue(value="resume")),
+    ]
+
+    assert index._centroids is not None
+    for query in rng.normal(size=(20, 16)):
+        assert len(index.search(query, 5, small, nprobe=2)) == 5
+        assert len(index.search(query, 10, resumes, nprobe=2)) == 10
+
+
+def test_delete_frees_rows_for_reuse():
+    index = LocalVectorIndex(None, dim=2)
+    index.create_payload_index("user_id", "keyword", is_tenant=True)
+    index.upsert([("a", [1.0, 0.0], {"user_id": "u1"}), ("b", [0.0, 1.0], {"user_id": "u1"})])
+
+    assert index.delete(["a", "missing"]) == 1
+    index.upsert([("c", [1.0, 0.1], {"user_id": "u1"})])
+    tenant = [models.FieldCondition(key="user_id", match=models.MatchValue(value="u1"))]
+
+    assert index._next_row == 2
+    assert [hit[0] for hit in index.search([1.0, 0.0], 5, tenant)] == ["c", "b"]
+    assert index.find([models.HasIdCondition(has_id=["a", "b"])]) == ["b"]
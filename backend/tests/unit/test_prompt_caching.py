@@ -0,0 +1,53 @@
+"""
+Unit tests for static-prefix prompts and provider prompt caching.
+Tests Prompt splitting, cache keys and provider-reported cache usage.
+"""
+
+from app.agent.cache import LLMResponseCache
+from app.agent.manager import AgentManager
+from app.agent.prompt import Prompt, PromptCacheStats
+
+
+def test_prompt_text_and_membership():
+    """The single-string form keeps the static prefix first."""
+    prompt = Prompt(system="REGRAS", user="CURRÍCULO: João")
+    assert prompt.text == "REGRAS\n\nCURRÍCULO: João"
+    assert str(prompt) == prompt.text
+    assert "REGRAS" in prompt and "João" in prompt
+
+
+def test_agent_manager_moves_prefix_to_system_arg():
+    """A Prompt is sent as the user text plus a ``system`` generation arg."""
+    kwargs: dict = {"temperature": 0}
+    text = AgentManager._split_prompt(Prompt(system="REGRAS", user="VAGA"), kwargs)
+    assert text == "VAGA"
+    assert kwargs == {"temperature": 0, "system": "REGRAS"}
+
+    plain: dict = {}
+    assert AgentManager._split_prompt("texto", plain) == "texto"
+    assert plain == {}
+
+
+def test_cache_key_includes_system_prefix():
+    """Same user text under a different prefix must not share a cached response."""
+    params = {
+        "model": "m",
+        "provider": "openrouter",
+        "prompt": "VAGA",
+        "temperature": 0,
+        "max_tokens": 100,
+        "prompt_version": "v2",
+    }
+    assert LLMResponseCache.make_key(**params) == LLMResponseCache.make_key(**params, system="")
+    assert LLMResponseCache.make_key(**params, system="A") != LLMResponseCache.make_key(
+        **params, system="B"
+    )
+
+
+def test_prompt_cache_stats_ratio():
+    """Cached token ratio is computed over all recorded prompt tokens."""
+    stats = PromptCacheStats()
+    stats.record(1000, 800)
+    stats.record(1000, None, cache_write_tokens=900)
+    assert stats.to_dict()["cached_ratio"] == 0.4
+    assert stats.to_dict()["cache_write_tokens"] == 900
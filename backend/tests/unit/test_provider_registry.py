@@ -0,0 +1,98 @@
+"""
+Unit tests for the pooled LLM provider registry.
+Tests provider reuse, shared connection pools, stats and shutdown.
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.agent.registry import PoolLimits, ProviderRegistry
+
+
+@pytest.fixture
+def registry():
+    """Create an isolated registry with small pool limits."""
+    return ProviderRegistry(
+        PoolLimits(
+            max_connections=4, max_keepalive_connections=2, keepalive_expiry=5.0, http2=False
+        )
+    )
+
+
+def _factory(created: list):
+    def build(http_client):
+        provider = MagicMock()
+        provider.http_client = http_client
+        created.append(provider)
+        return provider
+
+    return build
+
+
+def test_same_key_reuses_provider(registry):
+    """Repeated lookups with the same key return the same instance."""
+    created: list = []
+    first = registry.get_or_create("llm", "openrouter", "model-a", None, "key-1", _factory(created))
+    second = registry.get_or_create(
+        "llm", "openrouter", "model-a", None, "key-1", _factory(created)
+    )
+
+    assert first is second
+    assert len(created) == 1
+
+
+def test_different_keys_create_distinct_providers(registry):
+    """Model, api key and kind are all part of the registry key."""
+    created: list = []
+    registry.get_or_create("llm", "openrouter", "model-a", None, "key-1", _factory(created))
+    registry.get_or_create("llm", "openrouter", "model-b", None, "key-1", _factory(created))
+    registry.get_or_create("llm", "openrouter", "model-a", None, "key-2", _factory(created))
+    registry.get_or_create("embedding", "openrouter", "model-a", None, "key-1", _factory(created))
+
+    assert len(created) == 4
+
+
+def test_http_client_shared_per_upstream(registry):
+    """Providers for the same (provider, base_url) share one HTTP client."""
+    created: list = []
+    chat = registry.get_or_create("llm", "openrouter", "model-a", None, "k", _factory(created))
+    emb = registry.get_or_create("embedding", "openrouter", "emb", None, "k", _factory(created))
+    other = registry.get_or_create(
+        "llm", "openrouter", "model-a", "https://proxy.example/v1", "k", _factory(created)
+    )
+
+    assert chat.http_client is emb.http_client
+    assert chat.http_client is not other.http_client
+
+
+def test_stats_do_not_leak_api_keys(registry):
+    """Stats report pools and providers without exposing secrets."""
+    registry.get_or_create("llm", "openrouter", "model-a", None, "super-secret", _factory([]))
+
+    stats = registry.stats()
+
+    assert stats["provider_count"] == 1
+    assert stats["pool_count"] == 1
+    pool = stats["pools"][0]
+    assert pool["max_connections"] == 4
+    assert pool["in_flight"] == 0
+    assert pool["saturation"] == 0
+    assert "super-secret" not in str(stats)
+
+
+@pytest.mark.asyncio
+async def test_aclose_closes_clients_and_resets(registry):
+    """Shutdown closes pooled clients and empties the registry."""
+    created: list = []
+    provider = registry.get_or_create("llm", "openrouter", "m", None, "k", _factory(created))
+
+    await registry.aclose()
+
+    assert provider.http_client.is_closed
+    assert registry.stats()["provider_count"] == 0
+
+    # A fresh lookup after shutdown builds a new provider on a new client
+    again = registry.get_or_create("llm", "openrouter", "m", None, "k", _factory(created))
+    assert again is not provider
+    assert not again.http_client.is_closed
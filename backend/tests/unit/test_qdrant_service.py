@@ -0,0 +1,203 @@
+"""
+Unit tests for QdrantService.
+Tests the async client round trip, memoized collection state, race-safe
+collection creation and streaming ingestion.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.config import settings
+from app.core.exceptions import DatabaseError
+from app.services.vectordb.qdrant_service import PAYLOAD_INDEXES, QdrantService
+
+
+async def stream(n: int):
+    for i in range(n):
+        yield {"text": f"doc {i}"}, [1.0, float(i)], {"n": i}
+
+
+@pytest.fixture
+def qdrant_service():
+    """In-memory (local mode) service."""
+    return QdrantService(url="", collection_name="test_collection")
+
+
+@pytest.mark.asyncio
+async def test_add_and_search_check_the_collection_once(qdrant_service):
+    """Only the first call asks Qdrant whether the collection exists."""
+    exists = AsyncMock(wraps=qdrant_service.client.collection_exists)
+    qdrant_service.client.collection_exists = exists
+
+    ids = await qdrant_service.add_documents(
+        [{"text": "python"}, {"text": "design"}],
+        [[1.0, 0.0], [0.0, 1.0]],
+        [{"document_type": "resume"}, {"document_type": "job"}],
+        user_id="u1",
+    )
+    results = await qdrant_service.search(
+        [1.0, 0.1], user_id="u1", limit=1, filter_params={"document_type": "resume"}
+    )
+
+    assert exists.await_count == 1
+    assert results[0]["id"] == ids[0]
+    assert results[0]["document"] == {"text": "python"}
+    assert results[0]["metadata"]["user_id"] == "u1"
+    assert "created_at" in results[0]["metadata"]
+
+
+@pytest.mark.asyncio
+async def test_create_race_is_treated_as_success(qdrant_service):
+    """A create that fails because another worker won the race is not an error."""
+    client = qdrant_service.client
+    exists = AsyncMock(side_effect=[False, True])
+    real_create = client.create_collection
+
+    async def create_then_fail(**kwargs):
+        await real_create(**kwargs)
+        raise RuntimeError("Collection `test_collection` already exists!")
+
+    client.collection_exists = exists
+    client.create_collection = AsyncMock(side_effect=create_then_fail)
+
+    await qdrant_service.ensure_collection_exists(3)
+
+    assert exists.await_count == 2
+    assert qdrant_service._vector_size == 3
+
+
+@pytest.mark.asyncio
+async def test_vector_size_mismatch_is_rejected(qdrant_service):
+    await qdrant_service.ensure_collection_exists(3)
+
+    with pytest.raises(ValueError, match="3-dimensional"):
+        await qdrant_service.search([1.0, 0.0], user_id="u1")
+
+
+@pytest.mark.asyncio
+async def test_ingest_streams_chunks_and_ends_with_a_barrier(qdrant_service):
+    """Chunks go out with wait=False in parallel; only the last one waits."""
+    real_upsert = qdrant_service.client.upsert
+    calls: list[tuple[int, bool]] = []
+    in_flight = peak = 0
+
+    async def upsert(collection_name, points, wait):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        calls.append((len(points), wait))
+        return await real_upsert(collection_name=collection_name, points=points, wait=wait)
+
+    qdrant_service.client.upsert = upsert
+
+    report = await qdrant_service.ingest(stream(10), chunk_size=3, concurrency=2)
+
+    assert report.points == 10 and report.chunks == 4 and not report.failed_ids
+    assert peak == 2
+    assert calls[-1] == (1, True)
+    assert all(not wait for _, wait in calls[:-1])
+    assert report.points_per_second > 0
+    count = await qdrant_service.client.count(qdrant_service.collection_name)
+    assert count.count == 10
+
+
+@pytest.mark.asyncio
+async def test_ingest_retries_then_reports_failed_chunks(qdrant_service, monkeypatch):
+    monkeypatch.setattr(settings, "QDRANT_INGEST_RETRY_BACKOFF_SECONDS", 0)
+    real_upsert = qdrant_service.client.upsert
+    attempts = 0
+
+    async def flaky_upsert(collection_name, points, wait):
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1 or any(point.payload["n"] == 4 for point in points):
+            raise ConnectionError("upstream reset")
+        return await real_upsert(collection_name=collection_name, points=points, wait=wait)
+
+    qdrant_service.client.upsert = flaky_upsert
+
+    report = await qdrant_service.ingest(stream(6), chunk_size=2, max_retries=2)
+
+    assert report.points == 4
+    assert report.failed_ids == report.ids[4:]
+    assert report.retries == 3
+
+    with pytest.raises(DatabaseError, match="Failed to store 6 of 6 documents"):
+        await qdrant_service.add_documents(
+            [{"text": str(i)} for i in range(6)],
+            [[1.0, float(i)] for i in range(6)],
+            [{"n": i} for i in range(6)],
+        )
+
+
+@pytest.mark.asyncio
+async def test_payload_indexes_are_created_with_the_collection(qdrant_service):
+    create_index = AsyncMock()
+    qdrant_service.client.create_payload_index = create_index
+
+    await qdrant_service.ensure_collection_exists(2)
+
+    assert {c.kwargs["field_name"] for c in create_index.await_args_list} == set(PAYLOAD_INDEXES)
+    tenant_schema = PAYLOAD_INDEXES["user_id"]
+    assert tenant_schema.is_tenant
+
+
+@pytest.mark.asyncio
+async def test_search_and_delete_are_scoped_to_the_tenant(qdrant_service):
+    """Tenants never see or delete each other's documents, even by id."""
+    ids_u1 = await qdrant_service.add_documents([{"text": "a"}], [[1.0, 0.0]], user_id="u1")
+    # Client-supplied metadata cannot claim another tenant
+    ids_u2 = await qdrant_service.add_documents(
+        [{"text": "b"}], [[1.0, 0.0]], [{"user_id": "u1"}], user_id="u2"
+    )
+
+    results = await qdrant_service.search([1.0, 0.0], user_id="u1", hnsw_ef=128)
+    assert [r["id"] for r in results] == ids_u1
+    exact = await qdrant_service.search([1.0, 0.0], user_id="u2", exact=True)
+    assert [r["id"] for r in exact] == ids_u2
+
+    await qdrant_service.delete(ids_u2, user_id="u1")
+    assert await qdrant_service.search([1.0, 0.0], user_id="u2") != []
+
+
+@pytest.mark.asyncio
+async def test_delete_endpoint_keeps_its_http_errors(qdrant_service):
+    """A 401 or a refused delete is not rewrapped as a generic 400."""
+    from fastapi import HTTPException
+
+    from app.api.endpoints.vectordb import DeleteDocumentsRequest, delete_documents
+
+    request = DeleteDocumentsRequest(document_ids=["d1"])
+    credentials = SimpleNamespace(credentials="token")
+    auth_service = AsyncMock()
+
+    auth_service.get_user.return_value = None
+    with pytest.raises(HTTPException) as exc_info:
+        await delete_documents(request, credentials, auth_service, qdrant_service)
+    assert exc_info.value.status_code == 401
+
+    auth_service.get_user.return_value = {"id": "u1"}
+    qdrant_service.delete = AsyncMock(return_value=False)
+    with pytest.raises(HTTPException) as exc_info:
+        await delete_documents(request, credentials, auth_service, qdrant_service)
+    assert exc_info.value.detail == "Failed to delete one or more documents"
+
+
+@pytest.mark.asyncio
+async def test_filters_must_use_indexed_fields(qdrant_service):
+    await qdrant_service.ensure_collection_exists(2)
+
+    with pytest.raises(ValueError, match="no payload index"):
+        await qdrant_service.search([1.0, 0.0], user_id="u1", filter_params={"title": "x"})
+    with pytest.raises(ValueError, match="tenant scope"):
+        await qdrant_service.search([1.0, 0.0], user_id="u1", filter_params={"user_id": "u2"})
+
+    since = await qdrant_service.search(
+        [1.0, 0.0], user_id="u1", filter_params={"created_at": {"gte": "2024-01-01T00:00:00Z"}}
+    )
+    assert since == []
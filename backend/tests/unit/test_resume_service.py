@@ -6,13 +6,36 @@ Tests resume processing, file conversion, and database storage functionality.
 import os
 import tempfile
 import uuid
+from contextlib import contextmanager
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from fastapi import HTTPException, Response
+from markitdown import UnsupportedFormatException
 
+from app.api.endpoints.resumes import get_structured_resume
+from app.services.extraction_engine import extraction_engine
+from app.services.resume_artifact_store import ResumeArtifactStore
 from app.services.resume_service import ResumeService
 
 
+@pytest.fixture(autouse=True)
+def inline_extraction(monkeypatch):
+    """Run extraction jobs in-process instead of in worker processes."""
+
+    async def run(func, *args, timeout=None):
+        return func(*args)
+
+    monkeypatch.setattr(extraction_engine, "run", run)
+
+
+@contextmanager
+def patch_markitdown_convert():
+    """Patch MarkItDown.convert_stream as used by extraction jobs."""
+    with patch("app.services.text_extraction._markitdown") as markitdown:
+        yield markitdown.return_value.convert_stream
+
+
 @pytest.fixture
 def resume_service():
     """Create ResumeService instance for testing."""
@@ -53,7 +76,7 @@ def sample_resume_text():
 async def test_resume_service_initialization(resume_service):
     """Test ResumeService can be initialized successfully."""
     assert resume_service is not None
-    assert hasattr(resume_service, "md")
+    assert hasattr(resume_service, "text_extraction_service")
     assert hasattr(resume_service, "_validate_docx_dependencies")
 
 
@@ -89,7 +112,7 @@ async def test_convert_and_store_resume_pdf_success(
     mock_db_service.return_value = mock_service_instance
 
     # Mock MarkItDown conversion
-    with patch.object(resume_service.md, "convert") as mock_convert:
+    with patch_markitdown_convert() as mock_convert:
         mock_convert.return_value = MagicMock(text_content=sample_resume_text)
 
         result = await resume_service.convert_and_store_resume(
@@ -116,7 +139,7 @@ async def test_convert_and_store_resume_docx_success(
     mock_db_service.return_value = mock_service_instance
 
     # Mock MarkItDown conversion
-    with patch.object(resume_service.md, "convert") as mock_convert:
+    with patch_markitdown_convert() as mock_convert:
         mock_convert.return_value = MagicMock(text_content=sample_resume_text)
 
         result = await resume_service.convert_and_store_resume(
@@ -135,7 +158,7 @@ async def test_convert_and_store_resume_docx_success(
 async def test_convert_and_store_resume_conversion_failure(resume_service, mock_pdf_content):
     """Test handling of conversion failures."""
     # Mock MarkItDown conversion failure
-    with patch.object(resume_service.md, "convert") as mock_convert:
+    with patch_markitdown_convert() as mock_convert:
         mock_convert.side_effect = Exception("Conversion failed")
 
         with pytest.raises(Exception, match="File conversion failed"):
@@ -151,7 +174,7 @@ async def test_convert_and_store_resume_conversion_failure(resume_service, mock_
 async def test_convert_and_store_resume_docx_dependency_error(resume_service, mock_docx_content):
     """Test handling of DOCX dependency errors."""
     # Mock MarkItDown conversion with dependency error
-    with patch.object(resume_service.md, "convert") as mock_convert:
+    with patch_markitdown_convert() as mock_convert:
         mock_convert.side_effect = Exception("MissingDependencyException: DOCX support missing")
 
         with pytest.raises(Exception, match="markitdown is missing DOCX support"):
@@ -281,33 +304,304 @@ def test_validate_docx_dependencies_available(resume_service):
 
 
 @pytest.mark.asyncio
-async def test_convert_and_store_resume_temp_file_cleanup(resume_service, mock_pdf_content):
-    """Test that temporary files are properly cleaned up."""
+async def test_convert_and_store_resume_converts_in_memory(resume_service, mock_pdf_content):
+    """Test that uploads are converted from memory with a format hint, without temp files."""
 
     with patch("app.services.resume_service.SupabaseDatabaseService") as mock_db_service:
         mock_service_instance = AsyncMock()
         mock_service_instance.create.return_value = MagicMock(resume_id="test-resume")
         mock_db_service.return_value = mock_service_instance
 
-        with patch.object(resume_service.md, "convert") as mock_convert:
+        with patch_markitdown_convert() as mock_convert:
             mock_convert.return_value = MagicMock(text_content="sample text")
 
-            # Track temp files
             with patch("tempfile.NamedTemporaryFile") as mock_temp_file:
-                mock_file = MagicMock()
-                mock_file.name = "/tmp/test_temp_file.pdf"
-                mock_temp_file.return_value.__enter__.return_value = mock_file
-
-                with patch("os.path.exists") as mock_exists:
-                    with patch("os.remove") as mock_remove:
-                        mock_exists.return_value = True
-
-                        await resume_service.convert_and_store_resume(
-                            file_bytes=mock_pdf_content,
-                            file_type="application/pdf",
-                            filename="test.pdf",
-                            content_type="md",
-                        )
-
-                        # Verify cleanup
-                        mock_remove.assert_called_once_with("/tmp/test_temp_file.pdf")
+                await resume_service.convert_and_store_resume(
+                    file_bytes=mock_pdf_content,
+                    file_type="application/pdf",
+                    filename="test.pdf",
+                    content_type="md",
+                )
+
+                mock_temp_file.assert_not_called()
+
+            stream = mock_convert.call_args.args[0]
+            stream_info = mock_convert.call_args.kwargs["stream_info"]
+            assert stream.getvalue() == mock_pdf_content
+            assert (stream_info.extension, stream_info.mimetype) == (".pdf", "application/pdf")
+
+
+@pytest.mark.asyncio
+async def test_convert_and_store_resume_unsupported_stream_uses_parsers(
+    resume_service, mock_pdf_content
+):
+    """Test that an unsupported stream falls back to the PDF parser, never to a temp file."""
+
+    with patch("app.services.resume_service.SupabaseDatabaseService") as mock_db_service:
+        mock_service_instance = AsyncMock()
+        mock_service_instance.create.return_value = MagicMock(resume_id="test-resume")
+        mock_db_service.return_value = mock_service_instance
+
+        with patch("app.services.text_extraction._markitdown") as mock_markitdown:
+            converter = mock_markitdown.return_value
+            converter.convert_stream.side_effect = UnsupportedFormatException("no converter")
+
+            with patch.object(
+                resume_service.text_extraction_service,
+                "extract_text",
+                AsyncMock(return_value="sample text"),
+            ) as mock_extract_text:
+                with patch("tempfile.NamedTemporaryFile") as mock_temp_file:
+                    await resume_service.convert_and_store_resume(
+                        file_bytes=mock_pdf_content,
+                        file_type="application/pdf",
+                        filename="test.pdf",
+                        content_type="md",
+                    )
+
+                    mock_temp_file.assert_not_called()
+
+                converter.convert_local.assert_not_called()
+                mock_extract_text.assert_awaited_once_with(mock_pdf_content, ".pdf")
+
+
+class InMemoryArtifactTable:
+    """Stand-in for the resume_artifacts table."""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def get(self, id):
+        return self.rows.get(id)
+
+    async def upsert_many(self, records):
+        self.rows.update((record["id"], record) for record in records)
+        return records
+
+
+class InMemoryResumesTable:
+    """
+    Stand-in for the resumes table, keyed like the real schema: ``id`` is a
+    BIGSERIAL and ``resume_id`` the UUID the rest of the app uses. Also serves
+    resume_structured_data.
+    """
+
+    def __init__(self, rows=(), structured_rows=()):
+        self.rows = [dict(row) for row in rows]
+        self.structured_rows = [dict(row) for row in structured_rows]
+        self.supabase = self
+
+    async def create(self, data):
+        row = {"id": len(self.rows) + 1, **data}
+        self.rows.append(row)
+        return row
+
+    async def get(self, id):
+        return next((row for row in self.rows if row["id"] == id), None)
+
+    def table(self, name):
+        assert name in ("resumes", "resume_structured_data")
+        return _ResumesQuery(self.rows if name == "resumes" else self.structured_rows)
+
+
+class _ResumesQuery:
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+        self.changes = None
+
+    def select(self, columns):
+        return self
+
+    def update(self, changes):
+        self.changes = changes
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def execute(self):
+        matched = [r for r in self.rows if all(r.get(c) == v for c, v in self.filters)]
+        for row in matched:
+            row.update(self.changes or {})
+        return MagicMock(data=[dict(row) for row in matched])
+
+
+@patch("app.services.resume_service.SupabaseDatabaseService")
+@pytest.mark.asyncio
+async def test_repeat_upload_reuses_cached_artifacts(
+    mock_db_service, resume_service, mock_pdf_content, sample_resume_text
+):
+    """A file the user uploaded before skips extraction, PII scan and LLM extraction."""
+    resumes = InMemoryResumesTable()
+    mock_service_instance = AsyncMock()
+    mock_service_instance.create = AsyncMock(side_effect=resumes.create)
+    mock_service_instance.supabase = resumes
+    mock_db_service.return_value = mock_service_instance
+    resume_service.artifact_store = ResumeArtifactStore(enabled=True)
+    resume_service.artifact_store.db = InMemoryArtifactTable()
+    resume_service.job_queue = MagicMock(enqueue=AsyncMock())
+    resume_service._extract_structured_json = AsyncMock(return_value={"skills": ["Python"]})
+
+    async def upload(user_id):
+        await resume_service.convert_and_store_resume(
+            file_bytes=mock_pdf_content,
+            file_type="application/pdf",
+            filename="cv.pdf",
+            user_id=user_id,
+            checksum="a" * 64,
+        )
+        # Run the queued structured extraction job
+        payload = resume_service.job_queue.enqueue.await_args.args[1]
+        await resume_service.run_structured_extraction_job(payload)
+
+    with patch_markitdown_convert() as mock_convert:
+        mock_convert.return_value = MagicMock(text_content=sample_resume_text)
+
+        await upload("user-1")
+        with patch.object(resume_service.pii_detector, "scan_text") as mock_scan:
+            await upload("user-1")
+            mock_scan.assert_not_called()
+
+        assert mock_convert.call_count == 1
+        resume_service._extract_structured_json.assert_awaited_once()
+
+        # Artifacts are per user: the same file from another user is processed again
+        await upload("user-2")
+        assert mock_convert.call_count == 2
+
+    # Every upload still gets its own resume and structured data rows
+    stored = [c.args[0] for c in mock_service_instance.create.await_args_list]
+    assert len(stored) == 3
+    assert len({row["content"] for row in stored}) == 1
+    assert all(row["source_checksum"] == "a" * 64 for row in stored)
+    structured = [c.args[0][0] for c in mock_service_instance.upsert_many.await_args_list]
+    assert [row["structured_data"] for row in structured] == [{"skills": ["Python"]}] * 3
+
+
+@patch("app.services.resume_service.SupabaseDatabaseService")
+@pytest.mark.asyncio
+async def test_upload_queues_structured_extraction_instead_of_waiting(
+    mock_db_service, resume_service, mock_pdf_content, sample_resume_text
+):
+    """Upload returns once the text is stored; the LLM extraction runs as a job."""
+    mock_service_instance = AsyncMock()
+    mock_service_instance.create.return_value = {"resume_id": "test-resume"}
+    mock_db_service.return_value = mock_service_instance
+    resume_service.job_queue = MagicMock(enqueue=AsyncMock())
+    resume_service._extract_structured_json = AsyncMock()
+
+    with patch_markitdown_convert() as mock_convert:
+        mock_convert.return_value = MagicMock(text_content=sample_resume_text)
+        for _ in range(2):
+            resume_id = await resume_service.convert_and_store_resume(
+                file_bytes=mock_pdf_content,
+                file_type="application/pdf",
+                filename="cv.pdf",
+                user_id="user-1",
+            )
+
+    assert resume_id == "test-resume"
+    resume_service._extract_structured_json.assert_not_awaited()
+    assert mock_service_instance.create.await_args.args[0]["structured_status"] == "pending"
+
+    # Same resume, same prompt version: the same idempotency key
+    first, second = resume_service.job_queue.enqueue.await_args_list
+    assert first == second
+    assert first.args[1]["resume_id"] == "test-resume"
+    assert first.kwargs["idempotency_key"].startswith("resume_structured_extraction:test-resume:")
+
+
+@pytest.mark.asyncio
+async def test_structured_extraction_job_raises_for_retry(resume_service):
+    """A failed extraction raises so the queue retries the job."""
+    resumes = InMemoryResumesTable(
+        [{"id": 1, "resume_id": "test-resume", "content": "Python developer"}]
+    )
+    with patch("app.services.resume_service.SupabaseDatabaseService") as mock_db_service:
+        mock_service_instance = AsyncMock()
+        mock_service_instance.supabase = resumes
+        mock_db_service.return_value = mock_service_instance
+        resume_service._extract_structured_json = AsyncMock(return_value=None)
+
+        with pytest.raises(ValueError, match="no data"):
+            await resume_service.run_structured_extraction_job({"resume_id": "test-resume"})
+
+        mock_service_instance.upsert_many.assert_not_awaited()
+        assert resumes.rows[0]["structured_status"] == "processing"
+
+
+@patch("app.services.resume_service.SupabaseDatabaseService")
+@pytest.mark.asyncio
+async def test_structured_extraction_job_finds_resume_by_resume_id(
+    mock_db_service, resume_service, mock_pdf_content, sample_resume_text
+):
+    """The queued payload is resolved through resumes.resume_id, not the serial id."""
+    resumes = InMemoryResumesTable(
+        [{"id": 1, "resume_id": str(uuid.uuid4()), "content": "Other resume"}]
+    )
+    mock_service_instance = AsyncMock()
+    mock_service_instance.create = AsyncMock(side_effect=resumes.create)
+    mock_service_instance.supabase = resumes
+    mock_db_service.return_value = mock_service_instance
+    resume_service.job_queue = MagicMock(enqueue=AsyncMock())
+    resume_service._extract_structured_json = AsyncMock(return_value={"skills": ["Python"]})
+
+    with patch_markitdown_convert() as mock_convert:
+        mock_convert.return_value = MagicMock(text_content=sample_resume_text)
+        resume_id = await resume_service.convert_and_store_resume(
+            file_bytes=mock_pdf_content,
+            file_type="application/pdf",
+            filename="cv.pdf",
+            user_id="user-1",
+        )
+
+    kind, payload = resume_service.job_queue.enqueue.await_args.args
+    assert kind == "resume_structured_extraction" and payload["resume_id"] == resume_id
+    await resume_service.run_structured_extraction_job(payload)
+
+    other, uploaded = resumes.rows
+    assert uploaded["id"] == 2 and uploaded["structured_status"] == "ready"
+    assert "structured_status" not in other
+    resume_service._extract_structured_json.assert_awaited_once()
+    assert resume_service._extract_structured_json.await_args.args[0] == uploaded["content"]
+    [structured] = mock_service_instance.upsert_many.await_args.args[0]
+    assert structured["id"] == resume_id
+
+
+@pytest.mark.asyncio
+async def test_structured_endpoint_polls_by_resume_id():
+    """Polling with the UUID the upload returned finds the resume and, once ready, its data."""
+    resume_id = str(uuid.uuid4())
+    resumes = InMemoryResumesTable(
+        [
+            {"id": 1, "resume_id": str(uuid.uuid4()), "user_id": "user-1"},
+            {"id": 2, "resume_id": resume_id, "user_id": "user-1", "structured_status": "pending"},
+        ],
+        structured_rows=[
+            {"id": resume_id, "resume_id": resume_id, "structured_data": {"skills": ["Python"]}}
+        ],
+    )
+    user = {"id": "user-1"}
+
+    with patch("app.services.resume_service.SupabaseDatabaseService") as mock_db_service:
+        mock_db_service.return_value.supabase = resumes
+
+        response = Response()
+        pending = await get_structured_resume(resume_id, response, user)
+        assert (pending.status, pending.structured_data) == ("pending", None)
+        assert response.headers["Retry-After"] == "2"
+
+        resumes.rows[1]["structured_status"] = "ready"
+        ready = await get_structured_resume(resume_id, Response(), user)
+        assert ready.resume_id == resume_id
+        assert ready.structured_data == {"skills": ["Python"]}
+
+        with pytest.raises(HTTPException) as denied:
+            await get_structured_resume(resume_id, Response(), {"id": "user-2"})
+        assert denied.value.status_code == 403
+
+        with pytest.raises(HTTPException) as missing:
+            await get_structured_resume("2", Response(), user)
+        assert missing.value.status_code == 404
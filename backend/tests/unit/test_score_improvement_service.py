@@ -3,6 +3,7 @@ Unit tests for ScoreImprovementService.
 Tests resume-job matching, scoring, and improvement suggestions.
 """
 
+import asyncio
 import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -258,8 +259,8 @@ async def test_calculate_match_score_success(
     score_service.agent_manager.generate = AsyncMock(return_value=json.dumps(mock_score_response))
 
     # Mock embedding response
-    score_service.embedding_manager.embed = AsyncMock(
-        side_effect=[np.array([1, 2, 3]), np.array([4, 5, 6])]
+    score_service.embedding_manager.embed_many = AsyncMock(
+        return_value=[np.array([1, 2, 3]), np.array([4, 5, 6])]
     )
 
     result = await score_service.calculate_match_score(sample_resume_text, sample_job_description)
@@ -271,7 +272,8 @@ async def test_calculate_match_score_success(
     assert isinstance(result["embedding_similarity"], float)
 
     score_service.agent_manager.generate.assert_called_once()
-    assert score_service.embedding_manager.embed.call_count == 2
+    # Resume and job are embedded in a single batched call
+    score_service.embedding_manager.embed_many.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -283,7 +285,9 @@ async def test_calculate_match_score_embedding_error(
     score_service.agent_manager.generate = AsyncMock(return_value=json.dumps(mock_score_response))
 
     # Mock embedding error
-    score_service.embedding_manager.embed = AsyncMock(side_effect=Exception("Embedding failed"))
+    score_service.embedding_manager.embed_many = AsyncMock(
+        side_effect=Exception("Embedding failed")
+    )
 
     result = await score_service.calculate_match_score(sample_resume_text, sample_job_description)
 
@@ -291,6 +295,35 @@ async def test_calculate_match_score_embedding_error(
     assert result["embedding_similarity"] == 0.0
 
 
+@pytest.mark.asyncio
+async def test_calculate_match_score_runs_llm_and_embeddings_concurrently(
+    score_service, sample_resume_text, sample_job_description, mock_score_response
+):
+    """The LLM call and the embeddings overlap, and stage timings are reported."""
+    llm_started = asyncio.Event()
+    embeddings_started = asyncio.Event()
+
+    async def generate(*args, **kwargs):
+        llm_started.set()
+        # Would time out if embeddings only started after the LLM finished
+        await asyncio.wait_for(embeddings_started.wait(), timeout=1)
+        return json.dumps(mock_score_response)
+
+    async def embed_many(texts):
+        embeddings_started.set()
+        await asyncio.wait_for(llm_started.wait(), timeout=1)
+        return [np.array([1, 0]), np.array([1, 0])]
+
+    score_service.agent_manager.generate = generate
+    score_service.embedding_manager.embed_many = embed_many
+
+    result = await score_service.calculate_match_score(sample_resume_text, sample_job_description)
+
+    assert result["embedding_similarity"] == pytest.approx(1.0)
+    timings = result["processing_metadata"]["stage_timings_ms"]
+    assert set(timings) == {"resume_bias", "job_bias", "llm_score", "embeddings", "total"}
+
+
 @pytest.mark.asyncio
 async def test_calculate_match_score_llm_error(
     score_service, sample_resume_text, sample_job_description
@@ -316,8 +349,8 @@ async def test_improve_resume_success(
     )
 
     # Mock embedding response
-    score_service.embedding_manager.embed = AsyncMock(
-        side_effect=[np.array([1, 2, 3]), np.array([4, 5, 6])]
+    score_service.embedding_manager.embed_many = AsyncMock(
+        return_value=[np.array([1, 2, 3]), np.array([4, 5, 6])]
     )
 
     result = await score_service.improve_resume(
@@ -345,6 +378,36 @@ async def test_improve_resume_llm_error(score_service, sample_resume_text, sampl
         )
 
 
+@pytest.mark.asyncio
+async def test_improve_resume_stream_yields_tokens_then_result(
+    score_service, sample_resume_text, sample_job_description, mock_improvement_response
+):
+    """Streamed improvement yields raw deltas, then the same parsed result."""
+    payload = json.dumps(mock_improvement_response)
+
+    async def fake_stream(prompt, **kwargs):
+        for i in range(0, len(payload), 50):
+            yield payload[i : i + 50]
+
+    score_service.agent_manager.stream = fake_stream
+    score_service.embedding_manager.embed_many = AsyncMock(
+        return_value=[np.array([1, 2, 3]), np.array([4, 5, 6])]
+    )
+
+    events = [
+        event
+        async for event in score_service.improve_resume_stream(
+            sample_resume_text, sample_job_description, 75, ["Adicionar métricas"]
+        )
+    ]
+
+    tokens = [data for event, data in events if event == "token"]
+    assert "".join(tokens) == payload
+    assert events[-1][0] == "result"
+    assert "new_embedding_similarity" in events[-1][1]
+    assert "processing_metadata" in events[-1][1]
+
+
 @pytest.mark.asyncio
 async def test_analyze_and_improve_high_score(
     score_service, sample_resume_text, sample_job_description, mock_score_response
@@ -355,8 +418,8 @@ async def test_analyze_and_improve_high_score(
     high_score_response["score"] = 90
 
     score_service.agent_manager.generate = AsyncMock(return_value=json.dumps(high_score_response))
-    score_service.embedding_manager.embed = AsyncMock(
-        side_effect=[np.array([1, 2, 3]), np.array([4, 5, 6])]
+    score_service.embedding_manager.embed_many = AsyncMock(
+        return_value=[np.array([1, 2, 3]), np.array([4, 5, 6])]
     )
 
     result = await score_service.analyze_and_improve(sample_resume_text, sample_job_description)
@@ -384,12 +447,10 @@ async def test_analyze_and_improve_low_score(
     score_service.agent_manager.generate = AsyncMock(
         side_effect=[json.dumps(low_score_response), json.dumps(mock_improvement_response)]
     )
-    score_service.embedding_manager.embed = AsyncMock(
+    score_service.embedding_manager.embed_many = AsyncMock(
         side_effect=[
-            np.array([1, 2, 3]),
-            np.array([4, 5, 6]),
-            np.array([7, 8, 9]),
-            np.array([10, 11, 12]),
+            [np.array([1, 2, 3]), np.array([4, 5, 6])],
+            [np.array([7, 8, 9]), np.array([10, 11, 12])],
         ]
     )
 
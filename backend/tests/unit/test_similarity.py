@@ -0,0 +1,93 @@
+"""
+Unit tests for vectorized similarity scoring.
+Tests chunked top-k against brute force, reduced-precision storage and
+ScoreImprovementService.score_many.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.agent.similarity import SimilarityMatrix, normalize_rows
+from app.core.exceptions import ProviderError
+from app.services.score_improvement_service import ScoreImprovementService
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_chunked_top_k_matches_brute_force(dtype):
+    """Top-k across many small blocks equals a full sort of all scores."""
+    rng = np.random.default_rng(0)
+    pool = rng.normal(size=(257, 32))
+    queries = rng.normal(size=(3, 32))
+    matrix = SimilarityMatrix([f"job-{i}" for i in range(257)], pool, dtype=dtype)
+
+    results = matrix.top_k(queries, k=5, chunk_rows=16)
+
+    expected = normalize_rows(queries) @ normalize_rows(pool).T
+    assert matrix.vectors.dtype == np.dtype(dtype)
+    assert matrix.vectors.flags["C_CONTIGUOUS"]
+    for row, expected_row in zip(results, expected, strict=True):
+        best = np.argsort(-expected_row)[:5]
+        assert [job_id for job_id, _ in row] == [f"job-{i}" for i in best]
+        assert [score for _, score in row] == pytest.approx(expected_row[best], abs=1e-2)
+
+
+def test_zero_vectors_and_small_pools():
+    """Zero vectors score 0.0 and k is capped at the pool size."""
+    matrix = SimilarityMatrix(["a", "b"], [[0.0, 0.0], [3.0, 4.0]])
+
+    assert matrix.top_k([0.6, 0.8], k=10) == [[("b", pytest.approx(1.0)), ("a", 0.0)]]
+    assert SimilarityMatrix([], []).top_k([1.0, 0.0], k=3) == [[]]
+
+
+@pytest.mark.asyncio
+async def test_score_many_embeds_once_and_ranks_candidates():
+    """One batched embedding call; candidates ranked per query by index."""
+    with (
+        patch("app.services.score_improvement_service.AgentManager"),
+        patch("app.services.score_improvement_service.EmbeddingManager"),
+    ):
+        service = ScoreImprovementService()
+    service.embedding_manager = MagicMock()
+    service.embedding_manager.embed_many = AsyncMock(
+        return_value=[[1.0, 0.0], [0.0, 1.0], [1.0, 0.1], [1.0, 1.0]]
+    )
+
+    matches = await service.score_many(
+        ["resume"], ["vaga design", "vaga dados", "vaga python"], top_k=2
+    )
+
+    service.embedding_manager.embed_many.assert_awaited_once()
+    assert [m["index"] for m in matches[0]] == [1, 2]
+    assert matches[0][0]["score"] == pytest.approx(0.995, abs=1e-3)
+
+
+@pytest.mark.asyncio
+async def test_score_many_leaves_out_blocked_texts():
+    """A text blocked by bias analysis is skipped instead of failing the batch."""
+    with (
+        patch("app.services.score_improvement_service.AgentManager"),
+        patch("app.services.score_improvement_service.EmbeddingManager"),
+    ):
+        service = ScoreImprovementService()
+
+    def preprocess(text):
+        if "bloqueado" in text:
+            raise ProviderError("Text processing blocked")
+        return text, MagicMock()
+
+    service._preprocess_text_bias_analysis = preprocess
+    service.embedding_manager = MagicMock()
+    service.embedding_manager.embed_many = AsyncMock(
+        return_value=[[1.0, 0.0], [0.0, 1.0], [1.0, 0.1]]
+    )
+
+    matches = await service.score_many(
+        ["resume", "resume bloqueado"], ["vaga design", "vaga bloqueado", "vaga python"]
+    )
+
+    embedded = service.embedding_manager.embed_many.await_args.args[0]
+    assert embedded == ["resume", "vaga design", "vaga python"]
+    assert [m["index"] for m in matches[0]] == [2, 0]
+    assert matches[1] == []
@@ -0,0 +1,128 @@
+"""
+Unit tests for singleflight coalescing of concurrent identical calls.
+"""
+
+import asyncio
+
+import pytest
+
+from app.agent.singleflight import SingleFlight
+
+
+@pytest.fixture
+def flight():
+    return SingleFlight("test")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_execution(flight):
+    """Callers with the same key get the same result from one upstream call."""
+    calls = 0
+    release = asyncio.Event()
+
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return [0.1, 0.2, 0.3]
+
+    tasks = [asyncio.create_task(flight.do("job-1", upstream)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert calls == 1
+    assert all(result == [0.1, 0.2, 0.3] for result in results)
+    stats = flight.get_stats()
+    assert stats["executions"] == 1
+    assert stats["collapsed"] == 4
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_different_keys_are_not_collapsed(flight):
+    """Distinct keys run independently."""
+
+    async def upstream(value):
+        await asyncio.sleep(0)
+        return value
+
+    results = await asyncio.gather(
+        flight.do("a", lambda: upstream("a")), flight.do("b", lambda: upstream("b"))
+    )
+
+    assert results == ["a", "b"]
+    assert flight.stats.executions == 2
+    assert flight.stats.collapsed == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_every_waiter(flight):
+    """A failing upstream call fails all collapsed callers and is not cached."""
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise RuntimeError("upstream down")
+
+    tasks = [asyncio.create_task(flight.do("k", failing)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.in_flight() == 0
+
+    async def succeeding():
+        return "ok"
+
+    assert await flight.do("k", succeeding) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_waiter_does_not_cancel_shared_call(flight):
+    """The leader being cancelled must not break the other waiters."""
+    release = asyncio.Event()
+
+    async def upstream():
+        await release.wait()
+        return "shared"
+
+    leader = asyncio.create_task(flight.do("k", upstream))
+    follower = asyncio.create_task(flight.do("k", upstream))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == "shared"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert flight.stats.cancelled == 0
+
+
+@pytest.mark.asyncio
+async def test_upstream_cancelled_when_all_waiters_leave(flight):
+    """Once nobody is waiting, the orphaned upstream call is cancelled."""
+    started = asyncio.Event()
+    upstream_cancelled = asyncio.Event()
+
+    async def upstream():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            upstream_cancelled.set()
+            raise
+
+    waiter = asyncio.create_task(flight.do("k", upstream))
+    await started.wait()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    await asyncio.wait_for(upstream_cancelled.wait(), timeout=1)
+    await asyncio.sleep(0)  # let the done-callback run
+
+    assert flight.stats.cancelled == 1
+    assert flight.in_flight() == 0
@@ -0,0 +1,128 @@
+"""
+Unit tests for the incremental JSON parser and the streaming JSONWrapper.
+Tests chunk-boundary handling, early field emission, schema checks and early abort.
+"""
+
+import json
+
+import pytest
+
+from app.agent.cache import CachingProvider, LLMResponseCache
+from app.agent.exceptions import StrategyError
+from app.agent.providers.base import Provider
+from app.agent.strategies.streaming_json import IncrementalJSONParser, JSONSchema
+from app.agent.strategies.wrapper import JSONWrapper
+
+PAYLOAD = {
+    "score_compatibilidade": 82,
+    "pontos_fortes": ["Python", "FastAPI"],
+    "criterios_avaliacao": 'Texto com "aspas", {chaves} e \\ barra',
+    "detalhes": {"nivel": [1, 2, {"x": "}"}]},
+    "alerta_viés": False,
+}
+
+
+class ChunkedProvider(Provider):
+    """Streams a fixed response in fixed-size chunks and records how far it got."""
+
+    def __init__(self, response: str, size: int = 7):
+        self.response = response
+        self.size = size
+        self.delivered = 0
+        self.calls = 0
+
+    async def __call__(self, prompt, **generation_args):
+        return self.response
+
+    async def stream(self, prompt, **generation_args):
+        self.calls += 1
+        for i in range(0, len(self.response), self.size):
+            chunk = self.response[i : i + self.size]
+            self.delivered += len(chunk)
+            yield chunk
+
+
+@pytest.mark.parametrize("size", [1, 3, 16, 10_000])
+def test_parser_handles_any_chunk_boundary(size):
+    """Escapes, nested braces in strings and unicode keys survive arbitrary splits."""
+    text = "Claro! Aqui está:\n```json\n" + json.dumps(PAYLOAD, ensure_ascii=False) + "\n```"
+    parser = IncrementalJSONParser()
+    fields = []
+    for i in range(0, len(text), size):
+        fields.extend(parser.feed(text[i : i + size]))
+
+    assert parser.done and not parser.failed
+    assert parser.result() == PAYLOAD
+    assert [name for name, _ in fields] == list(PAYLOAD)
+
+
+def test_parser_emits_fields_before_object_closes():
+    """A field is reported as soon as its value is terminated."""
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"score_compatibilidade": 7') == []
+    assert parser.feed("5, ") == [("score_compatibilidade", 75)]
+    assert not parser.done
+
+
+def test_schema_violations_raise_early():
+    """Type mismatches abort on the field; missing required fields abort on close."""
+    schema = JSONSchema(fields={"score_compatibilidade": (int, float)}, required=("score",))
+    parser = IncrementalJSONParser(schema)
+    with pytest.raises(StrategyError):
+        parser.feed('{"score_compatibilidade": "alto",')
+
+    parser = IncrementalJSONParser(schema)
+    with pytest.raises(StrategyError):
+        parser.feed('{"score_compatibilidade": true}')
+
+    parser = IncrementalJSONParser(schema)
+    with pytest.raises(StrategyError):
+        parser.feed('{"score_compatibilidade": 10}')
+
+
+def test_malformed_object_marks_parser_failed():
+    """Non-JSON braces leave the parser failed instead of raising."""
+    parser = IncrementalJSONParser()
+    parser.feed("Resultado: {score: 10}")
+    assert parser.failed and not parser.done
+
+
+@pytest.mark.asyncio
+async def test_json_wrapper_stops_generation_when_object_closes():
+    """Trailing prose after the object is never pulled from the provider."""
+    response = json.dumps(PAYLOAD) + "\n\nEspero ter ajudado! " + "x" * 500
+    provider = ChunkedProvider(response)
+    seen = []
+
+    result = await JSONWrapper()("prompt", provider, on_field=lambda name, value: seen.append(name))
+
+    assert result == PAYLOAD
+    assert seen == list(PAYLOAD)
+    assert provider.delivered < len(response)
+
+
+@pytest.mark.asyncio
+async def test_json_wrapper_falls_back_to_full_parse():
+    """Responses the incremental parser rejects still go through the old heuristics."""
+    provider = ChunkedProvider('Nota {importante}\n```json\n{"a": 1}\n```')
+    assert await JSONWrapper()("prompt", provider) == {"a": 1}
+
+
+@pytest.mark.asyncio
+async def test_json_wrapper_reads_top_level_arrays_in_full():
+    """An array is not cut down to its first object."""
+    provider = ChunkedProvider('[{"a": 1}, {"a": 2}]', size=10)
+    assert await JSONWrapper()("prompt", provider) == [{"a": 1}, {"a": 2}]
+    assert provider.delivered == len(provider.response)
+
+
+@pytest.mark.asyncio
+async def test_early_abort_still_populates_response_cache():
+    """Stopping at the closing brace counts as a complete response for the cache."""
+    cache = LLMResponseCache(max_entries=10, max_bytes=1 << 20, ttl_seconds=60, db_path="")
+    inner = ChunkedProvider(json.dumps({"a": 1}) + " trailing text that is never needed")
+    provider = CachingProvider(inner, provider_name="openrouter", model="m", cache=cache)
+
+    assert await JSONWrapper()("prompt", provider, temperature=0) == {"a": 1}
+    assert await JSONWrapper()("prompt", provider, temperature=0) == {"a": 1}
+    assert inner.calls == 1
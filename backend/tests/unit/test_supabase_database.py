@@ -0,0 +1,43 @@
+"""
+Unit tests for the generic Supabase database service.
+Imports the real module (not a mock) and checks the batched reads and writes
+against a stubbed Supabase client.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.supabase.database import SupabaseDatabaseService
+
+
+@pytest.fixture
+def client():
+    client = MagicMock()
+    with patch("app.services.supabase.database.create_client", return_value=client):
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_get_many_fetches_all_ids_in_one_query(client):
+    query = client.table.return_value.select.return_value.in_.return_value
+    query.execute.return_value.data = [{"id": "a"}, {"id": "b"}]
+    service = SupabaseDatabaseService("jobs", dict)
+
+    assert await service.get_many(["a", "b"]) == [{"id": "a"}, {"id": "b"}]
+    client.table.return_value.select.return_value.in_.assert_called_once_with("id", ["a", "b"])
+
+    client.table.reset_mock()
+    assert await service.get_many([]) == []
+    client.table.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_sends_a_single_request(client):
+    upsert = client.table.return_value.upsert
+    upsert.return_value.execute.return_value.data = [{"id": "a", "score": 1}]
+    service = SupabaseDatabaseService("jobs", dict)
+
+    assert await service.upsert_many([{"id": "a", "score": 1}]) == [{"id": "a", "score": 1}]
+    upsert.assert_called_once_with([{"id": "a", "score": 1}])
+    assert await service.upsert_many([]) == []
@@ -0,0 +1,95 @@
+"""
+Unit tests for section-level embeddings.
+Tests heading-based splitting, long-section packing, max-sim aggregation and
+per-section embedding reuse.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.agent.embedding_cache import EmbeddingCache
+from app.agent.manager import EmbeddingManager
+from app.agent.providers.base import EmbeddingProvider
+from app.agent.similarity import max_sim
+from app.services.score_improvement_service import ScoreImprovementService
+from app.utils.text_sections import split_sections
+
+RESUME_MD = """# João Silva
+Desenvolvedor Python
+
+## Experiência
+TechCorp (2020-2024): APIs com FastAPI
+
+**Habilidades**
+Python, Docker, AWS
+
+## Educação
+Ciência da Computação - USP
+"""
+
+
+def test_split_on_markdown_headings_keeps_heading_text():
+    sections = split_sections(RESUME_MD)
+
+    assert [s.splitlines()[0] for s in sections] == [
+        "# João Silva",
+        "## Experiência",
+        "**Habilidades**",
+        "## Educação",
+    ]
+    assert "Python, Docker, AWS" in sections[2]
+
+
+def test_long_sections_split_on_paragraphs_and_count_is_capped():
+    """Plain text without headings is still chunked; the tail merges into the last section."""
+    text = "\n\n".join(f"Parágrafo {i} " + "x" * 50 for i in range(10))
+
+    assert all(len(s) <= 130 for s in split_sections(text, max_chars=130))
+    capped = split_sections(text, max_chars=130, max_sections=3)
+    assert len(capped) == 3
+    assert capped[-1].endswith("Parágrafo 9 " + "x" * 50)
+
+
+def test_max_sim_matches_each_query_section_to_its_best_section():
+    job = [[1.0, 0.0], [0.0, 1.0]]
+    resume = [[1.0, 0.0], [0.0, 0.0], [1.0, 1.0]]
+
+    assert max_sim(job, resume) == pytest.approx((1.0 + 0.7071) / 2, abs=1e-3)
+    assert max_sim(job, []) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_editing_one_section_only_reembeds_that_section(monkeypatch):
+    embedded: list[str] = []
+
+    class FakeProvider(EmbeddingProvider):
+        async def embed(self, text: str) -> list[float]:
+            raise AssertionError("embed_many should be used")
+
+        async def embed_many(self, texts: list[str]) -> list[list[float]]:
+            embedded.extend(texts)
+            return [[float(len(text)), 1.0] for text in texts]
+
+    async def get_provider(**kwargs):
+        return FakeProvider()
+
+    with (
+        patch("app.services.score_improvement_service.AgentManager"),
+        patch("app.services.score_improvement_service.EmbeddingManager"),
+    ):
+        service = ScoreImprovementService()
+    service.embedding_manager = EmbeddingManager(
+        model="m", model_provider="fake", cache=EmbeddingCache()
+    )
+    monkeypatch.setattr(service.embedding_manager, "_get_embedding_provider", get_provider)
+
+    job = "## Requisitos\nPython\n\n## Diferenciais\nAWS"
+    await service._section_similarity(RESUME_MD, job)
+    embedded.clear()
+
+    edited = RESUME_MD.replace("Python, Docker, AWS", "Python, Docker, AWS, Kubernetes")
+    score = await service._section_similarity(edited, job)
+
+    assert embedded == ["**Habilidades**\nPython, Docker, AWS, Kubernetes"]
+    assert 0.0 < score <= 1.0
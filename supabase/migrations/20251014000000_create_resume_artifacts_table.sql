@@ -0,0 +1,88 @@
+-- =====================================================
+-- CREATE RESUME ARTIFACTS TABLE
+-- =====================================================
+-- Content-addressed cache of resume processing results. A repeat upload of
+-- the same file (same SHA-256) reuses the masked text, PII findings summary
+-- and structured JSON instead of re-extracting, re-scanning and re-running
+-- the LLM extraction.
+--
+-- Created: 2025-10-14
+-- Purpose: Skip reprocessing of repeat resume uploads
+-- =====================================================
+
+-- =====================================================
+-- CREATE RESUME_ARTIFACTS TABLE
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS public.resume_artifacts (
+    -- sha256(user_id, checksum, kind, version), computed by the backend
+    id TEXT PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    checksum TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    version TEXT NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+
+    -- Constraints
+    CONSTRAINT resume_artifacts_checksum_sha256 CHECK (checksum ~ '^[0-9a-f]{64}$'),
+    CONSTRAINT resume_artifacts_valid_kind CHECK (kind IN ('text', 'structured')),
+    CONSTRAINT resume_artifacts_unique_key UNIQUE (user_id, checksum, kind, version)
+);
+
+-- Link resumes to the file they were processed from
+ALTER TABLE public.resumes
+ADD COLUMN IF NOT EXISTS source_checksum TEXT;
+
+-- =====================================================
+-- ENABLE ROW LEVEL SECURITY
+-- =====================================================
+
+ALTER TABLE public.resume_artifacts ENABLE ROW LEVEL SECURITY;
+
+-- Artifacts are only read and written by the backend
+CREATE POLICY "Service role full access to resume artifacts"
+    ON public.resume_artifacts
+    FOR ALL
+    USING (current_setting('app.current_user_id', true) IS NULL);
+
+-- =====================================================
+-- INDEXES FOR RESUME_ARTIFACTS
+-- =====================================================
+
+-- LGPD deletion of one file's or one user's artifacts
+CREATE INDEX IF NOT EXISTS idx_resume_artifacts_user_checksum ON public.resume_artifacts(user_id, checksum);
+
+-- Retention cleanup
+CREATE INDEX IF NOT EXISTS idx_resume_artifacts_created_at ON public.resume_artifacts(created_at);
+
+-- =====================================================
+-- COMMENTS
+-- =====================================================
+
+COMMENT ON TABLE public.resume_artifacts IS 'Per-user cache of resume processing artifacts keyed by file SHA-256';
+COMMENT ON COLUMN public.resume_artifacts.kind IS 'text: masked text and PII findings summary; structured: structured resume JSON';
+COMMENT ON COLUMN public.resume_artifacts.version IS 'Extractor or prompt version the artifact was produced with';
+COMMENT ON COLUMN public.resume_artifacts.payload IS 'Artifact content; never contains unmasked PII';
+COMMENT ON COLUMN public.resumes.source_checksum IS 'SHA-256 of the uploaded file, links the resume to its artifacts';
+
+-- =====================================================
+-- GRANTS AND PERMISSIONS
+-- =====================================================
+
+GRANT ALL ON public.resume_artifacts TO service_role;
+
+-- =====================================================
+-- MIGRATION COMPLETE
+-- =====================================================
+
+DO $$
+BEGIN
+    RAISE NOTICE '=================================================';
+    RAISE NOTICE 'Resume Artifacts Table Migration Complete';
+    RAISE NOTICE '=================================================';
+    RAISE NOTICE 'Created resume_artifacts table (checksum-keyed cache)';
+    RAISE NOTICE 'Added resumes.source_checksum';
+    RAISE NOTICE 'Artifacts cascade on user deletion (LGPD)';
+    RAISE NOTICE '=================================================';
+END $$;
@@ -0,0 +1,168 @@
+-- =====================================================
+-- CREATE BACKGROUND JOBS TABLE
+-- =====================================================
+-- Durable queue for work that runs after the request returns (structured
+-- resume extraction after an upload). Jobs are enqueued idempotently, leased
+-- to a worker for a visibility timeout and retried with backoff.
+--
+-- Created: 2025-10-15
+-- Purpose: Run post-upload structured extraction in the background
+-- =====================================================
+
+-- =====================================================
+-- CREATE BACKGROUND_JOBS TABLE
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS public.background_jobs (
+    -- uuid5(idempotency_key), computed by the backend
+    id UUID PRIMARY KEY,
+    kind TEXT NOT NULL,
+    idempotency_key TEXT NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_after TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+
+    -- Lease held by the worker running the job
+    lease_id UUID,
+    locked_by TEXT,
+    locked_until TIMESTAMPTZ,
+
+    last_error TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+    finished_at TIMESTAMPTZ,
+
+    -- Constraints
+    CONSTRAINT background_jobs_valid_status CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+    CONSTRAINT background_jobs_attempts_non_negative CHECK (attempts >= 0),
+    CONSTRAINT background_jobs_unique_idempotency_key UNIQUE (idempotency_key)
+);
+
+-- =====================================================
+-- ENABLE ROW LEVEL SECURITY
+-- =====================================================
+
+ALTER TABLE public.background_jobs ENABLE ROW LEVEL SECURITY;
+
+-- Jobs are only read and written by the backend
+DROP POLICY IF EXISTS "Service role full access to background jobs" ON public.background_jobs;
+CREATE POLICY "Service role full access to background jobs"
+    ON public.background_jobs
+    FOR ALL
+    USING (current_setting('app.current_user_id', true) IS NULL);
+
+-- =====================================================
+-- INDEXES FOR BACKGROUND_JOBS
+-- =====================================================
+
+-- Claiming: due queued jobs and running jobs whose lease expired
+CREATE INDEX IF NOT EXISTS idx_background_jobs_due ON public.background_jobs(kind, run_after) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_background_jobs_leased ON public.background_jobs(kind, locked_until) WHERE status = 'running';
+
+-- =====================================================
+-- CLAIM FUNCTION
+-- =====================================================
+
+-- Lease up to p_limit due jobs to a worker. SKIP LOCKED lets concurrent
+-- workers claim different jobs without waiting on each other.
+CREATE OR REPLACE FUNCTION public.claim_background_jobs(
+    p_kinds TEXT[],
+    p_worker TEXT,
+    p_limit INTEGER,
+    p_lease_seconds DOUBLE PRECISION
+)
+RETURNS SETOF public.background_jobs
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE public.background_jobs AS jobs
+    SET status = 'running',
+        attempts = jobs.attempts + 1,
+        lease_id = gen_random_uuid(),
+        locked_by = p_worker,
+        locked_until = NOW() + make_interval(secs => p_lease_seconds),
+        updated_at = NOW()
+    WHERE jobs.id IN (
+        SELECT due.id
+        FROM public.background_jobs AS due
+        WHERE due.kind = ANY(p_kinds)
+          AND (
+              (due.status = 'queued' AND due.run_after <= NOW())
+              OR (due.status = 'running' AND due.locked_until < NOW())
+          )
+        ORDER BY due.run_after
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING jobs.*;
+END;
+$$;
+
+-- =====================================================
+-- RESUME STRUCTURED EXTRACTION STATUS
+-- =====================================================
+
+-- pending -> processing -> ready | failed; NULL for resumes uploaded before
+-- extraction moved to the background queue
+ALTER TABLE public.resumes
+ADD COLUMN IF NOT EXISTS structured_status TEXT;
+
+ALTER TABLE public.resumes
+DROP CONSTRAINT IF EXISTS resumes_valid_structured_status;
+ALTER TABLE public.resumes
+ADD CONSTRAINT resumes_valid_structured_status
+    CHECK (structured_status IS NULL OR structured_status IN ('pending', 'processing', 'ready', 'failed'));
+
+-- Clients can subscribe to their resume rows instead of polling
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_publication WHERE pubname = 'supabase_realtime')
+       AND NOT EXISTS (
+           SELECT 1 FROM pg_publication_tables
+           WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = 'resumes'
+       ) THEN
+        ALTER PUBLICATION supabase_realtime ADD TABLE public.resumes;
+    END IF;
+END $$;
+
+-- =====================================================
+-- COMMENTS
+-- =====================================================
+
+COMMENT ON TABLE public.background_jobs IS 'Durable background job queue with leases and retries';
+COMMENT ON COLUMN public.background_jobs.run_after IS 'Earliest time the job may run (retry backoff)';
+COMMENT ON COLUMN public.background_jobs.lease_id IS 'Changes on every claim; only the current lease holder can settle the job';
+COMMENT ON COLUMN public.background_jobs.locked_until IS 'Visibility timeout: the job is claimable again after this time';
+COMMENT ON COLUMN public.resumes.structured_status IS 'Structured extraction status: pending, processing, ready or failed';
+COMMENT ON FUNCTION public.claim_background_jobs IS 'Lease due background jobs to a worker (FOR UPDATE SKIP LOCKED)';
+
+-- =====================================================
+-- GRANTS AND PERMISSIONS
+-- =====================================================
+
+GRANT ALL ON public.background_jobs TO service_role;
+
+-- SECURITY DEFINER functions are executable by PUBLIC by default and exposed at
+-- /rpc; only the backend may lease jobs or read their payloads
+REVOKE EXECUTE ON FUNCTION public.claim_background_jobs FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.claim_background_jobs TO service_role;
+
+-- =====================================================
+-- MIGRATION COMPLETE
+-- =====================================================
+
+DO $$
+BEGIN
+    RAISE NOTICE '=================================================';
+    RAISE NOTICE 'Background Jobs Migration Complete';
+    RAISE NOTICE '=================================================';
+    RAISE NOTICE 'Created background_jobs table and claim_background_jobs()';
+    RAISE NOTICE 'Added resumes.structured_status';
+    RAISE NOTICE 'Added resumes to the supabase_realtime publication';
+    RAISE NOTICE '=================================================';
+END $$;